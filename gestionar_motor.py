@@ -182,10 +182,49 @@ def test_motor():
     except Exception as e:
         print(f"❌ Error en test: {e}")
 
+def reconstruir_resumen():
+    """Recalcula el resumen diario de ejecuciones a partir del historial guardado"""
+    print("📊 Reconstruyendo resumen diario de ejecuciones...")
+    
+    try:
+        sys.path.append(str(Path(__file__).parent))
+        from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
+        
+        repo = SQLiteResultadoEjecucionRepository("sistema_controles.db")
+        dias = repo.reconstruir_resumen_diario()
+        
+        print(f"✅ Resumen reconstruido: {dias} días por control")
+        
+    except Exception as e:
+        print(f"❌ Error reconstruyendo resumen: {e}")
+
+def depurar_historial():
+    """Aplica la política de retención al historial y recupera espacio"""
+    print("🧹 Depurando historial de ejecuciones...")
+    
+    try:
+        sys.path.append(str(Path(__file__).parent))
+        from src.domain.entities.politica_retencion import PoliticaRetencion
+        from src.infrastructure.services.retencion_historial_service import RetencionHistorialService
+        
+        politica = PoliticaRetencion()
+        config = Path("config_retencion_historial.json")
+        if config.exists():
+            with open(config, 'r', encoding='utf-8') as f:
+                politica = PoliticaRetencion.desde_dict(json.load(f))
+        
+        resultado = RetencionHistorialService("sistema_controles.db", politica).depurar()
+        
+        print(f"✅ Depuración completada: {resultado}")
+        
+    except Exception as e:
+        print(f"❌ Error depurando historial: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="Gestión del Motor de Ejecución")
     parser.add_argument("accion", choices=[
-        "iniciar", "detener", "estado", "config", "test", "restart"
+        "iniciar", "detener", "estado", "config", "test", "restart", "reconstruir-resumen",
+        "depurar-historial"
     ], help="Acción a realizar")
     
     args = parser.parse_args()
@@ -200,6 +239,10 @@ def main():
         configurar_motor()
     elif args.accion == "test":
         test_motor()
+    elif args.accion == "reconstruir-resumen":
+        reconstruir_resumen()
+    elif args.accion == "depurar-historial":
+        depurar_historial()
     elif args.accion == "restart":
         detener_motor()
         time.sleep(2)
@@ -2,8 +2,11 @@
 """
 Script para limpiar historial de la base de datos
 """
+import argparse
 import sqlite3
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 
 def limpiar_historial():
     """Limpia el historial de ejecuciones"""
@@ -116,7 +119,32 @@ def mostrar_estadisticas():
     finally:
         conn.close()
 
+def activar_auto_vacuum():
+    """Convierte la base a auto_vacuum incremental (VACUUM completo, una única vez)"""
+    print("🔧 Activando auto_vacuum incremental...")
+    print("⚠️ Ejecutar con el motor y la GUI cerrados: la base queda bloqueada mientras se reescribe")
+    
+    try:
+        sys.path.append(str(Path(__file__).parent))
+        from src.infrastructure.services.retencion_historial_service import RetencionHistorialService
+        
+        recuperados = RetencionHistorialService('sistema_controles.db').activar_auto_vacuum()
+        
+        print(f"✅ auto_vacuum incremental activo ({recuperados / (1024 * 1024):.1f} MB recuperados)")
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestor de historial de ejecuciones")
+    parser.add_argument("--activar-auto-vacuum", action="store_true",
+                        help="Convertir la base a auto_vacuum incremental (única vez, con el motor detenido)")
+    args = parser.parse_args()
+    
+    if args.activar_auto_vacuum:
+        activar_auto_vacuum()
+        sys.exit(0)
+    
     print("🗄️ GESTOR DE HISTORIAL DE EJECUCIONES")
     print("=" * 40)
     
@@ -2,10 +2,13 @@
 Monitor de Archivos de Notificación
 Script que monitorea carpetas compartidas en busca de archivos de notificación,
 los procesa mostrando notificaciones locales y luego los elimina.
+
+En Linux las carpetas se vigilan con inotify y cada archivo se procesa apenas
+se termina de escribir; las que no informan eventos (unidades de red, otros
+sistemas) se revisan por sondeo, más espaciado mientras no aparecen archivos.
 """
 
 import os
-import time
 import json
 import logging
 import argparse
@@ -19,21 +22,28 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.infrastructure.services.notification_service import WindowsNotificationService
 from src.infrastructure.services.notification_file_service import NotificationFileService
+from src.infrastructure.services.vigilancia_carpetas_service import VigilanciaCarpetasService
 
 
 class NotificationFileMonitor:
     """Monitor de archivos de notificación en carpetas compartidas"""
     
-    def __init__(self, carpetas_monitoreadas: List[str], intervalo_segundos: int = 5):
+    def __init__(self, carpetas_monitoreadas: List[str], intervalo_segundos: float = 5,
+                 intervalo_maximo_segundos: float = 60, usar_eventos: bool = True):
         """
         Inicializa el monitor de archivos
         
         Args:
             carpetas_monitoreadas: Lista de carpetas a monitorear
-            intervalo_segundos: Intervalo entre verificaciones
+            intervalo_segundos: Intervalo entre verificaciones por sondeo tras un cambio
+            intervalo_maximo_segundos: Intervalo máximo de sondeo cuando no hay cambios
+            usar_eventos: Vigilar con inotify las carpetas que lo admitan
         """
         self.carpetas_monitoreadas = carpetas_monitoreadas
         self.intervalo_segundos = intervalo_segundos
+        self.intervalo_maximo_segundos = max(intervalo_segundos, intervalo_maximo_segundos)
+        self.usar_eventos = usar_eventos
+        self.vigilancia = None
         self.notification_service = WindowsNotificationService()
         self.file_service = NotificationFileService()
         self.archivos_procesados = set()  # Para evitar procesar el mismo archivo múltiples veces
@@ -43,7 +53,7 @@ class NotificationFileMonitor:
         self._configurar_logging()
         
         self.logger.info(f"Monitor inicializado para {len(carpetas_monitoreadas)} carpetas")
-        self.logger.info(f"Intervalo de monitoreo: {intervalo_segundos} segundos")
+        self.logger.info(f"Intervalo de sondeo: {intervalo_segundos} a {self.intervalo_maximo_segundos} segundos")
     
     def _configurar_logging(self):
         """Configura el sistema de logging"""
@@ -63,13 +73,22 @@ class NotificationFileMonitor:
         for carpeta in self.carpetas_monitoreadas:
             self.logger.info(f"  - {carpeta}")
         
+        self.vigilancia = VigilanciaCarpetasService(
+            self.carpetas_monitoreadas,
+            intervalo_minimo=self.intervalo_segundos,
+            intervalo_maximo=self.intervalo_maximo_segundos,
+            usar_eventos=self.usar_eventos
+        )
+        con_eventos = self.vigilancia.carpetas_con_eventos()
+        self.logger.info(f"Modo de vigilancia: {self.vigilancia.modo} "
+                         f"({len(con_eventos)}/{len(self.carpetas_monitoreadas)} carpetas con eventos)")
+        
         # Mostrar notificación de inicio del monitor
         self.notification_service.mostrar_motor_iniciado()
         
         try:
             while True:
                 self._procesar_ciclo_monitoreo()
-                time.sleep(self.intervalo_segundos)
                 
         except KeyboardInterrupt:
             self.logger.info("Monitor detenido por el usuario (Ctrl+C)")
@@ -77,28 +96,23 @@ class NotificationFileMonitor:
         except Exception as e:
             self.logger.error(f"Error en el monitor: {e}")
             self.notification_service.mostrar_motor_parado(f"Error en monitor: {str(e)}")
+        finally:
+            self.vigilancia.cerrar()
     
-    def _procesar_ciclo_monitoreo(self):
-        """Procesa un ciclo de monitoreo de todas las carpetas"""
-        archivos_encontrados = 0
+    def _procesar_ciclo_monitoreo(self, timeout: float = None):
+        """Espera archivos de notificación (eventos o sondeo) y los procesa"""
+        archivos = self.vigilancia.esperar_archivos(timeout)
+        archivos_encontrados = len(archivos)
         archivos_procesados = 0
         
-        for carpeta in self.carpetas_monitoreadas:
-            if not os.path.exists(carpeta):
+        for archivo in archivos:
+            # Evitar procesar el mismo archivo múltiples veces
+            if archivo in self.archivos_procesados:
                 continue
             
-            # Obtener archivos de notificación
-            archivos = self.file_service.listar_archivos_notificacion(carpeta)
-            archivos_encontrados += len(archivos)
-            
-            for archivo in archivos:
-                # Evitar procesar el mismo archivo múltiples veces
-                if archivo in self.archivos_procesados:
-                    continue
-                
-                if self._procesar_archivo_notificacion(archivo):
-                    archivos_procesados += 1
-                    self.archivos_procesados.add(archivo)
+            if self._procesar_archivo_notificacion(archivo):
+                archivos_procesados += 1
+                self.archivos_procesados.add(archivo)
         
         # Log periódico solo si hay actividad
         if archivos_encontrados > 0:
@@ -306,7 +320,12 @@ def main():
     """Función principal del monitor"""
     parser = argparse.ArgumentParser(description='Monitor de Archivos de Notificación')
     parser.add_argument('--config', '-c', help='Archivo de configuración JSON')
-    parser.add_argument('--intervalo', '-i', type=int, default=5, help='Intervalo en segundos (default: 5)')
+    parser.add_argument('--intervalo', '-i', type=float, default=5,
+                        help='Intervalo de sondeo en segundos tras un cambio (default: 5)')
+    parser.add_argument('--intervalo-maximo', type=float, default=60,
+                        help='Intervalo máximo de sondeo en segundos sin cambios (default: 60)')
+    parser.add_argument('--sin-eventos', action='store_true',
+                        help='No usar inotify: revisar todas las carpetas por sondeo')
     parser.add_argument('--test-archivo', '-t', help='Procesar un archivo específico (modo test)')
     parser.add_argument('--verificar-carpetas', '-v', action='store_true', help='Solo verificar carpetas y salir')
     
@@ -321,7 +340,8 @@ def main():
         return 1
     
     # Crear monitor
-    monitor = NotificationFileMonitor(carpetas, args.intervalo)
+    monitor = NotificationFileMonitor(carpetas, args.intervalo, args.intervalo_maximo,
+                                      usar_eventos=not args.sin_eventos)
     
     # Modo verificación de carpetas
     if args.verificar_carpetas:
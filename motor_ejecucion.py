@@ -6,18 +6,26 @@ Este módulo implementa un motor básico que ejecuta controles
 según su programación automática definida.
 
 Características:
-- Loop continuo cada 1 minuto
-- Ejecución secuencial de controles
+- Planificación por próxima ejecución (duerme hasta el próximo disparo)
+- Ejecución concurrente de controles (pool de workers)
+- Límite global de concurrencia y límite por conexión
+- Pool de conexiones reutilizadas por conexión de base de datos
+- Resultados y programaciones persistidos por un único hilo escritor
+- Depuración periódica del historial según la política de retención
 - Logging detallado
 - Gestión de errores
 - Fácil de extender
 """
+import json
 import time
 import logging
 import signal
 import sys
-from datetime import datetime
-from typing import List, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Deque, Dict, FrozenSet, List, Optional, Set, Tuple
 from pathlib import Path
 
 # Agregar src al path para imports
@@ -29,12 +37,22 @@ from src.infrastructure.repositories.sqlite_control_repository import SQLiteCont
 from src.infrastructure.repositories.sqlite_conexion_repository import SQLiteConexionRepository
 from src.application.use_cases.listar_programaciones_use_case import ListarProgramacionesUseCase
 from src.domain.services.ejecucion_control_service import EjecucionControlService
+from src.domain.services.planificador_programaciones import PlanificadorProgramaciones
+from src.infrastructure.database.pool_conexiones import GestorPoolsConexiones
+from src.infrastructure.database.conexion_sqlite import gestor_conexiones
+from src.infrastructure.database.escritor_diferido import EscritorDiferidoSQLite
+from src.infrastructure.database.conector_ibmi_jdbc import ConectorIBMiJDBC
+from src.infrastructure.repositories.sqlite_configuracion_jdbc_repository import SQLiteConfiguracionJDBCRepository
 from src.infrastructure.repositories.sqlite_parametro_repository import SQLiteParametroRepository
 from src.infrastructure.repositories.sqlite_consulta_repository import SQLiteConsultaRepository
 from src.infrastructure.repositories.sqlite_referente_repository import SQLiteReferenteRepository
 from src.infrastructure.repositories.sqlite_consulta_control_repository import SQLiteConsultaControlRepository
 from src.infrastructure.repositories.sqlite_control_referente_repository import SQLiteControlReferenteRepository
+from src.infrastructure.repositories.sqlite_plan_ejecucion_repository import SQLitePlanEjecucionRepository
 from src.infrastructure.services.notification_service import WindowsNotificationService
+from src.infrastructure.services.retencion_historial_service import RetencionHistorialService
+from src.infrastructure.services.generacion_reportes_service import GeneracionReportesService
+from src.domain.entities.politica_retencion import PoliticaRetencion
 from src.domain.entities.resultado_ejecucion import EstadoEjecucion
 
 
@@ -43,9 +61,34 @@ class MotorEjecucionService:
     Motor de ejecución automática de controles programados
     """
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 4, max_por_conexion: int = 2):
+        """
+        Inicializa el motor
+        
+        Args:
+            max_workers: Máximo de programaciones ejecutándose en paralelo
+                (1 = ejecución secuencial)
+            max_por_conexion: Máximo de controles simultáneos contra una misma conexión
+        """
         self.ejecutando = False
-        self.intervalo_segundos = 60  # 1 minuto
+        self.intervalo_segundos = 60  # Máxima espera entre verificaciones de cambios
+        self.max_workers = max(1, max_workers)
+        self.max_por_conexion = max(1, max_por_conexion)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Controles en curso por conexión y programaciones esperando una conexión libre
+        self._en_curso_conexion: Dict[int, int] = {}
+        self._en_espera_conexion: Deque[Tuple[object, FrozenSet[int]]] = deque()
+        self._futuros: Set[Future] = set()
+        self._conexiones_lock = threading.Lock()
+        self.planificador = PlanificadorProgramaciones()
+        self._firma_programaciones = None
+        self.horizonte_planificacion = timedelta(hours=1)
+        self._limite_carga: Optional[datetime] = None
+        self._despertar = threading.Event()
+        self.intervalo_retencion = timedelta(hours=6)
+        self._proxima_retencion: Optional[datetime] = None
+        self._hilo_retencion: Optional[threading.Thread] = None
+        self._detener_retencion = threading.Event()
         self.setup_logging()
         self.setup_dependencies()
         self.setup_signal_handlers()
@@ -92,6 +135,9 @@ class MotorEjecucionService:
             self.consulta_control_repo = SQLiteConsultaControlRepository(db_path)
             self.control_referente_repo = SQLiteControlReferenteRepository(db_path)
             
+            # Escritor único: los workers encolan resultados y programaciones sin esperar al disco
+            self.escritor = EscritorDiferidoSQLite(db_path, programacion_repository=self.programacion_repo)
+            
             # Use cases
             self.listar_programaciones_uc = ListarProgramacionesUseCase(
                 self.programacion_repo, 
@@ -100,6 +146,9 @@ class MotorEjecucionService:
             
             # Servicios
             self.notification_service = WindowsNotificationService()
+            self.retencion_service = RetencionHistorialService(db_path, self._cargar_politica_retencion())
+            # Los Excel se generan en procesos aparte: el ciclo no espera a openpyxl
+            self.generador_reportes = GeneracionReportesService()
             
             self.ejecucion_service = EjecucionControlService(
                 self.control_repo,
@@ -108,7 +157,11 @@ class MotorEjecucionService:
                 self.referente_repo,
                 self.conexion_repo,
                 self.consulta_control_repo,
-                self.control_referente_repo
+                self.control_referente_repo,
+                gestor_pools=GestorPoolsConexiones(max_conexiones=self.max_por_conexion),
+                conector_ibmi=ConectorIBMiJDBC(SQLiteConfiguracionJDBCRepository(db_path)),
+                plan_ejecucion_repository=SQLitePlanEjecucionRepository(db_path),
+                generador_reportes=self.generador_reportes
             )
             
             self.logger.info("✅ Dependencias configuradas correctamente")
@@ -117,6 +170,20 @@ class MotorEjecucionService:
             self.logger.error(f"❌ Error configurando dependencias: {e}")
             raise
     
+    def _cargar_politica_retencion(self, archivo: str = "config_retencion_historial.json") -> PoliticaRetencion:
+        """Carga la política de retención del historial (valores por defecto si no hay archivo)"""
+        ruta = Path(archivo)
+        if not ruta.exists():
+            return PoliticaRetencion()
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                politica = PoliticaRetencion.desde_dict(json.load(f))
+            self.logger.info(f"🧹 Política de retención cargada: {politica}")
+            return politica
+        except Exception as e:
+            self.logger.warning(f"⚠️ Error leyendo {archivo}, se usa la retención por defecto: {e}")
+            return PoliticaRetencion()
+    
     def setup_signal_handlers(self):
         """Configura manejadores de señales para parada elegante"""
         def signal_handler(signum, frame):
@@ -140,22 +207,24 @@ class MotorEjecucionService:
         
         try:
             while self.ejecutando:
-                inicio_ciclo = time.time()
+                self._despertar.clear()
                 
                 try:
-                    self.ejecutar_ciclo()
+                    # Despachar sin esperar: cada programación se replanifica al terminar
+                    self.ejecutar_ciclo(esperar=False)
                 except Exception as e:
                     self.logger.error(f"❌ Error en ciclo de ejecución: {e}")
                 
-                # Calcular tiempo de espera para mantener intervalo
-                tiempo_transcurrido = time.time() - inicio_ciclo
-                tiempo_espera = max(0, self.intervalo_segundos - tiempo_transcurrido)
+                self._programar_depuracion_historial()
+                
+                # Dormir hasta el próximo disparo (o hasta verificar cambios en BD)
+                tiempo_espera = self.planificador.segundos_hasta_proxima()
+                if tiempo_espera is None or tiempo_espera > self.intervalo_segundos:
+                    tiempo_espera = self.intervalo_segundos
                 
                 if tiempo_espera > 0:
-                    self.logger.debug(f"⏳ Esperando {tiempo_espera:.1f}s hasta próximo ciclo")
-                    time.sleep(tiempo_espera)
-                else:
-                    self.logger.warning(f"⚠️ Ciclo tardó {tiempo_transcurrido:.1f}s (más de {self.intervalo_segundos}s)")
+                    self.logger.debug(f"⏳ Esperando {tiempo_espera:.3f}s hasta próximo disparo")
+                    self._despertar.wait(tiempo_espera)
                 
         except KeyboardInterrupt:
             self.logger.info("⌨️ Interrupción de teclado recibida")
@@ -164,6 +233,40 @@ class MotorEjecucionService:
         finally:
             self.detener()
     
+    def _programar_depuracion_historial(self):
+        """Lanza la depuración del historial en segundo plano cuando corresponde"""
+        ahora = datetime.now()
+        if self._proxima_retencion and ahora < self._proxima_retencion:
+            return
+        if self._hilo_retencion is not None and self._hilo_retencion.is_alive():
+            return
+        
+        self._proxima_retencion = ahora + self.intervalo_retencion
+        self._hilo_retencion = threading.Thread(
+            target=self._depurar_historial_en_hilo, name="MotorRetencion", daemon=True
+        )
+        self._hilo_retencion.start()
+    
+    def _depurar_historial_en_hilo(self):
+        """Depuración del hilo MotorRetencion: cierra sus conexiones al terminar"""
+        try:
+            self.depurar_historial()
+        finally:
+            gestor_conexiones.cerrar_hilo_actual()
+    
+    def depurar_historial(self):
+        """Aplica la política de retención al historial de ejecuciones"""
+        try:
+            resultado = self.retencion_service.depurar(detener=self._detener_retencion)
+            if resultado.ejecuciones_eliminadas:
+                self.logger.info(f"🧹 Historial depurado: {resultado}")
+            else:
+                self.logger.debug("🧹 Historial sin ejecuciones vencidas")
+            return resultado
+        except Exception as e:
+            self.logger.error(f"❌ Error depurando historial: {e}")
+            return None
+    
     def _crear_archivo_pid(self):
         """Crea archivo con PID del proceso"""
         try:
@@ -184,8 +287,13 @@ class MotorEjecucionService:
         except Exception as e:
             self.logger.warning(f"⚠️ No se pudo eliminar archivo PID: {e}")
     
-    def ejecutar_ciclo(self):
-        """Ejecuta un ciclo completo de verificación y ejecución"""
+    def ejecutar_ciclo(self, esperar: bool = True):
+        """
+        Ejecuta un ciclo de verificación y ejecución
+        
+        Args:
+            esperar: Si True, espera a que terminen todas las programaciones despachadas
+        """
         ciclo_inicio = datetime.now()
         self.logger.debug(f"🔍 Iniciando ciclo: {ciclo_inicio.strftime('%Y-%m-%d %H:%M:%S')}")
         
@@ -198,34 +306,121 @@ class MotorEjecucionService:
         
         self.logger.info(f"📋 Encontradas {len(programaciones_pendientes)} programaciones pendientes")
         
-        # Ejecutar cada programación (secuencial)
-        for programacion in programaciones_pendientes:
-            try:
-                self.ejecutar_programacion(programacion)
-            except Exception as e:
-                self.logger.error(f"❌ Error ejecutando programación {programacion.nombre}: {e}")
+        if self.max_workers > 1 and (len(programaciones_pendientes) > 1 or not esperar):
+            # Ejecución concurrente: el ciclo dura lo que la programación más lenta
+            executor = self._obtener_executor()
+            for programacion in programaciones_pendientes:
+                self._despachar(executor, programacion)
+            if not esperar:
+                return
+            # Las que esperaban una conexión se despachan al liberarse otra: esperar hasta vaciar
+            while True:
+                with self._conexiones_lock:
+                    futuros = set(self._futuros)
+                if not futuros:
+                    break
+                wait(futuros)
+        else:
+            # Ejecución secuencial
+            for programacion in programaciones_pendientes:
+                self._ejecutar_y_reprogramar(programacion)
         
         ciclo_fin = datetime.now()
         duracion = (ciclo_fin - ciclo_inicio).total_seconds()
         self.logger.debug(f"✅ Ciclo completado en {duracion:.2f}s")
     
+    def _obtener_executor(self) -> ThreadPoolExecutor:
+        """Obtiene (creándolo si es necesario) el pool de workers del motor"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="MotorWorker"
+            )
+            self.logger.info(
+                f"🧵 Pool de ejecución creado: {self.max_workers} workers, "
+                f"máximo {self.max_por_conexion} por conexión"
+            )
+        return self._executor
+    
+    def _despachar(self, executor: ThreadPoolExecutor, programacion,
+                   conexiones_reservadas: FrozenSet[int] = None) -> bool:
+        """Envía una programación al pool de workers; False si el pool ya se cerró"""
+        try:
+            futuro = executor.submit(self._ejecutar_y_reprogramar, programacion, conexiones_reservadas)
+        except RuntimeError:
+            # Motor deteniéndose: la programación se recarga de la base al volver a iniciar
+            self.logger.warning(f"⚠️ {programacion.nombre}: no se despachó, el motor se está deteniendo")
+            return False
+        with self._conexiones_lock:
+            self._futuros.add(futuro)
+        futuro.add_done_callback(self._futuro_terminado)
+        return True
+    
+    def _futuro_terminado(self, futuro: Future):
+        """Olvida un despacho terminado"""
+        with self._conexiones_lock:
+            self._futuros.discard(futuro)
+    
+    def _conexiones_libres(self, conexiones: FrozenSet[int]) -> bool:
+        """Indica si todas las conexiones admiten otro control (requiere el lock)"""
+        return all(
+            self._en_curso_conexion.get(conexion_id, 0) < self.max_por_conexion
+            for conexion_id in conexiones
+        )
+    
+    def _ocupar_conexiones(self, conexiones: FrozenSet[int]):
+        """Cuenta un control más en cada conexión (requiere el lock)"""
+        for conexion_id in conexiones:
+            self._en_curso_conexion[conexion_id] = self._en_curso_conexion.get(conexion_id, 0) + 1
+    
+    def _reservar_conexiones(self, programacion, conexiones: FrozenSet[int]) -> bool:
+        """
+        Reserva un lugar en cada conexión que usa el control
+        
+        Si alguna está saturada la programación queda en espera sin ocupar un
+        worker, y se despacha con las conexiones ya reservadas cuando un control
+        en curso las libera.
+        """
+        with self._conexiones_lock:
+            if self._conexiones_libres(conexiones):
+                self._ocupar_conexiones(conexiones)
+                return True
+            self._en_espera_conexion.append((programacion, conexiones))
+            return False
+    
+    def _liberar_conexiones(self, conexiones: FrozenSet[int]):
+        """Libera las conexiones de un control y despacha las programaciones que ahora caben"""
+        listas = []
+        with self._conexiones_lock:
+            for conexion_id in conexiones:
+                restantes = self._en_curso_conexion.get(conexion_id, 0) - 1
+                if restantes > 0:
+                    self._en_curso_conexion[conexion_id] = restantes
+                else:
+                    self._en_curso_conexion.pop(conexion_id, None)
+            # En orden de llegada; cada una se despacha con sus conexiones ya reservadas
+            for programacion, necesarias in list(self._en_espera_conexion):
+                if self._conexiones_libres(necesarias):
+                    self._en_espera_conexion.remove((programacion, necesarias))
+                    self._ocupar_conexiones(necesarias)
+                    listas.append((programacion, necesarias))
+        
+        executor = self._executor
+        for programacion, necesarias in listas:
+            if executor is None or not self._despachar(executor, programacion, necesarias):
+                self._liberar_conexiones(necesarias)
+    
     def obtener_programaciones_pendientes(self) -> List:
         """Obtiene programaciones que deben ejecutarse ahora"""
         try:
-            # Obtener programaciones activas directamente del repositorio
-            programaciones = self.programacion_repo.obtener_activas()
-            
-            # Filtrar las que deben ejecutarse ahora
-            pendientes = []
-            ahora = datetime.now()
+            self._verificar_cambios_programaciones()
             
-            for programacion in programaciones:
-                try:
-                    if programacion.debe_ejecutarse_ahora(ahora):
-                        pendientes.append(programacion)
-                        self.logger.debug(f"⏰ Programación pendiente: {programacion.nombre}")
-                except Exception as e:
-                    self.logger.error(f"❌ Error evaluando programación {programacion.nombre}: {e}")
+            pendientes = self.planificador.extraer_vencidas(datetime.now())
+            for programacion in pendientes:
+                self.logger.debug(
+                    f"⏰ Programación pendiente: {programacion.nombre} "
+                    f"(programada para {programacion.proxima_ejecucion})"
+                )
             
             return pendientes
             
@@ -233,9 +428,67 @@ class MotorEjecucionService:
             self.logger.error(f"❌ Error obteniendo programaciones pendientes: {e}")
             return []
     
-    def ejecutar_programacion(self, programacion):
-        """Ejecuta una programación específica"""
+    def _verificar_cambios_programaciones(self):
+        """
+        Recarga la planificación si las programaciones cambiaron en la base de datos
+        o si se alcanzó el horizonte de la última carga
+        
+        Solo se cargan las programaciones que vencen dentro del horizonte, usando
+        el índice sobre proxima_ejecucion, por lo que el costo depende de las
+        programaciones próximas y no del total.
+        """
+        ahora = datetime.now()
+        # Leer la base con las programaciones ya ejecutadas persistidas
+        if self.escritor.pendientes():
+            self.escritor.vaciar(timeout=self.intervalo_segundos)
+        firma = self.programacion_repo.obtener_firma_cambios()
+        if firma == self._firma_programaciones and self._limite_carga and ahora < self._limite_carga:
+            return
+        
+        self._limite_carga = ahora + self.horizonte_planificacion
+        programaciones = self.programacion_repo.obtener_pendientes_ejecucion(self._limite_carga)
+        self.planificador.cargar(programaciones, ahora)
+        self._firma_programaciones = firma
+        
+        proxima = self.planificador.proxima_ejecucion()
+        self.logger.info(
+            f"🗓️ Planificación recargada: {self.planificador.total_planificadas()} programaciones, "
+            f"próxima ejecución: {proxima.strftime('%Y-%m-%d %H:%M:%S') if proxima else 'ninguna'}"
+        )
+    
+    def _ejecutar_y_reprogramar(self, programacion, conexiones_reservadas: FrozenSet[int] = None):
+        """Ejecuta una programación y la vuelve a encolar en el planificador"""
+        exito = False
+        try:
+            exito = self.ejecutar_programacion(programacion, conexiones_reservadas)
+        except Exception as e:
+            self.logger.error(f"❌ Error ejecutando programación {programacion.nombre}: {e}")
+        if exito is None:
+            # Espera una conexión libre: se despacha de nuevo al liberarse, sin reprogramar
+            return
+        # Si falló no se marcó ejecutada: se reintenta tras una espera creciente
+        proxima = self.planificador.reprogramar(programacion, fallo=not exito)
+        if proxima:
+            self.logger.debug(f"🗓️ {programacion.nombre}: próxima ejecución {proxima.strftime('%Y-%m-%d %H:%M:%S')}")
+        # Despertar el loop principal por si cambió la próxima ejecución
+        self._despertar.set()
+    
+    def ejecutar_programacion(self, programacion,
+                              conexiones_reservadas: FrozenSet[int] = None) -> Optional[bool]:
+        """
+        Ejecuta una programación específica
+        
+        Args:
+            programacion: Programación a ejecutar
+            conexiones_reservadas: Conexiones ya reservadas al despacharla desde la espera
+        
+        Returns:
+            True si se ejecutó, False si no se pudo ejecutar y None si quedó
+            esperando una conexión libre
+        """
         inicio = time.time()
+        ejecutada = False
+        conexiones = conexiones_reservadas
         self.logger.info(f"🚀 Ejecutando programación: {programacion.nombre} (Control ID: {programacion.control_id})")
         
         try:
@@ -249,23 +502,35 @@ class MotorEjecucionService:
             if not conexion:
                 raise Exception(f"Conexión {control.conexion_id} no encontrada para control {control.nombre}")
             
-            # Ejecutar control
-            resultado = self.ejecucion_service.ejecutar_control(
-                control=control,
-                conexion=conexion,
-                parametros_adicionales={},
-                ejecutar_solo_disparo=False,
-                mock_execution=False  # Cambiar a True para testing
-            )
+            # El límite por conexión cuenta la del control y las específicas de sus consultas
+            plan = self.ejecucion_service.cargar_plan(control)
+            if conexiones is None:
+                necesarias = frozenset([conexion.id, *plan.conexiones])
+                if not self._reservar_conexiones(programacion, necesarias):
+                    self.logger.info(f"⏳ {programacion.nombre}: conexión saturada, espera turno sin ocupar un worker")
+                    return None
+                conexiones = necesarias
             
-            # Marcar programación como ejecutada
-            programacion.marcar_ejecutado()
+            try:
+                resultado = self.ejecucion_service.ejecutar_control(
+                    control=control,
+                    conexion=conexion,
+                    parametros_adicionales={},
+                    ejecutar_solo_disparo=False,
+                    mock_execution=False,  # Cambiar a True para testing
+                    plan=plan
+                )
+            finally:
+                self._liberar_conexiones(conexiones)
+                conexiones = None
             
-            # Recalcular próxima ejecución
-            programacion._calcular_proxima_ejecucion()
+            # Marcar programación como ejecutada (recalcula la próxima ejecución)
+            programacion.marcar_ejecutado()
+            ejecutada = True
             
-            # Actualizar en base de datos
-            self.programacion_repo.actualizar(programacion)
+            # Guardar resultado y programación en segundo plano (hilo escritor)
+            self.escritor.encolar_resultado(resultado)
+            self.escritor.encolar_programacion(programacion)
             
             # Log del resultado
             duracion = time.time() - inicio
@@ -295,6 +560,7 @@ class MotorEjecucionService:
                     error_mensaje=resultado.mensaje or "Error desconocido",
                     tiempo_ejecucion_ms=duracion_ms
                 )
+            return True
             
         except Exception as e:
             duracion = time.time() - inicio
@@ -319,12 +585,54 @@ class MotorEjecucionService:
                 error_mensaje=str(e),
                 tiempo_ejecucion_ms=duracion_ms
             )
+            # Un error posterior a marcarla ejecutada (notificación, encolado) no es un fallo a reintentar
+            return ejecutada
+        finally:
+            # Reservadas desde la espera pero sin llegar a ejecutar (control o conexión eliminados)
+            if conexiones:
+                self._liberar_conexiones(conexiones)
     
     def detener(self):
         """Detiene el motor de ejecución"""
         if self.ejecutando:
             self.logger.info("🛑 Deteniendo motor de ejecución...")
             self.ejecutando = False
+            self._despertar.set()
+            
+            # La depuración se interrumpe entre lotes
+            self._detener_retencion.set()
+            if self._hilo_retencion is not None:
+                self._hilo_retencion.join(timeout=30)
+                self._hilo_retencion = None
+            
+            # Esperar a que terminen las ejecuciones en curso
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            
+            # Terminar y entregar los reportes encolados
+            self.generador_reportes.cerrar()
+            metricas_reportes = self.generador_reportes.obtener_metricas()
+            self.logger.info(
+                f"📊 Reportes: {metricas_reportes['completados']} generados, "
+                f"{metricas_reportes['errores']} con error"
+            )
+            
+            # Escribir lo que quedó en la cola antes de salir
+            self.escritor.cerrar()
+            metricas_escritor = self.escritor.obtener_metricas()
+            self.logger.info(
+                f"💾 Escritor: {metricas_escritor['resultados']} resultados y "
+                f"{metricas_escritor['programaciones']} programaciones en {metricas_escritor['lotes']} lotes"
+            )
+            
+            metricas = self.ejecucion_service.obtener_metricas_pools()
+            self.logger.info(
+                f"🔌 Pools de conexiones: {metricas['aciertos']} reutilizadas, "
+                f"{metricas['fallos']} nuevas ({metricas['tasa_aciertos']:.1f}% aciertos)"
+            )
+            self.ejecucion_service.cerrar_pools()
+            
             self._eliminar_archivo_pid()
             
             # Notificación de detención
@@ -334,9 +642,16 @@ class MotorEjecucionService:
     
     def estado(self) -> dict:
         """Obtiene el estado actual del motor"""
+        proxima = self.planificador.proxima_ejecucion()
         return {
             'ejecutando': self.ejecutando,
             'intervalo_segundos': self.intervalo_segundos,
+            'max_workers': self.max_workers,
+            'max_por_conexion': self.max_por_conexion,
+            'proxima_ejecucion': proxima.isoformat() if proxima else None,
+            'proxima_depuracion_historial': self._proxima_retencion.isoformat() if self._proxima_retencion else None,
+            'pools_conexiones': self.ejecucion_service.obtener_metricas_pools(),
+            'escritor': self.escritor.obtener_metricas(),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -17,6 +17,7 @@ class CrearConexionDTO:
     password: str
     driver_type: str = 'default'
     activa: bool = True
+    propiedades_jdbc: str = ''
     
 
 @dataclass  
@@ -43,4 +44,5 @@ class ActualizarConexionDTO:
     usuario: Optional[str] = None
     password: Optional[str] = None
     driver_type: Optional[str] = None
-    activa: Optional[bool] = None
\ No newline at end of file
+    activa: Optional[bool] = None
+    propiedades_jdbc: Optional[str] = None
\ No newline at end of file
@@ -14,6 +14,7 @@ class CrearConsultaDTO:
     control_id: Optional[int] = None
     conexion_id: Optional[int] = None  # Conexión específica (opcional)
     activa: bool = True
+    max_filas: Optional[int] = None  # Máximo de filas a leer (None = sin límite)
 
 
 @dataclass
@@ -26,6 +27,7 @@ class ConsultaResponseDTO:
     control_id: Optional[int]
     conexion_id: Optional[int]
     activa: bool
+    max_filas: Optional[int] = None
 
 
 @dataclass
@@ -35,4 +37,5 @@ class ActualizarConsultaDTO:
     sql: Optional[str] = None
     descripcion: Optional[str] = None
     conexion_id: Optional[int] = None
-    activa: Optional[bool] = None
\ No newline at end of file
+    activa: Optional[bool] = None
+    max_filas: Optional[int] = None  # 0 = quitar el límite
\ No newline at end of file
@@ -2,8 +2,8 @@
 DTOs para la ejecución de controles
 """
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime
 from src.domain.entities.resultado_ejecucion import EstadoEjecucion
 
 
@@ -45,6 +45,9 @@ class HistorialEjecucionDTO:
     estado: Optional[str] = None
     limite: int = 50
     incluir_detalles: bool = False
+    # Paginación: (fecha_ejecucion, id) del último / primer resultado de la página actual
+    despues_de: Optional[Tuple[datetime, int]] = None
+    antes_de: Optional[Tuple[datetime, int]] = None
 
 
 @dataclass
@@ -57,6 +60,7 @@ class EstadisticasEjecucionDTO:
     sin_datos: int
     tiempo_promedio_ejecucion_ms: float
     ultima_ejecucion: Optional[datetime] = None
+    tiempo_p95_ejecucion_ms: Optional[float] = None  # None si el rango se leyó del resumen diario
     
     @property
     def tasa_exito(self) -> float:
@@ -75,4 +79,19 @@ class ResumenControlDTO:
     ultima_ejecucion: Optional[datetime]
     ultimo_estado: Optional[str]
     tasa_exito: float
-    tiempo_promedio_ms: float
\ No newline at end of file
+    tiempo_promedio_ms: float
+    tiempo_p95_ms: Optional[float] = None  # None si el rango se leyó del resumen diario
+
+
+@dataclass
+class ResumenDiarioDTO:
+    """DTO con las métricas de un día (de un control o de todos)"""
+    dia: date
+    total_ejecuciones: int
+    ejecuciones_exitosas: int
+    ejecuciones_con_error: int
+    controles_disparados: int
+    sin_datos: int
+    tiempo_promedio_ms: float
+    tiempo_maximo_ms: float
+    total_filas_disparadas: int
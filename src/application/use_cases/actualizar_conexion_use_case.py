@@ -46,7 +46,9 @@ class ActualizarConexionUseCase:
             usuario=dto.usuario,
             contraseña=password_final,
             tipo_motor=dto.motor,
-            activa=dto.activa  # Usar el valor del DTO
+            driver_type=dto.driver_type,
+            activa=dto.activa,  # Usar el valor del DTO
+            propiedades_jdbc=dto.propiedades_jdbc
         )
         
         # Validar los datos
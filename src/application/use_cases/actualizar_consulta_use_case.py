@@ -48,7 +48,8 @@ class ActualizarConsultaUseCase:
             descripcion=datos.descripcion if datos.descripcion is not None else consulta_existente.descripcion,
             control_id=consulta_existente.control_id,  # No se puede cambiar el control
             conexion_id=datos.conexion_id if datos.conexion_id is not None else consulta_existente.conexion_id,
-            activa=datos.activa if datos.activa is not None else consulta_existente.activa
+            activa=datos.activa if datos.activa is not None else consulta_existente.activa,
+            max_filas=(datos.max_filas or None) if datos.max_filas is not None else consulta_existente.max_filas
         )
         
         # Validaciones de negocio
@@ -72,5 +73,6 @@ class ActualizarConsultaUseCase:
             descripcion=consulta_guardada.descripcion,
             control_id=consulta_guardada.control_id,
             conexion_id=consulta_guardada.conexion_id,
-            activa=consulta_guardada.activa
+            activa=consulta_guardada.activa,
+            max_filas=consulta_guardada.max_filas
         )
\ No newline at end of file
@@ -31,7 +31,8 @@ class CrearConexionUseCase:
             usuario=datos.usuario,
             contraseña=datos.password,
             driver_type=datos.driver_type,
-            activa=True
+            activa=True,
+            propiedades_jdbc=datos.propiedades_jdbc
         )
         
         # Guardar conexión
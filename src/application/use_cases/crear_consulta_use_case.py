@@ -29,7 +29,8 @@ class CrearConsultaUseCase:
             descripcion=datos.descripcion,
             control_id=datos.control_id,
             conexion_id=datos.conexion_id,
-            activa=datos.activa
+            activa=datos.activa,
+            max_filas=datos.max_filas or None
         )
         
         # Validaciones de negocio
@@ -53,5 +54,6 @@ class CrearConsultaUseCase:
             descripcion=consulta_guardada.descripcion,
             control_id=consulta_guardada.control_id,
             conexion_id=consulta_guardada.conexion_id,
-            activa=consulta_guardada.activa
+            activa=consulta_guardada.activa,
+            max_filas=consulta_guardada.max_filas
         )
\ No newline at end of file
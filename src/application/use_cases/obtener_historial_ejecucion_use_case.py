@@ -1,15 +1,17 @@
 """
 Caso de uso para obtener el historial de ejecuciones
 """
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from src.domain.repositories.resultado_ejecucion_repository import ResultadoEjecucionRepository
 from src.domain.repositories.control_repository import ControlRepository
+from src.domain.entities.resultado_ejecucion import EstadoEjecucion
 from src.application.dto.ejecucion_dto import (
     HistorialEjecucionDTO, 
     ResultadoEjecucionResponseDTO,
     EstadisticasEjecucionDTO,
-    ResumenControlDTO
+    ResumenControlDTO,
+    ResumenDiarioDTO
 )
 
 
@@ -19,10 +21,13 @@ class ObtenerHistorialEjecucionUseCase:
     def __init__(
         self,
         resultado_repository: ResultadoEjecucionRepository,
-        control_repository: ControlRepository
+        control_repository: ControlRepository,
+        dias_detalle: int = 31
     ):
         self.resultado_repository = resultado_repository
         self.control_repository = control_repository
+        # Rangos más largos se calculan solo con el resumen diario (días completos, p95 en None)
+        self.dias_detalle = dias_detalle
     
     def obtener_historial(self, dto: HistorialEjecucionDTO) -> List[ResultadoEjecucionResponseDTO]:
         """
@@ -34,27 +39,20 @@ class ObtenerHistorialEjecucionUseCase:
         Returns:
             List[ResultadoEjecucionResponseDTO]: Lista de resultados
         """
-        resultados = []
-        
-        if dto.control_id:
-            # Obtener por control específico
-            resultados = self.resultado_repository.obtener_por_control(dto.control_id)
-        elif dto.fecha_desde and dto.fecha_hasta:
-            # Obtener por rango de fechas
-            resultados = self.resultado_repository.obtener_por_fecha_rango(
-                dto.fecha_desde, 
-                dto.fecha_hasta
-            )
-        elif dto.estado:
-            # Obtener por estado
-            resultados = self.resultado_repository.obtener_por_estado(dto.estado)
-        else:
-            # Obtener todos
-            resultados = self.resultado_repository.obtener_todos()
+        # Filtros combinados y límite resueltos en una sola consulta paginada
+        resultados = self.resultado_repository.buscar(
+            control_id=dto.control_id,
+            estado=dto.estado.lower() if dto.estado else None,  # Los estados se guardan en minúsculas
+            fecha_desde=dto.fecha_desde,
+            fecha_hasta=dto.fecha_hasta,
+            limite=dto.limite if dto.limite > 0 else None,
+            despues_de=dto.despues_de,
+            antes_de=dto.antes_de
+        )
         
-        # Aplicar límite
-        if dto.limite > 0:
-            resultados = resultados[:dto.limite]
+        # Las filas de las consultas solo se cargan si se piden los detalles
+        if dto.incluir_detalles:
+            resultados = [self.resultado_repository.cargar_datos(resultado) for resultado in resultados]
         
         # Convertir a DTOs
         return [self._resultado_to_dto(resultado, dto.incluir_detalles) for resultado in resultados]
@@ -79,29 +77,24 @@ class ObtenerHistorialEjecucionUseCase:
         if not fecha_hasta:
             fecha_hasta = datetime.now()
         
-        resultados = self.resultado_repository.obtener_por_fecha_rango(fecha_desde, fecha_hasta)
-        
-        total = len(resultados)
-        exitosos = len([r for r in resultados if r.estado.value == "EXITOSO"])
-        errores = len([r for r in resultados if r.estado.value == "ERROR"])
-        disparados = len([r for r in resultados if r.estado.value == "CONTROL_DISPARADO"])
-        sin_datos = len([r for r in resultados if r.estado.value == "SIN_DATOS"])
-        
-        # Calcular tiempo promedio
-        tiempos = [r.tiempo_total_ejecucion_ms for r in resultados if r.tiempo_total_ejecucion_ms > 0]
-        tiempo_promedio = sum(tiempos) / len(tiempos) if tiempos else 0.0
-        
-        # Última ejecución
-        ultima = max([r.fecha_ejecucion for r in resultados]) if resultados else None
+        # Agregados calculados en la base (sin cargar las ejecuciones)
+        if self._usar_resumen_diario(fecha_desde, fecha_hasta):
+            estadisticas = self._sumar_dias(self.resultado_repository.obtener_resumen_diario(
+                fecha_desde.date(), fecha_hasta.date()
+            ))
+        else:
+            estadisticas = self.resultado_repository.obtener_estadisticas(fecha_desde, fecha_hasta)
+        por_estado = estadisticas['por_estado']
         
         return EstadisticasEjecucionDTO(
-            total_ejecuciones=total,
-            ejecuciones_exitosas=exitosos,
-            ejecuciones_con_error=errores,
-            controles_disparados=disparados,
-            sin_datos=sin_datos,
-            tiempo_promedio_ejecucion_ms=tiempo_promedio,
-            ultima_ejecucion=ultima
+            total_ejecuciones=estadisticas['total_ejecuciones'],
+            ejecuciones_exitosas=por_estado.get(EstadoEjecucion.EXITOSO.value, 0),
+            ejecuciones_con_error=por_estado.get(EstadoEjecucion.ERROR.value, 0),
+            controles_disparados=por_estado.get(EstadoEjecucion.CONTROL_DISPARADO.value, 0),
+            sin_datos=por_estado.get(EstadoEjecucion.SIN_DATOS.value, 0),
+            tiempo_promedio_ejecucion_ms=estadisticas['tiempo_promedio_ms'],
+            ultima_ejecucion=estadisticas['ultima_ejecucion'],
+            tiempo_p95_ejecucion_ms=estadisticas['tiempo_p95_ms']
         )
     
     def obtener_resumen_por_control(
@@ -124,52 +117,117 @@ class ObtenerHistorialEjecucionUseCase:
         if not fecha_hasta:
             fecha_hasta = datetime.now()
         
-        resultados = self.resultado_repository.obtener_por_fecha_rango(fecha_desde, fecha_hasta)
-        
-        # Agrupar por control
-        controles_data = {}
-        for resultado in resultados:
-            control_id = resultado.control_id
-            if control_id not in controles_data:
-                controles_data[control_id] = {
-                    'nombre': resultado.control_nombre,
-                    'resultados': []
-                }
-            controles_data[control_id]['resultados'].append(resultado)
+        # Agregados por control calculados en la base, del más reciente al más antiguo
+        if self._usar_resumen_diario(fecha_desde, fecha_hasta):
+            dias_por_control: Dict[int, list] = {}
+            for dia in self.resultado_repository.obtener_resumen_diario(fecha_desde.date(), fecha_hasta.date()):
+                dias_por_control.setdefault(dia['control_id'], []).append(dia)
+            por_control = [self._sumar_dias(dias) for dias in dias_por_control.values()]
+            por_control.sort(key=lambda x: x['ultima_ejecucion'] or datetime.min, reverse=True)
+        else:
+            por_control = self.resultado_repository.obtener_resumen_por_control(fecha_desde, fecha_hasta)
         
-        # Generar resúmenes
         resumenes = []
-        for control_id, data in controles_data.items():
-            resultados_control = data['resultados']
-            total = len(resultados_control)
-            exitosos = len([r for r in resultados_control if r.estado.value == "EXITOSO"])
-            
-            # Última ejecución
-            ultima = max([r.fecha_ejecucion for r in resultados_control])
-            ultimo_estado = next(r.estado.value for r in resultados_control if r.fecha_ejecucion == ultima)
-            
-            # Tiempo promedio
-            tiempos = [r.tiempo_total_ejecucion_ms for r in resultados_control if r.tiempo_total_ejecucion_ms > 0]
-            tiempo_promedio = sum(tiempos) / len(tiempos) if tiempos else 0.0
+        for resumen in por_control:
+            total = resumen['total_ejecuciones']
+            exitosos = resumen['por_estado'].get(EstadoEjecucion.EXITOSO.value, 0)
             
             # Tasa de éxito
             tasa_exito = (exitosos / total * 100) if total > 0 else 0.0
             
             resumenes.append(ResumenControlDTO(
-                control_id=control_id,
-                control_nombre=data['nombre'],
+                control_id=resumen['control_id'],
+                control_nombre=resumen['control_nombre'],
                 total_ejecuciones=total,
-                ultima_ejecucion=ultima,
-                ultimo_estado=ultimo_estado,
+                ultima_ejecucion=resumen['ultima_ejecucion'],
+                ultimo_estado=resumen['ultimo_estado'],
                 tasa_exito=tasa_exito,
-                tiempo_promedio_ms=tiempo_promedio
+                tiempo_promedio_ms=resumen['tiempo_promedio_ms'],
+                tiempo_p95_ms=resumen['tiempo_p95_ms']
             ))
         
-        # Ordenar por última ejecución (más reciente primero)
-        resumenes.sort(key=lambda x: x.ultima_ejecucion or datetime.min, reverse=True)
-        
         return resumenes
     
+    def obtener_tendencia_diaria(
+        self,
+        fecha_desde: datetime = None,
+        fecha_hasta: datetime = None,
+        control_id: Optional[int] = None
+    ) -> List[ResumenDiarioDTO]:
+        """
+        Obtiene las métricas de cada día (para gráficos de tendencia)
+        
+        Args:
+            fecha_desde: Fecha de inicio (por defecto, 90 días atrás)
+            fecha_hasta: Fecha de fin
+            control_id: ID del control (opcional, si no se especifica suma todos)
+            
+        Returns:
+            List[ResumenDiarioDTO]: Un resumen por día con ejecuciones, en orden cronológico
+        """
+        if not fecha_desde:
+            fecha_desde = datetime.now() - timedelta(days=90)
+        if not fecha_hasta:
+            fecha_hasta = datetime.now()
+        
+        dias: Dict = {}
+        for fila in self.resultado_repository.obtener_resumen_diario(
+            fecha_desde.date(), fecha_hasta.date(), control_id
+        ):
+            dias.setdefault(fila['dia'], []).append(fila)
+        
+        tendencia = []
+        for dia in sorted(dias):
+            suma = self._sumar_dias(dias[dia])
+            por_estado = suma['por_estado']
+            tendencia.append(ResumenDiarioDTO(
+                dia=dia,
+                total_ejecuciones=suma['total_ejecuciones'],
+                ejecuciones_exitosas=por_estado.get(EstadoEjecucion.EXITOSO.value, 0),
+                ejecuciones_con_error=por_estado.get(EstadoEjecucion.ERROR.value, 0),
+                controles_disparados=por_estado.get(EstadoEjecucion.CONTROL_DISPARADO.value, 0),
+                sin_datos=por_estado.get(EstadoEjecucion.SIN_DATOS.value, 0),
+                tiempo_promedio_ms=suma['tiempo_promedio_ms'],
+                tiempo_maximo_ms=suma['tiempo_maximo_ms'],
+                total_filas_disparadas=suma['total_filas_disparadas']
+            ))
+        return tendencia
+    
+    def _usar_resumen_diario(self, fecha_desde: datetime, fecha_hasta: datetime) -> bool:
+        """Indica si el rango es lo bastante largo para leer solo el resumen diario"""
+        return (fecha_hasta - fecha_desde) > timedelta(days=self.dias_detalle)
+    
+    def _sumar_dias(self, dias: List[dict]) -> dict:
+        """Suma filas del resumen diario con el formato de obtener_estadisticas / obtener_resumen_por_control"""
+        por_estado: Dict[str, int] = {}
+        tiempo_suma = 0.0
+        con_tiempo = 0
+        tiempo_maximo = 0.0
+        filas = 0
+        ultimo = None
+        for dia in dias:
+            for estado, cantidad in dia['por_estado'].items():
+                por_estado[estado] = por_estado.get(estado, 0) + cantidad
+            tiempo_suma += dia['tiempo_suma_ms']
+            con_tiempo += dia['ejecuciones_con_tiempo']
+            tiempo_maximo = max(tiempo_maximo, dia['tiempo_max_ms'] or 0.0)
+            filas += dia['total_filas_disparadas']
+            if dia['ultima_ejecucion'] and (ultimo is None or dia['ultima_ejecucion'] > ultimo['ultima_ejecucion']):
+                ultimo = dia
+        
+        return {
+            'control_id': ultimo['control_id'] if ultimo else None,
+            'control_nombre': ultimo['control_nombre'] if ultimo else "",
+            'ultimo_estado': ultimo['ultimo_estado'] if ultimo else None,
+            'total_ejecuciones': sum(dia['total_ejecuciones'] for dia in dias),
+            'por_estado': por_estado,
+            'tiempo_promedio_ms': tiempo_suma / con_tiempo if con_tiempo else 0.0,
+            'tiempo_p95_ms': None,  # No se puede obtener del resumen diario
+            'tiempo_maximo_ms': tiempo_maximo,
+            'total_filas_disparadas': filas,
+            'ultima_ejecucion': ultimo['ultima_ejecucion'] if ultimo else None
+        }
+    
     def obtener_ultimos_por_control(self, control_id: int, limite: int = 10) -> List[ResultadoEjecucionResponseDTO]:
         """
         Obtiene los últimos resultados de un control específico
@@ -182,6 +240,7 @@ class ObtenerHistorialEjecucionUseCase:
             List[ResultadoEjecucionResponseDTO]: Últimos resultados
         """
         resultados = self.resultado_repository.obtener_ultimos_por_control(control_id, limite)
+        resultados = [self.resultado_repository.cargar_datos(resultado) for resultado in resultados]
         return [self._resultado_to_dto(resultado, True) for resultado in resultados]
     
     def _resultado_to_dto(self, resultado, incluir_detalles: bool = False) -> ResultadoEjecucionResponseDTO:
@@ -0,0 +1,215 @@
+"""
+Entidad BufferFilas
+
+Filas de resultado de una consulta en formato compacto: los nombres de
+columna se guardan una sola vez y cada fila es una tupla de valores. La
+memoria está acotada: las primeras filas se conservan en memoria y el resto
+se vuelca a un archivo temporal en disco.
+
+Por compatibilidad se recorre como una lista de filas tipo diccionario
+(FilaResultado: vista columna -> valor sobre la tupla, sin copiarla), de
+modo que el generador de Excel, el historial y la GUI pueden consumirla
+sin cargar todas las filas a la vez.
+
+Al serializarla (por ejemplo para generar un reporte en otro proceso) se
+copian solo las filas en memoria: la copia lee las volcadas directamente
+del archivo del original, que debe seguir vivo mientras se use la copia.
+"""
+import itertools
+import os
+import pickle
+import tempfile
+import weakref
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def _eliminar_archivo(ruta: str) -> None:
+    """Elimina el archivo temporal del buffer ignorando errores"""
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+class FilaResultado(Mapping):
+    """Vista de solo lectura columna -> valor sobre la tupla de una fila"""
+
+    __slots__ = ('_indices', '_valores')
+
+    def __init__(self, indices: Dict[str, int], valores: Tuple[Any, ...]):
+        self._indices = indices  # Compartido por todas las filas del resultado
+        self._valores = valores
+
+    def __getitem__(self, columna: str) -> Any:
+        return self._valores[self._indices[columna]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._indices)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __contains__(self, columna: object) -> bool:
+        return columna in self._indices
+
+    def valores(self) -> Tuple[Any, ...]:
+        """Valores de la fila en el orden de las columnas"""
+        return self._valores
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class BufferFilas:
+    """Filas de un resultado con ventana en memoria y volcado a disco"""
+
+    def __init__(self, columnas: Sequence[str], filas_en_memoria: int = 10000,
+                 directorio_temporal: Optional[str] = None):
+        """
+        Args:
+            columnas: Nombres de columna, en el orden de los valores de cada fila
+            filas_en_memoria: Filas que se conservan en memoria antes de volcar a disco
+            directorio_temporal: Carpeta del archivo de volcado (por defecto la del sistema)
+        """
+        self.columnas: List[str] = list(columnas)
+        self._indices: Dict[str, int] = {columna: i for i, columna in enumerate(self.columnas)}
+        self.filas_en_memoria = max(0, filas_en_memoria)
+        self.directorio_temporal = directorio_temporal
+        self.truncado = False  # Se alcanzó el máximo de filas de la consulta
+
+        self._memoria: List[Tuple[Any, ...]] = []
+        self._total = 0
+        self._ruta: Optional[str] = None
+        self._archivo = None
+        self._finalizador = None
+
+    def agregar(self, filas: Sequence[Sequence[Any]]) -> None:
+        """Agrega un lote de filas (secuencias de valores en el orden de las columnas)"""
+        if not filas:
+            return
+        filas = [tuple(fila) for fila in filas]
+        self._total += len(filas)
+
+        libres = self.filas_en_memoria - len(self._memoria)
+        if libres > 0 and self._archivo is None:
+            self._memoria.extend(filas[:libres])
+            filas = filas[libres:]
+
+        if filas:
+            self._volcar(filas)
+
+    @classmethod
+    def desde_diccionarios(cls, filas: Iterable[Dict[str, Any]], filas_en_memoria: int = 10000) -> "BufferFilas":
+        """Crea un buffer a partir de filas como diccionarios (columnas de la primera fila)"""
+        filas = iter(filas)
+        primera = next(filas, None)
+        if primera is None:
+            return cls([], filas_en_memoria)
+
+        buffer = cls(list(primera.keys()), filas_en_memoria)
+        columnas = buffer.columnas
+        lote = []
+        for fila in itertools.chain([primera], filas):
+            lote.append(tuple(fila.get(columna) for columna in columnas))
+            if len(lote) >= 1000:
+                buffer.agregar(lote)
+                lote = []
+        buffer.agregar(lote)
+        return buffer
+
+    def columna(self, nombre: str) -> Iterator[Any]:
+        """Recorre los valores de una columna"""
+        indice = self._indices[nombre]
+        for fila in self.filas():
+            yield fila[indice]
+
+    def filas(self) -> Iterator[Tuple[Any, ...]]:
+        """Recorre las filas como tuplas (más liviano que los diccionarios)"""
+        yield from self._memoria
+        if self._ruta is None:
+            return
+
+        if self._archivo is not None:
+            self._archivo.flush()
+        with open(self._ruta, "rb") as archivo:
+            while True:
+                try:
+                    lote = pickle.load(archivo)
+                except EOFError:
+                    return
+                yield from lote
+
+    @property
+    def en_disco(self) -> bool:
+        """Indica si parte de las filas se volcó a disco"""
+        return self._ruta is not None
+
+    @property
+    def filas_en_disco(self) -> int:
+        """Cantidad de filas volcadas a disco"""
+        return len(self) - len(self._memoria)
+
+    def cerrar(self) -> None:
+        """Libera el archivo temporal; las filas en memoria siguen disponibles"""
+        if self._archivo is not None:
+            self._archivo.close()
+        if self._finalizador is not None:
+            self._finalizador()
+        self._archivo = None
+        self._ruta = None
+        self._total = len(self._memoria)
+
+    def _volcar(self, filas: List[Tuple[Any, ...]]) -> None:
+        """Escribe un lote de filas al archivo temporal"""
+        if self._archivo is None:
+            if self._ruta is not None:
+                raise RuntimeError("La copia serializada de un buffer es de solo lectura")
+            descriptor, self._ruta = tempfile.mkstemp(
+                prefix="resultado_", suffix=".filas", dir=self.directorio_temporal
+            )
+            self._archivo = os.fdopen(descriptor, "wb")
+            self._finalizador = weakref.finalize(self, _eliminar_archivo, self._ruta)
+        pickle.dump(filas, self._archivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Estado para serializar: el archivo de volcado se comparte por ruta"""
+        if self._archivo is not None:
+            self._archivo.flush()
+        estado = dict(self.__dict__)
+        estado['_archivo'] = None
+        estado['_finalizador'] = None  # El archivo lo elimina solo el original
+        return estado
+
+    def _fila(self, fila: Tuple[Any, ...]) -> FilaResultado:
+        return FilaResultado(self._indices, fila)
+
+    def __iter__(self) -> Iterator[FilaResultado]:
+        for fila in self.filas():
+            yield self._fila(fila)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            if paso <= 0:
+                return list(self)[indice]
+            return [self._fila(fila)
+                    for fila in itertools.islice(self.filas(), inicio, fin, paso)]
+
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice de fila fuera de rango")
+        if indice < len(self._memoria):
+            return self._fila(self._memoria[indice])
+        return self._fila(next(itertools.islice(self.filas(), indice, None)))
+
+    def __repr__(self) -> str:
+        return (f"BufferFilas(filas={len(self)}, columnas={len(self.columnas)}, "
+                f"en_disco={self.filas_en_disco}, truncado={self.truncado})")
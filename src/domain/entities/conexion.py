@@ -4,7 +4,7 @@ Entidad Conexión
 Representa una conexión a base de datos
 """
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional
 
 
 @dataclass
@@ -21,12 +21,24 @@ class Conexion:
     tipo_motor: str = "postgresql"  # postgresql, mysql, sqlite, sqlserver, iseries
     driver_type: str = "default"  # Para IBM i: "odbc" o "jdbc", para otros: "default"
     activa: bool = True
+    propiedades_jdbc: str = ""  # Para IBM i JDBC: "block size=512;prefetch=true"
     
     def es_configuracion_valida(self) -> bool:
         """Valida que la configuración de conexión sea correcta"""
         campos_obligatorios = [self.nombre, self.base_datos, self.servidor, self.usuario]
         return all(campo.strip() for campo in campos_obligatorios if isinstance(campo, str))
     
+    def obtener_propiedades_jdbc(self) -> Dict[str, str]:
+        """Convierte propiedades_jdbc ("clave=valor;clave=valor") en diccionario"""
+        propiedades = {}
+        for par in (self.propiedades_jdbc or "").split(";"):
+            if "=" not in par:
+                continue
+            clave, valor = par.split("=", 1)
+            if clave.strip():
+                propiedades[clave.strip().lower()] = valor.strip()
+        return propiedades
+    
     def obtener_string_conexion(self) -> str:
         """Genera string de conexión según el tipo de motor"""
         if self.tipo_motor.lower() == "postgresql":
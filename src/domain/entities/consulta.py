@@ -19,6 +19,7 @@ class Consulta:
     control_id: Optional[int] = None
     conexion_id: Optional[int] = None
     activa: bool = True
+    max_filas: Optional[int] = None  # Máximo de filas a leer (None = sin límite)
     
     def es_sql_valido(self) -> bool:
         """Validación básica de SQL"""
@@ -61,11 +62,12 @@ class Consulta:
         return any(op in sql_upper for op in operaciones_peligrosas)
     
     def reemplazar_parametros(self, parametros: dict) -> str:
-        """Reemplaza los parámetros en el SQL con sus valores"""
-        sql_resultado = self.sql
-        for nombre, valor in parametros.items():
-            sql_resultado = sql_resultado.replace(f':{nombre}', str(valor))
-        return sql_resultado
+        """Reemplaza los parámetros en el SQL con sus valores (solo para mostrar)"""
+        # Reemplazo por nombre completo: :fecha no debe afectar a :fecha_fin
+        def reemplazar(coincidencia):
+            nombre = coincidencia.group(1)
+            return str(parametros[nombre]) if nombre in parametros else coincidencia.group(0)
+        return re.sub(r'(?<!:):(\w+)', reemplazar, self.sql)
     
     def __str__(self) -> str:
         return f"Consulta(nombre={self.nombre}, activa={self.activa})"
\ No newline at end of file
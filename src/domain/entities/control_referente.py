@@ -4,10 +4,19 @@ Entidad ControlReferente
 Representa la asociación entre Control y Referente
 """
 from dataclasses import dataclass
+from enum import Enum
 from typing import Optional
 from datetime import datetime
 
 
+class FormatoArchivo(Enum):
+    """Formatos del archivo de resultados que recibe un referente"""
+    XLSX = "xlsx"
+    CSV = "csv"
+    CSV_GZ = "csv.gz"
+    JSONL = "jsonl"
+
+
 @dataclass
 class ControlReferente:
     """Entidad ControlReferente - Representa la asociación N:M entre Control y Referente"""
@@ -20,6 +29,7 @@ class ControlReferente:
     notificar_por_email: bool = True
     notificar_por_archivo: bool = False
     observaciones: str = ""
+    formato_archivo: FormatoArchivo = FormatoArchivo.XLSX
     
     def es_valida(self) -> bool:
         """Validación de la asociación"""
@@ -0,0 +1,47 @@
+"""
+Entidad PlanEjecucion
+
+Metadatos completos para ejecutar un control, cargados de una sola vez:
+el control, su conexión, sus parámetros, las consultas asociadas con sus
+conexiones específicas y los referentes a notificar. El motor ejecuta con
+el plan sin volver a consultar el repositorio por cada consulta.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.domain.entities.control import Control
+from src.domain.entities.conexion import Conexion
+from src.domain.entities.consulta import Consulta
+from src.domain.entities.consulta_control import ConsultaControl
+from src.domain.entities.control_referente import ControlReferente
+from src.domain.entities.parametro import Parametro
+from src.domain.entities.referente import Referente
+
+
+@dataclass
+class PlanEjecucion:
+    """Entidad PlanEjecucion - Grafo de metadatos de un control listo para ejecutar"""
+
+    control: Control
+    conexion: Optional[Conexion] = None  # Conexión del control
+    parametros: List[Parametro] = field(default_factory=list)
+    asociaciones: List[ConsultaControl] = field(default_factory=list)  # Activas, por orden
+    consultas: Dict[int, Consulta] = field(default_factory=dict)
+    conexiones: Dict[int, Conexion] = field(default_factory=dict)  # Control y consultas
+    # None: asociaciones de referentes no cargadas (se consultan al generar archivos)
+    asociaciones_referentes: Optional[List[ControlReferente]] = None
+    referentes: Dict[int, Referente] = field(default_factory=dict)
+
+    def consulta(self, consulta_id: int) -> Optional[Consulta]:
+        """Consulta asociada al control por su ID"""
+        return self.consultas.get(consulta_id)
+
+    def conexion_de(self, consulta: Consulta) -> Optional[Conexion]:
+        """Conexión específica de una consulta (None si usa la del control)"""
+        if consulta.conexion_id is None:
+            return None
+        return self.conexiones.get(consulta.conexion_id)
+
+    def __str__(self) -> str:
+        return (f"PlanEjecucion(control={self.control.nombre}, consultas={len(self.consultas)}, "
+                f"referentes={len(self.referentes)})")
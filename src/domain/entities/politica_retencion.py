@@ -0,0 +1,54 @@
+"""
+Entidad PoliticaRetencion
+
+Define cuántos días se conserva el historial de ejecuciones. Se puede fijar
+una retención por control y otra por estado; la del control tiene prioridad
+sobre la del estado y ésta sobre la retención por defecto. None significa
+conservar para siempre.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+
+@dataclass
+class PoliticaRetencion:
+    """Entidad PoliticaRetencion - Días que se conserva cada ejecución del historial"""
+
+    dias_por_defecto: Optional[int] = 90
+    dias_por_estado: Dict[str, Optional[int]] = field(default_factory=dict)  # 'error' -> 180
+    dias_por_control: Dict[int, Optional[int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        """Validaciones de la entidad"""
+        dias = [self.dias_por_defecto, *self.dias_por_estado.values(), *self.dias_por_control.values()]
+        if any(d is not None and d < 0 for d in dias):
+            raise ValueError("Los días de retención no pueden ser negativos")
+        self.dias_por_estado = {estado.lower(): d for estado, d in self.dias_por_estado.items()}
+        self.dias_por_control = {int(control_id): d for control_id, d in self.dias_por_control.items()}
+
+    def dias_para(self, control_id: Optional[int], estado: str) -> Optional[int]:
+        """Días de retención de una ejecución (None: no se depura)"""
+        if control_id in self.dias_por_control:
+            return self.dias_por_control[control_id]
+        if estado.lower() in self.dias_por_estado:
+            return self.dias_por_estado[estado.lower()]
+        return self.dias_por_defecto
+
+    @staticmethod
+    def limite(dias: int, ahora: Optional[datetime] = None) -> datetime:
+        """Fecha a partir de la cual se conservan las ejecuciones"""
+        return (ahora or datetime.now()) - timedelta(days=dias)
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> 'PoliticaRetencion':
+        """Crea la política desde una configuración (por ejemplo, un JSON)"""
+        return cls(
+            dias_por_defecto=datos.get('dias_por_defecto', 90),
+            dias_por_estado=dict(datos.get('dias_por_estado', {})),
+            dias_por_control=dict(datos.get('dias_por_control', {}))
+        )
+
+    def __str__(self) -> str:
+        return (f"PoliticaRetencion(defecto={self.dias_por_defecto}, estados={self.dias_por_estado}, "
+                f"controles={self.dias_por_control})")
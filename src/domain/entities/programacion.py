@@ -4,8 +4,9 @@ Entidad Programacion
 Representa la configuración de horarios para ejecución automática de controles.
 Soporta diferentes tipos de programación: diaria, semanal, mensual, por intervalos.
 """
+import calendar
 from dataclasses import dataclass
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from enum import Enum
 from typing import Optional, List
 
@@ -231,7 +232,6 @@ class Programacion:
         for dia_programado in self.dias_mes:
             if dia_programado == -1:
                 # Fin de mes: verificar si es el último día del mes
-                import calendar
                 ultimo_dia_mes = calendar.monthrange(fecha_actual.year, fecha_actual.month)[1]
                 if dia_actual == ultimo_dia_mes:
                     return self._debe_ejecutarse_diaria(fecha_actual)
@@ -263,37 +263,129 @@ class Programacion:
         self.fecha_modificacion = fecha_ejecucion
         
         # Calcular próxima ejecución si es aplicable
-        self._calcular_proxima_ejecucion()
+        self._calcular_proxima_ejecucion(fecha_ejecucion)
     
-    def _calcular_proxima_ejecucion(self):
-        """Calcula la próxima fecha de ejecución"""
+    def _calcular_proxima_ejecucion(self, desde: datetime = None):
+        """
+        Calcula y asigna la próxima fecha de ejecución
+        
+        Args:
+            desde: Instante de referencia (por defecto datetime.now())
+        """
+        self.proxima_ejecucion = self.calcular_proxima_ejecucion(desde)
+    
+    def calcular_proxima_ejecucion(self, desde: datetime = None) -> Optional[datetime]:
+        """
+        Calcula la primera ejecución posterior a un instante dado
+        
+        Nunca devuelve una ocurrencia anterior o igual a la última ejecución,
+        por lo que una misma ocurrencia no se dispara dos veces.
+        
+        Args:
+            desde: Instante de referencia (por defecto datetime.now())
+            
+        Returns:
+            datetime: Próxima ejecución, o None si no habrá más ejecuciones
+        """
         if not self.activo:
-            self.proxima_ejecucion = None
-            return
+            return None
         
-        ahora = datetime.now()
+        if desde is None:
+            desde = datetime.now()
         
-        if self.tipo_programacion == TipoProgramacion.UNICA_VEZ:
-            self.proxima_ejecucion = None  # Solo se ejecuta una vez
+        if self.ultima_ejecucion and self.ultima_ejecucion > desde:
+            desde = self.ultima_ejecucion
         
-        elif self.tipo_programacion == TipoProgramacion.DIARIA:
-            proxima = datetime.combine(
-                ahora.date(),
-                self.hora_ejecucion
-            )
-            if proxima <= ahora:
-                proxima = datetime.combine(
-                    ahora.date().replace(day=ahora.day + 1),
-                    self.hora_ejecucion
-                )
-            self.proxima_ejecucion = proxima
+        proxima = None
+        
+        if self.tipo_programacion == TipoProgramacion.UNICA_VEZ:
+            proxima = self._proxima_unica_vez(desde)
         
         elif self.tipo_programacion == TipoProgramacion.INTERVALO:
-            if self.ultima_ejecucion:
-                self.proxima_ejecucion = self.ultima_ejecucion.replace(
-                    minute=self.ultima_ejecucion.minute + self.intervalo_minutos
-                )
-            else:
-                self.proxima_ejecucion = ahora
+            proxima = self._proxima_intervalo(desde)
+        
+        elif self.hora_ejecucion is not None:
+            # Tipos basados en calendario: no antes del inicio de la programación
+            if self.fecha_inicio and self.fecha_inicio > desde:
+                desde = self.fecha_inicio - timedelta(microseconds=1)
+            
+            if self.tipo_programacion == TipoProgramacion.DIARIA:
+                proxima = self._proxima_diaria(desde)
+            elif self.tipo_programacion == TipoProgramacion.SEMANAL:
+                proxima = self._proxima_semanal(desde)
+            elif self.tipo_programacion == TipoProgramacion.MENSUAL:
+                proxima = self._proxima_mensual(desde)
+        
+        if proxima and self.fecha_fin and proxima > self.fecha_fin:
+            return None
+        
+        return proxima
+    
+    def _proxima_unica_vez(self, desde: datetime) -> Optional[datetime]:
+        """Próxima ejecución para programación única"""
+        if self.total_ejecuciones > 0 or not self.fecha_inicio or not self.hora_ejecucion:
+            return None
+        
+        fecha_programada = datetime.combine(self.fecha_inicio.date(), self.hora_ejecucion)
+        return fecha_programada if fecha_programada > desde else None
+    
+    def _proxima_diaria(self, desde: datetime) -> datetime:
+        """Próxima ejecución para programación diaria"""
+        proxima = datetime.combine(desde.date(), self.hora_ejecucion)
+        if proxima <= desde:
+            proxima = datetime.combine(desde.date() + timedelta(days=1), self.hora_ejecucion)
+        return proxima
+    
+    def _proxima_semanal(self, desde: datetime) -> Optional[datetime]:
+        """Próxima ejecución para programación semanal"""
+        if not self.dias_semana:
+            return None
+        
+        dias = {dia.value for dia in self.dias_semana}
+        # Revisar hoy y los 7 días siguientes (cubre la misma semana siguiente)
+        for offset in range(8):
+            fecha = desde.date() + timedelta(days=offset)
+            if fecha.isoweekday() in dias:
+                proxima = datetime.combine(fecha, self.hora_ejecucion)
+                if proxima > desde:
+                    return proxima
+        return None
+    
+    def _proxima_mensual(self, desde: datetime) -> Optional[datetime]:
+        """
+        Próxima ejecución para programación mensual
+        
+        El día -1 representa el último día del mes. Los días que no existen
+        en un mes (ej. 31 en abril) se omiten en ese mes.
+        """
+        if not self.dias_mes:
+            return None
+        
+        anio, mes = desde.year, desde.month
+        # Como máximo hace falta revisar 12 meses (ej. día 31 o 29 de febrero no aplica)
+        for _ in range(13):
+            ultimo_dia = calendar.monthrange(anio, mes)[1]
+            dias = sorted({ultimo_dia if dia == -1 else dia for dia in self.dias_mes if dia == -1 or dia <= ultimo_dia})
+            for dia in dias:
+                proxima = datetime.combine(datetime(anio, mes, dia).date(), self.hora_ejecucion)
+                if proxima > desde:
+                    return proxima
+            mes += 1
+            if mes > 12:
+                mes = 1
+                anio += 1
+        return None
+    
+    def _proxima_intervalo(self, desde: datetime) -> Optional[datetime]:
+        """Próxima ejecución para programación por intervalo"""
+        if not self.intervalo_minutos or self.intervalo_minutos <= 0:
+            return None
+        
+        if self.ultima_ejecucion:
+            proxima = self.ultima_ejecucion + timedelta(minutes=self.intervalo_minutos)
+        else:
+            # Primera ejecución: en cuanto comience la vigencia
+            proxima = self.fecha_inicio or desde
         
-        # Para semanal y mensual sería más complejo, lo implementamos después si es necesario
\ No newline at end of file
+        # Si la ejecución quedó atrasada, ejecutar lo antes posible
+        return max(proxima, desde)
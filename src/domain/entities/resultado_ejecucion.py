@@ -24,9 +24,18 @@ class ResultadoConsulta:
     consulta_nombre: str
     sql_ejecutado: str
     filas_afectadas: int
+    # BufferFilas (columnas una vez y filas como tuplas) o lista de diccionarios
     datos: List[Dict[str, Any]] = field(default_factory=list)
     tiempo_ejecucion_ms: float = 0.0
     error: Optional[str] = None
+    truncado: bool = False  # Se alcanzó el máximo de filas de la consulta
+    
+    @property
+    def columnas(self) -> List[str]:
+        """Nombres de columna del resultado"""
+        if hasattr(self.datos, 'columnas'):
+            return list(self.datos.columnas)
+        return list(self.datos[0].keys()) if self.datos else []
 
 
 @dataclass
@@ -56,6 +65,10 @@ class ResultadoEjecucion:
     conexion_id: int = 0
     conexion_nombre: str = ""
     
+    # False si se obtuvo de un listado del historial: las filas de las consultas
+    # (ResultadoConsulta.datos) se cargan a pedido desde el repositorio
+    datos_cargados: bool = True
+    
     def fue_exitoso(self) -> bool:
         """Indica si la ejecución fue exitosa"""
         return self.estado == EstadoEjecucion.EXITOSO
@@ -29,6 +29,11 @@ class ControlRepository(ABC):
         """Obtiene un control por su nombre"""
         pass
     
+    @abstractmethod
+    def obtener_por_parametro(self, parametro_id: int) -> List[Control]:
+        """Obtiene los controles que usan un parámetro"""
+        pass
+    
     @abstractmethod
     def guardar(self, control: Control) -> Control:
         """Guarda un control (crear o actualizar)"""
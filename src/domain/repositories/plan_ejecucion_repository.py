@@ -0,0 +1,15 @@
+"""
+Repositorio abstracto para PlanEjecucion
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+from src.domain.entities.plan_ejecucion import PlanEjecucion
+
+
+class PlanEjecucionRepository(ABC):
+    """Interface abstracta para cargar el plan de ejecución de un control"""
+
+    @abstractmethod
+    def obtener_por_control(self, control_id: int) -> Optional[PlanEjecucion]:
+        """Obtiene el plan de ejecución completo de un control (None si no existe)"""
+        pass
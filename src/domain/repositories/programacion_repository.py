@@ -86,6 +86,21 @@ class ProgramacionRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def obtener_firma_cambios(self) -> tuple:
+        """
+        Obtiene una firma barata del estado de las programaciones
+        
+        La firma cambia cuando se crea, modifica o elimina alguna programación,
+        lo que permite detectar cambios sin cargar todas las filas. Registrar
+        ejecuciones (última ejecución, total y la próxima ejecución calculada
+        por el motor) no la cambia.
+        
+        Returns:
+            tuple: Firma comparable del estado actual
+        """
+        pass
+    
     @abstractmethod
     def actualizar(self, programacion: Programacion) -> Programacion:
         """
@@ -99,6 +114,19 @@ class ProgramacionRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def actualizar_lote(self, programaciones: List[Programacion]) -> List[Programacion]:
+        """
+        Actualiza varias programaciones existentes en una única transacción
+        
+        Args:
+            programaciones: Programaciones con datos actualizados
+            
+        Returns:
+            List[Programacion]: Programaciones actualizadas
+        """
+        pass
+    
     @abstractmethod
     def eliminar(self, id: int) -> bool:
         """
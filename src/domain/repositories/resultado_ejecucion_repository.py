@@ -2,8 +2,8 @@
 Repositorio abstracto para ResultadoEjecucion
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import date, datetime
 from src.domain.entities.resultado_ejecucion import ResultadoEjecucion
 
 
@@ -15,6 +15,11 @@ class ResultadoEjecucionRepository(ABC):
         """Obtiene un resultado por su ID"""
         pass
     
+    @abstractmethod
+    def cargar_datos(self, resultado: ResultadoEjecucion) -> ResultadoEjecucion:
+        """Carga las filas de las consultas de un resultado obtenido en un listado"""
+        pass
+    
     @abstractmethod
     def obtener_todos(self) -> List[ResultadoEjecucion]:
         """Obtiene todos los resultados"""
@@ -39,11 +44,85 @@ class ResultadoEjecucionRepository(ABC):
         """Obtiene resultados por estado (exitoso, error, control_disparado)"""
         pass
     
+    @abstractmethod
+    def buscar(
+        self,
+        control_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        limite: Optional[int] = 50,
+        despues_de: Optional[Tuple[datetime, int]] = None,
+        antes_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[ResultadoEjecucion]:
+        """
+        Obtiene una página de resultados con los filtros combinados
+        
+        Los resultados se ordenan del más reciente al más antiguo por
+        (fecha_ejecucion, id). despues_de / antes_de son el (fecha, id) del
+        último / primer resultado de la página actual y devuelven la página
+        siguiente / anterior.
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_estadisticas(self, fecha_desde: datetime, fecha_hasta: datetime) -> dict:
+        """
+        Obtiene estadísticas agregadas de las ejecuciones en un rango de fechas
+        
+        Returns:
+            dict: total_ejecuciones, por_estado (estado -> cantidad),
+            tiempo_promedio_ms, tiempo_p95_ms, ultima_ejecucion
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_resumen_por_control(self, fecha_desde: datetime, fecha_hasta: datetime) -> List[dict]:
+        """
+        Obtiene estadísticas agregadas por control en un rango de fechas
+        
+        Returns:
+            List[dict]: Por control, control_id y control_nombre (de la última
+            ejecución), ultimo_estado y los mismos campos que obtener_estadisticas
+        """
+        pass
+    
+    @abstractmethod
+    def obtener_resumen_diario(
+        self,
+        fecha_desde: date,
+        fecha_hasta: date,
+        control_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Obtiene las métricas diarias por control (sin leer las ejecuciones)
+        
+        Returns:
+            List[dict]: Por (control_id, dia): control_nombre, total_ejecuciones,
+            por_estado, tiempo_suma_ms, tiempo_min_ms, tiempo_max_ms, ejecuciones_con_tiempo,
+            total_filas_disparadas, ultima_ejecucion, ultimo_estado
+        """
+        pass
+    
+    @abstractmethod
+    def reconstruir_resumen_diario(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> int:
+        """Recalcula el resumen diario a partir de las ejecuciones guardadas; retorna los días recalculados"""
+        pass
+    
     @abstractmethod
     def guardar(self, resultado: ResultadoEjecucion) -> ResultadoEjecucion:
         """Guarda un resultado de ejecución"""
         pass
     
+    @abstractmethod
+    def guardar_lote(self, resultados: List[ResultadoEjecucion]) -> List[ResultadoEjecucion]:
+        """Guarda varios resultados de ejecución en una única transacción"""
+        pass
+    
     @abstractmethod
     def eliminar(self, id: int) -> bool:
         """Elimina un resultado por su ID"""
@@ -0,0 +1,36 @@
+"""
+Interfaz de la cola de reportes de los controles
+
+El servicio de ejecución encola el reporte de un control disparado y sigue;
+la implementación (generacion_reportes_service en infraestructura) lo genera
+en el formato pedido y lo entrega en las carpetas de los referentes.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.domain.entities.control_referente import FormatoArchivo
+from src.domain.entities.referente import Referente
+
+
+class ColaReportesService(ABC):
+    """Interfaz abstracta para encolar reportes de controles"""
+
+    @abstractmethod
+    def encolar(
+        self,
+        control_nombre: str,
+        consultas_resultados: List[Dict[str, Any]],
+        referentes: List[Referente],
+        fecha_ejecucion: Optional[datetime] = None,
+        tiempo_ejecucion_ms: float = 0.0,
+        timeout: Optional[float] = None,
+        formato: FormatoArchivo = FormatoArchivo.XLSX
+    ) -> Any:
+        """
+        Encola el reporte de una ejecución para todos los referentes dados
+
+        Returns:
+            Trabajo de reporte con id, estado y error (si falló)
+        """
+        pass
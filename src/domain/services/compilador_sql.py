@@ -0,0 +1,318 @@
+"""
+Compilador de sentencias SQL con parámetros
+
+Convierte el SQL de una consulta (parámetros con formato :nombre) al estilo
+de parámetros del driver, para ejecutarlo con valores enlazados en lugar de
+insertarlos en el texto. Así el texto de la sentencia no cambia entre
+ejecuciones y el servidor puede reutilizar el plan.
+
+Estilos soportados:
+- qmark:    ? por cada aparición (JDBC, pyodbc, sqlite3)
+- pyformat: %(nombre)s (psycopg2)
+- numeric:  $1, $2... por nombre distinto (PREPARE de PostgreSQL)
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from src.domain.entities.parametro import TipoParametro
+
+
+ESTILOS_SOPORTADOS = ('qmark', 'pyformat', 'numeric')
+
+_PATRON_NOMBRE = re.compile(r'\w+')
+_PATRON_LITERAL_PARAMETRO = re.compile(r"^'\s*:(\w+)\s*'$")
+# Literales, identificadores entre comillas y comentarios: no contienen palabras clave
+_PATRON_NO_CODIGO = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_PATRON_ESCRITURA = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE|INTO)\b')
+
+
+def es_consulta_lectura(sql: str) -> bool:
+    """Determina si una consulta SQL es de lectura (devuelve datos)"""
+    sql_upper = sql.upper().strip()
+
+    # Consultas que devuelven datos
+    if sql_upper.startswith('SELECT'):
+        return True
+
+    # CTE (Common Table Expressions) que terminan en SELECT
+    if sql_upper.startswith('WITH') and 'SELECT' in sql_upper:
+        return True
+
+    # Comandos EXPLAIN, SHOW, DESCRIBE que devuelven datos
+    if any(sql_upper.startswith(cmd) for cmd in ['EXPLAIN', 'SHOW', 'DESCRIBE', 'DESC']):
+        return True
+
+    return False
+
+
+def es_lectura_simple(sql: str) -> bool:
+    """
+    Determina si una consulta solo lee: SELECT, VALUES o WITH sin sentencias que modifiquen datos
+
+    Es lo que admite un cursor del lado del servidor (DECLARE ... CURSOR FOR
+    de PostgreSQL). EXPLAIN, SHOW o un WITH con INSERT/UPDATE ... RETURNING
+    devuelven datos pero no lo son; ante la duda (SELECT ... INTO, FOR UPDATE)
+    retorna False.
+    """
+    codigo = _PATRON_NO_CODIGO.sub(' ', sql).upper()
+    palabras = codigo.split(None, 1)
+    comando = palabras[0] if palabras else ''
+    return comando in ('SELECT', 'VALUES', 'WITH') and not _PATRON_ESCRITURA.search(codigo)
+
+
+def es_procedimiento(sql: str) -> bool:
+    """Determina si una consulta SQL es un procedimiento almacenado"""
+    sql_upper = sql.upper().strip()
+
+    # Stored procedures y funciones
+    if any(sql_upper.startswith(cmd) for cmd in ['CALL', 'EXECUTE', 'EXEC']):
+        return True
+
+    return False
+
+
+@dataclass(frozen=True)
+class SentenciaCompilada:
+    """SQL compilado al estilo de parámetros de un driver"""
+    sql: str
+    estilo: str
+    parametros: Tuple[str, ...]  # Nombres en el orden en que se enlazan
+    sql_original: str
+    nombres_conocidos: FrozenSet[str] = field(default_factory=frozenset)
+    es_lectura: bool = False
+    es_lectura_simple: bool = False
+    es_procedimiento: bool = False
+
+    def argumentos(
+        self,
+        valores: Dict[str, Any],
+        tipos: Optional[Dict[str, TipoParametro]] = None,
+        fechas_como_texto: bool = False
+    ) -> Union[Tuple[Any, ...], Dict[str, Any], None]:
+        """
+        Construye los argumentos a enlazar a partir de los valores de los parámetros
+
+        Args:
+            valores: Valores por nombre de parámetro
+            tipos: Tipo de cada parámetro (los que no figuran se enlazan tal cual)
+            fechas_como_texto: Enlazar fechas como texto ISO (drivers sin soporte
+                de date/datetime de Python, como JDBC vía jaydebeapi o sqlite3)
+
+        Returns:
+            Tupla (qmark/numeric), diccionario (pyformat) o None si no hay parámetros
+        """
+        if not self.parametros:
+            return None
+
+        tipos = tipos or {}
+        convertidos = {
+            nombre: convertir_valor(nombre, valores.get(nombre), tipos.get(nombre), fechas_como_texto)
+            for nombre in set(self.parametros)
+        }
+
+        if self.estilo == 'pyformat':
+            return convertidos
+        return tuple(convertidos[nombre] for nombre in self.parametros)
+
+
+def compilar_sentencia(sql: str, estilo: str, nombres: Any) -> SentenciaCompilada:
+    """
+    Compila el SQL de una consulta al estilo de parámetros indicado
+
+    Solo se enlazan los :nombre que correspondan a parámetros conocidos; el
+    resto del texto (literales, comentarios, casts ::tipo) queda intacto.
+    Un literal que contiene únicamente un parámetro (':fecha') también se
+    enlaza, por compatibilidad con consultas escritas para el reemplazo textual.
+
+    Args:
+        sql: SQL con parámetros :nombre
+        estilo: 'qmark', 'pyformat' o 'numeric'
+        nombres: Nombres de parámetros conocidos (cualquier iterable)
+    """
+    if estilo not in ESTILOS_SOPORTADOS:
+        raise ValueError(f"Estilo de parámetros no soportado: {estilo}")
+    return _compilar(sql, estilo, frozenset(nombres or ()))
+
+
+@lru_cache(maxsize=512)
+def _compilar(sql: str, estilo: str, nombres: FrozenSet[str]) -> SentenciaCompilada:
+    """Compilación cacheada por (sql, estilo, nombres)"""
+    partes: List[str] = []
+    orden: List[str] = []
+    numeros: Dict[str, int] = {}
+
+    for token in _tokenizar(sql, nombres):
+        if isinstance(token, str):
+            # psycopg2 interpreta todos los % del texto cuando hay argumentos
+            partes.append(token.replace('%', '%%') if estilo == 'pyformat' else token)
+            continue
+
+        nombre = token[0]
+        if estilo == 'qmark':
+            orden.append(nombre)
+            partes.append('?')
+            continue
+        if nombre not in numeros:
+            numeros[nombre] = len(numeros) + 1
+            orden.append(nombre)
+        partes.append(f'%({nombre})s' if estilo == 'pyformat' else f'${numeros[nombre]}')
+
+    if estilo == 'pyformat' and not orden:
+        # Sin argumentos psycopg2 no interpreta los %: se ejecuta el texto original
+        partes = [sql]
+
+    return SentenciaCompilada(
+        sql=''.join(partes),
+        estilo=estilo,
+        parametros=tuple(orden),
+        sql_original=sql,
+        nombres_conocidos=nombres,
+        es_lectura=es_consulta_lectura(sql),
+        es_lectura_simple=es_lectura_simple(sql),
+        es_procedimiento=es_procedimiento(sql)
+    )
+
+
+def renderizar_sql(sql: str, valores: Dict[str, Any]) -> str:
+    """
+    Inserta los valores de los parámetros en el SQL como texto
+
+    Solo para mostrar o registrar la sentencia ejecutada: la ejecución usa
+    parámetros enlazados. Respeta los límites de nombre (:fecha no
+    reemplaza el inicio de :fecha_fin).
+    """
+    partes = []
+    for token in _tokenizar(sql, frozenset(valores.keys())):
+        if isinstance(token, str):
+            partes.append(token)
+        else:
+            nombre, en_literal = token
+            texto = str(valores[nombre])
+            partes.append(f"'{texto}'" if en_literal else texto)
+    return ''.join(partes)
+
+
+@lru_cache(maxsize=512)
+def _tokenizar(sql: str, nombres: FrozenSet[str]) -> Tuple[Union[str, Tuple[str, bool]], ...]:
+    """
+    Divide el SQL en texto y parámetros conocidos
+
+    Returns:
+        Tupla de tokens: str para texto, (nombre, en_literal) para parámetros
+    """
+    tokens: List[Union[str, Tuple[str, bool]]] = []
+    texto: List[str] = []
+
+    def agregar_parametro(nombre: str, en_literal: bool) -> None:
+        if texto:
+            tokens.append(''.join(texto))
+            texto.clear()
+        tokens.append((nombre, en_literal))
+
+    i = 0
+    longitud = len(sql)
+    while i < longitud:
+        caracter = sql[i]
+
+        if caracter == "'":
+            fin = _fin_literal(sql, i)
+            literal = sql[i:fin]
+            coincidencia = _PATRON_LITERAL_PARAMETRO.match(literal)
+            if coincidencia and coincidencia.group(1) in nombres:
+                agregar_parametro(coincidencia.group(1), True)
+            else:
+                texto.append(literal)
+            i = fin
+        elif caracter == '"':
+            fin = sql.find('"', i + 1)
+            fin = longitud if fin == -1 else fin + 1
+            texto.append(sql[i:fin])
+            i = fin
+        elif sql.startswith('--', i):
+            fin = sql.find('\n', i)
+            fin = longitud if fin == -1 else fin
+            texto.append(sql[i:fin])
+            i = fin
+        elif sql.startswith('/*', i):
+            fin = sql.find('*/', i + 2)
+            fin = longitud if fin == -1 else fin + 2
+            texto.append(sql[i:fin])
+            i = fin
+        elif sql.startswith('::', i):
+            # Cast de PostgreSQL (valor::tipo)
+            texto.append('::')
+            i += 2
+        elif caracter == ':':
+            coincidencia = _PATRON_NOMBRE.match(sql, i + 1)
+            if coincidencia and coincidencia.group(0) in nombres:
+                agregar_parametro(coincidencia.group(0), False)
+                i = coincidencia.end()
+            else:
+                texto.append(caracter)
+                i += 1
+        else:
+            texto.append(caracter)
+            i += 1
+
+    if texto:
+        tokens.append(''.join(texto))
+    return tuple(tokens)
+
+
+def convertir_valor(nombre: str, valor: Any, tipo: Optional[TipoParametro],
+                    fechas_como_texto: bool = False) -> Any:
+    """
+    Convierte el valor de un parámetro al tipo Python que corresponde a su TipoParametro
+
+    Raises:
+        ValueError: Si el valor no es compatible con el tipo
+    """
+    if tipo is None or valor is None:
+        return valor
+
+    if isinstance(valor, str):
+        valor = valor.strip()
+        # Compatibilidad: valores escritos con comillas para el reemplazo textual
+        if len(valor) >= 2 and valor[0] == valor[-1] == "'":
+            valor = valor[1:-1].replace("''", "'")
+        if valor == '' and tipo != TipoParametro.STRING:
+            return None
+
+    try:
+        if tipo == TipoParametro.INTEGER:
+            return int(valor)
+        if tipo == TipoParametro.FLOAT:
+            return float(valor)
+        if tipo == TipoParametro.BOOLEAN:
+            if isinstance(valor, bool):
+                return valor
+            return str(valor).lower() in ('true', '1', 'si', 'sí', 's', 'yes')
+        if tipo == TipoParametro.DATE:
+            if isinstance(valor, datetime):
+                valor = valor.date()
+            elif not isinstance(valor, date):
+                valor = date.fromisoformat(str(valor)[:10])
+            return valor.isoformat() if fechas_como_texto else valor
+        if tipo == TipoParametro.DATETIME:
+            if not isinstance(valor, datetime):
+                valor = datetime.fromisoformat(str(valor))
+            return valor.isoformat(sep=' ') if fechas_como_texto else valor
+        return str(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor inválido para el parámetro '{nombre}' ({tipo.value}): {valor}")
+
+
+def _fin_literal(sql: str, inicio: int) -> int:
+    """Posición siguiente al cierre del literal que empieza en inicio ('' es una comilla escapada)"""
+    i = inicio + 1
+    while i < len(sql):
+        if sql[i] == "'":
+            if i + 1 < len(sql) and sql[i + 1] == "'":
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(sql)
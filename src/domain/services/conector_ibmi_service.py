@@ -0,0 +1,30 @@
+"""
+Interfaz del conector a IBM i
+
+El servicio de ejecución abre las conexiones a IBM i y crea sus cursores a
+través de esta interfaz; la implementación JDBC (conector_ibmi_jdbc en
+infraestructura) maneja la JVM, el driver y la configuración recordada.
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+
+from src.domain.entities.conexion import Conexion
+
+
+class ConectorIBMiService(ABC):
+    """Interfaz abstracta para conectar a IBM i"""
+
+    @abstractmethod
+    def conectar(self, conexion: Conexion) -> Any:
+        """Abre una conexión a IBM i"""
+        pass
+
+    @abstractmethod
+    def crear_cursor(self, conn: Any, cache: Any = None) -> Any:
+        """Crea un cursor que reutiliza las sentencias preparadas del cache (None = cursor estándar)"""
+        pass
+
+    @abstractmethod
+    def registrar_salud(self, conexion: Conexion) -> None:
+        """Marca la conexión como sana (una consulta terminó correctamente)"""
+        pass
@@ -6,20 +6,17 @@ sobre las bases de datos objetivo.
 """
 import time
 import random
+import hashlib
 import sqlite3
-import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-try:
-    import jaydebeapi
-except ImportError:
-    jaydebeapi = None
-
 from src.domain.entities.control import Control
 from src.domain.entities.conexion import Conexion
 from src.domain.entities.consulta import Consulta
 from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.domain.entities.buffer_filas import BufferFilas
+from src.domain.entities.plan_ejecucion import PlanEjecucion
 from src.domain.repositories.control_repository import ControlRepository
 from src.domain.repositories.parametro_repository import ParametroRepository
 from src.domain.repositories.consulta_repository import ConsultaRepository
@@ -27,8 +24,18 @@ from src.domain.repositories.referente_repository import ReferenteRepository
 from src.domain.repositories.consulta_control_repository import ConsultaControlRepository
 from src.domain.repositories.conexion_repository import ConexionRepository
 from src.domain.repositories.control_referente_repository import ControlReferenteRepository
-from src.domain.services.excel_generator_service import ExcelGeneratorService
-from src.infrastructure.services.notification_file_service import NotificationFileService
+from src.domain.repositories.plan_ejecucion_repository import PlanEjecucionRepository
+from src.domain.services.compilador_sql import (
+    SentenciaCompilada, compilar_sentencia, renderizar_sql, es_consulta_lectura, es_procedimiento
+)
+from src.domain.services.pool_conexiones_service import GestorPoolsService, PoolConexionesService
+from src.domain.services.conector_ibmi_service import ConectorIBMiService
+from src.domain.services.cola_reportes_service import ColaReportesService
+from src.domain.entities.parametro import TipoParametro
+
+
+# Tipos que los resultados conservan sin conversión
+_TIPOS_NATIVOS = frozenset((int, float, bool, str, type(None)))
 
 
 class EjecucionControlService:
@@ -42,7 +49,14 @@ class EjecucionControlService:
         referente_repository: ReferenteRepository,
         conexion_repository: ConexionRepository,
         consulta_control_repository: ConsultaControlRepository,
-        control_referente_repository: ControlReferenteRepository
+        control_referente_repository: ControlReferenteRepository,
+        gestor_pools: GestorPoolsService = None,
+        conector_ibmi: ConectorIBMiService = None,
+        tamano_lote_fetch: int = 1000,
+        filas_en_memoria: int = 10000,
+        max_filas_por_consulta: Optional[int] = None,
+        plan_ejecucion_repository: PlanEjecucionRepository = None,
+        generador_reportes: ColaReportesService = None
     ):
         self._control_repository = control_repository
         self._parametro_repository = parametro_repository
@@ -51,36 +65,28 @@ class EjecucionControlService:
         self._conexion_repository = conexion_repository
         self._consulta_control_repository = consulta_control_repository
         self._control_referente_repository = control_referente_repository
-        self._excel_generator = ExcelGeneratorService()
-        self._notification_file_service = NotificationFileService()
+        # Carga de metadatos de un control de una sola vez (si no, repositorio por repositorio)
+        self._plan_ejecucion_repository = plan_ejecucion_repository
+        # Reportes y su entrega a los referentes (sin generador no se generan archivos)
+        self._generador_reportes = generador_reportes
+        # Pools de conexiones a las bases objetivo, compartidos entre ejecuciones
+        # (sin gestor solo hay ejecución simulada)
+        self._pools = gestor_pools
+        # Conexiones a IBM i (sin conector no se ejecuta contra IBM i)
+        self._conector_ibmi = conector_ibmi
+        # Lectura de resultados: lotes de fetchmany, filas en memoria antes de volcar
+        # a disco y máximo de filas por consulta (Consulta.max_filas tiene prioridad)
+        self.tamano_lote_fetch = max(1, tamano_lote_fetch)
+        self.filas_en_memoria = filas_en_memoria
+        self.max_filas_por_consulta = max_filas_por_consulta
     
     def _es_consulta_lectura(self, sql: str) -> bool:
         """Determina si una consulta SQL es de lectura (devuelve datos)"""
-        sql_upper = sql.upper().strip()
-        
-        # Consultas que devuelven datos
-        if sql_upper.startswith('SELECT'):
-            return True
-        
-        # CTE (Common Table Expressions) que terminan en SELECT
-        if sql_upper.startswith('WITH') and 'SELECT' in sql_upper:
-            return True
-        
-        # Comandos EXPLAIN, SHOW, DESCRIBE que devuelven datos
-        if any(sql_upper.startswith(cmd) for cmd in ['EXPLAIN', 'SHOW', 'DESCRIBE', 'DESC']):
-            return True
-        
-        return False
+        return es_consulta_lectura(sql)
     
     def _es_procedimiento(self, sql: str) -> bool:
         """Determina si una consulta SQL es un procedimiento almacenado"""
-        sql_upper = sql.upper().strip()
-        
-        # Stored procedures y funciones
-        if any(sql_upper.startswith(cmd) for cmd in ['CALL', 'EXECUTE', 'EXEC']):
-            return True
-        
-        return False
+        return es_procedimiento(sql)
     
     def ejecutar_control(
         self,
@@ -88,7 +94,8 @@ class EjecucionControlService:
         conexion: Conexion,
         parametros_adicionales: Dict[str, Any] = None,
         ejecutar_solo_disparo: bool = False,
-        mock_execution: bool = False
+        mock_execution: bool = False,
+        plan: PlanEjecucion = None
     ) -> ResultadoEjecucion:
         """
         Ejecuta un control específico
@@ -99,6 +106,7 @@ class EjecucionControlService:
             parametros_adicionales: Parámetros adicionales para la ejecución
             ejecutar_solo_disparo: Si True, solo ejecuta la consulta de disparo
             mock_execution: Si True, simula la ejecución (para testing)
+            plan: Metadatos del control ya cargados con cargar_plan() (se cargan si falta)
             
         Returns:
             ResultadoEjecucion: Resultado de la ejecución
@@ -106,19 +114,22 @@ class EjecucionControlService:
         inicio_tiempo = time.time()
         
         try:
-            # Obtener parámetros del control
-            parametros = self._parametro_repository.obtener_por_control(control.id)
+            # Cargar los metadatos del control una sola vez
+            if plan is None:
+                plan = self.cargar_plan(control)
             
             # Combinar parámetros por defecto con adicionales
             valores_parametros = {}
-            for param in parametros:
+            tipos_parametros = {}
+            for param in plan.parametros:
                 valores_parametros[param.nombre] = param.valor_por_defecto
+                tipos_parametros[param.nombre] = param.tipo
             
             if parametros_adicionales:
                 valores_parametros.update(parametros_adicionales)
             
             # Obtener asociaciones consulta-control
-            asociaciones = self._consulta_control_repository.obtener_por_control(control.id)
+            asociaciones = plan.asociaciones
             if not asociaciones:
                 return self._crear_resultado_error(
                     control, conexion, valores_parametros, 
@@ -133,7 +144,7 @@ class EjecucionControlService:
             
             if asociacion_disparo:
                 # Lógica tradicional con consulta de disparo específica
-                consulta_disparo = self._consulta_repository.obtener_por_id(asociacion_disparo.consulta_id)
+                consulta_disparo = plan.consulta(asociacion_disparo.consulta_id)
                 if not consulta_disparo:
                     return self._crear_resultado_error(
                         control, conexion, valores_parametros, 
@@ -142,7 +153,8 @@ class EjecucionControlService:
                 
                 # Ejecutar consulta de disparo
                 resultado_disparo = self._ejecutar_consulta(
-                    consulta_disparo, valores_parametros, conexion, mock_execution, es_disparo=True
+                    consulta_disparo, valores_parametros, conexion, mock_execution, es_disparo=True,
+                    tipos_parametros=tipos_parametros, plan=plan
                 )
                 
                 if resultado_disparo.error:
@@ -171,19 +183,28 @@ class EjecucionControlService:
                         "No se puede ejecutar solo disparo: no existe consulta de disparo para el control"
                     )
                 
-                # Ejecutar todas las consultas para ver si alguna tiene resultados
+                # Ejecutar las consultas una sola vez para ver si alguna tiene resultados;
+                # si el control se dispara, estos mismos resultados son los finales
                 total_filas_todas_consultas = 0
+                resultados_evaluacion = []
                 todas_asociaciones = [a for a in asociaciones if a.activa]
                 todas_asociaciones.sort(key=lambda x: x.orden)
                 
                 for asociacion in todas_asociaciones:
-                    consulta = self._consulta_repository.obtener_por_id(asociacion.consulta_id)
+                    consulta = plan.consulta(asociacion.consulta_id)
                     if consulta:
                         resultado_temp = self._ejecutar_consulta(
-                            consulta, valores_parametros, conexion, mock_execution, es_disparo=False
+                            consulta, valores_parametros, conexion, mock_execution, es_disparo=False,
+                            tipos_parametros=tipos_parametros, plan=plan
                         )
+                        resultados_evaluacion.append(resultado_temp)
                         if not resultado_temp.error:
                             total_filas_todas_consultas += resultado_temp.filas_afectadas
+                        
+                        # Con la primera consulta con datos la decisión ya está tomada:
+                        # si se dispara cuando NO hay datos, el resto no hace falta ejecutarlo
+                        if total_filas_todas_consultas > 0 and not control.disparar_si_hay_datos:
+                            break
                 
                 # Aplicar lógica de disparo basada en si hay datos en CUALQUIER consulta
                 if control.disparar_si_hay_datos:
@@ -208,29 +229,20 @@ class EjecucionControlService:
                     asociaciones_disparadas.sort(key=lambda x: x.orden)  # Ordenar por orden de ejecución
                     
                     for asociacion in asociaciones_disparadas:
-                        consulta = self._consulta_repository.obtener_por_id(asociacion.consulta_id)
+                        consulta = plan.consulta(asociacion.consulta_id)
                         if consulta:
                             resultado = self._ejecutar_consulta(
-                                consulta, valores_parametros, conexion, mock_execution, es_disparo=False
+                                consulta, valores_parametros, conexion, mock_execution, es_disparo=False,
+                                tipos_parametros=tipos_parametros, plan=plan
                             )
                             resultados_disparadas.append(resultado)
                             if not resultado.error:
                                 total_filas_disparadas += resultado.filas_afectadas
                 else:
-                    # Nueva lógica: re-ejecutar todas las consultas para los resultados finales
-                    # (ya las ejecutamos para evaluar, pero necesitamos los resultados completos)
-                    todas_asociaciones = [a for a in asociaciones if a.activa]
-                    todas_asociaciones.sort(key=lambda x: x.orden)
-                    
-                    for asociacion in todas_asociaciones:
-                        consulta = self._consulta_repository.obtener_por_id(asociacion.consulta_id)
-                        if consulta:
-                            resultado = self._ejecutar_consulta(
-                                consulta, valores_parametros, conexion, mock_execution, es_disparo=False
-                            )
-                            resultados_disparadas.append(resultado)
-                            if not resultado.error:
-                                total_filas_disparadas += resultado.filas_afectadas
+                    # Nueva lógica: reutilizar los resultados de la evaluación
+                    # (todas las consultas ya se ejecutaron, no se vuelven a ejecutar)
+                    resultados_disparadas = resultados_evaluacion
+                    total_filas_disparadas = total_filas_todas_consultas
             
             # Determinar estado final
             estado = self._determinar_estado(control_se_dispara, filas_disparo, resultados_disparadas)
@@ -262,7 +274,7 @@ class EjecucionControlService:
             print(f"DEBUG EXCEL - Estado: {estado}, Solo disparo: {ejecutar_solo_disparo}")
             if not ejecutar_solo_disparo and (estado == EstadoEjecucion.EXITOSO or estado == EstadoEjecucion.CONTROL_DISPARADO):
                 print(f"DEBUG EXCEL - Iniciando generación de Excel para control {control.nombre}")
-                self._generar_archivos_excel(control, resultado_ejecucion)
+                self._generar_archivos_excel(control, resultado_ejecucion, plan)
             else:
                 print(f"DEBUG EXCEL - No se genera Excel: solo_disparo={ejecutar_solo_disparo}, estado={estado}")
             
@@ -282,7 +294,9 @@ class EjecucionControlService:
         parametros: Dict[str, Any],
         conexion_control: Conexion,
         mock_execution: bool = False,
-        es_disparo: bool = False
+        es_disparo: bool = False,
+        tipos_parametros: Dict[str, TipoParametro] = None,
+        plan: Optional[PlanEjecucion] = None
     ) -> ResultadoConsulta:
         """Ejecuta una consulta específica"""
         inicio = time.time()
@@ -293,7 +307,10 @@ class EjecucionControlService:
             
             if consulta.conexion_id is not None:
                 # La consulta tiene una conexión específica, usarla
-                conexion_especifica = self._conexion_repository.obtener_por_id(consulta.conexion_id)
+                if plan is not None:
+                    conexion_especifica = plan.conexion_de(consulta)
+                else:
+                    conexion_especifica = self._conexion_repository.obtener_por_id(consulta.conexion_id)
                 if conexion_especifica:
                     conexion_a_usar = conexion_especifica
                     print(f"DEBUG: Usando conexión específica de consulta '{consulta.nombre}': {conexion_especifica.nombre} (ID: {conexion_especifica.id})")
@@ -307,7 +324,9 @@ class EjecucionControlService:
                 return self._simular_ejecucion_consulta(consulta, parametros, es_disparo)
             else:
                 # Ejecución real de la consulta SQL
-                return self._ejecutar_consulta_real(consulta, parametros, conexion_a_usar, es_disparo)
+                return self._ejecutar_consulta_real(
+                    consulta, parametros, conexion_a_usar, es_disparo, tipos_parametros
+                )
                 
         except Exception as e:
             tiempo_ejecucion = (time.time() - inicio) * 1000
@@ -321,6 +340,32 @@ class EjecucionControlService:
                 error=str(e)
             )
     
+    def cargar_plan(self, control: Control) -> PlanEjecucion:
+        """
+        Obtiene los metadatos necesarios para ejecutar el control
+        
+        Con repositorio de planes se cargan en un número fijo de consultas;
+        si no, se arma el plan consultando cada repositorio una vez por entidad.
+        Los referentes se dejan sin cargar en ese caso (solo hacen falta al generar archivos).
+        """
+        if self._plan_ejecucion_repository:
+            plan = self._plan_ejecucion_repository.obtener_por_control(control.id)
+            if plan:
+                return plan
+        
+        plan = PlanEjecucion(control=control)
+        plan.parametros = self._parametro_repository.obtener_por_control(control.id)
+        plan.asociaciones = self._consulta_control_repository.obtener_por_control(control.id)
+        for asociacion in plan.asociaciones:
+            consulta = self._consulta_repository.obtener_por_id(asociacion.consulta_id)
+            if consulta:
+                plan.consultas[consulta.id] = consulta
+                if consulta.conexion_id is not None and consulta.conexion_id not in plan.conexiones:
+                    conexion = self._conexion_repository.obtener_por_id(consulta.conexion_id)
+                    if conexion:
+                        plan.conexiones[conexion.id] = conexion
+        return plan
+    
     def _simular_ejecucion_consulta(self, consulta: Consulta, parametros: Dict[str, Any], es_disparo: bool = False) -> ResultadoConsulta:
         """Simula la ejecución de una consulta para demo/testing"""
         sql_ejecutado = self._reemplazar_parametros(consulta.sql, parametros)
@@ -356,12 +401,8 @@ class EjecucionControlService:
         )
     
     def _reemplazar_parametros(self, sql: str, parametros: Dict[str, Any]) -> str:
-        """Reemplaza parámetros en el SQL (simulación)"""
-        sql_final = sql
-        for nombre, valor in parametros.items():
-            placeholder = f":{nombre}"
-            sql_final = sql_final.replace(placeholder, str(valor))
-        return sql_final
+        """Reemplaza parámetros en el SQL (solo para mostrar; la ejecución usa parámetros enlazados)"""
+        return renderizar_sql(sql, parametros)
     
     def _determinar_estado(
         self, 
@@ -453,7 +494,8 @@ class EjecucionControlService:
         consulta: Consulta,
         parametros: Dict[str, Any],
         conexion: Conexion,
-        es_disparo: bool = False
+        es_disparo: bool = False,
+        tipos_parametros: Dict[str, TipoParametro] = None
     ) -> ResultadoConsulta:
         """Ejecuta una consulta real contra la base de datos"""
         inicio = time.time()
@@ -464,14 +506,23 @@ class EjecucionControlService:
             tipo_motor = conexion.tipo_motor.lower()
             print(f"DEBUG: Ejecutando consulta en motor: {tipo_motor}")
             
+            # Los parámetros se enlazan con el estilo del driver (el texto SQL no varía entre ejecuciones)
             if tipo_motor in ['sqlite', 'sqlite3']:
-                return self._ejecutar_sqlite(sql_ejecutado, consulta, inicio)
+                sentencia = compilar_sentencia(consulta.sql, 'qmark', parametros)
+                argumentos = sentencia.argumentos(parametros, tipos_parametros, fechas_como_texto=True)
+                return self._ejecutar_sqlite(sql_ejecutado, sentencia, argumentos, conexion, consulta, inicio)
             elif tipo_motor in ['ibm i series', 'as/400', 'iseries', 'ibm i']:
-                return self._ejecutar_ibm_i(sql_ejecutado, conexion, consulta, inicio)
+                sentencia = compilar_sentencia(consulta.sql, 'qmark', parametros)
+                argumentos = sentencia.argumentos(parametros, tipos_parametros, fechas_como_texto=True)
+                return self._ejecutar_ibm_i(sql_ejecutado, sentencia, argumentos, conexion, consulta, inicio)
             elif tipo_motor in ['postgresql', 'postgres']:
-                return self._ejecutar_postgresql(sql_ejecutado, conexion, consulta, inicio)
+                sentencia = compilar_sentencia(consulta.sql, 'pyformat', parametros)
+                argumentos = sentencia.argumentos(parametros, tipos_parametros)
+                return self._ejecutar_postgresql(sql_ejecutado, sentencia, argumentos, conexion, consulta, inicio)
             elif tipo_motor in ['sqlserver', 'sql server', 'mssql']:
-                return self._ejecutar_sqlserver(sql_ejecutado, conexion, consulta, inicio)
+                sentencia = compilar_sentencia(consulta.sql, 'qmark', parametros)
+                argumentos = sentencia.argumentos(parametros, tipos_parametros)
+                return self._ejecutar_sqlserver(sql_ejecutado, sentencia, argumentos, conexion, consulta, inicio)
             else:
                 # Para tipos no implementados, devolver error en lugar de simulación
                 tiempo_ejecucion = (time.time() - inicio) * 1000
@@ -497,17 +548,190 @@ class EjecucionControlService:
                 error=f"Error ejecutando consulta: {str(e)}"
             )
     
-    def _ejecutar_sqlite(self, sql: str, consulta: Consulta, inicio: float) -> ResultadoConsulta:
+    def obtener_metricas_pools(self) -> Dict[str, Any]:
+        """Métricas de aciertos/fallos de los pools de conexiones"""
+        if self._pools is None:
+            return {'aciertos': 0, 'fallos': 0, 'tasa_aciertos': 0.0, 'invalidaciones': 0, 'pools': {}}
+        return self._pools.obtener_metricas()
+    
+    def invalidar_pool_conexion(self, conexion_id: int) -> bool:
+        """Descarta las conexiones abiertas de una conexión (por ejemplo, tras editarla)"""
+        return self._pools.invalidar(conexion_id) if self._pools is not None else False
+    
+    def cerrar_pools(self) -> None:
+        """Cierra todas las conexiones abiertas a bases objetivo"""
+        if self._pools is not None:
+            self._pools.cerrar_todos()
+    
+    def _obtener_pool(self, conexion: Conexion) -> PoolConexionesService:
+        """Obtiene el pool de conexiones correspondiente al motor de la conexión"""
+        if self._pools is None:
+            raise Exception("No hay gestor de pools de conexiones configurado para la ejecución real")
+        tipo_motor = conexion.tipo_motor.lower()
+        
+        if tipo_motor in ['sqlite', 'sqlite3']:
+            return self._pools.obtener_pool(
+                conexion,
+                fabrica=self._conectar_sqlite,
+                validador=lambda conn: self._validar_conexion(conn, "SELECT 1")
+            )
+        elif tipo_motor in ['ibm i series', 'as/400', 'iseries', 'ibm i']:
+            if self._conector_ibmi is None:
+                raise Exception("No hay conector de IBM i configurado")
+            return self._pools.obtener_pool(
+                conexion,
+                fabrica=lambda: self._conector_ibmi.conectar(conexion),
+                validador=lambda conn: self._validar_conexion(conn, "SELECT 1 FROM SYSIBM.SYSDUMMY1"),
+                reiniciador=self._reiniciar_conexion_jdbc
+            )
+        elif tipo_motor in ['postgresql', 'postgres']:
+            return self._pools.obtener_pool(
+                conexion,
+                fabrica=lambda: self._conectar_postgresql(conexion),
+                validador=lambda conn: self._validar_conexion(conn, "SELECT 1")
+            )
+        elif tipo_motor in ['sqlserver', 'sql server', 'mssql']:
+            return self._pools.obtener_pool(
+                conexion,
+                fabrica=lambda: self._conectar_sqlserver(conexion),
+                validador=lambda conn: self._validar_conexion(conn, "SELECT 1")
+            )
+        
+        raise Exception(f"Motor de BD no soportado para ejecución real: {conexion.tipo_motor}")
+    
+    def _validar_conexion(self, conn, sql_validacion: str) -> bool:
+        """Health-check de una conexión del pool antes de reutilizarla"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_validacion)
+            cursor.fetchall()
+            return True
+        finally:
+            cursor.close()
+    
+    def _reiniciar_conexion_jdbc(self, conn) -> None:
+        """Deshace la transacción abierta de una conexión JDBC (si no es autocommit)"""
+        if not conn.jconn.getAutoCommit():
+            conn.rollback()
+    
+    def _conectar_sqlite(self):
+        """Abre una conexión SQLite para el pool"""
+        # Para demo, usar una base de datos de ejemplo
+        # sqlite3 mantiene su propio cache de sentencias preparadas por conexión
+        conn = sqlite3.connect("sistema_controles.db", check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _conectar_postgresql(self, conexion: Conexion):
+        """Abre una conexión PostgreSQL para el pool"""
+        import psycopg2
+        
+        # Construir cadena de conexión
+        conn_string = f"host={conexion.servidor} port={conexion.puerto or 5432} dbname={conexion.base_datos} user={conexion.usuario}"
+        if conexion.contraseña:
+            conn_string += f" password={conexion.contraseña}"
+        
+        print(f"DEBUG: Conectando a PostgreSQL: host={conexion.servidor} dbname={conexion.base_datos}")
+        return psycopg2.connect(conn_string)
+    
+    def _conectar_sqlserver(self, conexion: Conexion):
+        """Abre una conexión SQL Server para el pool"""
+        import pyodbc
+        
+        # Construir cadena de conexión
+        conn_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={conexion.servidor},{conexion.puerto or 1433};DATABASE={conexion.base_datos};UID={conexion.usuario}"
+        if conexion.contraseña:
+            conn_string += f";PWD={conexion.contraseña}"
+        else:
+            conn_string += ";Trusted_Connection=yes"
+        
+        print(f"DEBUG: Conectando a SQL Server: {conexion.servidor} / {conexion.base_datos}")
+        return pyodbc.connect(conn_string)
+    
+    def _leer_filas(self, cursor, consulta: Consulta, convertir_valor=None) -> BufferFilas:
+        """
+        Lee el resultado del cursor en lotes de fetchmany
+        
+        Las filas se acumulan en un BufferFilas (memoria acotada, el resto en
+        disco). Si la consulta supera su máximo de filas se deja de leer y el
+        buffer queda marcado como truncado.
+        
+        Args:
+            cursor: Cursor DB-API ya ejecutado
+            consulta: Consulta ejecutada (para el máximo de filas)
+            convertir_valor: Conversión opcional de cada valor leído
+        """
+        max_filas = self._max_filas(consulta)
+        cursor.arraysize = self.tamano_lote_fetch
+        
+        # Los cursores del lado del servidor informan las columnas tras el primer fetch
+        lote = cursor.fetchmany(self.tamano_lote_fetch)
+        columnas = [desc[0] for desc in cursor.description] if cursor.description else []
+        datos = BufferFilas(self._nombres_columnas_unicos(columnas), self.filas_en_memoria)
+        
+        while lote:
+            if convertir_valor is not None:
+                # Solo se convierten los valores que no son de tipos nativos
+                lote = [
+                    tuple([valor if type(valor) in _TIPOS_NATIVOS else convertir_valor(valor) for valor in fila])
+                    for fila in lote
+                ]
+            if max_filas and len(datos) + len(lote) > max_filas:
+                datos.agregar(lote[:max_filas - len(datos)])
+                datos.truncado = True
+                print(f"WARNING: Consulta '{consulta.nombre}' truncada a {max_filas} filas")
+                break
+            datos.agregar(lote)
+            lote = cursor.fetchmany(self.tamano_lote_fetch)
+        
+        return datos
+    
+    def _max_filas(self, consulta: Consulta) -> Optional[int]:
+        """Máximo de filas a leer de una consulta (None = sin límite)"""
+        return consulta.max_filas or self.max_filas_por_consulta or None
+    
+    def _nombres_columnas_unicos(self, columnas: List[str]) -> List[str]:
+        """Renombra las columnas duplicadas (COL, COL_1, COL_2...)"""
+        unicos = []
+        apariciones = {}
+        for nombre in columnas:
+            if nombre in apariciones:
+                apariciones[nombre] += 1
+                unicos.append(f"{nombre}_{apariciones[nombre]}")
+            else:
+                apariciones[nombre] = 0
+                unicos.append(nombre)
+        return unicos
+    
+    def _valor_ibm_i(self, value):
+        """Convierte valores JDBC problemáticos (bytes, tipos Java) a tipos Python"""
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            # Convertir bytes a string
+            try:
+                return value.decode('utf-8', errors='replace')
+            except:
+                return str(value)
+        return str(value) if not isinstance(value, (int, float, bool)) else value
+    
+    def _valor_sqlserver(self, value):
+        """Convierte valores pyodbc no serializables (Decimal, fechas...) a texto"""
+        if value is None:
+            return None
+        return str(value) if not isinstance(value, (int, float, bool)) else value
+    
+    def _ejecutar_sqlite(
+        self, sql: str, sentencia: SentenciaCompilada, argumentos,
+        conexion: Conexion, consulta: Consulta, inicio: float
+    ) -> ResultadoConsulta:
         """Ejecuta consulta en SQLite"""
         try:
-            # Para demo, usar una base de datos de ejemplo
-            with sqlite3.connect("sistema_controles.db") as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute(sql)
+            with self._obtener_pool(conexion).conexion(self._pools.timeout_obtener_segundos) as conn:
+                cursor = conn.execute(sentencia.sql, argumentos or ())
                 
-                if sql.strip().upper().startswith('SELECT'):
-                    rows = cursor.fetchall()
-                    datos = [dict(row) for row in rows]
+                if sentencia.es_lectura:
+                    datos = self._leer_filas(cursor, consulta)
                     filas_afectadas = len(datos)
                 else:
                     conn.commit()
@@ -523,7 +747,8 @@ class EjecucionControlService:
                     filas_afectadas=filas_afectadas,
                     datos=datos,
                     tiempo_ejecucion_ms=tiempo_ejecucion,
-                    error=""
+                    error="",
+                    truncado=getattr(datos, 'truncado', False)
                 )
                 
         except Exception as e:
@@ -538,208 +763,43 @@ class EjecucionControlService:
                 error=f"Error SQLite: {str(e)}"
             )
     
-    def _ejecutar_ibm_i(self, sql: str, conexion: Conexion, consulta: Consulta, inicio: float) -> ResultadoConsulta:
+    def _ejecutar_ibm_i(
+        self, sql: str, sentencia: SentenciaCompilada, argumentos,
+        conexion: Conexion, consulta: Consulta, inicio: float
+    ) -> ResultadoConsulta:
         """Ejecuta consulta en IBM i Series usando JDBC"""
+        pool = None
         conn = None
         cursor = None
+        descartar_conexion = False
         try:
-            # Verificar si jaydebeapi está disponible
-            if jaydebeapi is None:
-                raise Exception("jaydebeapi no está instalado. Instale con: pip install jaydebeapi")
-            
-            # Configuración JDBC para IBM i
-            driver_path = os.path.join(os.getcwd(), "drivers", "jt400.jar")
-            if not os.path.exists(driver_path):
-                raise Exception(f"Driver JT400 no encontrado en: {driver_path}")
-            
-            # Usar puerto por defecto si no se especifica
-            puerto = conexion.puerto if conexion.puerto and conexion.puerto > 0 else 446
-            
-            # Primero, intentar una conexión de prueba simple
-            print(f"DEBUG: Verificando conectividad básica...")
-            try:
-                import socket
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(10)  # 10 segundos de timeout
-                result = sock.connect_ex((conexion.servidor, puerto))
-                sock.close()
-                if result != 0:
-                    raise Exception(f"No se puede conectar al puerto {puerto} en {conexion.servidor}")
-                print(f"DEBUG: Puerto {puerto} accesible en {conexion.servidor}")
-            except Exception as e:
-                raise Exception(f"Error de conectividad de red: {str(e)}")
-            
-            # Intentar diferentes configuraciones de conexión
-            configuraciones = [
-                {
-                    'url': f"jdbc:as400://{conexion.servidor}:{puerto}",
-                    'props': {
-                        'user': conexion.usuario,
-                        'password': conexion.contraseña or "",
-                        'prompt': 'false',
-                        'thread used': 'false',
-                        'errors': 'full',
-                        'naming': 'system',  # Único para IBM i - toma lista de librerías
-                        'libraries': '*LIBL',
-                        'date format': 'iso',
-                        'time format': 'hms'
-                    },
-                    'descripcion': 'Configuración básica con naming=system'
-                },
-                {
-                    'url': f"jdbc:as400://{conexion.servidor}",
-                    'props': {
-                        'user': conexion.usuario,
-                        'password': conexion.contraseña or "",
-                        'prompt': 'false',
-                        'secure': 'false',
-                        'thread used': 'false',
-                        'naming': 'system',  # Único para IBM i - toma lista de librerías
-                        'libraries': '*LIBL'
-                    },
-                    'descripcion': 'Configuración simplificada sin puerto con naming=system'
-                },
-                {
-                    'url': f"jdbc:as400://{conexion.servidor}:{puerto}",
-                    'props': {
-                        'user': conexion.usuario,
-                        'password': conexion.contraseña or "",
-                        'prompt': 'false',
-                        'secure': 'false',
-                        'thread used': 'false',
-                        'errors': 'basic',
-                        'trace': 'false',
-                        'naming': 'system'  # Único para IBM i - toma lista de librerías
-                    },
-                    'descripcion': 'Configuración sin seguridad con naming=system'
-                }
-            ]
-            
-            driver_class = "com.ibm.as400.access.AS400JDBCDriver"
-            
-            # Probar cada configuración
-            for i, config in enumerate(configuraciones):
-                print(f"DEBUG: Probando {config['descripcion']} - URL: {config['url']}")
-                print(f"DEBUG: Usuario: {conexion.usuario}")
-                
-                try:
-                    # Conectar usando jaydebeapi
-                    conn = jaydebeapi.connect(
-                        driver_class,
-                        config['url'],
-                        config['props'],
-                        driver_path
-                    )
-                    
-                    print(f"DEBUG: ¡Conexión establecida exitosamente con {config['descripcion']}!")
-                    break
-                    
-                except Exception as e:
-                    print(f"DEBUG: Error con {config['descripcion']}: {str(e)}")
-                    if i == len(configuraciones) - 1:
-                        # Si fue el último intento, lanzar error
-                        raise Exception(f"Todos los métodos de conexión fallaron. Último error: {str(e)}")
-                    continue
+            pool = self._obtener_pool(conexion)
+            conn = pool.obtener(self._pools.timeout_obtener_segundos)
             
-            # Si llegamos aquí, la conexión fue exitosa
-            # Establecer biblioteca de trabajo si se especifica
-            if conexion.base_datos and conexion.base_datos != '*LIBL':
-                try:
-                    with conn.cursor() as setup_cursor:
-                        setup_cursor.execute(f"SET SCHEMA {conexion.base_datos}")
-                        print(f"DEBUG: Esquema establecido a: {conexion.base_datos}")
-                except Exception as e:
-                    print(f"DEBUG: Advertencia - No se pudo establecer esquema: {str(e)}")
-            
-            cursor = conn.cursor()
+            # PreparedStatement reutilizados entre ejecuciones sobre la misma conexión
+            cache = pool.cache_sentencias(conn, al_descartar=lambda prep: prep.close())
+            cursor = self._conector_ibmi.crear_cursor(conn, cache)
             print(f"DEBUG: Ejecutando SQL: {sql}")
-            cursor.execute(sql)
+            cursor.execute(sentencia.sql, argumentos)
             
-            if self._es_consulta_lectura(sql):
-                # Para consultas de lectura (SELECT, WITH...SELECT, etc.), obtener resultados
-                rows = cursor.fetchall()
-                # Obtener nombres de columnas
-                column_names = [desc[0] for desc in cursor.description] if cursor.description else []
-                
-                print(f"DEBUG: Columnas encontradas: {column_names}")
-                print(f"DEBUG: Número de filas: {len(rows)}")
-                
-                # Convertir a lista de diccionarios manejando nombres duplicados
-                datos = []
-                
-                # Crear nombres únicos para columnas duplicadas
-                unique_column_names = []
-                column_counts = {}
-                for col_name in column_names:
-                    if col_name in column_counts:
-                        column_counts[col_name] += 1
-                        unique_name = f"{col_name}_{column_counts[col_name]}"
-                    else:
-                        column_counts[col_name] = 0
-                        unique_name = col_name
-                    unique_column_names.append(unique_name)
-                
-                print(f"DEBUG: Nombres únicos de columnas: {unique_column_names}")
-                
-                for row in rows:
-                    row_dict = {}
-                    for i, value in enumerate(row):
-                        col_name = unique_column_names[i] if i < len(unique_column_names) else f"col_{i}"
-                        # Convertir valores problemáticos
-                        if value is None:
-                            row_dict[col_name] = None
-                        elif isinstance(value, (bytes, bytearray)):
-                            # Convertir bytes a string
-                            try:
-                                row_dict[col_name] = value.decode('utf-8', errors='replace')
-                            except:
-                                row_dict[col_name] = str(value)
-                        else:
-                            row_dict[col_name] = str(value) if not isinstance(value, (int, float, bool)) else value
-                    datos.append(row_dict)
-                
+            if sentencia.es_lectura:
+                # Para consultas de lectura (SELECT, WITH...SELECT, etc.), leer en lotes
+                datos = self._leer_filas(cursor, consulta, self._valor_ibm_i)
                 filas_afectadas = len(datos)
+                
+                print(f"DEBUG: Columnas encontradas: {datos.columnas}")
+                print(f"DEBUG: Número de filas: {filas_afectadas} ({datos.filas_en_disco} en disco)")
                 print(f"DEBUG: Primera fila (si existe): {datos[0] if datos else 'No hay datos'}")
                 
-            elif self._es_procedimiento(sql):
+            elif sentencia.es_procedimiento:
                 # Para stored procedures (CALL, EXECUTE), intentar obtener resultados si los hay
                 try:
                     # Algunos procedimientos pueden devolver resultados
                     if cursor.description:
-                        rows = cursor.fetchall()
-                        column_names = [desc[0] for desc in cursor.description]
-                        
-                        # Crear nombres únicos para columnas duplicadas
-                        unique_column_names = []
-                        column_counts = {}
-                        for col_name in column_names:
-                            if col_name in column_counts:
-                                column_counts[col_name] += 1
-                                unique_name = f"{col_name}_{column_counts[col_name]}"
-                            else:
-                                column_counts[col_name] = 0
-                                unique_name = col_name
-                            unique_column_names.append(unique_name)
-                        
-                        datos = []
-                        for row in rows:
-                            row_dict = {}
-                            for i, value in enumerate(row):
-                                col_name = unique_column_names[i] if i < len(unique_column_names) else f"col_{i}"
-                                if value is None:
-                                    row_dict[col_name] = None
-                                elif isinstance(value, (bytes, bytearray)):
-                                    try:
-                                        row_dict[col_name] = value.decode('utf-8', errors='replace')
-                                    except:
-                                        row_dict[col_name] = str(value)
-                                else:
-                                    row_dict[col_name] = str(value) if not isinstance(value, (int, float, bool)) else value
-                            datos.append(row_dict)
-                        
+                        datos = self._leer_filas(cursor, consulta, self._valor_ibm_i)
                         filas_afectadas = len(datos)
                         print(f"DEBUG: Procedimiento devolvió {filas_afectadas} filas")
-                        print(f"DEBUG: Columnas del procedimiento: {unique_column_names}")
+                        print(f"DEBUG: Columnas del procedimiento: {datos.columnas}")
                     else:
                         # Procedimiento sin resultados
                         datos = []
@@ -756,6 +816,7 @@ class EjecucionControlService:
                 filas_afectadas = cursor.rowcount
                 print(f"DEBUG: Filas afectadas: {filas_afectadas}")
             
+            self._conector_ibmi.registrar_salud(conexion)
             tiempo_ejecucion = (time.time() - inicio) * 1000
             
             return ResultadoConsulta(
@@ -765,12 +826,14 @@ class EjecucionControlService:
                 filas_afectadas=filas_afectadas,
                 datos=datos,
                 tiempo_ejecucion_ms=tiempo_ejecucion,
-                error=""
+                error="",
+                truncado=getattr(datos, 'truncado', False)
             )
             
         except Exception as e:
             error_msg = str(e)
             print(f"DEBUG: Error en IBM i: {error_msg}")
+            descartar_conexion = True
             
             # Información adicional para debugging
             if "connection" in error_msg.lower():
@@ -800,53 +863,78 @@ class EjecucionControlService:
                     cursor.close()
                     print("DEBUG: Cursor cerrado")
                 if conn:
-                    conn.close()
-                    print("DEBUG: Conexión cerrada")
+                    pool.devolver(conn, descartar=descartar_conexion)
+                    print("DEBUG: Conexión devuelta al pool")
             except Exception as e:
                 print(f"DEBUG: Error cerrando recursos: {str(e)}")
     
-    def _ejecutar_postgresql(self, sql: str, conexion: Conexion, consulta: Consulta, inicio: float) -> ResultadoConsulta:
+    def _ejecutar_postgresql(
+        self, sql: str, sentencia: SentenciaCompilada, argumentos,
+        conexion: Conexion, consulta: Consulta, inicio: float
+    ) -> ResultadoConsulta:
         """Ejecuta consulta en PostgreSQL"""
         try:
-            import psycopg2
-            import psycopg2.extras
-            
-            # Construir cadena de conexión
-            conn_string = f"host={conexion.servidor} port={conexion.puerto or 5432} dbname={conexion.base_datos} user={conexion.usuario}"
-            if conexion.contraseña:
-                conn_string += f" password={conexion.contraseña}"
-            
-            print(f"DEBUG: Conectando a PostgreSQL: {conn_string}")
-            
-            with psycopg2.connect(conn_string) as conn:
-                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
-                    print(f"DEBUG: Ejecutando SQL: {sql}")
-                    cursor.execute(sql)
-                    
-                    if self._es_consulta_lectura(sql):
-                        rows = cursor.fetchall()
-                        datos = [dict(row) for row in rows]
-                        filas_afectadas = len(datos)
-                        print(f"DEBUG: Columnas encontradas: {list(datos[0].keys()) if datos else []}")
-                        print(f"DEBUG: Número de filas: {len(datos)}")
-                        print(f"DEBUG: Primera fila (si existe): {datos[0] if datos else 'No hay datos'}")
-                    else:
-                        conn.commit()
-                        datos = []
-                        filas_afectadas = cursor.rowcount
-                        print(f"DEBUG: Filas afectadas: {filas_afectadas}")
-                    
-                    tiempo_ejecucion = (time.time() - inicio) * 1000
-                    
-                    return ResultadoConsulta(
-                        consulta_id=consulta.id,
-                        consulta_nombre=consulta.nombre,
-                        sql_ejecutado=sql,
-                        filas_afectadas=filas_afectadas,
-                        datos=datos,
-                        tiempo_ejecucion_ms=tiempo_ejecucion,
-                        error=""
+            pool = self._obtener_pool(conexion)
+            with pool.conexion(self._pools.timeout_obtener_segundos) as conn:
+                print(f"DEBUG: Ejecutando SQL: {sql}")
+                nombre = None
+                if sentencia.parametros and self._es_preparable_postgresql(sentencia):
+                    # PREPARE una vez por conexión y EXECUTE en las siguientes ejecuciones
+                    preparada = compilar_sentencia(sentencia.sql_original, 'numeric', sentencia.nombres_conocidos)
+                    cache = pool.cache_sentencias(
+                        conn, al_descartar=lambda nombre: self._liberar_preparada_postgresql(conn, nombre)
                     )
+                    nombre = cache.obtener(preparada.sql, lambda: self._preparar_postgresql(conn, preparada.sql))
+                
+                if not nombre and sentencia.es_lectura and sentencia.es_lectura_simple:
+                    # Cursor del lado del servidor: sin él psycopg2 trae todas las filas en el execute.
+                    # DECLARE ... CURSOR solo admite SELECT, VALUES y WITH sin modificaciones
+                    # (ni EXECUTE: las lecturas preparadas se leen del cursor del cliente)
+                    with conn.cursor(name="ctrl_lectura") as cursor:
+                        cursor.itersize = self.tamano_lote_fetch
+                        cursor.execute(sentencia.sql, argumentos)
+                        datos = self._leer_filas(cursor, consulta)
+                    conn.commit()
+                else:
+                    with conn.cursor() as cursor:
+                        if nombre:
+                            marcadores = ", ".join(["%s"] * len(preparada.parametros))
+                            cursor.execute(
+                                f"EXECUTE {nombre} ({marcadores})",
+                                tuple(argumentos[p] for p in preparada.parametros)
+                            )
+                        else:
+                            cursor.execute(sentencia.sql, argumentos)
+                        
+                        if sentencia.es_lectura:
+                            # Lecturas preparadas, EXPLAIN, SHOW o WITH ... RETURNING: cursor del
+                            # cliente. libpq recibe el resultado completo; se convierte en lotes
+                            # y solo hasta el máximo de filas de la consulta
+                            datos = self._leer_filas(cursor, consulta)
+                        else:
+                            datos = []
+                            filas_afectadas = cursor.rowcount
+                            print(f"DEBUG: Filas afectadas: {filas_afectadas}")
+                        conn.commit()
+                
+                if sentencia.es_lectura:
+                    filas_afectadas = len(datos)
+                    print(f"DEBUG: Columnas encontradas: {datos.columnas}")
+                    print(f"DEBUG: Número de filas: {filas_afectadas} ({datos.filas_en_disco} en disco)")
+                    print(f"DEBUG: Primera fila (si existe): {datos[0] if datos else 'No hay datos'}")
+                
+                tiempo_ejecucion = (time.time() - inicio) * 1000
+                
+                return ResultadoConsulta(
+                    consulta_id=consulta.id,
+                    consulta_nombre=consulta.nombre,
+                    sql_ejecutado=sql,
+                    filas_afectadas=filas_afectadas,
+                    datos=datos,
+                    tiempo_ejecucion_ms=tiempo_ejecucion,
+                    error="",
+                    truncado=getattr(datos, 'truncado', False)
+                )
                     
         except ImportError:
             tiempo_ejecucion = (time.time() - inicio) * 1000
@@ -871,63 +959,59 @@ class EjecucionControlService:
                 error=f"Error PostgreSQL: {str(e)}"
             )
     
-    def _ejecutar_sqlserver(self, sql: str, conexion: Conexion, consulta: Consulta, inicio: float) -> ResultadoConsulta:
+    def _es_preparable_postgresql(self, sentencia: SentenciaCompilada) -> bool:
+        """PREPARE de PostgreSQL admite SELECT, VALUES, INSERT, UPDATE, DELETE y MERGE"""
+        comando = sentencia.sql_original.lstrip().split(None, 1)[0].upper() if sentencia.sql_original.strip() else ''
+        return comando in ('SELECT', 'WITH', 'VALUES', 'INSERT', 'UPDATE', 'DELETE', 'MERGE')
+    
+    def _preparar_postgresql(self, conn, sql_numerado: str) -> Optional[str]:
+        """
+        Prepara una sentencia en la sesión PostgreSQL y devuelve su nombre
+        
+        Si el servidor no puede prepararla (por ejemplo, no puede deducir el tipo
+        de un parámetro) devuelve None y la consulta se ejecuta sin preparar.
+        """
+        nombre = "ctrl_" + hashlib.sha1(sql_numerado.encode("utf-8")).hexdigest()[:16]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"PREPARE {nombre} AS {sql_numerado}")
+            return nombre
+        except Exception as e:
+            print(f"DEBUG: No se pudo preparar la sentencia en PostgreSQL: {str(e)}")
+            conn.rollback()
+            return None
+    
+    def _liberar_preparada_postgresql(self, conn, nombre: Optional[str]) -> None:
+        """Libera una sentencia preparada desalojada del cache"""
+        if not nombre:
+            return
+        with conn.cursor() as cursor:
+            cursor.execute(f"DEALLOCATE {nombre}")
+    
+    def _ejecutar_sqlserver(
+        self, sql: str, sentencia: SentenciaCompilada, argumentos,
+        conexion: Conexion, consulta: Consulta, inicio: float
+    ) -> ResultadoConsulta:
         """Ejecuta consulta en SQL Server"""
         try:
-            import pyodbc
-            
-            # Construir cadena de conexión
-            conn_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={conexion.servidor},{conexion.puerto or 1433};DATABASE={conexion.base_datos};UID={conexion.usuario}"
-            if conexion.contraseña:
-                conn_string += f";PWD={conexion.contraseña}"
-            else:
-                conn_string += ";Trusted_Connection=yes"
-            
-            print(f"DEBUG: Conectando a SQL Server: {conn_string}")
-            
-            with pyodbc.connect(conn_string) as conn:
-                cursor = conn.cursor()
+            pool = self._obtener_pool(conexion)
+            with pool.conexion(self._pools.timeout_obtener_segundos) as conn:
+                # pyodbc reutiliza el plan preparado si el cursor vuelve a ejecutar el mismo SQL
+                cache = pool.cache_sentencias(conn, al_descartar=lambda cursor: cursor.close())
+                cursor = cache.obtener(sentencia.sql, conn.cursor)
                 print(f"DEBUG: Ejecutando SQL: {sql}")
-                cursor.execute(sql)
+                if argumentos:
+                    cursor.execute(sentencia.sql, argumentos)
+                else:
+                    cursor.execute(sentencia.sql)
                 
-                if self._es_consulta_lectura(sql):
-                    # Para consultas de lectura (SELECT, WITH...SELECT, etc.), obtener resultados
-                    # Obtener nombres de columnas
-                    columns = [column[0] for column in cursor.description]
-                    rows = cursor.fetchall()
-                    
-                    print(f"DEBUG: Columnas encontradas: {columns}")
-                    print(f"DEBUG: Número de filas: {len(rows)}")
-                    
-                    # Convertir a lista de diccionarios manejando nombres duplicados
-                    datos = []
-                    
-                    # Crear nombres únicos para columnas duplicadas
-                    unique_column_names = []
-                    column_counts = {}
-                    for col_name in columns:
-                        if col_name in column_counts:
-                            column_counts[col_name] += 1
-                            unique_name = f"{col_name}_{column_counts[col_name]}"
-                        else:
-                            column_counts[col_name] = 0
-                            unique_name = col_name
-                        unique_column_names.append(unique_name)
-                    
-                    print(f"DEBUG: Nombres únicos de columnas: {unique_column_names}")
-                    
-                    for row in rows:
-                        row_dict = {}
-                        for i, value in enumerate(row):
-                            col_name = unique_column_names[i] if i < len(unique_column_names) else f"col_{i}"
-                            # Convertir valores problemáticos
-                            if value is None:
-                                row_dict[col_name] = None
-                            else:
-                                row_dict[col_name] = str(value) if not isinstance(value, (int, float, bool)) else value
-                        datos.append(row_dict)
-                    
+                if sentencia.es_lectura:
+                    # Para consultas de lectura (SELECT, WITH...SELECT, etc.), leer en lotes
+                    datos = self._leer_filas(cursor, consulta, self._valor_sqlserver)
                     filas_afectadas = len(datos)
+                    
+                    print(f"DEBUG: Columnas encontradas: {datos.columnas}")
+                    print(f"DEBUG: Número de filas: {filas_afectadas} ({datos.filas_en_disco} en disco)")
                     print(f"DEBUG: Primera fila (si existe): {datos[0] if datos else 'No hay datos'}")
                 else:
                     conn.commit()
@@ -944,7 +1028,8 @@ class EjecucionControlService:
                     filas_afectadas=filas_afectadas,
                     datos=datos,
                     tiempo_ejecucion_ms=tiempo_ejecucion,
-                    error=""
+                    error="",
+                    truncado=getattr(datos, 'truncado', False)
                 )
                 
         except ImportError:
@@ -970,18 +1055,30 @@ class EjecucionControlService:
                 error=f"Error SQL Server: {str(e)}"
             )
     
-    def _generar_archivos_excel(self, control: Control, resultado_ejecucion: ResultadoEjecucion):
+    def _generar_archivos_excel(self, control: Control, resultado_ejecucion: ResultadoEjecucion,
+                                plan: Optional[PlanEjecucion] = None):
         """
         Genera archivos Excel para los referentes que tienen configurada la notificación por archivo
         
+        El libro se genera una sola vez por ejecución y se entrega en la carpeta
+        de cada referente (en paralelo, con reintentos por carpeta). Con un
+        generador de reportes en segundo plano, la ejecución no espera al Excel.
+        
         Args:
             control: Control ejecutado
             resultado_ejecucion: Resultado de la ejecución del control
+            plan: Plan de ejecución con los referentes ya cargados (opcional)
         """
         print(f"DEBUG EXCEL - Entrando en _generar_archivos_excel para control {control.nombre}")
+        if self._generador_reportes is None:
+            print("DEBUG EXCEL - Sin generador de reportes configurado, no se generan archivos")
+            return
         try:
             # Obtener asociaciones de referentes que requieren archivo
-            asociaciones = self._control_referente_repository.obtener_por_control(control.id)
+            if plan is not None and plan.asociaciones_referentes is not None:
+                asociaciones = plan.asociaciones_referentes
+            else:
+                asociaciones = self._control_referente_repository.obtener_por_control(control.id)
             print(f"DEBUG EXCEL - Encontradas {len(asociaciones)} asociaciones totales")
             
             referentes_archivo = [
@@ -1018,40 +1115,33 @@ class EjecucionControlService:
                 print(f"DEBUG - No hay datos para generar Excel en control {control.nombre}")
                 return
             
-            # Generar archivo para cada referente
+            # Referentes con carpeta donde dejar el archivo, agrupados por formato
+            destinos_por_formato = {}
             for asociacion in referentes_archivo:
-                referente = self._referente_repository.obtener_por_id(asociacion.referente_id)
+                if plan is not None and plan.asociaciones_referentes is not None:
+                    referente = plan.referentes.get(asociacion.referente_id)
+                else:
+                    referente = self._referente_repository.obtener_por_id(asociacion.referente_id)
                 if not referente or not referente.path_archivos:
                     print(f"DEBUG - Referente {asociacion.referente_id} no encontrado o sin path_archivos")
                     continue
-                
-                try:
-                    archivo_generado = self._excel_generator.generar_excel_control(
-                        control_nombre=control.nombre,
-                        consultas_resultados=consultas_resultados,
-                        referente_path=referente.path_archivos,
-                        fecha_ejecucion=resultado_ejecucion.fecha_ejecucion
-                    )
-                    
-                    print(f"DEBUG - Archivo Excel generado para referente {referente.nombre}: {archivo_generado}")
-                    
-                    # Generar archivo de notificación en la misma carpeta
-                    archivo_notificacion = self._notification_file_service.crear_archivo_notificacion_control(
-                        carpeta_destino=referente.path_archivos,
-                        control_nombre=control.nombre,
-                        filas_procesadas=sum(len(cr.get('datos', [])) for cr in consultas_resultados),
-                        tiempo_ejecucion_ms=resultado_ejecucion.tiempo_ejecucion_ms,
-                        archivo_excel=os.path.basename(archivo_generado),
-                        mensaje_adicional=f"Control ejecutado para referente: {referente.nombre}"
-                    )
-                    
-                    if archivo_notificacion:
-                        print(f"DEBUG - Archivo de notificación generado: {archivo_notificacion}")
-                    else:
-                        print(f"DEBUG - Error al generar archivo de notificación")
-                    
-                except Exception as e:
-                    print(f"ERROR - No se pudo generar Excel para referente {referente.nombre}: {str(e)}")
+                destinos_por_formato.setdefault(asociacion.formato_archivo, []).append(referente)
+            
+            # Cada formato se genera una sola vez (en segundo plano si el generador lo hace)
+            # y se entrega en la carpeta de cada referente que lo pidió
+            for formato, destinos in destinos_por_formato.items():
+                trabajo = self._generador_reportes.encolar(
+                    control_nombre=control.nombre,
+                    consultas_resultados=consultas_resultados,
+                    referentes=destinos,
+                    fecha_ejecucion=resultado_ejecucion.fecha_ejecucion,
+                    tiempo_ejecucion_ms=resultado_ejecucion.tiempo_total_ejecucion_ms,
+                    formato=formato
+                )
+                print(f"DEBUG EXCEL - Reporte {trabajo.id} ({formato.value}) para {len(destinos)} referentes: "
+                      f"{trabajo.estado.value}")
+                if trabajo.error:
+                    print(f"ERROR - Reporte de control {control.nombre}: {trabajo.error}")
                     
         except Exception as e:
             print(f"ERROR - Error general generando archivos Excel: {str(e)}")
\ No newline at end of file
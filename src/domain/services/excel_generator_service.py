@@ -3,18 +3,42 @@ Servicio para generación de archivos Excel
 
 Este servicio crea archivos Excel profesionales con múltiples hojas,
 formato profesional, filtros automáticos y freeze de filas.
+
+Los libros se escriben en modo write-only de openpyxl: cada fila se vuelca
+al archivo temporal de la hoja apenas se agrega, con estilos con nombre
+compartidos, así la memoria no crece con la cantidad de filas. Las
+consultas que superan el máximo de filas de Excel continúan en hojas
+adicionales.
 """
 import os
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import warnings
+from datetime import date, datetime, time, timedelta
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterator, Optional
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
+
+# Marca de fin de las filas de una consulta
+_SIN_FILAS = object()
+
+# Valores a los que openpyxl les asigna un formato de fecha u hora
+_TIPOS_FECHA = (date, time, timedelta)
 
 
 class ExcelGeneratorService:
     """Servicio para generar archivos Excel profesionales"""
     
+    # Filas por hoja que admite Excel (incluye la fila de encabezados)
+    MAX_FILAS_HOJA = 1048576
+    
+    # Filas que se revisan para calcular el ancho de las columnas
+    FILAS_MUESTRA_ANCHO = 100
+    
+    ESTILO_ENCABEZADO = 'Encabezado control'
+    ESTILO_CELDA = 'Celda control'
+    
     def __init__(self):
         self.header_font = Font(name='Calibri', size=11, bold=True, color='FFFFFF')
         self.header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
@@ -59,12 +83,9 @@ class ExcelGeneratorService:
         # Crear directorio si no existe
         os.makedirs(referente_path, exist_ok=True)
         
-        # Crear libro de Excel
-        workbook = Workbook()
-        
-        # Eliminar hoja por defecto
-        if 'Sheet' in workbook.sheetnames:
-            workbook.remove(workbook['Sheet'])
+        # Crear libro de Excel (sin hoja por defecto en modo write-only)
+        workbook = Workbook(write_only=True)
+        self._registrar_estilos(workbook)
         
         # Crear hoja de resumen
         self._crear_hoja_resumen(workbook, control_nombre, consultas_resultados, fecha_ejecucion)
@@ -80,6 +101,28 @@ class ExcelGeneratorService:
         print(f"DEBUG - Archivo Excel generado: {filepath}")
         return filepath
     
+    def _registrar_estilos(self, workbook: Workbook):
+        """Registra los estilos con nombre que comparten todas las celdas del libro"""
+        workbook.add_named_style(NamedStyle(
+            name=self.ESTILO_ENCABEZADO,
+            font=self.header_font,
+            fill=self.header_fill,
+            alignment=self.header_alignment,
+            border=self.border
+        ))
+        workbook.add_named_style(NamedStyle(name=self.ESTILO_CELDA, border=self.border))
+    
+    def _celda(self, ws, valor=None, estilo: str = None, font: Font = None) -> WriteOnlyCell:
+        """Celda para una hoja write-only con un estilo con nombre o una fuente"""
+        cell = WriteOnlyCell(ws)
+        if estilo:
+            cell.style = estilo
+        if font:
+            cell.font = font
+        # El valor va después del estilo: el estilo con nombre pisaría el formato de una fecha
+        cell.value = valor
+        return cell
+    
     def _crear_hoja_resumen(
         self, 
         workbook: Workbook, 
@@ -90,57 +133,37 @@ class ExcelGeneratorService:
         """Crea la hoja de resumen del control"""
         ws = workbook.create_sheet("Resumen", 0)
         
+        # Ajustar ancho de columnas (en write-only, antes de escribir filas)
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['B'].width = 15
+        ws.column_dimensions['C'].width = 15
+        
         # Título
-        ws['A1'] = f"Reporte de Control: {control_nombre}"
-        ws['A1'].font = Font(name='Calibri', size=16, bold=True, color='1F4E79')
-        ws.merge_cells('A1:C1')
+        ws.append([self._celda(ws, f"Reporte de Control: {control_nombre}",
+                               font=Font(name='Calibri', size=16, bold=True, color='1F4E79'))])
+        ws.append([])
         
         # Información general
-        row = 3
-        ws[f'A{row}'] = "Fecha de Ejecución:"
-        ws[f'B{row}'] = fecha_ejecucion.strftime("%d/%m/%Y %H:%M:%S")
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Total de Consultas:"
-        ws[f'B{row}'] = len(consultas_resultados)
-        ws[f'A{row}'].font = Font(bold=True)
-        
-        row += 1
-        ws[f'A{row}'] = "Consultas con Datos:"
         consultas_con_datos = sum(1 for c in consultas_resultados if c.get('datos') and len(c['datos']) > 0)
-        ws[f'B{row}'] = consultas_con_datos
-        ws[f'A{row}'].font = Font(bold=True)
+        for etiqueta, valor in (
+            ("Fecha de Ejecución:", fecha_ejecucion.strftime("%d/%m/%Y %H:%M:%S")),
+            ("Total de Consultas:", len(consultas_resultados)),
+            ("Consultas con Datos:", consultas_con_datos),
+        ):
+            ws.append([self._celda(ws, etiqueta, font=Font(bold=True)), valor])
+        ws.append([])
+        ws.append([])
         
         # Tabla de consultas
-        row += 3
-        ws[f'A{row}'] = "Consulta"
-        ws[f'B{row}'] = "Filas"
-        ws[f'C{row}'] = "Estado"
-        
-        # Formatear encabezados
-        for col in ['A', 'B', 'C']:
-            cell = ws[f'{col}{row}']
-            cell.font = self.header_font
-            cell.fill = self.header_fill
-            cell.alignment = self.header_alignment
-            cell.border = self.border
+        ws.append([self._celda(ws, titulo, self.ESTILO_ENCABEZADO) for titulo in ("Consulta", "Filas", "Estado")])
         
         # Datos de consultas
         for consulta in consultas_resultados:
-            row += 1
-            ws[f'A{row}'] = consulta.get('nombre', 'Sin nombre')
-            ws[f'B{row}'] = len(consulta.get('datos', []))
-            ws[f'C{row}'] = "Con datos" if consulta.get('datos') else "Sin datos"
-            
-            # Bordes para datos
-            for col in ['A', 'B', 'C']:
-                ws[f'{col}{row}'].border = self.border
-        
-        # Ajustar ancho de columnas
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 15
+            ws.append([
+                self._celda(ws, consulta.get('nombre', 'Sin nombre'), self.ESTILO_CELDA),
+                self._celda(ws, len(consulta.get('datos', [])), self.ESTILO_CELDA),
+                self._celda(ws, "Con datos" if consulta.get('datos') else "Sin datos", self.ESTILO_CELDA)
+            ])
     
     def _crear_hoja_consulta(
         self, 
@@ -148,45 +171,86 @@ class ExcelGeneratorService:
         consulta_resultado: Dict[str, Any],
         numero_consulta: int
     ):
-        """Crea una hoja para una consulta específica"""
+        """
+        Crea la hoja de una consulta específica
+        
+        Las filas se escriben a medida que se recorren los datos. Si superan
+        el máximo de Excel, siguen en hojas "<nombre>_2", "<nombre>_3", etc.
+        """
         nombre_consulta = consulta_resultado.get('nombre', f'Consulta_{numero_consulta}')
         # Limpiar nombre para que sea válido como nombre de hoja
         nombre_hoja = self._limpiar_nombre_hoja(nombre_consulta)
         
-        ws = workbook.create_sheet(nombre_hoja)
-        
         datos = consulta_resultado.get('datos', [])
         if not datos:
-            ws['A1'] = "No hay datos para mostrar"
+            ws = workbook.create_sheet(nombre_hoja)
+            ws.append(["No hay datos para mostrar"])
             return
         
-        # Obtener columnas
-        columnas = list(datos[0].keys()) if datos else []
+        # Obtener columnas (BufferFilas las guarda una sola vez)
+        columnas = list(getattr(datos, 'columnas', None) or datos[0].keys())
         
-        # Crear encabezados
-        for col_idx, columna in enumerate(columnas, 1):
-            cell = ws.cell(row=1, column=col_idx, value=columna)
-            cell.font = self.header_font
-            cell.fill = self.header_fill
-            cell.alignment = self.header_alignment
-            cell.border = self.border
-        
-        # Agregar datos
-        for row_idx, fila in enumerate(datos, 2):
-            for col_idx, columna in enumerate(columnas, 1):
-                valor = fila.get(columna, '')
-                cell = ws.cell(row=row_idx, column=col_idx, value=valor)
-                cell.border = self.border
-        
-        # Freeze primera fila
+        # El ancho de las columnas se calcula con las primeras filas, que luego se escriben
+        filas = iter(self._filas_como_tuplas(datos, columnas))
+        muestra = list(islice(filas, self.FILAS_MUESTRA_ANCHO))
+        anchos = self._anchos_columnas(columnas, muestra)
+        filas = chain(muestra, filas)
+        
+        filas_por_hoja = self.MAX_FILAS_HOJA - 1
+        parte = 1
+        while True:
+            ws = workbook.create_sheet(self._nombre_hoja_parte(nombre_hoja, parte))
+            self._escribir_hoja_datos(ws, columnas, anchos, islice(filas, filas_por_hoja))
+            
+            siguiente = next(filas, _SIN_FILAS)
+            if siguiente is _SIN_FILAS:
+                break
+            filas = chain([siguiente], filas)
+            parte += 1
+    
+    def _escribir_hoja_datos(self, ws, columnas: List[str], anchos: List[int], filas: Iterator[tuple]) -> int:
+        """
+        Escribe encabezados y filas en una hoja write-only y le agrega la tabla con autofiltro
+        
+        Returns:
+            int: Cantidad de filas de datos escritas
+        """
+        # Ajustar ancho de columnas y freeze de la primera fila (antes de escribir filas)
+        for col_idx, ancho in enumerate(anchos, 1):
+            ws.column_dimensions[self._get_column_letter(col_idx)].width = ancho
         ws.freeze_panes = 'A2'
         
+        # Crear encabezados
+        ws.append([self._celda(ws, str(columna), self.ESTILO_ENCABEZADO) for columna in columnas])
+        
+        # Agregar datos: cada fila se vuelca al archivo al agregarla, por eso
+        # se reutilizan las mismas celdas con estilo en todas las filas. Una
+        # fecha le cambia el formato de número a su celda (y openpyxl comparte
+        # ese estilo con las filas ya escritas): va en una celda propia
+        celdas = [self._celda(ws, estilo=self.ESTILO_CELDA) for _ in columnas]
+        total = 0
+        for valores in filas:
+            fila = celdas
+            for col_idx, (cell, valor) in enumerate(zip(celdas, valores)):
+                if isinstance(valor, _TIPOS_FECHA):
+                    if fila is celdas:
+                        fila = list(celdas)
+                    fila[col_idx] = self._celda(ws, valor, self.ESTILO_CELDA)
+                else:
+                    cell.value = valor
+            ws.append(fila)
+            total += 1
+        
         # Crear tabla con autofiltro
-        if len(datos) > 0:
-            table_range = f"A1:{self._get_column_letter(len(columnas))}{len(datos) + 1}"
+        if total > 0:
+            table_range = f"A1:{self._get_column_letter(len(columnas))}{total + 1}"
             # Limpiar nombre de tabla (no puede tener espacios ni caracteres especiales)
-            table_name = self._limpiar_nombre_tabla(f"Tabla_{nombre_hoja}")
+            table_name = self._limpiar_nombre_tabla(f"Tabla_{ws.title}")
             table = Table(displayName=table_name, ref=table_range)
+            # En write-only las columnas de la tabla se declaran a mano
+            table.tableColumns = [
+                TableColumn(id=col_idx, name=str(columna)) for col_idx, columna in enumerate(columnas, 1)
+            ]
             
             # Estilo de tabla
             style = TableStyleInfo(
@@ -198,19 +262,39 @@ class ExcelGeneratorService:
             )
             table.tableStyleInfo = style
             
-            ws.add_table(table)
+            with warnings.catch_warnings():
+                # openpyxl avisa que en write-only hay que declarar las columnas: ya están
+                warnings.simplefilter('ignore', UserWarning)
+                ws.add_table(table)
         
-        # Ajustar ancho de columnas
-        for col_idx, columna in enumerate(columnas, 1):
+        return total
+    
+    def _anchos_columnas(self, columnas: List[str], muestra: List[tuple]) -> List[int]:
+        """Ancho de cada columna según el encabezado y las filas de muestra"""
+        anchos = []
+        for col_idx, columna in enumerate(columnas):
             # Calcular ancho basado en el contenido
             max_length = len(str(columna))
-            for fila in datos[:100]:  # Solo revisar las primeras 100 filas para performance
-                cell_value = str(fila.get(columna, ''))
-                max_length = max(max_length, len(cell_value))
+            for valores in muestra:
+                valor = valores[col_idx] if col_idx < len(valores) else ''
+                max_length = max(max_length, len(str(valor if valor is not None else '')))
             
             # Limitar el ancho máximo
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[self._get_column_letter(col_idx)].width = adjusted_width
+            anchos.append(min(max_length + 2, 50))
+        return anchos
+    
+    def _nombre_hoja_parte(self, nombre_hoja: str, parte: int) -> str:
+        """Nombre de la hoja de continuación de una consulta (máximo 31 caracteres)"""
+        if parte == 1:
+            return nombre_hoja
+        sufijo = f"_{parte}"
+        return nombre_hoja[:31 - len(sufijo)] + sufijo
+    
+    def _filas_como_tuplas(self, datos, columnas: List[str]):
+        """Recorre las filas como tuplas de valores sin armar diccionarios"""
+        if hasattr(datos, 'filas'):
+            return datos.filas()
+        return (tuple(fila.get(columna, '') for columna in columnas) for fila in datos)
     
     def _limpiar_nombre_hoja(self, nombre: str) -> str:
         """Limpia el nombre para que sea válido como nombre de hoja de Excel"""
@@ -0,0 +1,168 @@
+"""
+Planificador de programaciones
+
+Mantiene las programaciones activas en una cola de prioridad ordenada por
+su próxima fecha de ejecución, de modo que el motor pueda dormir exactamente
+hasta el próximo disparo en lugar de revisar todas las programaciones
+cada minuto.
+
+Una programación cuya ejecución falla (control o conexión eliminados, por
+ejemplo) se reintenta con una espera que se duplica en cada fallo
+consecutivo, hasta un máximo, en lugar de volver a dispararse enseguida.
+"""
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.domain.entities.programacion import Programacion
+
+
+class PlanificadorProgramaciones:
+    """Cola de prioridad de programaciones por próxima ejecución"""
+
+    def __init__(self, tolerancia_segundos: int = 60, espera_reintento_segundos: int = 60,
+                 espera_reintento_maxima_segundos: int = 3600):
+        """
+        Inicializa el planificador
+
+        Args:
+            tolerancia_segundos: Al cargar, las ocurrencias vencidas hace menos de
+                este tiempo (y no ejecutadas) todavía se disparan
+            espera_reintento_segundos: Espera antes de reintentar una ejecución fallida
+                (se duplica en cada fallo consecutivo)
+            espera_reintento_maxima_segundos: Tope de la espera entre reintentos
+        """
+        self.tolerancia_segundos = tolerancia_segundos
+        self.espera_reintento_segundos = espera_reintento_segundos
+        self.espera_reintento_maxima_segundos = max(espera_reintento_segundos, espera_reintento_maxima_segundos)
+        # Fallos consecutivos y fecha del próximo reintento por programación
+        self._reintentos: Dict[int, Tuple[int, datetime]] = {}
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._programaciones: Dict[int, Programacion] = {}
+        self._en_ejecucion: Set[int] = set()
+        self._secuencia = itertools.count()
+        self._lock = threading.Lock()
+
+    def cargar(self, programaciones: List[Programacion], ahora: datetime = None) -> None:
+        """
+        Reemplaza la planificación con las programaciones dadas
+
+        Se respeta la proxima_ejecucion persistida; solo se recalcula si falta
+        o si quedó vencida hace más que la tolerancia (ejecuciones perdidas
+        mientras el motor estaba detenido no se recuperan).
+
+        Las programaciones que están ejecutándose se conservan tal cual:
+        se replanifican al terminar mediante reprogramar().
+        """
+        if ahora is None:
+            ahora = datetime.now()
+        desde = ahora - timedelta(seconds=self.tolerancia_segundos)
+
+        with self._lock:
+            self._heap = []
+            self._programaciones = {
+                id_: prog for id_, prog in self._programaciones.items()
+                if id_ in self._en_ejecucion
+            }
+            for programacion in programaciones:
+                if programacion.id is None or programacion.id in self._en_ejecucion:
+                    continue
+                if programacion.proxima_ejecucion is None or programacion.proxima_ejecucion < desde:
+                    programacion.proxima_ejecucion = programacion.calcular_proxima_ejecucion(desde)
+                # La espera de un reintento no se pierde al recargar desde la base
+                reintento = self._reintentos.get(programacion.id)
+                if reintento and programacion.proxima_ejecucion and programacion.proxima_ejecucion < reintento[1]:
+                    programacion.proxima_ejecucion = reintento[1]
+                self._agregar(programacion)
+
+    def reprogramar(self, programacion: Programacion, ahora: datetime = None,
+                    fallo: bool = False) -> Optional[datetime]:
+        """
+        Vuelve a encolar una programación (tras ejecutarla o modificarla)
+
+        Si su próxima ejecución no es posterior a ahora, se recalcula a partir
+        de ahora. Si la ejecución falló, se reintenta tras la espera de
+        reintento (creciente por fallo consecutivo), salvo que su próxima
+        ocurrencia normal llegue antes.
+
+        Returns:
+            datetime: Próxima ejecución, o None si ya no tiene más ejecuciones
+        """
+        if ahora is None:
+            ahora = datetime.now()
+
+        if programacion.proxima_ejecucion is None or programacion.proxima_ejecucion <= ahora:
+            programacion.proxima_ejecucion = programacion.calcular_proxima_ejecucion(ahora)
+
+        with self._lock:
+            if not fallo:
+                self._reintentos.pop(programacion.id, None)
+            elif programacion.proxima_ejecucion is not None:
+                fallos = self._reintentos.get(programacion.id, (0, ahora))[0] + 1
+                espera = min(self.espera_reintento_segundos * 2 ** (fallos - 1),
+                             self.espera_reintento_maxima_segundos)
+                reintento = ahora + timedelta(seconds=espera)
+                self._reintentos[programacion.id] = (fallos, reintento)
+                # Una ocurrencia normal vencida (intervalos atrasados) se reemplaza por el reintento
+                if programacion.proxima_ejecucion <= ahora or programacion.proxima_ejecucion > reintento:
+                    programacion.proxima_ejecucion = reintento
+
+            self._en_ejecucion.discard(programacion.id)
+            self._programaciones.pop(programacion.id, None)
+            self._heap = [entrada for entrada in self._heap if entrada[2] != programacion.id]
+            heapq.heapify(self._heap)
+            self._agregar(programacion)
+
+        return programacion.proxima_ejecucion
+
+    def extraer_vencidas(self, ahora: datetime = None) -> List[Programacion]:
+        """
+        Extrae las programaciones cuya próxima ejecución ya llegó
+
+        Las programaciones extraídas quedan marcadas como en ejecución y no se
+        vuelven a entregar hasta que se llame a reprogramar().
+        """
+        if ahora is None:
+            ahora = datetime.now()
+
+        vencidas = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= ahora:
+                _, _, programacion_id = heapq.heappop(self._heap)
+                programacion = self._programaciones.get(programacion_id)
+                if programacion is None:
+                    continue
+                self._en_ejecucion.add(programacion_id)
+                vencidas.append(programacion)
+        return vencidas
+
+    def proxima_ejecucion(self) -> Optional[datetime]:
+        """Fecha de la próxima ejecución planificada"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def segundos_hasta_proxima(self, ahora: datetime = None) -> Optional[float]:
+        """Segundos que faltan para la próxima ejecución (None si no hay ninguna)"""
+        proxima = self.proxima_ejecucion()
+        if proxima is None:
+            return None
+        if ahora is None:
+            ahora = datetime.now()
+        return max(0.0, (proxima - ahora).total_seconds())
+
+    def total_planificadas(self) -> int:
+        """Cantidad de programaciones en cola (sin contar las que están ejecutándose)"""
+        with self._lock:
+            return len(self._heap)
+
+    def _agregar(self, programacion: Programacion) -> None:
+        """Encola una programación si tiene próxima ejecución (requiere el lock)"""
+        if programacion.proxima_ejecucion is None:
+            return
+        self._programaciones[programacion.id] = programacion
+        heapq.heappush(
+            self._heap,
+            (programacion.proxima_ejecucion, next(self._secuencia), programacion.id)
+        )
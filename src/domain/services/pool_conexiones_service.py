@@ -0,0 +1,89 @@
+"""
+Interfaces de los pools de conexiones a las bases objetivo
+
+El servicio de ejecución obtiene y devuelve conexiones a través de estas
+interfaces; la implementación (pool_conexiones en infraestructura) decide
+cuántas mantener abiertas, cómo validarlas y cuándo descartarlas.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from src.domain.entities.conexion import Conexion
+
+
+class PoolConexionesService(ABC):
+    """Interfaz abstracta de un pool de conexiones a una base objetivo"""
+
+    @abstractmethod
+    def obtener(self, timeout: Optional[float] = 30) -> Any:
+        """Obtiene una conexión (reutilizada o nueva) esperando hasta timeout segundos"""
+        pass
+
+    @abstractmethod
+    def devolver(self, conn: Any, descartar: bool = False) -> None:
+        """Devuelve una conexión al pool (descartar=True la cierra)"""
+        pass
+
+    @contextmanager
+    def conexion(self, timeout: Optional[float] = 30):
+        """Context manager que obtiene y devuelve una conexión (la descarta si hubo error)"""
+        conn = self.obtener(timeout)
+        descartar = False
+        try:
+            yield conn
+        except Exception:
+            descartar = True
+            raise
+        finally:
+            self.devolver(conn, descartar=descartar)
+
+    @abstractmethod
+    def cache_sentencias(self, conn: Any, al_descartar: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Cache de sentencias preparadas de una conexión del pool
+
+        El cache ofrece obtener(clave, crear) y vive mientras la conexión siga abierta.
+        """
+        pass
+
+
+class GestorPoolsService(ABC):
+    """Interfaz abstracta que administra un pool por cada Conexion"""
+
+    # Espera máxima para obtener una conexión de un pool
+    timeout_obtener_segundos: float = 30
+
+    @abstractmethod
+    def obtener_pool(
+        self,
+        conexion: Conexion,
+        fabrica: Callable[[], Any],
+        validador: Optional[Callable[[Any], bool]] = None,
+        reiniciador: Optional[Callable[[Any], None]] = None
+    ) -> PoolConexionesService:
+        """
+        Obtiene (o crea) el pool de una conexión
+
+        Args:
+            conexion: Entidad Conexion; su id es la clave del pool
+            fabrica: Función que abre una conexión nueva
+            validador: Función de health-check
+            reiniciador: Función que limpia la conexión al devolverla
+        """
+        pass
+
+    @abstractmethod
+    def invalidar(self, conexion_id: int) -> bool:
+        """Cierra y descarta el pool de una conexión; True si existía"""
+        pass
+
+    @abstractmethod
+    def cerrar_todos(self) -> None:
+        """Cierra todos los pools"""
+        pass
+
+    @abstractmethod
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Métricas de aciertos/fallos de los pools"""
+        pass
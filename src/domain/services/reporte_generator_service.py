@@ -0,0 +1,135 @@
+"""
+Servicio para generación del archivo de resultados de un control
+
+Cada referente elige el formato en que recibe los datos de un control
+disparado: el libro Excel (ExcelGeneratorService) o un archivo plano para
+procesar con otras herramientas:
+
+- csv: un archivo por consulta con datos (con una sola, sin sufijo)
+- csv.gz: igual que csv, comprimido con gzip
+- jsonl: un único archivo con un objeto JSON por fila y la consulta en "_consulta"
+
+Los archivos planos se escriben fila por fila a medida que se recorren los
+datos (BufferFilas entrega tuplas sin armar diccionarios), sin cargar la
+consulta completa en memoria. Los nombres siguen el esquema del Excel:
+"<control>_<AAAAMMDD_HHMMSS>.<extensión>".
+"""
+import csv
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.domain.entities.control_referente import FormatoArchivo
+from src.domain.services.excel_generator_service import ExcelGeneratorService
+
+
+class ReporteGeneratorService:
+    """Genera el archivo de resultados de un control en el formato pedido"""
+
+    # Nivel de gzip: casi la compresión del máximo a una fracción del tiempo
+    NIVEL_COMPRESION = 6
+
+    # Búfer de escritura de los archivos planos
+    TAMANO_BUFFER = 1024 * 1024
+
+    def __init__(self, excel_generator: Optional[ExcelGeneratorService] = None):
+        self._excel_generator = excel_generator or ExcelGeneratorService()
+        self.logger = logging.getLogger(__name__)
+
+    def generar_archivos_control(
+        self,
+        control_nombre: str,
+        consultas_resultados: List[Dict[str, Any]],
+        referente_path: str,
+        fecha_ejecucion: datetime = None,
+        formato: FormatoArchivo = FormatoArchivo.XLSX
+    ) -> List[str]:
+        """
+        Genera los archivos con los resultados de las consultas de un control
+
+        Args:
+            control_nombre: Nombre del control ejecutado
+            consultas_resultados: Lista de diccionarios con los resultados de cada consulta
+                Formato: [{'nombre': 'consulta1', 'datos': [dict], 'columnas': [str]}, ...]
+            referente_path: Ruta donde guardar los archivos
+            fecha_ejecucion: Fecha de ejecución (por defecto now)
+            formato: Formato de los archivos
+
+        Returns:
+            List[str]: Rutas completas de los archivos generados
+        """
+        if formato == FormatoArchivo.XLSX:
+            return [self._excel_generator.generar_excel_control(
+                control_nombre=control_nombre,
+                consultas_resultados=consultas_resultados,
+                referente_path=referente_path,
+                fecha_ejecucion=fecha_ejecucion
+            )]
+
+        if fecha_ejecucion is None:
+            fecha_ejecucion = datetime.now()
+        timestamp = fecha_ejecucion.strftime("%Y%m%d_%H%M%S")
+        base = f"{self._excel_generator._limpiar_nombre_archivo(control_nombre)}_{timestamp}"
+        os.makedirs(referente_path, exist_ok=True)
+
+        consultas = [
+            (consulta.get('nombre', f'Consulta_{i + 1}'), consulta['datos'])
+            for i, consulta in enumerate(consultas_resultados) if consulta.get('datos')
+        ]
+
+        if formato == FormatoArchivo.JSONL:
+            filepath = os.path.join(referente_path, f"{base}.jsonl")
+            self._escribir_jsonl(filepath, consultas)
+            archivos = [filepath]
+        else:
+            archivos = []
+            for nombre, datos in consultas:
+                sufijo = "" if len(consultas) == 1 else f"_{self._excel_generator._limpiar_nombre_archivo(nombre)}"
+                filepath = os.path.join(referente_path, f"{base}{sufijo}.{formato.value}")
+                self._escribir_csv(filepath, datos, comprimir=formato == FormatoArchivo.CSV_GZ)
+                archivos.append(filepath)
+
+        self.logger.debug(f"📄 Archivos {formato.value} generados: {archivos}")
+        return archivos
+
+    def _columnas_y_filas(self, datos) -> Tuple[List[str], Iterator[tuple]]:
+        """Columnas de la consulta y sus filas como tuplas"""
+        columnas = list(getattr(datos, 'columnas', None) or datos[0].keys())
+        return columnas, self._excel_generator._filas_como_tuplas(datos, columnas)
+
+    def _abrir_texto(self, filepath: str, comprimir: bool = False):
+        """Abre el archivo para escribir texto UTF-8 con búfer grande (o comprimido con gzip)"""
+        if comprimir:
+            return gzip.open(filepath, 'wt', encoding='utf-8', newline='', compresslevel=self.NIVEL_COMPRESION)
+        return open(filepath, 'w', encoding='utf-8', newline='', buffering=self.TAMANO_BUFFER)
+
+    def _escribir_csv(self, filepath: str, datos, comprimir: bool = False) -> int:
+        """Escribe una consulta como CSV (encabezado + filas); retorna las filas escritas"""
+        columnas, filas = self._columnas_y_filas(datos)
+        escritas = 0
+        with self._abrir_texto(filepath, comprimir) as archivo:
+            writer = csv.writer(archivo)
+            writer.writerow(columnas)
+            for fila in filas:
+                writer.writerow(fila)
+                escritas += 1
+        return escritas
+
+    def _escribir_jsonl(self, filepath: str, consultas: List[Tuple[str, Any]]) -> int:
+        """Escribe todas las consultas como JSON Lines; retorna las filas escritas"""
+        encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+        escritas = 0
+        with self._abrir_texto(filepath) as archivo:
+            for nombre, datos in consultas:
+                columnas, filas = self._columnas_y_filas(datos)
+                for fila in filas:
+                    registro = {'_consulta': nombre}
+                    registro.update(zip(columnas, fila))
+                    archivo.write(encoder.encode(registro))
+                    archivo.write('\n')
+                    escritas += 1
+        return escritas
+
@@ -0,0 +1,460 @@
+"""
+Conector JDBC para IBM i (driver JT400)
+
+Centraliza la apertura de conexiones JDBC a IBM i:
+- Inicia la JVM una sola vez por proceso
+- Recuerda qué configuración de propiedades conectó a cada conexión
+  (persistida entre reinicios si se indica un repositorio) y la prueba primero
+- Omite la verificación de socket si la conexión estuvo sana recientemente
+- Aplica propiedades de block fetch/prefetch para que los SELECT grandes
+  se transfieran en bloques
+- Reutiliza los PreparedStatement de cada conexión entre ejecuciones
+"""
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import jaydebeapi
+except ImportError:
+    jaydebeapi = None
+
+from src.domain.entities.conexion import Conexion
+from src.domain.services.conector_ibmi_service import ConectorIBMiService
+
+
+DRIVER_CLASS = "com.ibm.as400.access.AS400JDBCDriver"
+
+_jvm_lock = threading.Lock()
+
+
+# Tipos de java.sql.Types y cómo leer cada uno del ResultSet (como la
+# conversión por defecto de jaydebeapi: fechas como texto, decimales como float)
+_TIPOS_ENTEROS = {-7: 'getBoolean', 16: 'getBoolean', -6: 'getInt', 5: 'getInt', 4: 'getInt', -5: 'getLong'}
+_TIPOS_REALES = {2, 3, 6, 7, 8}  # NUMERIC, DECIMAL, FLOAT, REAL, DOUBLE
+_TIPOS_BINARIOS = {-2, -3, -4, 2004}  # BINARY, VARBINARY, LONGVARBINARY, BLOB
+_TIPO_DATE, _TIPO_TIME, _TIPO_TIMESTAMP = 91, 92, 93
+
+
+class CursorSentenciasPreparadas:
+    """
+    Cursor DB-API sobre la conexión JDBC que toma los PreparedStatement de un cache
+
+    El cursor de jaydebeapi prepara y cierra un PreparedStatement en cada
+    execute(). Este cursor lo obtiene del cache de la conexión y no lo cierra,
+    para que el mismo texto SQL no vuelva a prepararse en el servidor. Solo usa
+    la API JDBC pública (jconn, PreparedStatement, ResultSet), no el estado
+    interno del cursor de jaydebeapi.
+    """
+
+    def __init__(self, connection, cache):
+        self._connection = connection
+        self._cache = cache
+        self._rs = None
+        self._lectores = []
+        self.description = None
+        self.rowcount = -1
+        self.arraysize = 1
+
+    def execute(self, operation, parameters=None):
+        self._cerrar_resultado()
+        prep = self._cache.obtener(
+            operation, lambda: self._connection.jconn.prepareStatement(operation)
+        )
+        prep.clearParameters()
+        for indice, valor in enumerate(parameters or (), start=1):
+            prep.setObject(indice, valor)
+
+        if prep.execute():
+            self._rs = prep.getResultSet()
+            meta = self._rs.getMetaData()
+            columnas = range(1, meta.getColumnCount() + 1)
+            self.description = [
+                (meta.getColumnLabel(i), meta.getColumnType(i), meta.getColumnDisplaySize(i),
+                 meta.getColumnDisplaySize(i), meta.getPrecision(i), meta.getScale(i), meta.isNullable(i))
+                for i in columnas
+            ]
+            self._lectores = [self._lector(i, meta.getColumnType(i)) for i in columnas]
+            self.rowcount = -1
+        else:
+            self.rowcount = prep.getUpdateCount()
+
+    def fetchone(self):
+        if self._rs is None or not self._rs.next():
+            return None
+        return tuple(leer() for leer in self._lectores)
+
+    def fetchmany(self, size=None):
+        filas = []
+        for _ in range(self.arraysize if size is None else size):
+            fila = self.fetchone()
+            if fila is None:
+                break
+            filas.append(fila)
+        return filas
+
+    def fetchall(self):
+        filas = []
+        fila = self.fetchone()
+        while fila is not None:
+            filas.append(fila)
+            fila = self.fetchone()
+        return filas
+
+    def close(self):
+        # El PreparedStatement queda en el cache de la conexión; solo se cierra el ResultSet
+        self._cerrar_resultado()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _cerrar_resultado(self):
+        if self._rs is not None:
+            self._rs.close()
+        self._rs = None
+        self._lectores = []
+        self.description = None
+
+    def _lector(self, columna: int, tipo: int):
+        """Función que lee el valor de una columna de la fila actual"""
+        rs = self._rs
+
+        if tipo in _TIPOS_ENTEROS or tipo in _TIPOS_REALES:
+            # Los getters primitivos devuelven 0/false para NULL: se consulta wasNull()
+            if tipo in _TIPOS_REALES:
+                getter, convertir = rs.getDouble, float
+            else:
+                getter = getattr(rs, _TIPOS_ENTEROS[tipo])
+                convertir = bool if _TIPOS_ENTEROS[tipo] == 'getBoolean' else int
+
+            def leer_primitivo():
+                valor = getter(columna)
+                return None if rs.wasNull() else convertir(valor)
+            return leer_primitivo
+
+        if tipo in _TIPOS_BINARIOS:
+            getter, convertir = rs.getBytes, bytes
+        elif tipo == _TIPO_DATE:
+            getter, convertir = rs.getDate, lambda valor: str(valor)[:10]
+        elif tipo == _TIPO_TIME:
+            getter, convertir = rs.getTime, str
+        elif tipo == _TIPO_TIMESTAMP:
+            getter, convertir = rs.getTimestamp, self._texto_timestamp
+        else:
+            return lambda: rs.getObject(columna)
+
+        def leer_objeto():
+            valor = getter(columna)
+            return None if valor is None else convertir(valor)
+        return leer_objeto
+
+    @staticmethod
+    def _texto_timestamp(valor) -> str:
+        """Timestamp JDBC como 'AAAA-MM-DD HH:MM:SS[.ffffff]'"""
+        fecha = datetime.strptime(str(valor)[:19], "%Y-%m-%d %H:%M:%S")
+        return str(fecha.replace(microsecond=int(valor.getNanos()) // 1000))
+
+
+def iniciar_jvm(driver_path: str) -> bool:
+    """
+    Inicia la JVM con el driver en el classpath (una sola vez por proceso)
+
+    Returns:
+        bool: True si la JVM quedó iniciada por JPype; False si JPype no está
+            disponible (jaydebeapi la iniciará en la primera conexión)
+    """
+    try:
+        import jpype
+    except ImportError:
+        return False
+
+    with _jvm_lock:
+        if not jpype.isJVMStarted():
+            jpype.startJVM(
+                jpype.getDefaultJVMPath(),
+                f"-Djava.class.path={driver_path}",
+                convertStrings=True
+            )
+    return True
+
+
+class ConectorIBMiJDBC(ConectorIBMiService):
+    """Abre conexiones JDBC a IBM i recordando la configuración que funciona"""
+
+    # Propiedades jt400 para transferir resultados en bloques (sobrescribibles
+    # por conexión mediante Conexion.propiedades_jdbc)
+    PROPIEDADES_RENDIMIENTO = {
+        'block size': '512',      # KB por bloque de filas
+        'block criteria': '2',    # Bloquear salvo FOR UPDATE
+        'prefetch': 'true',       # Traer el primer bloque junto con el OPEN
+        'lazy close': 'true'      # Cerrar cursores en la siguiente petición
+    }
+
+    def __init__(
+        self,
+        configuracion_repository=None,
+        driver_path: str = None,
+        ventana_salud_segundos: float = 300,
+        timeout_socket_segundos: float = 10
+    ):
+        """
+        Inicializa el conector
+
+        Args:
+            configuracion_repository: Repositorio donde persistir la configuración
+                exitosa por conexión (None = solo en memoria)
+            driver_path: Ruta al jt400.jar (por defecto drivers/jt400.jar)
+            ventana_salud_segundos: Si la conexión funcionó hace menos de este
+                tiempo no se verifica el puerto antes de conectar
+            timeout_socket_segundos: Timeout de la verificación de puerto
+        """
+        self._repository = configuracion_repository
+        self.driver_path = driver_path or os.path.join(os.getcwd(), "drivers", "jt400.jar")
+        self.ventana_salud_segundos = ventana_salud_segundos
+        self.timeout_socket_segundos = timeout_socket_segundos
+
+        self._configuraciones_recordadas: Dict[Any, Dict[str, Any]] = {}
+        self._ultima_salud: Dict[Any, tuple] = {}  # (huella, instante)
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    def conectar(self, conexion: Conexion):
+        """Abre una conexión JDBC probando primero la configuración recordada"""
+        # Verificar si jaydebeapi está disponible
+        if jaydebeapi is None:
+            raise Exception("jaydebeapi no está instalado. Instale con: pip install jaydebeapi")
+
+        if not os.path.exists(self.driver_path):
+            raise Exception(f"Driver JT400 no encontrado en: {self.driver_path}")
+
+        iniciar_jvm(self.driver_path)
+
+        # Usar puerto por defecto si no se especifica
+        puerto = conexion.puerto if conexion.puerto and conexion.puerto > 0 else 446
+
+        if self.esta_sana(conexion):
+            print("DEBUG: Conexión sana recientemente, se omite verificación de puerto")
+        else:
+            self._verificar_conectividad(conexion.servidor, puerto)
+
+        huella = self._huella(conexion)
+        recordada = self._obtener_recordada(conexion, huella)
+        configuraciones = self._configuraciones(conexion, puerto)
+        if recordada:
+            configuraciones.sort(key=lambda config: config['clave'] != recordada)
+
+        conn = None
+        ultimo_error = None
+        for config in configuraciones:
+            print(f"DEBUG: Probando {config['descripcion']} - URL: {config['url']}")
+            try:
+                conn = jaydebeapi.connect(
+                    DRIVER_CLASS,
+                    config['url'],
+                    config['props'],
+                    self.driver_path
+                )
+                print(f"DEBUG: ¡Conexión establecida exitosamente con {config['descripcion']}!")
+                break
+            except Exception as e:
+                print(f"DEBUG: Error con {config['descripcion']}: {str(e)}")
+                ultimo_error = e
+
+        if conn is None:
+            self.olvidar(conexion)
+            raise Exception(f"Todos los métodos de conexión fallaron. Último error: {str(ultimo_error)}")
+
+        self._recordar(conexion, huella, config['clave'])
+
+        # Establecer biblioteca de trabajo si se especifica
+        if conexion.base_datos and conexion.base_datos != '*LIBL':
+            try:
+                with conn.cursor() as setup_cursor:
+                    setup_cursor.execute(f"SET SCHEMA {conexion.base_datos}")
+                    print(f"DEBUG: Esquema establecido a: {conexion.base_datos}")
+            except Exception as e:
+                print(f"DEBUG: Advertencia - No se pudo establecer esquema: {str(e)}")
+
+        return conn
+
+    def crear_cursor(self, conn, cache=None):
+        """
+        Crea un cursor que reutiliza los PreparedStatement del cache de la conexión
+
+        Args:
+            conn: Conexión jaydebeapi
+            cache: CacheSentenciasPreparadas de la conexión (None = cursor estándar)
+        """
+        if cache is None:
+            return conn.cursor()
+        return CursorSentenciasPreparadas(conn, cache)
+
+    def registrar_salud(self, conexion: Conexion) -> None:
+        """Marca la conexión como sana (una consulta terminó correctamente)"""
+        huella = self._huella(conexion)
+        with self._lock:
+            self._ultima_salud[self._clave(conexion)] = (huella, time.monotonic())
+
+    def esta_sana(self, conexion: Conexion) -> bool:
+        """Indica si la conexión funcionó dentro de la ventana de salud"""
+        huella = self._huella(conexion)
+        with self._lock:
+            ultima = self._ultima_salud.get(self._clave(conexion))
+        if ultima is not None:
+            return ultima[0] == huella and time.monotonic() - ultima[1] < self.ventana_salud_segundos
+
+        recordada = self._leer_persistida(conexion)
+        if recordada and recordada['huella'] == huella:
+            antiguedad = (datetime.now() - recordada['fecha_ultimo_exito']).total_seconds()
+            return 0 <= antiguedad < self.ventana_salud_segundos
+        return False
+
+    def olvidar(self, conexion: Conexion) -> None:
+        """Descarta la configuración recordada y el estado de salud de una conexión"""
+        clave = self._clave(conexion)
+        with self._lock:
+            self._configuraciones_recordadas.pop(clave, None)
+            self._ultima_salud.pop(clave, None)
+        if self._repository is not None and conexion.id is not None:
+            try:
+                self._repository.eliminar(conexion.id)
+            except Exception as e:
+                self._logger.warning(f"No se pudo olvidar la configuración JDBC: {e}")
+
+    def _configuraciones(self, conexion: Conexion, puerto: int) -> List[Dict[str, Any]]:
+        """Configuraciones de conexión a intentar, con las propiedades de rendimiento aplicadas"""
+        credenciales = {
+            'user': conexion.usuario,
+            'password': conexion.contraseña or "",
+        }
+        configuraciones = [
+            {
+                'clave': 'basica',
+                'url': f"jdbc:as400://{conexion.servidor}:{puerto}",
+                'props': {
+                    'prompt': 'false',
+                    'thread used': 'false',
+                    'errors': 'full',
+                    'naming': 'system',  # Único para IBM i - toma lista de librerías
+                    'libraries': '*LIBL',
+                    'date format': 'iso',
+                    'time format': 'hms'
+                },
+                'descripcion': 'Configuración básica con naming=system'
+            },
+            {
+                'clave': 'sin_puerto',
+                'url': f"jdbc:as400://{conexion.servidor}",
+                'props': {
+                    'prompt': 'false',
+                    'secure': 'false',
+                    'thread used': 'false',
+                    'naming': 'system',  # Único para IBM i - toma lista de librerías
+                    'libraries': '*LIBL'
+                },
+                'descripcion': 'Configuración simplificada sin puerto con naming=system'
+            },
+            {
+                'clave': 'sin_seguridad',
+                'url': f"jdbc:as400://{conexion.servidor}:{puerto}",
+                'props': {
+                    'prompt': 'false',
+                    'secure': 'false',
+                    'thread used': 'false',
+                    'errors': 'basic',
+                    'trace': 'false',
+                    'naming': 'system'  # Único para IBM i - toma lista de librerías
+                },
+                'descripcion': 'Configuración sin seguridad con naming=system'
+            }
+        ]
+
+        propiedades_conexion = conexion.obtener_propiedades_jdbc()
+        for config in configuraciones:
+            config['props'] = {
+                **credenciales,
+                **config['props'],
+                **self.PROPIEDADES_RENDIMIENTO,
+                **propiedades_conexion
+            }
+        return configuraciones
+
+    def _verificar_conectividad(self, servidor: str, puerto: int) -> None:
+        """Verifica que el puerto del servidor acepte conexiones"""
+        print("DEBUG: Verificando conectividad básica...")
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_socket_segundos)
+            result = sock.connect_ex((servidor, puerto))
+            sock.close()
+            if result != 0:
+                raise Exception(f"No se puede conectar al puerto {puerto} en {servidor}")
+            print(f"DEBUG: Puerto {puerto} accesible en {servidor}")
+        except Exception as e:
+            raise Exception(f"Error de conectividad de red: {str(e)}")
+
+    def _obtener_recordada(self, conexion: Conexion, huella: str) -> Optional[str]:
+        """Clave de la configuración que conectó la última vez (si la conexión no cambió)"""
+        clave = self._clave(conexion)
+        with self._lock:
+            recordada = self._configuraciones_recordadas.get(clave)
+        if recordada is None:
+            recordada = self._leer_persistida(conexion)
+            if recordada:
+                with self._lock:
+                    self._configuraciones_recordadas[clave] = recordada
+
+        if recordada and recordada['huella'] == huella:
+            return recordada['configuracion']
+        return None
+
+    def _recordar(self, conexion: Conexion, huella: str, configuracion: str) -> None:
+        """Guarda la configuración exitosa en memoria y en el repositorio"""
+        ahora = datetime.now()
+        clave = self._clave(conexion)
+        with self._lock:
+            self._configuraciones_recordadas[clave] = {
+                'huella': huella,
+                'configuracion': configuracion,
+                'fecha_ultimo_exito': ahora
+            }
+            self._ultima_salud[clave] = (huella, time.monotonic())
+
+        if self._repository is not None and conexion.id is not None:
+            try:
+                self._repository.guardar(conexion.id, huella, configuracion, ahora)
+            except Exception as e:
+                self._logger.warning(f"No se pudo persistir la configuración JDBC: {e}")
+
+    def _leer_persistida(self, conexion: Conexion) -> Optional[Dict[str, Any]]:
+        """Lee la configuración persistida de una conexión"""
+        if self._repository is None or conexion.id is None:
+            return None
+        try:
+            return self._repository.obtener(conexion.id)
+        except Exception as e:
+            self._logger.warning(f"No se pudo leer la configuración JDBC: {e}")
+            return None
+
+    def _clave(self, conexion: Conexion):
+        """Clave de la conexión en los registros en memoria"""
+        return conexion.id if conexion.id is not None else conexion.nombre
+
+    def _huella(self, conexion: Conexion) -> str:
+        """Hash de los datos que, si cambian, invalidan la configuración recordada"""
+        datos = "|".join(str(valor) for valor in (
+            conexion.servidor,
+            conexion.puerto,
+            conexion.usuario,
+            conexion.contraseña,
+            conexion.propiedades_jdbc
+        ))
+        return hashlib.sha256(datos.encode("utf-8")).hexdigest()
@@ -0,0 +1,138 @@
+"""
+Conexiones a la base de datos del sistema (SQLite)
+
+Todos los repositorios SQLite obtienen su conexión de aquí en lugar de
+abrir una nueva en cada llamada. Cada hilo mantiene una conexión abierta
+por archivo de base de datos, configurada con journal WAL para que las
+lecturas de la GUI no bloqueen las escrituras del motor (y viceversa),
+synchronous=NORMAL, espera ante bloqueos y cache de sentencias.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class GestorConexionesSQLite:
+    """
+    Conexiones SQLite por hilo y por archivo de base de datos
+
+    Uso equivalente a ``with sqlite3.connect(db_path) as conn:``: al salir
+    del bloque se confirma la transacción (o se revierte si hubo una
+    excepción), pero la conexión queda abierta para la próxima llamada.
+    """
+
+    def __init__(
+        self,
+        timeout_ms: int = 30000,
+        cache_kb: int = 16384,
+        mmap_bytes: int = 128 * 1024 * 1024,
+        sentencias_en_cache: int = 256
+    ):
+        """
+        Args:
+            timeout_ms: Espera máxima ante una base bloqueada por otro proceso
+            cache_kb: Tamaño del cache de páginas por conexión
+            mmap_bytes: Bytes del archivo mapeados en memoria (0 lo desactiva)
+            sentencias_en_cache: Sentencias compiladas que conserva cada conexión
+        """
+        self.timeout_ms = timeout_ms
+        self.cache_kb = cache_kb
+        self.mmap_bytes = mmap_bytes
+        self.sentencias_en_cache = sentencias_en_cache
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Todas las conexiones abiertas (de todos los hilos) para poder cerrarlas
+        self._abiertas: Dict[int, tuple] = {}
+
+    @contextmanager
+    def conectar(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """Conexión del hilo actual a la base, dentro de una transacción"""
+        conn = self._obtener(db_path)
+        # Un bloque anidado (un repositorio que usa otro) no altera al que lo contiene
+        row_factory_anterior = conn.row_factory
+        conn.row_factory = None
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.row_factory = row_factory_anterior
+
+    def cerrar(self, db_path: Optional[str] = None) -> None:
+        """Cierra las conexiones abiertas (todas, o solo las de una base)"""
+        ruta = self._ruta(db_path) if db_path is not None else None
+        with self._lock:
+            for clave, (ruta_conn, conn) in list(self._abiertas.items()):
+                if ruta is None or ruta_conn == ruta:
+                    del self._abiertas[clave]
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+
+    def cerrar_hilo_actual(self) -> None:
+        """Cierra las conexiones del hilo actual (llamar antes de que termine un hilo de corta vida)"""
+        conexiones = getattr(self._local, 'conexiones', None)
+        if not conexiones:
+            return
+        with self._lock:
+            for conn in conexiones.values():
+                if self._abiertas.pop(id(conn), None) is not None:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+        conexiones.clear()
+
+    def _obtener(self, db_path: str) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual, creándola si hace falta"""
+        conexiones = getattr(self._local, 'conexiones', None)
+        if conexiones is None:
+            conexiones = self._local.conexiones = {}
+
+        ruta = self._ruta(db_path)
+        conn = conexiones.get(ruta)
+        if conn is not None and id(conn) in self._abiertas:
+            return conn
+
+        conn = self._crear(ruta)
+        conexiones[ruta] = conn
+        with self._lock:
+            self._abiertas[id(conn)] = (ruta, conn)
+        return conn
+
+    def _crear(self, ruta: str) -> sqlite3.Connection:
+        """Abre y configura una conexión nueva"""
+        conn = sqlite3.connect(
+            ruta,
+            timeout=self.timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.sentencias_en_cache
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout_ms)}")
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            # Base nueva: espacio recuperable por pasos (las existentes lo adoptan con un VACUUM)
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        if ruta != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _ruta(self, db_path: str) -> str:
+        """Ruta absoluta de la base (así 'x.db' y './x.db' comparten conexión)"""
+        if db_path == ":memory:":
+            return db_path
+        return os.path.abspath(db_path)
+
+
+# Gestor compartido por todos los repositorios del proceso
+gestor_conexiones = GestorConexionesSQLite()
+
+
+def conectar(db_path: str):
+    """Conexión a la base del sistema usando el gestor compartido"""
+    return gestor_conexiones.conectar(db_path)
@@ -0,0 +1,198 @@
+"""
+Escritura diferida de la base del sistema (SQLite)
+
+Los hilos que ejecutan controles no escriben en la base: encolan los
+resultados de ejecución y las programaciones a actualizar, y un único hilo
+escritor los persiste por lotes, con una transacción por lote. Así las
+ejecuciones concurrentes no compiten por el bloqueo de escritura de SQLite
+ni esperan al disco.
+
+La cola es acotada: si el escritor no da abasto, encolar espera (presión
+hacia atrás) en lugar de acumular memoria sin límite. Al cerrar se escribe
+todo lo pendiente.
+
+Un lote que falla tras sus reintentos (base bloqueada por una operación
+larga, disco lleno) no se pierde: queda retenido y se vuelve a intentar
+junto con el lote siguiente. Solo si lo retenido supera la capacidad se
+descartan las escrituras más antiguas.
+"""
+import copy
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from src.domain.entities.programacion import Programacion
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.repositories.sqlite_programacion_repository import SQLiteProgramacionRepository
+from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
+
+# Marca de fin para el hilo escritor
+_FIN = object()
+
+
+class EscritorDiferidoSQLite:
+    """Hilo escritor único alimentado por una cola acotada"""
+
+    def __init__(
+        self,
+        db_path: str,
+        resultado_repository: Optional[SQLiteResultadoEjecucionRepository] = None,
+        programacion_repository: Optional[SQLiteProgramacionRepository] = None,
+        capacidad: int = 1000,
+        tamano_lote: int = 200,
+        espera_lote: float = 0.2,
+        reintentos: int = 3,
+        pausa_retenidos: float = 5.0
+    ):
+        """
+        Args:
+            db_path: Base de datos del sistema
+            resultado_repository: Repositorio de resultados (se crea si no se indica)
+            programacion_repository: Repositorio de programaciones (se crea si no se indica)
+            capacidad: Máximo de escrituras pendientes antes de que encolar espere
+            tamano_lote: Máximo de escrituras por transacción
+            espera_lote: Segundos que se esperan más escrituras antes de confirmar un lote
+            reintentos: Intentos de escribir un lote antes de retenerlo para más tarde
+            pausa_retenidos: Segundos entre intentos de escribir lo retenido si no llega nada nuevo
+        """
+        self.db_path = db_path
+        self.resultado_repository = resultado_repository or SQLiteResultadoEjecucionRepository(db_path)
+        self.programacion_repository = programacion_repository or SQLiteProgramacionRepository(db_path)
+        self.tamano_lote = max(1, tamano_lote)
+        self.espera_lote = espera_lote
+        self.reintentos = max(1, reintentos)
+        self.pausa_retenidos = pausa_retenidos
+        self.capacidad = max(1, capacidad)
+        self.logger = logging.getLogger(__name__)
+        self._cola: "queue.Queue" = queue.Queue(maxsize=self.capacidad)
+        self._retenidos: list = []  # Escrituras de lotes fallidos, a reintentar (solo el hilo escritor)
+        self._metricas_lock = threading.Lock()
+        self._metricas = {'resultados': 0, 'programaciones': 0, 'lotes': 0, 'descartados': 0, 'retenidos': 0}
+        self._hilo = threading.Thread(target=self._escribir, name="EscritorSQLite", daemon=True)
+        self._hilo.start()
+
+    def encolar_resultado(self, resultado: ResultadoEjecucion, timeout: Optional[float] = None) -> None:
+        """Encola un resultado de ejecución para guardarlo (espera si la cola está llena)"""
+        self._encolar(resultado, timeout)
+
+    def encolar_programacion(self, programacion: Programacion, timeout: Optional[float] = None) -> None:
+        """Encola la actualización de una programación (espera si la cola está llena)"""
+        # Copia: el planificador sigue modificando la programación mientras espera en la cola
+        self._encolar(copy.copy(programacion), timeout)
+
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se escriba todo lo encolado; retorna False si se agotó el tiempo"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cola.all_tasks_done:
+            while self._cola.unfinished_tasks:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cola.all_tasks_done.wait(restante)
+        return True
+
+    def cerrar(self, timeout: Optional[float] = None) -> None:
+        """Escribe todo lo pendiente y detiene el hilo escritor"""
+        if not self._hilo.is_alive():
+            return
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+
+    def pendientes(self) -> int:
+        """Escrituras encoladas que todavía no se confirmaron"""
+        return self._cola.unfinished_tasks
+
+    def obtener_metricas(self) -> Dict[str, int]:
+        """Escrituras confirmadas, lotes, escrituras retenidas por error y descartadas"""
+        with self._metricas_lock:
+            metricas = dict(self._metricas)
+        metricas['pendientes'] = self.pendientes()
+        return metricas
+
+    def _encolar(self, elemento, timeout: Optional[float]) -> None:
+        if not self._hilo.is_alive():
+            raise RuntimeError("El escritor diferido está cerrado")
+        self._cola.put(elemento, timeout=timeout)
+
+    def _escribir(self) -> None:
+        """Bucle del hilo escritor: junta un lote, lo confirma y repite"""
+        terminar = False
+        while not terminar:
+            try:
+                # Con escrituras retenidas no se espera indefinidamente: se reintentan solas
+                lote = [self._cola.get(timeout=self.pausa_retenidos if self._retenidos else None)]
+            except queue.Empty:
+                lote = []
+            limite = time.monotonic() + self.espera_lote
+            while lote and len(lote) < self.tamano_lote and lote[-1] is not _FIN:
+                try:
+                    lote.append(self._cola.get(timeout=max(0.0, limite - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            if lote and lote[-1] is _FIN:
+                terminar = True
+                lote.pop()
+                # Lo que quedó en la cola se escribe antes de terminar
+                while True:
+                    try:
+                        lote.append(self._cola.get_nowait())
+                    except queue.Empty:
+                        break
+            tomados = len(lote) + int(terminar)
+            # Lo retenido va primero: de cada programación prevalece el estado más nuevo
+            lote, self._retenidos = self._retenidos + lote, []
+            try:
+                if not self._confirmar_lote(lote):
+                    self._retener(lote, final=terminar)
+            finally:
+                for _ in range(tomados):
+                    self._cola.task_done()
+
+    def _retener(self, lote: list, final: bool = False) -> None:
+        """Guarda un lote fallido para reintentarlo (descarta lo que excede la capacidad)"""
+        descartados = len(lote) if final else max(0, len(lote) - self.capacidad)
+        self._retenidos = lote[descartados:]
+        if descartados:
+            self.logger.error(f"❌ Se descartan {descartados} escrituras que no se pudieron guardar")
+        elif self._retenidos:
+            self.logger.warning(f"⚠️ Se retienen {len(self._retenidos)} escrituras para reintentar")
+        with self._metricas_lock:
+            self._metricas['descartados'] += descartados
+            self._metricas['retenidos'] = len(self._retenidos)
+
+    def _confirmar_lote(self, lote: list) -> bool:
+        """Escribe un lote en una única transacción (reintenta ante errores); False si falló"""
+        if not lote:
+            return True
+        resultados = [e for e in lote if isinstance(e, ResultadoEjecucion)]
+        nuevos = [r for r in resultados if r.id is None]
+        # De cada programación basta con su último estado
+        programaciones = list({p.id: p for p in lote if isinstance(p, Programacion)}.values())
+
+        for intento in range(1, self.reintentos + 1):
+            try:
+                with conectar(self.db_path) as conn:
+                    self.resultado_repository._insertar(conn, resultados)
+                    # Solo el estado de ejecución: no revertir lo editado desde la GUI mientras tanto
+                    self.programacion_repository._registrar_ejecuciones(conn, programaciones)
+                break
+            except Exception as e:
+                # Un lote revertido no debe dejar IDs asignados que no existen
+                for resultado in nuevos:
+                    resultado.id = None
+                if intento == self.reintentos:
+                    self.logger.error(f"❌ No se pudo escribir un lote de {len(lote)} escrituras tras {intento} intentos: {e}")
+                    return False
+                self.logger.warning(f"⚠️ Error escribiendo lote (intento {intento}): {e}")
+                time.sleep(0.1 * intento)
+
+        with self._metricas_lock:
+            self._metricas['resultados'] += len(resultados)
+            self._metricas['programaciones'] += len(programaciones)
+            self._metricas['lotes'] += 1
+            self._metricas['retenidos'] = 0
+        return True
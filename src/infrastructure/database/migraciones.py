@@ -0,0 +1,680 @@
+"""
+Migraciones versionadas de la base del sistema (SQLite)
+
+El esquema se crea y actualiza con migraciones numeradas. La versión
+aplicada se guarda en PRAGMA user_version, así cada migración corre una
+sola vez por base y, con la base al día, abrirla no ejecuta DDL.
+
+Los repositorios llaman a asegurar_esquema() al construirse: solo la
+primera llamada del proceso para cada base lee la versión (y aplica lo
+pendiente); las siguientes no tocan la base.
+
+Para cambiar el esquema se agrega una migración al final de MIGRACIONES
+con el número siguiente; nunca se modifica una ya publicada. Por eso cada
+migración lleva su propio SQL y sus transformaciones en el formato de su
+versión, sin depender de los repositorios (que siguen al esquema actual).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Callable, List, Optional, Set, Tuple
+
+from src.domain.entities.programacion import DiaSemana, Programacion, TipoProgramacion
+from src.infrastructure.database.conexion_sqlite import conectar
+
+
+@dataclass(frozen=True)
+class Migracion:
+    """Cambio de esquema identificado por su versión"""
+
+    version: int
+    descripcion: str
+    aplicar: Callable[[sqlite3.Connection, str], None]  # (conexión, db_path)
+
+
+def _columnas(conn: sqlite3.Connection, tabla: str) -> List[str]:
+    """Nombres de las columnas de una tabla"""
+    return [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})").fetchall()]
+
+
+def _agregar_columna(conn: sqlite3.Connection, tabla: str, columna: str, definicion: str) -> None:
+    """Agrega una columna si la tabla todavía no la tiene"""
+    if columna not in _columnas(conn, tabla):
+        conn.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+
+def _esquema_inicial(conn: sqlite3.Connection, db_path: str) -> None:
+    """
+    Tablas, índices y triggers del sistema
+
+    Las bases anteriores a las migraciones ya tienen parte del esquema (creado
+    por cada repositorio), por eso todo es IF NOT EXISTS y las columnas
+    agregadas con el tiempo se completan si faltan.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            fecha_creacion TIMESTAMP,
+            activo BOOLEAN
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conexiones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            base_datos TEXT NOT NULL,
+            servidor TEXT NOT NULL,
+            puerto INTEGER,
+            usuario TEXT NOT NULL,
+            contraseña TEXT NOT NULL,
+            tipo_motor TEXT DEFAULT 'postgresql',
+            activa BOOLEAN DEFAULT 1
+        )
+    """)
+    _agregar_columna(conn, "conexiones", "driver_type", "TEXT DEFAULT 'default'")
+    _agregar_columna(conn, "conexiones", "propiedades_jdbc", "TEXT DEFAULT ''")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS configuraciones_jdbc_conexion (
+            conexion_id INTEGER PRIMARY KEY,
+            huella TEXT NOT NULL,
+            configuracion TEXT NOT NULL,
+            fecha_ultimo_exito TEXT NOT NULL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS parametros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            tipo TEXT NOT NULL,
+            descripcion TEXT,
+            valor_por_defecto TEXT,
+            obligatorio BOOLEAN DEFAULT 1
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS controles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            descripcion TEXT,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion TIMESTAMP,
+            disparar_si_hay_datos BOOLEAN DEFAULT 1,
+            conexion_id INTEGER,
+            consulta_disparo_id INTEGER,
+            parametros_ids TEXT,  -- JSON array
+            consultas_a_disparar_ids TEXT,  -- JSON array
+            referentes_ids TEXT  -- JSON array
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS consultas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            sql TEXT NOT NULL,
+            descripcion TEXT,
+            control_id INTEGER,
+            conexion_id INTEGER,
+            activa BOOLEAN DEFAULT 1,
+            max_filas INTEGER,
+            FOREIGN KEY (control_id) REFERENCES controles(id),
+            FOREIGN KEY (conexion_id) REFERENCES conexiones(id)
+        )
+    """)
+    _agregar_columna(conn, "consultas", "control_id", "INTEGER")
+    _agregar_columna(conn, "consultas", "conexion_id", "INTEGER")
+    _agregar_columna(conn, "consultas", "max_filas", "INTEGER")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS consultas_controles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            control_id INTEGER NOT NULL,
+            consulta_id INTEGER NOT NULL,
+            es_disparo BOOLEAN DEFAULT 0,
+            orden INTEGER DEFAULT 1,
+            activa BOOLEAN DEFAULT 1,
+            fecha_asociacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (control_id) REFERENCES controles(id) ON DELETE CASCADE,
+            FOREIGN KEY (consulta_id) REFERENCES consultas(id) ON DELETE CASCADE,
+            UNIQUE(control_id, consulta_id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_consultas_controles_control ON consultas_controles(control_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_consultas_controles_consulta ON consultas_controles(consulta_id)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_consultas_controles_disparo
+        ON consultas_controles(control_id, es_disparo)
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS referentes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            path_archivos TEXT,
+            activo BOOLEAN DEFAULT 1
+        )
+    """)
+    columnas = _columnas(conn, "referentes")
+    if 'path_archivos' not in columnas:
+        conn.execute("ALTER TABLE referentes ADD COLUMN path_archivos TEXT")
+        # Bases antiguas guardaban la carpeta en carpeta_red
+        if 'carpeta_red' in columnas:
+            conn.execute("UPDATE referentes SET path_archivos = carpeta_red")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS control_referente (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            control_id INTEGER NOT NULL,
+            referente_id INTEGER NOT NULL,
+            activa BOOLEAN DEFAULT 1,
+            fecha_asociacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            notificar_por_email BOOLEAN DEFAULT 1,
+            notificar_por_archivo BOOLEAN DEFAULT 0,
+            observaciones TEXT,
+            FOREIGN KEY (control_id) REFERENCES controles(id) ON DELETE CASCADE,
+            FOREIGN KEY (referente_id) REFERENCES referentes(id) ON DELETE CASCADE,
+            UNIQUE(control_id, referente_id)
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS programaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            control_id INTEGER NOT NULL,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            tipo_programacion TEXT NOT NULL,
+            activo BOOLEAN NOT NULL DEFAULT 1,
+
+            -- Configuración de horario
+            hora_ejecucion TEXT,
+            fecha_inicio TEXT,
+            fecha_fin TEXT,
+
+            -- Configuración específica por tipo (JSON)
+            dias_semana TEXT,
+            dias_mes TEXT,
+            intervalo_minutos INTEGER,
+
+            -- Control de ejecución
+            ultima_ejecucion TEXT,
+            proxima_ejecucion TEXT,
+            total_ejecuciones INTEGER DEFAULT 0,
+
+            -- Metadatos
+            fecha_creacion TEXT NOT NULL,
+            fecha_modificacion TEXT,
+            creado_por TEXT,
+
+            FOREIGN KEY (control_id) REFERENCES controles (id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_programaciones_control_id ON programaciones(control_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_programaciones_activo ON programaciones(activo)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_programaciones_proxima_ejecucion
+        ON programaciones(proxima_ejecucion)
+    """)
+    # Índice para la búsqueda de pendientes (activo = 1 AND proxima_ejecucion <= ?)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_programaciones_activo_proxima
+        ON programaciones(activo, proxima_ejecucion)
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resultados_ejecucion (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            control_id INTEGER NOT NULL,
+            control_nombre TEXT NOT NULL,
+            fecha_ejecucion TIMESTAMP NOT NULL,
+            estado TEXT NOT NULL,
+            mensaje TEXT,
+            parametros_utilizados TEXT,  -- JSON
+            resultado_consulta_disparo TEXT,  -- JSON
+            resultados_consultas_disparadas TEXT,  -- JSON array
+            tiempo_total_ejecucion_ms REAL,
+            total_filas_disparo INTEGER,
+            total_filas_disparadas INTEGER,
+            conexion_id INTEGER,
+            conexion_nombre TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_control_id ON resultados_ejecucion(control_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fecha_ejecucion ON resultados_ejecucion(fecha_ejecucion)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_estado ON resultados_ejecucion(estado)")
+    # Índices para buscar() paginado: el id (rowid) ya va al final de cada índice
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resultados_control_fecha
+        ON resultados_ejecucion(control_id, fecha_ejecucion)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resultados_estado_fecha
+        ON resultados_ejecucion(estado, fecha_ejecucion)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resultados_control_estado_fecha
+        ON resultados_ejecucion(control_id, estado, fecha_ejecucion)
+    """)
+
+    # Filas de cada consulta (posición 0: disparo, 1..n: consultas disparadas)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resultados_ejecucion_datos (
+            resultado_id INTEGER NOT NULL,
+            posicion INTEGER NOT NULL,
+            datos TEXT NOT NULL,  -- JSON {"columnas": [...], "filas": [[...], ...]}
+            PRIMARY KEY (resultado_id, posicion),
+            FOREIGN KEY (resultado_id) REFERENCES resultados_ejecucion(id) ON DELETE CASCADE
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_resultados_ejecucion_datos_eliminar
+        AFTER DELETE ON resultados_ejecucion
+        BEGIN
+            DELETE FROM resultados_ejecucion_datos WHERE resultado_id = OLD.id;
+        END
+    """)
+
+    # Métricas por control y día, mantenidas al guardar cada ejecución
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_diario_ejecuciones (
+            control_id INTEGER NOT NULL,
+            dia TEXT NOT NULL,  -- YYYY-MM-DD
+            control_nombre TEXT,
+            total_ejecuciones INTEGER NOT NULL DEFAULT 0,
+            exitosas INTEGER NOT NULL DEFAULT 0,
+            con_error INTEGER NOT NULL DEFAULT 0,
+            disparadas INTEGER NOT NULL DEFAULT 0,
+            sin_datos INTEGER NOT NULL DEFAULT 0,
+            tiempo_suma_ms REAL NOT NULL DEFAULT 0,
+            tiempo_min_ms REAL,
+            tiempo_max_ms REAL,
+            ejecuciones_con_tiempo INTEGER NOT NULL DEFAULT 0,
+            total_filas_disparadas INTEGER NOT NULL DEFAULT 0,
+            ultima_ejecucion TIMESTAMP,
+            ultimo_estado TEXT,
+            PRIMARY KEY (control_id, dia)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resumen_diario_dia ON resumen_diario_ejecuciones(dia)")
+
+
+def _filas_compactas(consulta: dict) -> dict:
+    """Filas de una consulta guardada en el JSON de resumen, en formato compacto"""
+    if 'filas' in consulta:
+        return {'columnas': consulta.get('columnas', []), 'filas': consulta['filas']}
+    datos = consulta.get('datos') or []
+    columnas = list(datos[0].keys()) if datos else []
+    return {'columnas': columnas, 'filas': [[fila.get(columna) for columna in columnas] for fila in datos]}
+
+
+def _resumen_consulta(consulta: dict) -> dict:
+    """Consulta guardada en el JSON de resumen, sin sus filas"""
+    return {
+        'consulta_id': consulta.get('consulta_id', 0),
+        'consulta_nombre': consulta.get('consulta_nombre', ''),
+        'sql_ejecutado': consulta.get('sql_ejecutado', ''),
+        'filas_afectadas': consulta.get('filas_afectadas', 0),
+        'tiempo_ejecucion_ms': consulta.get('tiempo_ejecucion_ms', 0.0),
+        'error': consulta.get('error'),
+        'truncado': consulta.get('truncado', False)
+    }
+
+
+def _separar_filas_de_resultados(conn: sqlite3.Connection, db_path: str) -> None:
+    """Mueve las filas guardadas dentro de los JSON de resumen a resultados_ejecucion_datos"""
+    pendientes = conn.execute(
+        """SELECT id, resultado_consulta_disparo, resultados_consultas_disparadas
+           FROM resultados_ejecucion
+           WHERE resultado_consulta_disparo LIKE '%"filas"%' OR resultado_consulta_disparo LIKE '%"datos"%'
+              OR resultados_consultas_disparadas LIKE '%"filas"%' OR resultados_consultas_disparadas LIKE '%"datos"%'"""
+    ).fetchall()
+    for resultado_id, disparo, disparadas in pendientes:
+        consultas = [json.loads(disparo) if disparo else None]
+        consultas += [consulta for consulta in (json.loads(disparadas) if disparadas else []) if consulta]
+
+        # Tabla de datos de esta versión: filas en JSON de texto
+        datos = []
+        for posicion, consulta in enumerate(consultas):
+            if consulta is None:
+                continue
+            filas = _filas_compactas(consulta)
+            if filas['filas']:
+                datos.append((resultado_id, posicion, json.dumps(filas, default=str)))
+        conn.executemany(
+            """INSERT OR REPLACE INTO resultados_ejecucion_datos (resultado_id, posicion, datos)
+               VALUES (?, ?, ?)""",
+            datos
+        )
+        conn.execute(
+            """UPDATE resultados_ejecucion
+               SET resultado_consulta_disparo = ?, resultados_consultas_disparadas = ?
+               WHERE id = ?""",
+            (json.dumps(_resumen_consulta(consultas[0]) if consultas[0] else None),
+             json.dumps([_resumen_consulta(consulta) for consulta in consultas[1:]]),
+             resultado_id)
+        )
+
+
+def _fecha(valor: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def _completar_proximas_ejecuciones(conn: sqlite3.Connection, db_path: str) -> None:
+    """Calcula proxima_ejecucion de las programaciones activas que no la tienen"""
+    filas = conn.execute("""
+        SELECT id, control_id, nombre, descripcion, tipo_programacion, hora_ejecucion,
+               fecha_inicio, fecha_fin, dias_semana, dias_mes, intervalo_minutos, ultima_ejecucion
+        FROM programaciones
+        WHERE activo = 1 AND proxima_ejecucion IS NULL
+    """).fetchall()
+    for (id_, control_id, nombre, descripcion, tipo, hora, fecha_inicio, fecha_fin,
+         dias_semana, dias_mes, intervalo_minutos, ultima_ejecucion) in filas:
+        programacion = Programacion(
+            id=id_, control_id=control_id, nombre=nombre, descripcion=descripcion,
+            tipo_programacion=TipoProgramacion(tipo), activo=True,
+            hora_ejecucion=time.fromisoformat(hora) if hora else None,
+            fecha_inicio=_fecha(fecha_inicio), fecha_fin=_fecha(fecha_fin),
+            dias_semana=[DiaSemana(dia) for dia in json.loads(dias_semana)] if dias_semana else None,
+            dias_mes=json.loads(dias_mes) if dias_mes else None,
+            intervalo_minutos=intervalo_minutos, ultima_ejecucion=_fecha(ultima_ejecucion),
+            proxima_ejecucion=None
+        )
+        proxima = programacion.calcular_proxima_ejecucion()
+        if proxima:
+            conn.execute(
+                "UPDATE programaciones SET proxima_ejecucion = ? WHERE id = ?",
+                (proxima.isoformat(), id_)
+            )
+
+
+# Relaciones de controles que antes se guardaban como arrays JSON en la fila del control:
+# (tabla, columna JSON en controles, columna de la relación, tabla referenciada)
+RELACIONES_CONTROL = [
+    ("controles_parametros", "parametros_ids", "parametro_id", "parametros"),
+    ("controles_consultas_disparar", "consultas_a_disparar_ids", "consulta_id", "consultas"),
+    ("controles_referentes", "referentes_ids", "referente_id", "referentes"),
+]
+
+
+def _normalizar_relaciones_de_controles(conn: sqlite3.Connection, db_path: str) -> None:
+    """
+    Pasa los arrays JSON de IDs de controles a tablas de relación indexadas
+
+    Cada tabla guarda la posición para conservar el orden de la lista. Las
+    columnas JSON quedan en NULL (sin uso) para que no haya dos fuentes.
+    controles_referentes es la lista simple Control.referentes_ids; la
+    configuración de notificación por referente sigue en control_referente.
+    """
+    for tabla, columna_json, columna, referenciada in RELACIONES_CONTROL:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                control_id INTEGER NOT NULL,
+                {columna} INTEGER NOT NULL,
+                posicion INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (control_id, {columna}),
+                FOREIGN KEY (control_id) REFERENCES controles(id) ON DELETE CASCADE,
+                FOREIGN KEY ({columna}) REFERENCES {referenciada}(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        """)
+        # Búsqueda inversa: qué controles usan un parámetro, consulta o referente
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{columna} ON {tabla}({columna}, control_id)")
+        for origen, clave in (("controles", "control_id"), (referenciada, columna)):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_eliminar_{origen}
+                AFTER DELETE ON {origen}
+                BEGIN
+                    DELETE FROM {tabla} WHERE {clave} = OLD.id;
+                END
+            """)
+
+        filas = []
+        for control_id, valor in conn.execute(
+            f"SELECT id, {columna_json} FROM controles WHERE {columna_json} IS NOT NULL"
+        ).fetchall():
+            try:
+                ids = json.loads(valor)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if isinstance(ids, list):
+                filas.extend((control_id, int(id_), posicion) for posicion, id_ in enumerate(ids) if id_ is not None)
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {tabla} (control_id, {columna}, posicion) VALUES (?, ?, ?)", filas
+        )
+        conn.execute(f"UPDATE controles SET {columna_json} = NULL")
+
+
+def _comprimir(datos: str) -> Tuple[str, str, int, bytes]:
+    """(hash SHA-256, compresión, tamaño sin comprimir, contenido) del JSON de unas filas"""
+    contenido = datos.encode('utf-8')
+    return hashlib.sha256(contenido).hexdigest(), 'zlib', len(contenido), zlib.compress(contenido, 6)
+
+
+def _datos_por_contenido(conn: sqlite3.Connection, db_path: str) -> None:
+    """
+    Guarda las filas de los resultados comprimidas y direccionadas por su hash
+
+    contenidos_datos tiene cada contenido distinto una sola vez y cuántas filas
+    de resultados_ejecucion_datos lo referencian; los triggers mantienen la
+    cuenta y borran el contenido cuando deja de usarse. Los datos existentes
+    se recomprimen de a lotes.
+    """
+    conn.execute("""
+        CREATE TABLE contenidos_datos (
+            hash TEXT PRIMARY KEY,  -- SHA-256 del JSON sin comprimir
+            compresion TEXT NOT NULL,
+            tamano INTEGER NOT NULL,  -- Bytes del JSON sin comprimir
+            contenido BLOB NOT NULL,
+            referencias INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # La tabla de datos pasa a guardar solo el hash: se reconstruye
+    conn.execute("DROP TRIGGER IF EXISTS trg_resultados_ejecucion_datos_eliminar")
+    conn.execute("ALTER TABLE resultados_ejecucion_datos RENAME TO resultados_ejecucion_datos_anterior")
+    conn.execute("""
+        CREATE TABLE resultados_ejecucion_datos (
+            resultado_id INTEGER NOT NULL,
+            posicion INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (resultado_id, posicion),
+            FOREIGN KEY (resultado_id) REFERENCES resultados_ejecucion(id) ON DELETE CASCADE,
+            FOREIGN KEY (hash) REFERENCES contenidos_datos(hash)
+        ) WITHOUT ROWID
+    """)
+
+    referencias = {}
+    cursor = conn.execute("SELECT resultado_id, posicion, datos FROM resultados_ejecucion_datos_anterior")
+    while True:
+        filas = cursor.fetchmany(500)
+        if not filas:
+            break
+        filas = [(resultado_id, posicion, _comprimir(datos)) for resultado_id, posicion, datos in filas]
+        conn.executemany(
+            """INSERT INTO contenidos_datos (hash, compresion, tamano, contenido)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(hash) DO NOTHING""",
+            [contenido for _, _, contenido in filas]
+        )
+        conn.executemany(
+            "INSERT INTO resultados_ejecucion_datos (resultado_id, posicion, hash) VALUES (?, ?, ?)",
+            [(resultado_id, posicion, contenido[0]) for resultado_id, posicion, contenido in filas]
+        )
+        for _, _, contenido in filas:
+            referencias[contenido[0]] = referencias.get(contenido[0], 0) + 1
+    conn.executemany(
+        "UPDATE contenidos_datos SET referencias = ? WHERE hash = ?",
+        [(cantidad, hash_) for hash_, cantidad in referencias.items()]
+    )
+    conn.execute("DROP TABLE resultados_ejecucion_datos_anterior")
+
+    conn.execute("""
+        CREATE TRIGGER trg_resultados_ejecucion_datos_eliminar
+        AFTER DELETE ON resultados_ejecucion
+        BEGIN
+            DELETE FROM resultados_ejecucion_datos WHERE resultado_id = OLD.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_contenidos_datos_referenciar
+        AFTER INSERT ON resultados_ejecucion_datos
+        BEGIN
+            UPDATE contenidos_datos SET referencias = referencias + 1 WHERE hash = NEW.hash;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_contenidos_datos_reemplazar
+        AFTER UPDATE OF hash ON resultados_ejecucion_datos
+        WHEN OLD.hash <> NEW.hash
+        BEGIN
+            UPDATE contenidos_datos SET referencias = referencias + 1 WHERE hash = NEW.hash;
+            UPDATE contenidos_datos SET referencias = referencias - 1 WHERE hash = OLD.hash;
+            DELETE FROM contenidos_datos WHERE hash = OLD.hash AND referencias <= 0;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_contenidos_datos_liberar
+        AFTER DELETE ON resultados_ejecucion_datos
+        BEGIN
+            UPDATE contenidos_datos SET referencias = referencias - 1 WHERE hash = OLD.hash;
+            DELETE FROM contenidos_datos WHERE hash = OLD.hash AND referencias <= 0;
+        END
+    """)
+
+
+def _formato_archivo_de_referentes(conn: sqlite3.Connection, db_path: str) -> None:
+    """Agrega el formato del archivo de resultados de cada asociación control-referente"""
+    _agregar_columna(conn, "control_referente", "formato_archivo", "TEXT DEFAULT 'xlsx'")
+
+
+def _contador_cambios_programaciones(conn: sqlite3.Connection, db_path: str) -> None:
+    """
+    Contador de cambios de programaciones mantenido por triggers
+
+    El motor lo lee en cada ciclo para saber si debe recargar la planificación.
+    Solo avanza al crear, eliminar o reconfigurar una programación (o al mover
+    su próxima ejecución sin ejecutarla): el registro de ejecuciones del motor
+    (ultima_ejecucion, total_ejecuciones, fecha_modificacion y la próxima
+    ejecución que calcula) no lo modifica.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cambios_programaciones (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO cambios_programaciones (id, version) VALUES (1, 0)")
+    avanzar = "UPDATE cambios_programaciones SET version = version + 1 WHERE id = 1;"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_programaciones_cambio_insertar
+        AFTER INSERT ON programaciones
+        BEGIN
+            {avanzar}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_programaciones_cambio_eliminar
+        AFTER DELETE ON programaciones
+        BEGIN
+            {avanzar}
+        END
+    """)
+    configuracion = " OR ".join(
+        f"NEW.{columna} IS NOT OLD.{columna}"
+        for columna in ("control_id", "nombre", "tipo_programacion", "activo", "hora_ejecucion",
+                        "fecha_inicio", "fecha_fin", "dias_semana", "dias_mes", "intervalo_minutos")
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_programaciones_cambio_actualizar
+        AFTER UPDATE ON programaciones
+        WHEN {configuracion}
+             OR (NEW.proxima_ejecucion IS NOT OLD.proxima_ejecucion
+                 AND NEW.ultima_ejecucion IS OLD.ultima_ejecucion)
+        BEGIN
+            {avanzar}
+        END
+    """)
+
+
+MIGRACIONES: List[Migracion] = [
+    Migracion(1, "Esquema inicial", _esquema_inicial),
+    Migracion(2, "Filas de resultados en tabla aparte", _separar_filas_de_resultados),
+    Migracion(3, "Próxima ejecución de programaciones antiguas", _completar_proximas_ejecuciones),
+    Migracion(4, "Relaciones de controles en tablas indexadas", _normalizar_relaciones_de_controles),
+    Migracion(5, "Datos de resultados comprimidos y deduplicados", _datos_por_contenido),
+    Migracion(6, "Formato de archivo por referente", _formato_archivo_de_referentes),
+    Migracion(7, "Contador de cambios de programaciones", _contador_cambios_programaciones),
+]
+
+
+def version_actual(db_path: str) -> int:
+    """Versión de esquema aplicada a la base"""
+    with conectar(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(db_path: str, migraciones: List[Migracion] = None) -> int:
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción
+
+    Cada migración toma el bloqueo de escritura y vuelve a leer la versión,
+    por lo que dos procesos que inician a la vez (motor y GUI) no aplican
+    la misma migración dos veces.
+
+    Returns:
+        int: Versión de esquema resultante
+    """
+    migraciones = sorted(migraciones if migraciones is not None else MIGRACIONES, key=lambda m: m.version)
+    version = version_actual(db_path)
+
+    for migracion in migraciones:
+        if migracion.version <= version:
+            continue
+        with conectar(db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if migracion.version <= version:
+                continue
+            migracion.aplicar(conn, db_path)
+            conn.execute(f"PRAGMA user_version = {int(migracion.version)}")
+            version = migracion.version
+
+    return version
+
+
+# Bases cuyo esquema ya se verificó en este proceso
+_aseguradas: Set[str] = set()
+_aseguradas_lock = threading.Lock()
+
+
+def _ruta(db_path: str) -> str:
+    return db_path if db_path == ":memory:" else os.path.abspath(db_path)
+
+
+def asegurar_esquema(db_path: str) -> None:
+    """
+    Aplica las migraciones pendientes la primera vez que el proceso usa la base
+
+    Las llamadas siguientes para la misma base no acceden a ella.
+    """
+    ruta = _ruta(db_path)
+    with _aseguradas_lock:
+        if ruta in _aseguradas:
+            return
+        _aseguradas.add(ruta)
+        try:
+            aplicar_migraciones(db_path)
+        except Exception:
+            _aseguradas.discard(ruta)
+            raise
@@ -0,0 +1,444 @@
+"""
+Pool de conexiones a bases de datos objetivo
+
+Mantiene conexiones abiertas por Conexion para que cada consulta de un
+control no pague el costo de conectar (handshake JDBC/TLS/ODBC).
+Los pools son thread-safe, tienen tamaño mínimo y máximo, cierran las
+conexiones inactivas y validan la conexión antes de entregarla.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.domain.entities.conexion import Conexion
+from src.domain.services.pool_conexiones_service import GestorPoolsService, PoolConexionesService
+
+
+class PoolConexionesAgotadoError(Exception):
+    """Se superó el tiempo de espera para obtener una conexión del pool"""
+    pass
+
+
+class CacheSentenciasPreparadas:
+    """
+    Cache LRU de sentencias preparadas de una conexión del pool
+
+    No es thread-safe: cada conexión la usa un único hilo mientras está prestada.
+    """
+
+    def __init__(self, max_sentencias: int = 100, al_descartar: Optional[Callable[[Any], None]] = None):
+        """
+        Args:
+            max_sentencias: Sentencias que se conservan preparadas
+            al_descartar: Función que libera una sentencia desalojada del cache
+        """
+        self.max_sentencias = max(1, max_sentencias)
+        self._al_descartar = al_descartar
+        self._sentencias: "OrderedDict[Any, Any]" = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Any, crear: Callable[[], Any]) -> Any:
+        """Devuelve la sentencia preparada para la clave, creándola si no existe"""
+        if clave in self._sentencias:
+            self._sentencias.move_to_end(clave)
+            self.aciertos += 1
+            return self._sentencias[clave]
+
+        sentencia = crear()
+        self.fallos += 1
+        self._sentencias[clave] = sentencia
+        while len(self._sentencias) > self.max_sentencias:
+            _, desalojada = self._sentencias.popitem(last=False)
+            self._descartar(desalojada)
+        return sentencia
+
+    def limpiar(self) -> None:
+        """Libera todas las sentencias del cache"""
+        while self._sentencias:
+            _, sentencia = self._sentencias.popitem(last=False)
+            self._descartar(sentencia)
+
+    def __len__(self) -> int:
+        return len(self._sentencias)
+
+    def _descartar(self, sentencia: Any) -> None:
+        """Libera una sentencia ignorando errores"""
+        if self._al_descartar is None:
+            return
+        try:
+            self._al_descartar(sentencia)
+        except Exception:
+            pass
+
+
+class PoolConexiones(PoolConexionesService):
+    """Pool thread-safe de conexiones DB-API para una única Conexion"""
+
+    def __init__(
+        self,
+        fabrica: Callable[[], Any],
+        validador: Optional[Callable[[Any], bool]] = None,
+        reiniciador: Optional[Callable[[Any], None]] = None,
+        min_conexiones: int = 0,
+        max_conexiones: int = 5,
+        tiempo_inactividad_segundos: float = 300,
+        intervalo_validacion_segundos: float = 30,
+        nombre: str = "",
+        max_sentencias_cache: int = 100
+    ):
+        """
+        Inicializa el pool
+
+        Args:
+            fabrica: Función que abre una nueva conexión
+            validador: Función que verifica que una conexión sigue viva
+            reiniciador: Función que limpia la conexión antes de devolverla al
+                pool (por defecto rollback de la transacción abierta)
+            min_conexiones: Conexiones inactivas que se conservan aunque expiren
+            max_conexiones: Máximo de conexiones abiertas (en uso + inactivas)
+            tiempo_inactividad_segundos: Tiempo tras el cual se cierra una conexión inactiva
+            intervalo_validacion_segundos: Las conexiones usadas hace menos de este
+                tiempo se entregan sin validar
+            nombre: Nombre descriptivo para logs y métricas
+            max_sentencias_cache: Sentencias preparadas que se conservan por conexión
+        """
+        self._fabrica = fabrica
+        self._validador = validador
+        self._reiniciador = reiniciador or (lambda conn: conn.rollback())
+        self.min_conexiones = max(0, min_conexiones)
+        self.max_conexiones = max(1, max_conexiones)
+        self.tiempo_inactividad_segundos = tiempo_inactividad_segundos
+        self.intervalo_validacion_segundos = intervalo_validacion_segundos
+        self.nombre = nombre
+        self.max_sentencias_cache = max_sentencias_cache
+
+        self._caches: Dict[int, CacheSentenciasPreparadas] = {}  # id(conexión) -> cache
+        self._inactivas: List[Tuple[Any, float]] = []  # (conexión, último uso)
+        self._en_uso = 0
+        self._cerrado = False
+        self._condicion = threading.Condition()
+        self._logger = logging.getLogger(__name__)
+
+        self._metricas = {
+            'aciertos': 0,
+            'fallos': 0,
+            'creadas': 0,
+            'cerradas': 0,
+            'descartadas': 0,
+            'validaciones_fallidas': 0,
+            'esperas': 0
+        }
+
+    def obtener(self, timeout: Optional[float] = 30) -> Any:
+        """
+        Obtiene una conexión del pool (reutilizada o nueva)
+
+        Args:
+            timeout: Segundos a esperar si el pool está lleno (None = sin límite)
+
+        Raises:
+            PoolConexionesAgotadoError: Si no hay conexiones disponibles a tiempo
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        expiradas = []
+
+        with self._condicion:
+            while True:
+                if self._cerrado:
+                    raise PoolConexionesAgotadoError(f"Pool {self.nombre} cerrado")
+
+                expiradas.extend(self._extraer_expiradas())
+
+                if self._inactivas:
+                    conn, ultimo_uso = self._inactivas.pop()
+                    self._en_uso += 1
+                    break
+
+                if self._en_uso + len(self._inactivas) < self.max_conexiones:
+                    conn, ultimo_uso = None, None
+                    self._en_uso += 1
+                    break
+
+                self._metricas['esperas'] += 1
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    raise PoolConexionesAgotadoError(
+                        f"No hay conexiones disponibles en el pool {self.nombre} "
+                        f"(máximo {self.max_conexiones})"
+                    )
+                self._condicion.wait(restante)
+
+        # Cerrar, validar o crear fuera del lock: son operaciones de red
+        for expirada in expiradas:
+            self._cerrar_conexion(expirada)
+
+        try:
+            if conn is not None:
+                if self._es_valida(conn, ultimo_uso):
+                    self._incrementar('aciertos')
+                    return conn
+                self._incrementar('validaciones_fallidas')
+                self._cerrar_conexion(conn)
+
+            self._incrementar('fallos')
+            conn = self._fabrica()
+            self._incrementar('creadas')
+            return conn
+        except Exception:
+            with self._condicion:
+                self._en_uso -= 1
+                self._condicion.notify()
+            raise
+
+    def devolver(self, conn: Any, descartar: bool = False) -> None:
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            conn: Conexión obtenida con obtener()
+            descartar: Si True, la conexión se cierra en lugar de reutilizarse
+                (por ejemplo, tras un error de comunicación)
+        """
+        if not descartar:
+            try:
+                # No dejar transacciones abiertas entre usos
+                self._reiniciador(conn)
+            except Exception:
+                descartar = True
+
+        with self._condicion:
+            self._en_uso -= 1
+            if descartar or self._cerrado:
+                self._metricas['descartadas'] += 1
+                cerrar = True
+            else:
+                self._inactivas.append((conn, time.monotonic()))
+                cerrar = False
+            self._condicion.notify()
+
+        if cerrar:
+            self._cerrar_conexion(conn)
+
+    def cache_sentencias(
+        self,
+        conn: Any,
+        al_descartar: Optional[Callable[[Any], None]] = None
+    ) -> CacheSentenciasPreparadas:
+        """
+        Cache de sentencias preparadas de una conexión del pool
+
+        El cache vive mientras la conexión siga abierta, de modo que las
+        ejecuciones siguientes que reciban la misma conexión reutilicen las
+        sentencias ya preparadas en el servidor.
+        """
+        with self._condicion:
+            cache = self._caches.get(id(conn))
+            if cache is None:
+                cache = CacheSentenciasPreparadas(self.max_sentencias_cache, al_descartar)
+                self._caches[id(conn)] = cache
+            return cache
+
+    def cerrar(self) -> None:
+        """Cierra las conexiones inactivas; las que están en uso se cierran al devolverse"""
+        with self._condicion:
+            self._cerrado = True
+            inactivas = [conn for conn, _ in self._inactivas]
+            self._inactivas = []
+            self._condicion.notify_all()
+
+        for conn in inactivas:
+            self._cerrar_conexion(conn)
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Devuelve las métricas de uso del pool"""
+        with self._condicion:
+            metricas = dict(self._metricas)
+            metricas['en_uso'] = self._en_uso
+            metricas['inactivas'] = len(self._inactivas)
+            metricas['sentencias_reutilizadas'] = sum(c.aciertos for c in self._caches.values())
+            metricas['sentencias_preparadas'] = sum(c.fallos for c in self._caches.values())
+        total = metricas['aciertos'] + metricas['fallos']
+        metricas['tasa_aciertos'] = (metricas['aciertos'] / total * 100) if total else 0.0
+        return metricas
+
+    def _es_valida(self, conn: Any, ultimo_uso: float) -> bool:
+        """Valida la conexión si estuvo inactiva más que el intervalo de validación"""
+        if self._validador is None:
+            return True
+        if time.monotonic() - ultimo_uso < self.intervalo_validacion_segundos:
+            return True
+        try:
+            return bool(self._validador(conn))
+        except Exception as e:
+            self._logger.debug(f"Conexión inválida en pool {self.nombre}: {e}")
+            return False
+
+    def _extraer_expiradas(self) -> List[Any]:
+        """Quita del pool las conexiones inactivas vencidas respetando el mínimo (requiere el lock)"""
+        if not self._inactivas:
+            return []
+
+        ahora = time.monotonic()
+        conservar = []
+        expiradas = []
+        # Las más recientes están al final; se conservan primero
+        for conn, ultimo_uso in reversed(self._inactivas):
+            vencida = ahora - ultimo_uso > self.tiempo_inactividad_segundos
+            if vencida and len(conservar) >= self.min_conexiones:
+                expiradas.append(conn)
+            else:
+                conservar.append((conn, ultimo_uso))
+        self._inactivas = list(reversed(conservar))
+        return expiradas
+
+    def _cerrar_conexion(self, conn: Any) -> None:
+        """Cierra una conexión ignorando errores"""
+        # Las sentencias preparadas se liberan junto con la conexión
+        with self._condicion:
+            self._caches.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception as e:
+            self._logger.debug(f"Error cerrando conexión del pool {self.nombre}: {e}")
+        self._incrementar('cerradas')
+
+    def _incrementar(self, metrica: str) -> None:
+        """Incrementa una métrica de forma thread-safe"""
+        with self._condicion:
+            self._metricas[metrica] += 1
+
+
+class GestorPoolsConexiones(GestorPoolsService):
+    """
+    Administra un pool por cada Conexion (clave: id de la conexión)
+
+    Si los datos de una Conexion cambian (servidor, usuario, contraseña, etc.)
+    el pool anterior se invalida automáticamente la próxima vez que se pide.
+    """
+
+    def __init__(
+        self,
+        min_conexiones: int = 0,
+        max_conexiones: int = 5,
+        tiempo_inactividad_segundos: float = 300,
+        intervalo_validacion_segundos: float = 30,
+        timeout_obtener_segundos: float = 30
+    ):
+        self.min_conexiones = min_conexiones
+        self.max_conexiones = max_conexiones
+        self.tiempo_inactividad_segundos = tiempo_inactividad_segundos
+        self.intervalo_validacion_segundos = intervalo_validacion_segundos
+        self.timeout_obtener_segundos = timeout_obtener_segundos
+
+        self._pools: Dict[Any, Tuple[tuple, PoolConexiones]] = {}
+        self._invalidaciones = 0
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    def obtener_pool(
+        self,
+        conexion: Conexion,
+        fabrica: Callable[[], Any],
+        validador: Optional[Callable[[Any], bool]] = None,
+        reiniciador: Optional[Callable[[Any], None]] = None
+    ) -> PoolConexiones:
+        """
+        Obtiene (o crea) el pool de una conexión
+
+        Args:
+            conexion: Entidad Conexion; su id es la clave del pool
+            fabrica: Función que abre una conexión nueva
+            validador: Función de health-check
+            reiniciador: Función que limpia la conexión al devolverla
+        """
+        clave = conexion.id if conexion.id is not None else conexion.nombre
+        huella = self._huella(conexion)
+        pool_anterior = None
+
+        with self._lock:
+            existente = self._pools.get(clave)
+            if existente and existente[0] == huella:
+                return existente[1]
+
+            if existente:
+                pool_anterior = existente[1]
+                self._invalidaciones += 1
+
+            pool = PoolConexiones(
+                fabrica=fabrica,
+                validador=validador,
+                reiniciador=reiniciador,
+                min_conexiones=self.min_conexiones,
+                max_conexiones=self.max_conexiones,
+                tiempo_inactividad_segundos=self.tiempo_inactividad_segundos,
+                intervalo_validacion_segundos=self.intervalo_validacion_segundos,
+                nombre=conexion.nombre
+            )
+            self._pools[clave] = (huella, pool)
+
+        if pool_anterior:
+            self._logger.info(f"Conexión '{conexion.nombre}' modificada: pool anterior invalidado")
+            pool_anterior.cerrar()
+
+        return pool
+
+    def invalidar(self, conexion_id: int) -> bool:
+        """
+        Cierra y descarta el pool de una conexión (por ejemplo, al editarla)
+
+        Returns:
+            bool: True si existía un pool para la conexión
+        """
+        with self._lock:
+            existente = self._pools.pop(conexion_id, None)
+            if existente:
+                self._invalidaciones += 1
+
+        if existente:
+            existente[1].cerrar()
+            return True
+        return False
+
+    def cerrar_todos(self) -> None:
+        """Cierra todos los pools"""
+        with self._lock:
+            pools = [pool for _, pool in self._pools.values()]
+            self._pools = {}
+
+        for pool in pools:
+            pool.cerrar()
+
+    def obtener_metricas(self) -> Dict[str, Any]:
+        """Métricas por pool y totales de aciertos/fallos"""
+        with self._lock:
+            pools = {clave: pool for clave, (_, pool) in self._pools.items()}
+            invalidaciones = self._invalidaciones
+
+        por_pool = {pool.nombre or str(clave): pool.obtener_metricas() for clave, pool in pools.items()}
+        aciertos = sum(m['aciertos'] for m in por_pool.values())
+        fallos = sum(m['fallos'] for m in por_pool.values())
+        total = aciertos + fallos
+
+        return {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'tasa_aciertos': (aciertos / total * 100) if total else 0.0,
+            'invalidaciones': invalidaciones,
+            'pools': por_pool
+        }
+
+    def _huella(self, conexion: Conexion) -> tuple:
+        """Datos de la conexión que, si cambian, invalidan el pool"""
+        return (
+            conexion.tipo_motor,
+            conexion.driver_type,
+            conexion.servidor,
+            conexion.puerto,
+            conexion.base_datos,
+            conexion.usuario,
+            conexion.contraseña,
+            conexion.propiedades_jdbc
+        )
@@ -5,6 +5,8 @@ import sqlite3
 from typing import List, Optional
 from src.domain.entities.conexion import Conexion
 from src.domain.repositories.conexion_repository import ConexionRepository
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
 
 
 class SQLiteConexionRepository(ConexionRepository):
@@ -12,36 +14,11 @@ class SQLiteConexionRepository(ConexionRepository):
     
     def __init__(self, db_path: str = "controles.db"):
         self.db_path = db_path
-        self._crear_tabla()
-    
-    def _crear_tabla(self):
-        """Crea la tabla de conexiones si no existe"""
-        with sqlite3.connect(self.db_path) as conn:
-            # Crear tabla original
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS conexiones (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT UNIQUE NOT NULL,
-                    base_datos TEXT NOT NULL,
-                    servidor TEXT NOT NULL,
-                    puerto INTEGER,
-                    usuario TEXT NOT NULL,
-                    contraseña TEXT NOT NULL,
-                    tipo_motor TEXT DEFAULT 'postgresql',
-                    activa BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Agregar columna driver_type si no existe (migración)
-            try:
-                conn.execute("ALTER TABLE conexiones ADD COLUMN driver_type TEXT DEFAULT 'default'")
-            except sqlite3.OperationalError:
-                # La columna ya existe
-                pass
+        asegurar_esquema(db_path)
     
     def obtener_por_id(self, id: int) -> Optional[Conexion]:
         """Obtiene una conexión por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM conexiones WHERE id = ?", (id,)
@@ -49,32 +26,32 @@ class SQLiteConexionRepository(ConexionRepository):
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_conexion(row)
+                return row_to_conexion(row)
             return None
     
     def obtener_todos(self) -> List[Conexion]:
         """Obtiene todas las conexiones"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM conexiones ORDER BY nombre")
             rows = cursor.fetchall()
             
-            return [self._row_to_conexion(row) for row in rows]
+            return [row_to_conexion(row) for row in rows]
     
     def obtener_activas(self) -> List[Conexion]:
         """Obtiene solo las conexiones activas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM conexiones WHERE activa = 1 ORDER BY nombre"
             )
             rows = cursor.fetchall()
             
-            return [self._row_to_conexion(row) for row in rows]
+            return [row_to_conexion(row) for row in rows]
     
     def obtener_por_nombre(self, nombre: str) -> Optional[Conexion]:
         """Obtiene una conexión por su nombre"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM conexiones WHERE nombre = ?", (nombre,)
@@ -82,21 +59,22 @@ class SQLiteConexionRepository(ConexionRepository):
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_conexion(row)
+                return row_to_conexion(row)
             return None
     
     def guardar(self, conexion: Conexion) -> Conexion:
         """Guarda una conexión (crear o actualizar)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             if conexion.id is None:
                 # Crear nueva conexión
                 cursor = conn.execute(
                     """INSERT INTO conexiones 
-                       (nombre, base_datos, servidor, puerto, usuario, contraseña, tipo_motor, driver_type, activa) 
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                       (nombre, base_datos, servidor, puerto, usuario, contraseña, tipo_motor, driver_type, activa, propiedades_jdbc) 
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                     (conexion.nombre, conexion.base_datos, conexion.servidor, conexion.puerto,
                      conexion.usuario, conexion.contraseña, conexion.tipo_motor, 
-                     getattr(conexion, 'driver_type', 'default'), conexion.activa)
+                     getattr(conexion, 'driver_type', 'default'), conexion.activa,
+                     conexion.propiedades_jdbc or '')
                 )
                 conexion.id = cursor.lastrowid
             else:
@@ -104,18 +82,19 @@ class SQLiteConexionRepository(ConexionRepository):
                 conn.execute(
                     """UPDATE conexiones 
                        SET nombre=?, base_datos=?, servidor=?, puerto=?, usuario=?, 
-                           contraseña=?, tipo_motor=?, driver_type=?, activa=? 
+                           contraseña=?, tipo_motor=?, driver_type=?, activa=?, propiedades_jdbc=? 
                        WHERE id=?""",
                     (conexion.nombre, conexion.base_datos, conexion.servidor, conexion.puerto,
                      conexion.usuario, conexion.contraseña, conexion.tipo_motor, 
-                     getattr(conexion, 'driver_type', 'default'), conexion.activa, conexion.id)
+                     getattr(conexion, 'driver_type', 'default'), conexion.activa,
+                     conexion.propiedades_jdbc or '', conexion.id)
                 )
             
             return conexion
     
     def eliminar(self, id: int) -> bool:
         """Elimina una conexión por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM conexiones WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
@@ -124,24 +103,31 @@ class SQLiteConexionRepository(ConexionRepository):
         # TODO: Implementar prueba real de conexión
         # Por ahora, solo validamos que la configuración sea válida
         return conexion.es_configuracion_valida()
-    
-    def _row_to_conexion(self, row: sqlite3.Row) -> Conexion:
-        """Convierte una fila de base de datos a una entidad Conexión"""
-        # Obtener driver_type de manera segura
-        try:
-            driver_type = row['driver_type']
-        except (IndexError, KeyError):
-            driver_type = 'default'
-        
-        return Conexion(
-            id=row['id'],
-            nombre=row['nombre'],
-            base_datos=row['base_datos'],
-            servidor=row['servidor'],
-            puerto=row['puerto'],
-            usuario=row['usuario'],
-            contraseña=row['contraseña'],
-            tipo_motor=row['tipo_motor'],
-            driver_type=driver_type,
-            activa=bool(row['activa'])
-        )
\ No newline at end of file
+
+
+def row_to_conexion(row: sqlite3.Row) -> Conexion:
+    """Convierte una fila de base de datos a una entidad Conexión"""
+    # Obtener driver_type de manera segura
+    try:
+        driver_type = row['driver_type']
+    except (IndexError, KeyError):
+        driver_type = 'default'
+
+    try:
+        propiedades_jdbc = row['propiedades_jdbc'] or ''
+    except (IndexError, KeyError):
+        propiedades_jdbc = ''
+
+    return Conexion(
+        id=row['id'],
+        nombre=row['nombre'],
+        base_datos=row['base_datos'],
+        servidor=row['servidor'],
+        puerto=row['puerto'],
+        usuario=row['usuario'],
+        contraseña=row['contraseña'],
+        tipo_motor=row['tipo_motor'],
+        driver_type=driver_type,
+        activa=bool(row['activa']),
+        propiedades_jdbc=propiedades_jdbc
+    )
@@ -0,0 +1,61 @@
+"""
+Repositorio SQLite de configuraciones JDBC recordadas por conexión
+
+Guarda qué juego de propiedades JDBC logró conectar a cada conexión IBM i,
+para probarlo primero en los siguientes arranques del motor.
+"""
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Optional
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
+
+
+class SQLiteConfiguracionJDBCRepository:
+    """Persistencia de la configuración JDBC exitosa por conexión"""
+
+    def __init__(self, db_path: str = "sistema_controles.db"):
+        self.db_path = db_path
+        asegurar_esquema(db_path)
+
+    def obtener(self, conexion_id: int) -> Optional[Dict[str, Any]]:
+        """Obtiene la configuración recordada de una conexión"""
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM configuraciones_jdbc_conexion WHERE conexion_id = ?",
+                (conexion_id,)
+            ).fetchone()
+
+            if not row:
+                return None
+            return {
+                'conexion_id': row['conexion_id'],
+                'huella': row['huella'],
+                'configuracion': row['configuracion'],
+                'fecha_ultimo_exito': datetime.fromisoformat(row['fecha_ultimo_exito'])
+            }
+
+    def guardar(self, conexion_id: int, huella: str, configuracion: str,
+                fecha_ultimo_exito: datetime = None) -> None:
+        """Registra la configuración que conectó exitosamente"""
+        fecha = fecha_ultimo_exito or datetime.now()
+        with conectar(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO configuraciones_jdbc_conexion
+                    (conexion_id, huella, configuracion, fecha_ultimo_exito)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(conexion_id) DO UPDATE SET
+                    huella = excluded.huella,
+                    configuracion = excluded.configuracion,
+                    fecha_ultimo_exito = excluded.fecha_ultimo_exito
+            """, (conexion_id, huella, configuracion, fecha.isoformat()))
+
+    def eliminar(self, conexion_id: int) -> bool:
+        """Olvida la configuración de una conexión"""
+        with conectar(self.db_path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM configuraciones_jdbc_conexion WHERE conexion_id = ?",
+                (conexion_id,)
+            )
+            return cursor.rowcount > 0
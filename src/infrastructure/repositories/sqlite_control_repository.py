@@ -1,14 +1,25 @@
 """
 Implementación concreta del repositorio de Control usando SQLite
 
-Esta implementación maneja la persistencia de controles y sus relaciones
+Esta implementación maneja la persistencia de controles y sus relaciones.
+Las listas de IDs (parámetros, consultas a disparar y referentes) se
+guardan en tablas de relación indexadas, no en la fila del control.
 """
 import sqlite3
-import json
 from typing import List, Optional
 from datetime import datetime
 from src.domain.entities.control import Control
 from src.domain.repositories.control_repository import ControlRepository
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
+
+
+# Listas de IDs del control y su tabla de relación: (atributo, tabla, columna)
+_RELACIONES = [
+    ('parametros_ids', 'controles_parametros', 'parametro_id'),
+    ('consultas_a_disparar_ids', 'controles_consultas_disparar', 'consulta_id'),
+    ('referentes_ids', 'controles_referentes', 'referente_id'),
+]
 
 
 class SQLiteControlRepository(ControlRepository):
@@ -16,85 +27,57 @@ class SQLiteControlRepository(ControlRepository):
     
     def __init__(self, db_path: str = "controles.db"):
         self.db_path = db_path
-        self._crear_tablas()
-    
-    def _crear_tablas(self):
-        """Crea las tablas necesarias si no existen"""
-        with sqlite3.connect(self.db_path) as conn:
-            # Tabla principal de controles
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS controles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT UNIQUE NOT NULL,
-                    descripcion TEXT,
-                    activo BOOLEAN DEFAULT 1,
-                    fecha_creacion TIMESTAMP,
-                    disparar_si_hay_datos BOOLEAN DEFAULT 1,
-                    conexion_id INTEGER,
-                    consulta_disparo_id INTEGER,
-                    parametros_ids TEXT,  -- JSON array
-                    consultas_a_disparar_ids TEXT,  -- JSON array
-                    referentes_ids TEXT  -- JSON array
-                )
-            """)
+        asegurar_esquema(db_path)
     
     def obtener_por_id(self, id: int) -> Optional[Control]:
         """Obtiene un control por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM controles WHERE id = ?", (id,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                return self._row_to_control(row)
-            return None
+        controles = self._consultar("WHERE id = ?", (id,))
+        return controles[0] if controles else None
     
     def obtener_todos(self) -> List[Control]:
         """Obtiene todos los controles"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM controles ORDER BY nombre")
-            rows = cursor.fetchall()
-            
-            return [self._row_to_control(row) for row in rows]
+        return self._consultar("ORDER BY nombre")
     
     def obtener_activos(self) -> List[Control]:
         """Obtiene solo los controles activos"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM controles WHERE activo = 1 ORDER BY nombre"
-            )
-            rows = cursor.fetchall()
-            
-            return [self._row_to_control(row) for row in rows]
+        return self._consultar("WHERE activo = 1 ORDER BY nombre")
     
     def obtener_por_nombre(self, nombre: str) -> Optional[Control]:
         """Obtiene un control por su nombre"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM controles WHERE nombre = ?", (nombre,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                return self._row_to_control(row)
-            return None
+        controles = self._consultar("WHERE nombre = ?", (nombre,))
+        return controles[0] if controles else None
+    
+    def obtener_por_parametro(self, parametro_id: int) -> List[Control]:
+        """Obtiene los controles que usan un parámetro"""
+        return self._consultar(
+            "WHERE id IN (SELECT control_id FROM controles_parametros WHERE parametro_id = ?) ORDER BY nombre",
+            (parametro_id,)
+        )
+    
+    def obtener_por_consulta_a_disparar(self, consulta_id: int) -> List[Control]:
+        """Obtiene los controles que disparan una consulta"""
+        return self._consultar(
+            "WHERE id IN (SELECT control_id FROM controles_consultas_disparar WHERE consulta_id = ?) ORDER BY nombre",
+            (consulta_id,)
+        )
+    
+    def obtener_por_referente(self, referente_id: int) -> List[Control]:
+        """Obtiene los controles que tienen asignado un referente"""
+        return self._consultar(
+            "WHERE id IN (SELECT control_id FROM controles_referentes WHERE referente_id = ?) ORDER BY nombre",
+            (referente_id,)
+        )
     
     def guardar(self, control: Control) -> Control:
         """Guarda un control (crear o actualizar)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             if control.id is None:
                 # Crear nuevo control
                 cursor = conn.execute(
                     """INSERT INTO controles 
                        (nombre, descripcion, activo, fecha_creacion, disparar_si_hay_datos,
-                        conexion_id, consulta_disparo_id, parametros_ids, 
-                        consultas_a_disparar_ids, referentes_ids) 
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        conexion_id, consulta_disparo_id) 
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
                     (
                         control.nombre,
                         control.descripcion,
@@ -102,10 +85,7 @@ class SQLiteControlRepository(ControlRepository):
                         control.fecha_creacion.isoformat() if control.fecha_creacion else None,
                         control.disparar_si_hay_datos,
                         control.conexion_id,
-                        control.consulta_disparo_id,
-                        json.dumps(control.parametros_ids),
-                        json.dumps(control.consultas_a_disparar_ids),
-                        json.dumps(control.referentes_ids)
+                        control.consulta_disparo_id
                     )
                 )
                 control.id = cursor.lastrowid
@@ -114,8 +94,7 @@ class SQLiteControlRepository(ControlRepository):
                 conn.execute(
                     """UPDATE controles 
                        SET nombre=?, descripcion=?, activo=?, disparar_si_hay_datos=?,
-                           conexion_id=?, consulta_disparo_id=?, parametros_ids=?,
-                           consultas_a_disparar_ids=?, referentes_ids=?
+                           conexion_id=?, consulta_disparo_id=?
                        WHERE id=?""",
                     (
                         control.nombre,
@@ -124,18 +103,16 @@ class SQLiteControlRepository(ControlRepository):
                         control.disparar_si_hay_datos,
                         control.conexion_id,
                         control.consulta_disparo_id,
-                        json.dumps(control.parametros_ids),
-                        json.dumps(control.consultas_a_disparar_ids),
-                        json.dumps(control.referentes_ids),
                         control.id
                     )
                 )
             
+            self._guardar_relaciones(conn, control)
             return control
     
     def eliminar(self, id: int) -> bool:
-        """Elimina un control por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Elimina un control por su ID (los triggers borran sus relaciones)"""
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM controles WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
@@ -146,18 +123,59 @@ class SQLiteControlRepository(ControlRepository):
         # TODO: Implementar carga de relaciones cuando estén disponibles los otros repositorios
         return control
     
-    def _row_to_control(self, row: sqlite3.Row) -> Control:
-        """Convierte una fila de base de datos a una entidad Control"""
-        return Control(
-            id=row['id'],
-            nombre=row['nombre'],
-            descripcion=row['descripcion'],
-            activo=bool(row['activo']),
-            fecha_creacion=datetime.fromisoformat(row['fecha_creacion']) if row['fecha_creacion'] else None,
-            disparar_si_hay_datos=bool(row['disparar_si_hay_datos']),
-            conexion_id=row['conexion_id'],
-            consulta_disparo_id=row['consulta_disparo_id'],
-            parametros_ids=json.loads(row['parametros_ids']) if row['parametros_ids'] else [],
-            consultas_a_disparar_ids=json.loads(row['consultas_a_disparar_ids']) if row['consultas_a_disparar_ids'] else [],
-            referentes_ids=json.loads(row['referentes_ids']) if row['referentes_ids'] else []
-        )
\ No newline at end of file
+    def _consultar(self, condicion: str, valores: tuple = ()) -> List[Control]:
+        """Obtiene los controles que cumplen la condición, con sus listas de IDs"""
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT * FROM controles {condicion}", valores).fetchall()
+            controles = [row_to_control(row) for row in rows]
+            cargar_ids_relaciones(conn, controles)
+            return controles
+    
+    def _guardar_relaciones(self, conn, control: Control):
+        """Reemplaza las filas de relación del control por sus listas de IDs actuales"""
+        for atributo, tabla, columna in _RELACIONES:
+            conn.execute(f"DELETE FROM {tabla} WHERE control_id = ?", (control.id,))
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {tabla} (control_id, {columna}, posicion) VALUES (?, ?, ?)",
+                [(control.id, relacionado_id, posicion)
+                 for posicion, relacionado_id in enumerate(getattr(control, atributo) or [])]
+            )
+
+
+def row_to_control(row: sqlite3.Row) -> Control:
+    """
+    Convierte una fila de base de datos a una entidad Control
+
+    Las listas de IDs quedan vacías: se completan con cargar_ids_relaciones().
+    """
+    return Control(
+        id=row['id'],
+        nombre=row['nombre'],
+        descripcion=row['descripcion'],
+        activo=bool(row['activo']),
+        fecha_creacion=datetime.fromisoformat(row['fecha_creacion']) if row['fecha_creacion'] else None,
+        disparar_si_hay_datos=bool(row['disparar_si_hay_datos']),
+        conexion_id=row['conexion_id'],
+        consulta_disparo_id=row['consulta_disparo_id']
+    )
+
+
+def cargar_ids_relaciones(conn, controles: List[Control]):
+    """Completa las listas de IDs de los controles con una consulta por relación"""
+    por_id = {control.id: control for control in controles}
+    if not por_id:
+        return
+    ids = list(por_id)
+    for atributo, tabla, columna in _RELACIONES:
+        # Lotes de IDs para no superar el límite de parámetros de SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            placeholders = ','.join('?' * len(lote))
+            filas = conn.execute(
+                f"SELECT control_id, {columna} FROM {tabla} "
+                f"WHERE control_id IN ({placeholders}) ORDER BY control_id, posicion",
+                lote
+            ).fetchall()
+            for control_id, relacionado_id in filas:
+                getattr(por_id[control_id], atributo).append(relacionado_id)
@@ -5,6 +5,8 @@ import sqlite3
 from typing import List, Optional
 from src.domain.entities.parametro import Parametro, TipoParametro
 from src.domain.repositories.parametro_repository import ParametroRepository
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
 
 
 class SQLiteParametroRepository(ParametroRepository):
@@ -12,25 +14,11 @@ class SQLiteParametroRepository(ParametroRepository):
     
     def __init__(self, db_path: str = "controles.db"):
         self.db_path = db_path
-        self._crear_tabla()
-    
-    def _crear_tabla(self):
-        """Crea la tabla de parámetros si no existe"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS parametros (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT UNIQUE NOT NULL,
-                    tipo TEXT NOT NULL,
-                    descripcion TEXT,
-                    valor_por_defecto TEXT,
-                    obligatorio BOOLEAN DEFAULT 1
-                )
-            """)
+        asegurar_esquema(db_path)
     
     def obtener_por_id(self, id: int) -> Optional[Parametro]:
         """Obtiene un parámetro por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM parametros WHERE id = ?", (id,)
@@ -38,21 +26,21 @@ class SQLiteParametroRepository(ParametroRepository):
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_parametro(row)
+                return row_to_parametro(row)
             return None
     
     def obtener_todos(self) -> List[Parametro]:
         """Obtiene todos los parámetros"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM parametros ORDER BY nombre")
             rows = cursor.fetchall()
             
-            return [self._row_to_parametro(row) for row in rows]
+            return [row_to_parametro(row) for row in rows]
     
     def obtener_por_nombre(self, nombre: str) -> Optional[Parametro]:
         """Obtiene un parámetro por su nombre"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM parametros WHERE nombre = ?", (nombre,)
@@ -60,7 +48,7 @@ class SQLiteParametroRepository(ParametroRepository):
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_parametro(row)
+                return row_to_parametro(row)
             return None
     
     def obtener_por_ids(self, ids: List[int]) -> List[Parametro]:
@@ -69,7 +57,7 @@ class SQLiteParametroRepository(ParametroRepository):
             return []
         
         placeholders = ','.join('?' * len(ids))
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 f"SELECT * FROM parametros WHERE id IN ({placeholders})",
@@ -77,11 +65,11 @@ class SQLiteParametroRepository(ParametroRepository):
             )
             rows = cursor.fetchall()
             
-            return [self._row_to_parametro(row) for row in rows]
+            return [row_to_parametro(row) for row in rows]
     
     def guardar(self, parametro: Parametro) -> Parametro:
         """Guarda un parámetro (crear o actualizar)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             if parametro.id is None:
                 # Crear nuevo parámetro
                 cursor = conn.execute(
@@ -105,38 +93,30 @@ class SQLiteParametroRepository(ParametroRepository):
     
     def eliminar(self, id: int) -> bool:
         """Elimina un parámetro por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM parametros WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
-    def _row_to_parametro(self, row: sqlite3.Row) -> Parametro:
-        """Convierte una fila de base de datos a una entidad Parámetro"""
-        return Parametro(
-            id=row['id'],
-            nombre=row['nombre'],
-            tipo=TipoParametro(row['tipo']),
-            descripcion=row['descripcion'],
-            valor_por_defecto=row['valor_por_defecto'],
-            obligatorio=bool(row['obligatorio'])
-        )
-    
     def obtener_por_control(self, control_id: int) -> List[Parametro]:
         """Obtiene todos los parámetros asociados a un control"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
-            # Obtener los IDs de parámetros del control
             cursor = conn.execute(
-                "SELECT parametros_ids FROM controles WHERE id = ?",
+                """SELECT p.* FROM parametros p
+                   JOIN controles_parametros cp ON cp.parametro_id = p.id
+                   WHERE cp.control_id = ? ORDER BY cp.posicion""",
                 (control_id,)
             )
-            row = cursor.fetchone()
-            if not row or not row['parametros_ids']:
-                return []
-            
-            # Decodificar JSON y obtener parámetros
-            import json
-            try:
-                parametro_ids = json.loads(row['parametros_ids'])
-                return self.obtener_por_ids(parametro_ids)
-            except (json.JSONDecodeError, TypeError):
-                return []
\ No newline at end of file
+            return [row_to_parametro(row) for row in cursor.fetchall()]
+
+
+def row_to_parametro(row: sqlite3.Row) -> Parametro:
+    """Convierte una fila de base de datos a una entidad Parámetro"""
+    return Parametro(
+        id=row['id'],
+        nombre=row['nombre'],
+        tipo=TipoParametro(row['tipo']),
+        descripcion=row['descripcion'],
+        valor_por_defecto=row['valor_por_defecto'],
+        obligatorio=bool(row['obligatorio'])
+    )
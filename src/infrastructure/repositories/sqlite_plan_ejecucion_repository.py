@@ -0,0 +1,132 @@
+"""
+Implementación SQLite del repositorio PlanEjecucion
+
+Carga el grafo completo de un control (parámetros, consultas asociadas,
+conexiones y referentes) con una única conexión y un número fijo de
+consultas, independiente de cuántas consultas o referentes tenga el control.
+Las entidades relacionadas se leen con JOIN sobre las filas de asociación y
+se convierten con los mismos conversores de fila que usan sus repositorios.
+"""
+import sqlite3
+from typing import Dict, Optional
+from src.domain.entities.plan_ejecucion import PlanEjecucion
+from src.domain.repositories.plan_ejecucion_repository import PlanEjecucionRepository
+from src.infrastructure.repositories.sqlite_conexion_repository import row_to_conexion
+from src.infrastructure.repositories.sqlite_consulta_control_repository import row_to_consulta_control
+from src.infrastructure.repositories.sqlite_consulta_repository import row_to_consulta
+from src.infrastructure.repositories.sqlite_control_referente_repository import row_to_control_referente
+from src.infrastructure.repositories.sqlite_control_repository import cargar_ids_relaciones, row_to_control
+from src.infrastructure.repositories.sqlite_parametro_repository import row_to_parametro
+from src.infrastructure.repositories.sqlite_referente_repository import row_to_referente
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
+
+
+# Tablas leídas por el plan y el prefijo con que se distinguen sus columnas en los JOIN
+_PREFIJOS = {
+    'controles': 'ctl',
+    'parametros': 'par',
+    'consultas_controles': 'cc',
+    'consultas': 'con',
+    'conexiones': 'cx',
+    'control_referente': 'cr',
+    'referentes': 'ref',
+}
+
+
+class SQLitePlanEjecucionRepository(PlanEjecucionRepository):
+    """Implementación SQLite del repositorio PlanEjecucion"""
+
+    def __init__(self, db_path: str = "sistema_controles.db"):
+        self.db_path = db_path
+        asegurar_esquema(db_path)
+        # Columnas de cada tabla, leídas una sola vez para armar los SELECT con alias
+        with conectar(db_path) as conn:
+            self._columnas = {
+                tabla: [fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")]
+                for tabla in _PREFIJOS
+            }
+
+    def obtener_por_control(self, control_id: int) -> Optional[PlanEjecucion]:
+        """Obtiene el plan de ejecución completo de un control (None si no existe)"""
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+
+            # Control y su conexión principal
+            row = conn.execute(
+                f"""SELECT {self._select('controles', 'conexiones')}
+                    FROM controles ctl
+                    LEFT JOIN conexiones cx ON cx.id = ctl.conexion_id
+                    WHERE ctl.id = ?""",
+                (control_id,)
+            ).fetchone()
+            if not row:
+                return None
+            control = row_to_control(self._separar(row, 'controles'))
+            cargar_ids_relaciones(conn, [control])
+            plan = PlanEjecucion(control=control)
+            conexion = self._separar(row, 'conexiones')
+            if conexion is not None:
+                plan.conexion = row_to_conexion(conexion)
+                plan.conexiones[plan.conexion.id] = plan.conexion
+
+            # Parámetros del control, en el orden en que se asignaron
+            rows = conn.execute(
+                f"""SELECT {self._select('parametros')}
+                    FROM controles_parametros cp
+                    JOIN parametros par ON par.id = cp.parametro_id
+                    WHERE cp.control_id = ? ORDER BY cp.posicion""",
+                (control_id,)
+            ).fetchall()
+            plan.parametros = [row_to_parametro(self._separar(r, 'parametros')) for r in rows]
+
+            # Asociaciones activas con su consulta y la conexión específica de la consulta
+            rows = conn.execute(
+                f"""SELECT {self._select('consultas_controles', 'consultas', 'conexiones')}
+                    FROM consultas_controles cc
+                    LEFT JOIN consultas con ON con.id = cc.consulta_id
+                    LEFT JOIN conexiones cx ON cx.id = con.conexion_id
+                    WHERE cc.control_id = ? AND cc.activa = 1
+                    ORDER BY cc.orden, cc.id""",
+                (control_id,)
+            ).fetchall()
+            for r in rows:
+                plan.asociaciones.append(row_to_consulta_control(self._separar(r, 'consultas_controles')))
+                consulta = self._separar(r, 'consultas')
+                if consulta is not None:
+                    plan.consultas[consulta['id']] = row_to_consulta(consulta)
+                conexion = self._separar(r, 'conexiones')
+                if conexion is not None:
+                    plan.conexiones[conexion['id']] = row_to_conexion(conexion)
+
+            # Referentes asociados al control
+            rows = conn.execute(
+                f"""SELECT {self._select('control_referente', 'referentes')}
+                    FROM control_referente cr
+                    LEFT JOIN referentes ref ON ref.id = cr.referente_id
+                    WHERE cr.control_id = ?
+                    ORDER BY cr.fecha_asociacion DESC""",
+                (control_id,)
+            ).fetchall()
+            plan.asociaciones_referentes = []
+            for r in rows:
+                plan.asociaciones_referentes.append(row_to_control_referente(self._separar(r, 'control_referente')))
+                referente = self._separar(r, 'referentes')
+                if referente is not None:
+                    plan.referentes[referente['id']] = row_to_referente(referente)
+
+            return plan
+
+    def _select(self, *tablas: str) -> str:
+        """Lista de columnas de las tablas con alias 'prefijo__columna'"""
+        return ', '.join(
+            f"{_PREFIJOS[tabla]}.{columna} AS {_PREFIJOS[tabla]}__{columna}"
+            for tabla in tablas
+            for columna in self._columnas[tabla]
+        )
+
+    def _separar(self, row: sqlite3.Row, tabla: str) -> Optional[Dict]:
+        """Extrae de una fila con JOIN las columnas de una tabla (None si el JOIN no encontró fila)"""
+        prefijo = _PREFIJOS[tabla]
+        datos = {columna: row[f"{prefijo}__{columna}"] for columna in self._columnas[tabla]}
+        return datos if datos.get('id') is not None else None
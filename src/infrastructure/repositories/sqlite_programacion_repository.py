@@ -11,6 +11,8 @@ from typing import List, Optional
 
 from ...domain.repositories.programacion_repository import ProgramacionRepository
 from ...domain.entities.programacion import Programacion, TipoProgramacion, DiaSemana
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
 
 
 class SQLiteProgramacionRepository(ProgramacionRepository):
@@ -18,63 +20,20 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._crear_tabla_si_no_existe()
+        asegurar_esquema(db_path)
     
-    def _crear_tabla_si_no_existe(self):
-        """Crea la tabla programaciones si no existe"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS programaciones (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    control_id INTEGER NOT NULL,
-                    nombre TEXT NOT NULL,
-                    descripcion TEXT,
-                    tipo_programacion TEXT NOT NULL,
-                    activo BOOLEAN NOT NULL DEFAULT 1,
-                    
-                    -- Configuración de horario
-                    hora_ejecucion TEXT,
-                    fecha_inicio TEXT,
-                    fecha_fin TEXT,
-                    
-                    -- Configuración específica por tipo (JSON)
-                    dias_semana TEXT,
-                    dias_mes TEXT,
-                    intervalo_minutos INTEGER,
-                    
-                    -- Control de ejecución
-                    ultima_ejecucion TEXT,
-                    proxima_ejecucion TEXT,
-                    total_ejecuciones INTEGER DEFAULT 0,
-                    
-                    -- Metadatos
-                    fecha_creacion TEXT NOT NULL,
-                    fecha_modificacion TEXT,
-                    creado_por TEXT,
-                    
-                    FOREIGN KEY (control_id) REFERENCES controles (id)
-                )
-            """)
-            
-            # Crear índices para optimizar consultas
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_programaciones_control_id 
-                ON programaciones(control_id)
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_programaciones_activo 
-                ON programaciones(activo)
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_programaciones_proxima_ejecucion 
-                ON programaciones(proxima_ejecucion)
-            """)
+    def _preparar_proxima_ejecucion(self, programacion: Programacion) -> None:
+        """Mantiene proxima_ejecucion coherente con el estado antes de persistir"""
+        if not programacion.activo:
+            programacion.proxima_ejecucion = None
+        elif programacion.proxima_ejecucion is None:
+            programacion._calcular_proxima_ejecucion()
     
     def crear(self, programacion: Programacion) -> Programacion:
         """Crea una nueva programación"""
-        with sqlite3.connect(self.db_path) as conn:
+        self._preparar_proxima_ejecucion(programacion)
+        
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("""
                 INSERT INTO programaciones (
                     control_id, nombre, descripcion, tipo_programacion, activo,
@@ -108,7 +67,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_por_id(self, id: int) -> Optional[Programacion]:
         """Obtiene una programación por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM programaciones WHERE id = ?", (id,)
@@ -121,7 +80,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_por_control_id(self, control_id: int) -> List[Programacion]:
         """Obtiene todas las programaciones de un control"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM programaciones WHERE control_id = ? ORDER BY nombre",
@@ -133,7 +92,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_todas(self) -> List[Programacion]:
         """Obtiene todas las programaciones"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM programaciones ORDER BY control_id, nombre"
@@ -144,7 +103,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_activas(self) -> List[Programacion]:
         """Obtiene todas las programaciones activas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM programaciones WHERE activo = 1 ORDER BY control_id, nombre"
@@ -154,34 +113,63 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
             return [self._row_to_programacion(row) for row in rows]
     
     def obtener_pendientes_ejecucion(self, fecha_actual: datetime = None) -> List[Programacion]:
-        """Obtiene las programaciones que deben ejecutarse ahora"""
+        """
+        Obtiene las programaciones activas cuya próxima ejecución es anterior
+        o igual a fecha_actual (usa el índice activo + proxima_ejecucion)
+        """
         if fecha_actual is None:
             fecha_actual = datetime.now()
         
-        # Obtener todas las programaciones activas y filtrar usando la lógica de la entidad
-        programaciones_activas = self.obtener_activas()
-        pendientes = []
-        
-        for programacion in programaciones_activas:
-            if programacion.debe_ejecutarse_ahora(fecha_actual):
-                pendientes.append(programacion)
-        
-        return pendientes
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                """SELECT * FROM programaciones 
+                   WHERE activo = 1 AND proxima_ejecucion <= ?
+                   ORDER BY proxima_ejecucion""",
+                (self._datetime_to_string(fecha_actual),)
+            )
+            rows = cursor.fetchall()
+            
+            return [self._row_to_programacion(row) for row in rows]
+    
+    def obtener_firma_cambios(self) -> tuple:
+        """
+        Obtiene una firma barata del estado de las programaciones
+
+        Lee la fila única del contador que mantienen los triggers de
+        programaciones, sin recorrer la tabla.
+        """
+        with conectar(self.db_path) as conn:
+            cursor = conn.execute("SELECT version FROM cambios_programaciones WHERE id = 1")
+            return tuple(cursor.fetchone())
     
     def actualizar(self, programacion: Programacion) -> Programacion:
         """Actualiza una programación existente"""
-        programacion.fecha_modificacion = datetime.now()
+        return self.actualizar_lote([programacion])[0]
+    
+    def actualizar_lote(self, programaciones: List[Programacion]) -> List[Programacion]:
+        """Actualiza varias programaciones existentes en una única transacción"""
+        with conectar(self.db_path) as conn:
+            self._actualizar(conn, programaciones)
+        return programaciones
+    
+    def _actualizar(self, conn, programaciones: List[Programacion]):
+        """Actualiza las programaciones con un solo executemany (en la transacción de conn)"""
+        ahora = datetime.now()
+        for programacion in programaciones:
+            programacion.fecha_modificacion = ahora
+            self._preparar_proxima_ejecucion(programacion)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                UPDATE programaciones SET
-                    control_id = ?, nombre = ?, descripcion = ?, tipo_programacion = ?, activo = ?,
-                    hora_ejecucion = ?, fecha_inicio = ?, fecha_fin = ?,
-                    dias_semana = ?, dias_mes = ?, intervalo_minutos = ?,
-                    ultima_ejecucion = ?, proxima_ejecucion = ?, total_ejecuciones = ?,
-                    fecha_modificacion = ?, creado_por = ?
-                WHERE id = ?
-            """, (
+        conn.executemany("""
+            UPDATE programaciones SET
+                control_id = ?, nombre = ?, descripcion = ?, tipo_programacion = ?, activo = ?,
+                hora_ejecucion = ?, fecha_inicio = ?, fecha_fin = ?,
+                dias_semana = ?, dias_mes = ?, intervalo_minutos = ?,
+                ultima_ejecucion = ?, proxima_ejecucion = ?, total_ejecuciones = ?,
+                fecha_modificacion = ?, creado_por = ?
+            WHERE id = ?
+        """, [
+            (
                 programacion.control_id,
                 programacion.nombre,
                 programacion.descripcion,
@@ -199,22 +187,70 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
                 self._datetime_to_string(programacion.fecha_modificacion),
                 programacion.creado_por,
                 programacion.id
-            ))
-            
-            return programacion
+            )
+            for programacion in programaciones
+        ])
+    
+    def _registrar_ejecuciones(self, conn, programaciones: List[Programacion]):
+        """
+        Persiste solo el estado de ejecución de las programaciones (motor)
+
+        El motor trabaja con una copia cargada antes de ejecutar: reescribir la
+        fila completa revertiría lo editado mientras tanto (nombre, activo,
+        horario). Solo se actualizan ultima_ejecucion, total_ejecuciones y
+        fecha_modificacion; proxima_ejecucion únicamente si la programación
+        sigue activa y con el mismo horario que usó el motor para calcularla.
+        """
+        ahora = datetime.now()
+        conn.executemany("""
+            UPDATE programaciones SET
+                ultima_ejecucion = ?, total_ejecuciones = ?, fecha_modificacion = ?,
+                proxima_ejecucion = CASE
+                    WHEN activo = 1 AND tipo_programacion = ? AND hora_ejecucion IS ?
+                         AND fecha_inicio IS ? AND fecha_fin IS ? AND dias_semana IS ?
+                         AND dias_mes IS ? AND intervalo_minutos IS ?
+                    THEN ? ELSE proxima_ejecucion END
+            WHERE id = ?
+        """, [
+            (
+                self._datetime_to_string(programacion.ultima_ejecucion),
+                programacion.total_ejecuciones,
+                self._datetime_to_string(ahora),
+                programacion.tipo_programacion.value,
+                self._time_to_string(programacion.hora_ejecucion),
+                self._datetime_to_string(programacion.fecha_inicio),
+                self._datetime_to_string(programacion.fecha_fin),
+                self._dias_semana_to_json(programacion.dias_semana),
+                self._dias_mes_to_json(programacion.dias_mes),
+                programacion.intervalo_minutos,
+                self._datetime_to_string(programacion.proxima_ejecucion),
+                programacion.id
+            )
+            for programacion in programaciones
+        ])
     
     def eliminar(self, id: int) -> bool:
         """Elimina una programación"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM programaciones WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
     def activar_desactivar(self, id: int, activo: bool) -> bool:
         """Activa o desactiva una programación"""
-        with sqlite3.connect(self.db_path) as conn:
+        if activo:
+            # Al activar hay que recalcular la próxima ejecución
+            programacion = self.obtener_por_id(id)
+            if not programacion:
+                return False
+            programacion.activo = True
+            programacion._calcular_proxima_ejecucion()
+            self.actualizar(programacion)
+            return True
+        
+        with conectar(self.db_path) as conn:
             cursor = conn.execute(
-                "UPDATE programaciones SET activo = ?, fecha_modificacion = ? WHERE id = ?",
-                (activo, self._datetime_to_string(datetime.now()), id)
+                "UPDATE programaciones SET activo = 0, proxima_ejecucion = NULL, fecha_modificacion = ? WHERE id = ?",
+                (self._datetime_to_string(datetime.now()), id)
             )
             return cursor.rowcount > 0
     
@@ -237,7 +273,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_historial_ejecuciones(self, control_id: int, limite: int = 50) -> List[dict]:
         """Obtiene el historial de ejecuciones programadas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("""
                 SELECT 
@@ -256,7 +292,7 @@ class SQLiteProgramacionRepository(ProgramacionRepository):
     
     def obtener_estadisticas(self, control_id: int = None) -> dict:
         """Obtiene estadísticas de programaciones"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             if control_id:
                 # Estadísticas específicas del control
                 cursor = conn.execute("""
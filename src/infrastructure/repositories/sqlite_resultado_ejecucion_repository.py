@@ -1,12 +1,28 @@
 """
 Implementación concreta del repositorio de ResultadoEjecucion usando SQLite
+
+Las filas devueltas por cada consulta se guardan aparte y solo se leen al
+pedir un resultado por ID o con cargar_datos(): los listados del historial
+no tocan esos datos. El contenido se guarda comprimido y direccionado por
+su hash en contenidos_datos, una sola vez aunque muchas ejecuciones
+devuelvan las mismas filas; resultados_ejecucion_datos solo referencia el
+hash y los triggers llevan la cuenta de referencias.
+
+Cada ejecución guardada actualiza además, en la misma transacción, el
+resumen diario por control (resumen_diario_ejecuciones) del que leen las
+estadísticas de rangos largos.
 """
 import sqlite3
 import json
-from typing import List, Optional
-from datetime import datetime
+import hashlib
+import zlib
+from typing import Iterator, List, Optional, Tuple
+from datetime import date, datetime
 from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.domain.entities.buffer_filas import BufferFilas
 from src.domain.repositories.resultado_ejecucion_repository import ResultadoEjecucionRepository
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
 
 
 class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
@@ -14,38 +30,11 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
     
     def __init__(self, db_path: str = "controles.db"):
         self.db_path = db_path
-        self._crear_tabla()
-    
-    def _crear_tabla(self):
-        """Crea la tabla de resultados si no existe"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS resultados_ejecucion (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    control_id INTEGER NOT NULL,
-                    control_nombre TEXT NOT NULL,
-                    fecha_ejecucion TIMESTAMP NOT NULL,
-                    estado TEXT NOT NULL,
-                    mensaje TEXT,
-                    parametros_utilizados TEXT,  -- JSON
-                    resultado_consulta_disparo TEXT,  -- JSON
-                    resultados_consultas_disparadas TEXT,  -- JSON array
-                    tiempo_total_ejecucion_ms REAL,
-                    total_filas_disparo INTEGER,
-                    total_filas_disparadas INTEGER,
-                    conexion_id INTEGER,
-                    conexion_nombre TEXT
-                )
-            """)
-            
-            # Crear índices para mejorar performance
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_control_id ON resultados_ejecucion(control_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_fecha_ejecucion ON resultados_ejecucion(fecha_ejecucion)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_estado ON resultados_ejecucion(estado)")
+        asegurar_esquema(db_path)
     
     def obtener_por_id(self, id: int) -> Optional[ResultadoEjecucion]:
-        """Obtiene un resultado por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Obtiene un resultado por su ID, con las filas de sus consultas"""
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM resultados_ejecucion WHERE id = ?", (id,)
@@ -53,12 +42,37 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_resultado(row)
+                return self._cargar_datos(conn, self._row_to_resultado(row))
             return None
     
+    def cargar_datos(self, resultado: ResultadoEjecucion) -> ResultadoEjecucion:
+        """Carga las filas de las consultas de un resultado obtenido en un listado"""
+        if resultado.datos_cargados or resultado.id is None:
+            return resultado
+        with conectar(self.db_path) as conn:
+            return self._cargar_datos(conn, resultado)
+    
+    def _cargar_datos(self, conn, resultado: ResultadoEjecucion) -> ResultadoEjecucion:
+        """Asigna a cada ResultadoConsulta sus filas guardadas"""
+        consultas = [resultado.resultado_consulta_disparo] + resultado.resultados_consultas_disparadas
+        cursor = conn.execute(
+            """SELECT d.posicion, c.compresion, c.contenido
+               FROM resultados_ejecucion_datos d
+               JOIN contenidos_datos c ON c.hash = d.hash
+               WHERE d.resultado_id = ?""",
+            (resultado.id,)
+        )
+        for posicion, compresion, contenido in cursor:
+            if posicion < len(consultas) and consultas[posicion] is not None:
+                data = json.loads(self._descomprimir(compresion, contenido))
+                data['truncado'] = consultas[posicion].truncado
+                consultas[posicion].datos = self._datos_desde_dict(data)
+        resultado.datos_cargados = True
+        return resultado
+    
     def obtener_todos(self) -> List[ResultadoEjecucion]:
         """Obtiene todos los resultados"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM resultados_ejecucion ORDER BY fecha_ejecucion DESC"
@@ -69,7 +83,7 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
     
     def obtener_por_control(self, control_id: int) -> List[ResultadoEjecucion]:
         """Obtiene todos los resultados de un control específico"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM resultados_ejecucion 
@@ -87,7 +101,7 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
         fecha_hasta: datetime
     ) -> List[ResultadoEjecucion]:
         """Obtiene resultados en un rango de fechas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM resultados_ejecucion 
@@ -101,7 +115,7 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
     
     def obtener_por_estado(self, estado: str) -> List[ResultadoEjecucion]:
         """Obtiene resultados por estado"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM resultados_ejecucion 
@@ -113,47 +127,386 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
             
             return [self._row_to_resultado(row) for row in rows]
     
+    def buscar(
+        self,
+        control_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        limite: Optional[int] = 50,
+        despues_de: Optional[Tuple[datetime, int]] = None,
+        antes_de: Optional[Tuple[datetime, int]] = None
+    ) -> List[ResultadoEjecucion]:
+        """Obtiene una página de resultados con los filtros combinados (paginación por cursor)"""
+        condiciones = []
+        valores = []
+        if control_id is not None:
+            condiciones.append("control_id = ?")
+            valores.append(control_id)
+        if estado:
+            condiciones.append("estado = ?")
+            valores.append(estado)
+        if fecha_desde:
+            condiciones.append("fecha_ejecucion >= ?")
+            valores.append(fecha_desde.isoformat())
+        if fecha_hasta:
+            condiciones.append("fecha_ejecucion <= ?")
+            valores.append(fecha_hasta.isoformat())
+        
+        # Cursor: página siguiente (más antiguos) o anterior (más recientes)
+        orden = "DESC"
+        if despues_de:
+            fecha, id_cursor = despues_de
+            condiciones.append("(fecha_ejecucion < ? OR (fecha_ejecucion = ? AND id < ?))")
+            valores.extend([fecha.isoformat(), fecha.isoformat(), id_cursor])
+        elif antes_de:
+            fecha, id_cursor = antes_de
+            condiciones.append("(fecha_ejecucion > ? OR (fecha_ejecucion = ? AND id > ?))")
+            valores.extend([fecha.isoformat(), fecha.isoformat(), id_cursor])
+            orden = "ASC"
+        
+        sql = "SELECT * FROM resultados_ejecucion"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += f" ORDER BY fecha_ejecucion {orden}, id {orden}"
+        if limite:
+            sql += " LIMIT ?"
+            valores.append(limite)
+        
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(sql, valores).fetchall()
+        
+        resultados = [self._row_to_resultado(row) for row in rows]
+        if orden == "ASC":
+            resultados.reverse()
+        return resultados
+    
+    def obtener_estadisticas(self, fecha_desde: datetime, fecha_hasta: datetime) -> dict:
+        """Obtiene estadísticas agregadas de las ejecuciones en un rango de fechas"""
+        resumen = self._agregar(fecha_desde, fecha_hasta, por_control=False)
+        if resumen:
+            return resumen[0]
+        return {
+            'total_ejecuciones': 0,
+            'por_estado': {},
+            'tiempo_promedio_ms': 0.0,
+            'tiempo_p95_ms': 0.0,
+            'ultima_ejecucion': None
+        }
+    
+    def obtener_resumen_por_control(self, fecha_desde: datetime, fecha_hasta: datetime) -> List[dict]:
+        """Obtiene estadísticas agregadas por control en un rango de fechas"""
+        return self._agregar(fecha_desde, fecha_hasta, por_control=True)
+    
+    def _agregar(self, fecha_desde: datetime, fecha_hasta: datetime, por_control: bool) -> List[dict]:
+        """
+        Calcula los agregados en la base (por control o de todo el rango)
+        
+        El p95 es el percentil por rango más cercano sobre los tiempos > 0.
+        """
+        grupo = "control_id" if por_control else "0"
+        rango = (fecha_desde.isoformat(), fecha_hasta.isoformat())
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"""
+                WITH base AS (
+                    SELECT {grupo} AS grupo, id, control_id, control_nombre, estado,
+                           fecha_ejecucion, tiempo_total_ejecucion_ms AS tiempo
+                    FROM resultados_ejecucion
+                    WHERE fecha_ejecucion BETWEEN ? AND ?
+                ),
+                totales AS (
+                    SELECT grupo, COUNT(*) AS total,
+                           AVG(CASE WHEN tiempo > 0 THEN tiempo END) AS promedio
+                    FROM base GROUP BY grupo
+                ),
+                ultimas AS (
+                    SELECT grupo, control_id, control_nombre, estado, fecha_ejecucion,
+                           ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY fecha_ejecucion DESC, id DESC) AS n
+                    FROM base
+                ),
+                tiempos AS (
+                    SELECT grupo, tiempo,
+                           ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY tiempo) AS n,
+                           COUNT(*) OVER (PARTITION BY grupo) AS cantidad
+                    FROM base WHERE tiempo > 0
+                ),
+                percentiles AS (
+                    SELECT grupo, tiempo AS p95 FROM tiempos
+                    WHERE n = (cantidad * 95 + 99) / 100
+                )
+                SELECT t.grupo, t.total, t.promedio, u.control_id, u.control_nombre,
+                       u.estado AS ultimo_estado, u.fecha_ejecucion AS ultima_ejecucion, p.p95
+                FROM totales t
+                JOIN ultimas u ON u.grupo = t.grupo AND u.n = 1
+                LEFT JOIN percentiles p ON p.grupo = t.grupo
+                ORDER BY u.fecha_ejecucion DESC
+            """, rango).fetchall()
+            
+            por_estado = {}
+            for grupo, estado, cantidad in conn.execute(f"""
+                SELECT {grupo} AS grupo, estado, COUNT(*) FROM resultados_ejecucion
+                WHERE fecha_ejecucion BETWEEN ? AND ?
+                GROUP BY grupo, estado
+            """, rango):
+                por_estado.setdefault(grupo, {})[estado] = cantidad
+        
+        resultados = []
+        for row in rows:
+            resumen = {
+                'total_ejecuciones': row['total'],
+                'por_estado': por_estado.get(row['grupo'], {}),
+                'tiempo_promedio_ms': row['promedio'] or 0.0,
+                'tiempo_p95_ms': row['p95'] or 0.0,
+                'ultima_ejecucion': datetime.fromisoformat(row['ultima_ejecucion']) if row['ultima_ejecucion'] else None
+            }
+            if por_control:
+                resumen.update({
+                    'control_id': row['control_id'],
+                    'control_nombre': row['control_nombre'],
+                    'ultimo_estado': row['ultimo_estado']
+                })
+            resultados.append(resumen)
+        return resultados
+    
     def guardar(self, resultado: ResultadoEjecucion) -> ResultadoEjecucion:
         """Guarda un resultado de ejecución"""
-        with sqlite3.connect(self.db_path) as conn:
-            if resultado.id is None:
-                # Crear nuevo resultado
-                cursor = conn.execute(
-                    """INSERT INTO resultados_ejecucion 
-                       (control_id, control_nombre, fecha_ejecucion, estado, mensaje,
-                        parametros_utilizados, resultado_consulta_disparo, 
-                        resultados_consultas_disparadas, tiempo_total_ejecucion_ms,
-                        total_filas_disparo, total_filas_disparadas, conexion_id, conexion_nombre)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        resultado.control_id,
-                        resultado.control_nombre,
-                        resultado.fecha_ejecucion.isoformat() if resultado.fecha_ejecucion else None,
-                        resultado.estado.value,
-                        resultado.mensaje,
-                        json.dumps(resultado.parametros_utilizados),
-                        json.dumps(self._consulta_to_dict(resultado.resultado_consulta_disparo)),
-                        json.dumps([self._consulta_to_dict(c) for c in resultado.resultados_consultas_disparadas]),
-                        resultado.tiempo_total_ejecucion_ms,
-                        resultado.total_filas_disparo,
-                        resultado.total_filas_disparadas,
-                        resultado.conexion_id,
-                        resultado.conexion_nombre
-                    )
+        return self.guardar_lote([resultado])[0]
+    
+    def guardar_lote(self, resultados: List[ResultadoEjecucion]) -> List[ResultadoEjecucion]:
+        """Guarda varios resultados de ejecución en una única transacción"""
+        with conectar(self.db_path) as conn:
+            self._insertar(conn, resultados)
+        return resultados
+    
+    def _insertar(self, conn, resultados: List[ResultadoEjecucion]):
+        """Inserta los resultados nuevos, sus filas y su resumen diario (en la transacción de conn)"""
+        nuevos = [resultado for resultado in resultados if resultado.id is None]
+        for resultado in nuevos:
+            cursor = conn.execute(
+                """INSERT INTO resultados_ejecucion 
+                   (control_id, control_nombre, fecha_ejecucion, estado, mensaje,
+                    parametros_utilizados, resultado_consulta_disparo, 
+                    resultados_consultas_disparadas, tiempo_total_ejecucion_ms,
+                    total_filas_disparo, total_filas_disparadas, conexion_id, conexion_nombre)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    resultado.control_id,
+                    resultado.control_nombre,
+                    resultado.fecha_ejecucion.isoformat() if resultado.fecha_ejecucion else None,
+                    resultado.estado.value,
+                    resultado.mensaje,
+                    json.dumps(resultado.parametros_utilizados),
+                    json.dumps(self._consulta_to_dict(resultado.resultado_consulta_disparo)),
+                    json.dumps([self._consulta_to_dict(c) for c in resultado.resultados_consultas_disparadas]),
+                    resultado.tiempo_total_ejecucion_ms,
+                    resultado.total_filas_disparo,
+                    resultado.total_filas_disparadas,
+                    resultado.conexion_id,
+                    resultado.conexion_nombre
                 )
-                resultado.id = cursor.lastrowid
-            
-            return resultado
+            )
+            resultado.id = cursor.lastrowid
+        
+        conn.executemany(
+            self._SQL_ACUMULAR_RESUMEN_DIARIO,
+            [self._valores_resumen_diario(r) for r in nuevos if r.fecha_ejecucion]
+        )
+        self._guardar_filas_datos(conn, [
+            fila
+            for resultado in nuevos
+            for fila in self._filas_datos(
+                resultado.id,
+                [resultado.resultado_consulta_disparo] + resultado.resultados_consultas_disparadas
+            )
+        ])
+    
+    # Suma una ejecución al resumen diario de su control
+    _SQL_ACUMULAR_RESUMEN_DIARIO = """
+        INSERT INTO resumen_diario_ejecuciones
+        (control_id, dia, control_nombre, total_ejecuciones, exitosas, con_error, disparadas,
+         sin_datos, tiempo_suma_ms, tiempo_min_ms, tiempo_max_ms, ejecuciones_con_tiempo,
+         total_filas_disparadas, ultima_ejecucion, ultimo_estado)
+        VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(control_id, dia) DO UPDATE SET
+            total_ejecuciones = total_ejecuciones + 1,
+            exitosas = exitosas + excluded.exitosas,
+            con_error = con_error + excluded.con_error,
+            disparadas = disparadas + excluded.disparadas,
+            sin_datos = sin_datos + excluded.sin_datos,
+            tiempo_suma_ms = tiempo_suma_ms + excluded.tiempo_suma_ms,
+            tiempo_min_ms = COALESCE(MIN(tiempo_min_ms, excluded.tiempo_min_ms),
+                                     tiempo_min_ms, excluded.tiempo_min_ms),
+            tiempo_max_ms = COALESCE(MAX(tiempo_max_ms, excluded.tiempo_max_ms),
+                                     tiempo_max_ms, excluded.tiempo_max_ms),
+            ejecuciones_con_tiempo = ejecuciones_con_tiempo + excluded.ejecuciones_con_tiempo,
+            total_filas_disparadas = total_filas_disparadas + excluded.total_filas_disparadas,
+            control_nombre = CASE WHEN excluded.ultima_ejecucion >= ultima_ejecucion
+                                  THEN excluded.control_nombre ELSE control_nombre END,
+            ultimo_estado = CASE WHEN excluded.ultima_ejecucion >= ultima_ejecucion
+                                 THEN excluded.ultimo_estado ELSE ultimo_estado END,
+            ultima_ejecucion = MAX(ultima_ejecucion, excluded.ultima_ejecucion)"""
+    
+    def _valores_resumen_diario(self, resultado: ResultadoEjecucion) -> tuple:
+        """Parámetros de _SQL_ACUMULAR_RESUMEN_DIARIO para una ejecución"""
+        estado = resultado.estado.value
+        tiempo = resultado.tiempo_total_ejecucion_ms or 0.0
+        con_tiempo = tiempo > 0
+        return (
+            resultado.control_id,
+            resultado.fecha_ejecucion.date().isoformat(),
+            resultado.control_nombre,
+            int(estado == EstadoEjecucion.EXITOSO.value),
+            int(estado == EstadoEjecucion.ERROR.value),
+            int(estado == EstadoEjecucion.CONTROL_DISPARADO.value),
+            int(estado == EstadoEjecucion.SIN_DATOS.value),
+            tiempo if con_tiempo else 0.0,
+            tiempo if con_tiempo else None,
+            tiempo if con_tiempo else None,
+            int(con_tiempo),
+            resultado.total_filas_disparadas or 0,
+            resultado.fecha_ejecucion.isoformat(),
+            estado
+        )
+    
+    def reconstruir_resumen_diario(
+        self,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> int:
+        """
+        Recalcula el resumen diario a partir de las ejecuciones guardadas
+        
+        Sirve para completar el resumen de ejecuciones anteriores a la tabla o
+        para corregirlo. Los días sin ejecuciones guardadas (por ejemplo, ya
+        depurados) conservan su resumen.
+        """
+        condiciones = []
+        valores = []
+        if fecha_desde:
+            condiciones.append("substr(fecha_ejecucion, 1, 10) >= ?")
+            valores.append(fecha_desde.isoformat())
+        if fecha_hasta:
+            condiciones.append("substr(fecha_ejecucion, 1, 10) <= ?")
+            valores.append(fecha_hasta.isoformat())
+        where = (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+        
+        with conectar(self.db_path) as conn:
+            cursor = conn.execute(f"""
+                INSERT OR REPLACE INTO resumen_diario_ejecuciones
+                    (control_id, dia, control_nombre, total_ejecuciones, exitosas, con_error, disparadas,
+                     sin_datos, tiempo_suma_ms, tiempo_min_ms, tiempo_max_ms, ejecuciones_con_tiempo,
+                     total_filas_disparadas, ultima_ejecucion, ultimo_estado)
+                SELECT control_id, dia, control_nombre, total, exitosas, con_error, disparadas, sin_datos,
+                       tiempo_suma, tiempo_min, tiempo_max, con_tiempo, filas, ultima, estado
+                FROM (
+                    SELECT control_id, substr(fecha_ejecucion, 1, 10) AS dia,
+                           COUNT(*) OVER dia_control AS total,
+                           SUM(estado = 'exitoso') OVER dia_control AS exitosas,
+                           SUM(estado = 'error') OVER dia_control AS con_error,
+                           SUM(estado = 'control_disparado') OVER dia_control AS disparadas,
+                           SUM(estado = 'sin_datos') OVER dia_control AS sin_datos,
+                           COALESCE(SUM(CASE WHEN tiempo_total_ejecucion_ms > 0
+                                             THEN tiempo_total_ejecucion_ms END) OVER dia_control, 0) AS tiempo_suma,
+                           MIN(CASE WHEN tiempo_total_ejecucion_ms > 0
+                                    THEN tiempo_total_ejecucion_ms END) OVER dia_control AS tiempo_min,
+                           MAX(CASE WHEN tiempo_total_ejecucion_ms > 0
+                                    THEN tiempo_total_ejecucion_ms END) OVER dia_control AS tiempo_max,
+                           SUM(tiempo_total_ejecucion_ms > 0) OVER dia_control AS con_tiempo,
+                           COALESCE(SUM(total_filas_disparadas) OVER dia_control, 0) AS filas,
+                           fecha_ejecucion AS ultima, estado, control_nombre,
+                           ROW_NUMBER() OVER (PARTITION BY control_id, substr(fecha_ejecucion, 1, 10)
+                                              ORDER BY fecha_ejecucion DESC, id DESC) AS n
+                    FROM resultados_ejecucion{where}
+                    WINDOW dia_control AS (PARTITION BY control_id, substr(fecha_ejecucion, 1, 10))
+                )
+                WHERE n = 1
+            """, valores)
+            return cursor.rowcount
+    
+    def obtener_resumen_diario(
+        self,
+        fecha_desde: date,
+        fecha_hasta: date,
+        control_id: Optional[int] = None
+    ) -> List[dict]:
+        """Obtiene las métricas diarias por control (sin leer las ejecuciones)"""
+        sql = "SELECT * FROM resumen_diario_ejecuciones WHERE dia BETWEEN ? AND ?"
+        valores = [fecha_desde.isoformat(), fecha_hasta.isoformat()]
+        if control_id is not None:
+            sql += " AND control_id = ?"
+            valores.append(control_id)
+        sql += " ORDER BY dia, control_id"
+        
+        with conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(sql, valores).fetchall()
+        
+        return [
+            {
+                'control_id': row['control_id'],
+                'dia': date.fromisoformat(row['dia']),
+                'control_nombre': row['control_nombre'] or "",
+                'total_ejecuciones': row['total_ejecuciones'],
+                'por_estado': {
+                    EstadoEjecucion.EXITOSO.value: row['exitosas'],
+                    EstadoEjecucion.ERROR.value: row['con_error'],
+                    EstadoEjecucion.CONTROL_DISPARADO.value: row['disparadas'],
+                    EstadoEjecucion.SIN_DATOS.value: row['sin_datos']
+                },
+                'tiempo_suma_ms': row['tiempo_suma_ms'],
+                'tiempo_min_ms': row['tiempo_min_ms'],
+                'tiempo_max_ms': row['tiempo_max_ms'],
+                'ejecuciones_con_tiempo': row['ejecuciones_con_tiempo'],
+                'total_filas_disparadas': row['total_filas_disparadas'],
+                'ultima_ejecucion': datetime.fromisoformat(row['ultima_ejecucion']) if row['ultima_ejecucion'] else None,
+                'ultimo_estado': row['ultimo_estado']
+            }
+            for row in rows
+        ]
+    
+    # Nivel de zlib: la mayor parte de la ganancia con poco costo de CPU
+    NIVEL_COMPRESION = 6
+    
+    # El contenido se guarda una sola vez; las referencias las suman los triggers
+    _SQL_GUARDAR_CONTENIDO = """INSERT INTO contenidos_datos (hash, compresion, tamano, contenido)
+                                VALUES (?, ?, ?, ?)
+                                ON CONFLICT(hash) DO NOTHING"""
+    
+    _SQL_GUARDAR_DATOS = """INSERT INTO resultados_ejecucion_datos (resultado_id, posicion, hash)
+                             VALUES (?, ?, ?)
+                             ON CONFLICT(resultado_id, posicion) DO UPDATE SET hash = excluded.hash"""
+    
+    def _guardar_datos(self, conn, resultado_id: int, consultas: List[Optional[ResultadoConsulta]]):
+        """Guarda las filas de cada consulta con datos en la tabla de datos"""
+        self._guardar_filas_datos(conn, self._filas_datos(resultado_id, consultas))
+    
+    def _guardar_filas_datos(self, conn, filas: List[tuple]):
+        """Guarda los contenidos nuevos y la referencia de cada consulta a su contenido"""
+        conn.executemany(self._SQL_GUARDAR_CONTENIDO, [contenido for _, _, contenido in filas])
+        conn.executemany(
+            self._SQL_GUARDAR_DATOS,
+            [(resultado_id, posicion, contenido[0]) for resultado_id, posicion, contenido in filas]
+        )
+    
+    def _filas_datos(self, resultado_id: int, consultas: List[Optional[ResultadoConsulta]]) -> List[tuple]:
+        """(resultado_id, posicion, contenido comprimido) de cada consulta con datos"""
+        return [
+            (resultado_id, posicion, self._comprimir_datos(consulta.datos))
+            for posicion, consulta in enumerate(consultas)
+            if consulta is not None and consulta.datos
+        ]
     
     def eliminar(self, id: int) -> bool:
         """Elimina un resultado por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM resultados_ejecucion WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
     def obtener_ultimos_por_control(self, control_id: int, limite: int = 10) -> List[ResultadoEjecucion]:
         """Obtiene los últimos N resultados de un control"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 """SELECT * FROM resultados_ejecucion 
@@ -193,11 +546,12 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
             total_filas_disparo=row['total_filas_disparo'] or 0,
             total_filas_disparadas=row['total_filas_disparadas'] or 0,
             conexion_id=row['conexion_id'] or 0,
-            conexion_nombre=row['conexion_nombre'] or ""
+            conexion_nombre=row['conexion_nombre'] or "",
+            datos_cargados=False
         )
     
     def _consulta_to_dict(self, consulta: Optional[ResultadoConsulta]) -> Optional[dict]:
-        """Convierte ResultadoConsulta a diccionario para JSON"""
+        """Convierte ResultadoConsulta a diccionario para JSON (sin las filas)"""
         if not consulta:
             return None
         
@@ -206,11 +560,72 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
             'consulta_nombre': consulta.consulta_nombre,
             'sql_ejecutado': consulta.sql_ejecutado,
             'filas_afectadas': consulta.filas_afectadas,
-            'datos': consulta.datos,
             'tiempo_ejecucion_ms': consulta.tiempo_ejecucion_ms,
-            'error': consulta.error
+            'error': consulta.error,
+            'truncado': consulta.truncado
         }
     
+    def _partes_json(self, datos) -> Iterator[str]:
+        """
+        Serializa las filas de una consulta a JSON escribiéndolas de a una
+        
+        Las filas se guardan en formato compacto ("columnas" una vez y "filas"
+        como arreglos de valores). Los datos pueden ser un BufferFilas con parte
+        de las filas en disco: se recorren sin armarlas todas en memoria.
+        """
+        if not isinstance(datos, BufferFilas):
+            datos = BufferFilas.desde_diccionarios(datos or [])
+        
+        yield '{"columnas": '
+        yield json.dumps(datos.columnas)
+        yield ', "filas": ['
+        for i, fila in enumerate(datos.filas()):
+            if i:
+                yield ", "
+            yield json.dumps(fila, default=str)
+        yield "]}"
+    
+    def _comprimir_datos(self, datos) -> Tuple[str, str, int, bytes]:
+        """
+        Serializa, calcula el hash y comprime las filas de una consulta en una pasada
+        
+        Returns:
+            (hash SHA-256 del JSON, compresión, tamaño sin comprimir, contenido)
+        """
+        if isinstance(datos, str):
+            partes = [datos]
+        else:
+            partes = self._partes_json(datos)
+        
+        resumen = hashlib.sha256()
+        compresor = zlib.compressobj(self.NIVEL_COMPRESION)
+        comprimido = []
+        tamano = 0
+        for parte in partes:
+            contenido = parte.encode('utf-8')
+            resumen.update(contenido)
+            tamano += len(contenido)
+            comprimido.append(compresor.compress(contenido))
+        comprimido.append(compresor.flush())
+        return resumen.hexdigest(), 'zlib', tamano, b"".join(comprimido)
+    
+    def _descomprimir(self, compresion: str, contenido: bytes) -> str:
+        """JSON de las filas de un contenido guardado"""
+        if compresion == 'zlib':
+            return zlib.decompress(contenido).decode('utf-8')
+        raise ValueError(f"Compresión no soportada: {compresion}")
+    
+    def _datos_desde_dict(self, data: dict):
+        """Filas de un resultado serializado (formato compacto o lista de diccionarios)"""
+        if 'filas' not in data:
+            return data.get('datos', [])
+        
+        filas = data['filas']
+        datos = BufferFilas(data.get('columnas', []), filas_en_memoria=len(filas))
+        datos.agregar(filas)
+        datos.truncado = data.get('truncado', False)
+        return datos
+    
     def _dict_to_consulta(self, data: dict) -> ResultadoConsulta:
         """Convierte diccionario a ResultadoConsulta"""
         return ResultadoConsulta(
@@ -218,7 +633,8 @@ class SQLiteResultadoEjecucionRepository(ResultadoEjecucionRepository):
             consulta_nombre=data.get('consulta_nombre', ''),
             sql_ejecutado=data.get('sql_ejecutado', ''),
             filas_afectadas=data.get('filas_afectadas', 0),
-            datos=data.get('datos', []),
+            datos=self._datos_desde_dict(data),
             tiempo_ejecucion_ms=data.get('tiempo_ejecucion_ms', 0.0),
-            error=data.get('error')
+            error=data.get('error'),
+            truncado=data.get('truncado', False)
         )
\ No newline at end of file
@@ -9,6 +9,8 @@ from typing import List, Optional
 from datetime import datetime
 from src.domain.entities.usuario import Usuario
 from src.domain.repositories.usuario_repository import UsuarioRepository
+from src.infrastructure.database.conexion_sqlite import conectar
+from src.infrastructure.database.migraciones import asegurar_esquema
 
 
 class SQLiteUsuarioRepository(UsuarioRepository):
@@ -16,24 +18,11 @@ class SQLiteUsuarioRepository(UsuarioRepository):
     
     def __init__(self, db_path: str = "usuarios.db"):
         self.db_path = db_path
-        self._crear_tabla()
-    
-    def _crear_tabla(self):
-        """Crea la tabla de usuarios si no existe"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    fecha_creacion TIMESTAMP,
-                    activo BOOLEAN
-                )
-            """)
+        asegurar_esquema(db_path)
     
     def obtener_por_id(self, id: int) -> Optional[Usuario]:
         """Obtiene un usuario por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM usuarios WHERE id = ?", (id,)
@@ -52,7 +41,7 @@ class SQLiteUsuarioRepository(UsuarioRepository):
     
     def obtener_todos(self) -> List[Usuario]:
         """Obtiene todos los usuarios"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM usuarios")
             rows = cursor.fetchall()
@@ -70,7 +59,7 @@ class SQLiteUsuarioRepository(UsuarioRepository):
     
     def guardar(self, usuario: Usuario) -> Usuario:
         """Guarda un usuario (crear o actualizar)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             if usuario.id is None:
                 # Crear nuevo usuario
                 cursor = conn.execute(
@@ -93,13 +82,13 @@ class SQLiteUsuarioRepository(UsuarioRepository):
     
     def eliminar(self, id: int) -> bool:
         """Elimina un usuario por su ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             cursor = conn.execute("DELETE FROM usuarios WHERE id = ?", (id,))
             return cursor.rowcount > 0
     
     def obtener_por_email(self, email: str) -> Optional[Usuario]:
         """Obtiene un usuario por su email"""
-        with sqlite3.connect(self.db_path) as conn:
+        with conectar(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM usuarios WHERE email = ?", (email,)
@@ -0,0 +1,117 @@
+"""
+Servicio de distribución de archivos generados
+
+Entrega un archivo ya generado (por ejemplo el Excel de un control) en las
+carpetas de varios referentes. Cada entrega se escribe primero con un
+nombre temporal en la carpeta de destino y después se renombra, así quien
+vigila la carpeta nunca ve un archivo a medio copiar. Se intenta un enlace
+duro (sin copiar bytes) y, si la carpeta está en otro sistema de archivos
+(unidad de red), se copia. Las carpetas se atienden en paralelo y cada una
+reintenta por su cuenta.
+"""
+import logging
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass
+class EntregaArchivo:
+    """Resultado de entregar un archivo en una carpeta"""
+
+    carpeta: str
+    ruta: Optional[str] = None
+    intentos: int = 0
+    error: Optional[str] = None
+
+    @property
+    def exitosa(self) -> bool:
+        return self.error is None
+
+
+class DistribucionArchivosService:
+    """Entrega atómica de un archivo en varias carpetas, en paralelo"""
+
+    def __init__(self, max_hilos: int = 8, reintentos: int = 3, pausa_reintento: float = 0.5,
+                 usar_enlaces: bool = True):
+        """
+        Args:
+            max_hilos: Máximo de carpetas que se atienden a la vez
+            reintentos: Intentos por carpeta antes de dar la entrega por fallida
+            pausa_reintento: Segundos de espera antes del segundo intento (se duplica en cada uno)
+            usar_enlaces: Intentar un enlace duro antes de copiar
+        """
+        self.max_hilos = max(1, max_hilos)
+        self.reintentos = max(1, reintentos)
+        self.pausa_reintento = pausa_reintento
+        self.usar_enlaces = usar_enlaces
+        self.logger = logging.getLogger(__name__)
+
+    def distribuir(self, archivo: str, carpetas: List[str]) -> Dict[str, EntregaArchivo]:
+        """
+        Entrega el archivo en cada carpeta con su mismo nombre
+
+        Returns:
+            Dict[str, EntregaArchivo]: Resultado de la entrega por carpeta
+        """
+        # Una carpeta compartida por varios referentes se escribe una sola vez
+        carpetas = list(dict.fromkeys(carpetas))
+        if not carpetas:
+            return {}
+
+        hilos = min(self.max_hilos, len(carpetas))
+        if hilos == 1:
+            entregas = [self._entregar(archivo, carpetas[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="DistribucionArchivos") as executor:
+                entregas = list(executor.map(lambda carpeta: self._entregar(archivo, carpeta), carpetas))
+        return {entrega.carpeta: entrega for entrega in entregas}
+
+    def _entregar(self, archivo: str, carpeta: str) -> EntregaArchivo:
+        """Entrega el archivo en una carpeta, reintentando ante errores"""
+        entrega = EntregaArchivo(carpeta=carpeta)
+        destino = os.path.join(carpeta, os.path.basename(archivo))
+
+        for intento in range(1, self.reintentos + 1):
+            entrega.intentos = intento
+            try:
+                self._entregar_atomico(archivo, destino)
+                entrega.ruta = destino
+                entrega.error = None
+                return entrega
+            except OSError as e:
+                entrega.error = str(e)
+                if intento < self.reintentos:
+                    self.logger.warning(f"⚠️ Error entregando {destino} (intento {intento}): {e}")
+                    time.sleep(self.pausa_reintento * 2 ** (intento - 1))
+
+        self.logger.error(f"❌ No se pudo entregar {destino} tras {entrega.intentos} intentos: {entrega.error}")
+        return entrega
+
+    def _entregar_atomico(self, archivo: str, destino: str) -> None:
+        """Escribe el archivo con un nombre temporal en la carpeta de destino y lo renombra"""
+        carpeta = os.path.dirname(destino)
+        os.makedirs(carpeta, exist_ok=True)
+        temporal = os.path.join(carpeta, f".{os.path.basename(destino)}.{uuid.uuid4().hex}.tmp")
+        try:
+            if not self._enlazar(archivo, temporal):
+                shutil.copyfile(archivo, temporal)
+            os.replace(temporal, destino)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def _enlazar(self, archivo: str, temporal: str) -> bool:
+        """Crea un enlace duro si se puede (mismo sistema de archivos)"""
+        if not self.usar_enlaces:
+            return False
+        try:
+            os.link(archivo, temporal)
+            return True
+        except (OSError, AttributeError, NotImplementedError):
+            return False
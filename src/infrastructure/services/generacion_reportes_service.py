@@ -0,0 +1,345 @@
+"""
+Servicio de generación de reportes en segundo plano
+
+Armar el reporte de un control (Excel con openpyxl, o CSV / JSON Lines)
+es trabajo de CPU que no debe demorar la ejecución del control. Este
+servicio recibe trabajos de reporte en un formato, los genera en un pool
+de procesos (varios reportes usan varios núcleos) y, al terminar cada uno,
+entrega los archivos en las carpetas de los referentes y crea sus archivos
+de notificación.
+
+La cantidad de trabajos sin terminar está acotada: si se alcanza, encolar
+espera (presión hacia atrás) en lugar de acumular resultados en memoria.
+Cada trabajo tiene un estado consultable mientras se procesa.
+
+Con en_segundo_plano=False el reporte se genera en el hilo que lo pide,
+con el mismo resultado (scripts, pruebas).
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from src.domain.entities.control_referente import FormatoArchivo
+from src.domain.entities.referente import Referente
+from src.domain.services.cola_reportes_service import ColaReportesService
+from src.domain.services.reporte_generator_service import ReporteGeneratorService
+from src.infrastructure.services.distribucion_archivos_service import DistribucionArchivosService, EntregaArchivo
+from src.infrastructure.services.notification_file_service import NotificationFileService
+
+
+class EstadoTrabajoReporte(Enum):
+    """Estados de un trabajo de reporte"""
+    PENDIENTE = "pendiente"
+    EN_PROCESO = "en_proceso"
+    COMPLETADO = "completado"
+    ERROR = "error"
+
+
+@dataclass
+class TrabajoReporte:
+    """Reporte de una ejecución de control, con su estado"""
+
+    id: str
+    control_nombre: str
+    referentes: List[Referente]
+    filas_procesadas: int = 0
+    tiempo_ejecucion_ms: float = 0.0
+    estado: EstadoTrabajoReporte = EstadoTrabajoReporte.PENDIENTE
+    fecha_encolado: datetime = field(default_factory=datetime.now)
+    fecha_fin: Optional[datetime] = None
+    formato: FormatoArchivo = FormatoArchivo.XLSX
+    archivos: List[str] = field(default_factory=list)  # Nombres de los archivos generados
+    entregas: Dict[str, EntregaArchivo] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in (EstadoTrabajoReporte.COMPLETADO, EstadoTrabajoReporte.ERROR)
+
+    @property
+    def archivo(self) -> Optional[str]:
+        """Primer archivo generado (el único, salvo CSV de varias consultas)"""
+        return self.archivos[0] if self.archivos else None
+
+
+def _generar_reporte(control_nombre: str, consultas_resultados: List[Dict[str, Any]],
+                     carpeta: str, fecha_ejecucion: Optional[datetime], formato: FormatoArchivo) -> List[str]:
+    """Genera el reporte en un proceso del pool (función de módulo para poder serializarla)"""
+    return ReporteGeneratorService().generar_archivos_control(
+        control_nombre=control_nombre,
+        consultas_resultados=consultas_resultados,
+        referente_path=carpeta,
+        fecha_ejecucion=fecha_ejecucion,
+        formato=formato
+    )
+
+
+class GeneracionReportesService(ColaReportesService):
+    """Genera los reportes de los controles en un pool de procesos y los entrega"""
+
+    def __init__(
+        self,
+        en_segundo_plano: bool = True,
+        max_procesos: Optional[int] = None,
+        capacidad: int = 16,
+        max_historial: int = 200,
+        distribucion_archivos: Optional[DistribucionArchivosService] = None,
+        notification_file_service: Optional[NotificationFileService] = None
+    ):
+        """
+        Args:
+            en_segundo_plano: Generar en el pool de procesos (False: en el hilo que encola)
+            max_procesos: Procesos del pool (por defecto, uno por núcleo)
+            capacidad: Máximo de trabajos sin terminar antes de que encolar espere
+            max_historial: Trabajos terminados que se conservan para consultar su estado
+            distribucion_archivos: Entrega en las carpetas de los referentes
+            notification_file_service: Archivos de notificación de cada referente
+        """
+        self.en_segundo_plano = en_segundo_plano
+        self.max_procesos = max_procesos
+        self.max_historial = max(0, max_historial)
+        self.logger = logging.getLogger(__name__)
+        self._reporte_generator = ReporteGeneratorService()
+        self._distribucion_archivos = distribucion_archivos or DistribucionArchivosService()
+        self._notification_file_service = notification_file_service or NotificationFileService()
+
+        self._cupos = threading.BoundedSemaphore(max(1, capacidad))
+        self._lock = threading.Condition()
+        self._trabajos: "OrderedDict[str, TrabajoReporte]" = OrderedDict()
+        self._futuros: Dict[str, Future] = {}
+        self._pendientes = 0
+        self._metricas = {'encolados': 0, 'completados': 0, 'errores': 0}
+        self._procesos: Optional[ProcessPoolExecutor] = None
+        self._entregas: Optional[ThreadPoolExecutor] = None
+        self._cerrado = False
+        self._pools_cerrados = False  # Tras cerrar los pools no se vuelven a crear
+
+    def encolar(
+        self,
+        control_nombre: str,
+        consultas_resultados: List[Dict[str, Any]],
+        referentes: List[Referente],
+        fecha_ejecucion: Optional[datetime] = None,
+        tiempo_ejecucion_ms: float = 0.0,
+        timeout: Optional[float] = None,
+        formato: FormatoArchivo = FormatoArchivo.XLSX
+    ) -> TrabajoReporte:
+        """
+        Encola el reporte de una ejecución (espera si hay demasiados trabajos sin terminar)
+
+        Todos los referentes del trabajo reciben el reporte en el mismo formato.
+
+        Los datos de las consultas no deben modificarse hasta que el trabajo termine.
+
+        Raises:
+            queue.Full: Si no se liberó lugar dentro de timeout
+        """
+        if self._cerrado:
+            raise RuntimeError("El servicio de reportes está cerrado")
+        if not self._cupos.acquire(timeout=timeout):
+            raise queue.Full("Demasiados reportes pendientes")
+
+        trabajo = TrabajoReporte(
+            id=uuid.uuid4().hex,
+            control_nombre=control_nombre,
+            referentes=list(referentes),
+            filas_procesadas=sum(len(cr.get('datos', [])) for cr in consultas_resultados),
+            tiempo_ejecucion_ms=tiempo_ejecucion_ms,
+            formato=formato
+        )
+        with self._lock:
+            self._trabajos[trabajo.id] = trabajo
+            self._pendientes += 1
+            self._metricas['encolados'] += 1
+
+        # El reporte se genera en una carpeta temporal y después se entrega a cada referente
+        carpeta = tempfile.mkdtemp(prefix="reporte_control_")
+
+        if not self.en_segundo_plano:
+            trabajo.estado = EstadoTrabajoReporte.EN_PROCESO
+            try:
+                archivos = self._reporte_generator.generar_archivos_control(
+                    control_nombre=control_nombre,
+                    consultas_resultados=consultas_resultados,
+                    referente_path=carpeta,
+                    fecha_ejecucion=fecha_ejecucion,
+                    formato=formato
+                )
+            except Exception as e:
+                self._terminar(trabajo, carpeta, error=e)
+            else:
+                self._terminar(trabajo, carpeta, archivos=archivos)
+            return trabajo
+
+        try:
+            # El pool conserva los argumentos hasta terminar: los BufferFilas siguen vivos
+            # mientras el proceso lee sus filas volcadas a disco
+            futuro = self._pool_procesos().submit(
+                _generar_reporte, control_nombre, consultas_resultados, carpeta, fecha_ejecucion, formato
+            )
+        except Exception as e:
+            self._terminar(trabajo, carpeta, error=e)
+            return trabajo
+        with self._lock:
+            self._futuros[trabajo.id] = futuro
+        # La entrega se hace fuera del hilo de resultados del pool
+        futuro.add_done_callback(lambda f: self._encolar_entrega(trabajo, carpeta, f))
+        return trabajo
+
+    def obtener_trabajo(self, trabajo_id: str) -> Optional[TrabajoReporte]:
+        """Trabajo por ID (los terminados se conservan hasta max_historial)"""
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            self._actualizar_estado(trabajo)
+            return trabajo
+
+    def obtener_trabajos(self) -> List[TrabajoReporte]:
+        """Trabajos pendientes y terminados recientes, del más antiguo al más nuevo"""
+        with self._lock:
+            trabajos = list(self._trabajos.values())
+            for trabajo in trabajos:
+                self._actualizar_estado(trabajo)
+            return trabajos
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que terminen los trabajos encolados; retorna False si se agotó el tiempo"""
+        with self._lock:
+            return self._lock.wait_for(lambda: self._pendientes == 0, timeout)
+
+    def cerrar(self, esperar: bool = True) -> None:
+        """Deja de aceptar trabajos y libera los procesos (por defecto, tras terminar los pendientes)"""
+        self._cerrado = True
+        if esperar:
+            self.esperar()
+        with self._lock:
+            self._pools_cerrados = True
+        if self._procesos is not None:
+            self._procesos.shutdown(wait=esperar, cancel_futures=not esperar)
+            self._procesos = None
+        if self._entregas is not None:
+            self._entregas.shutdown(wait=esperar)
+            self._entregas = None
+
+    def obtener_metricas(self) -> Dict[str, int]:
+        """Trabajos encolados, completados, con error y pendientes"""
+        with self._lock:
+            metricas = dict(self._metricas)
+            metricas['pendientes'] = self._pendientes
+        return metricas
+
+    def _pool_procesos(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pools_cerrados:
+                raise RuntimeError("El servicio de reportes está cerrado")
+            if self._procesos is None:
+                # spawn: el motor tiene hilos y conexiones abiertas que no deben heredarse con fork
+                self._procesos = ProcessPoolExecutor(
+                    max_workers=self.max_procesos, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._procesos
+
+    def _pool_entregas(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pools_cerrados:
+                raise RuntimeError("El servicio de reportes está cerrado")
+            if self._entregas is None:
+                self._entregas = ThreadPoolExecutor(max_workers=2, thread_name_prefix="EntregaReportes")
+            return self._entregas
+
+    def _actualizar_estado(self, trabajo: Optional[TrabajoReporte]) -> None:
+        """Marca en proceso los trabajos que el pool ya tomó"""
+        if trabajo is None or trabajo.estado != EstadoTrabajoReporte.PENDIENTE:
+            return
+        futuro = self._futuros.get(trabajo.id)
+        if futuro is not None and futuro.running():
+            trabajo.estado = EstadoTrabajoReporte.EN_PROCESO
+
+    def _encolar_entrega(self, trabajo: TrabajoReporte, carpeta: str, futuro: Future) -> None:
+        """Pasa un trabajo generado al hilo de entregas (callback del futuro del pool)"""
+        try:
+            self._pool_entregas().submit(self._completar, trabajo, carpeta, futuro)
+        except Exception as e:
+            # Servicio cerrado sin esperar o intérprete terminando: el trabajo
+            # termina aquí con error para liberar su cupo y su carpeta temporal
+            self._terminar(trabajo, carpeta, error=e)
+
+    def _completar(self, trabajo: TrabajoReporte, carpeta: str, futuro: Future) -> None:
+        """Termina un trabajo generado en el pool (se ejecuta en el hilo de entregas)"""
+        try:
+            archivos = futuro.result()
+        except BaseException as e:
+            self._terminar(trabajo, carpeta, error=e)
+        else:
+            self._terminar(trabajo, carpeta, archivos=archivos)
+
+    def _terminar(self, trabajo: TrabajoReporte, carpeta: str, archivos: Optional[List[str]] = None,
+                  error: Optional[BaseException] = None) -> None:
+        """Entrega los archivos generados, crea las notificaciones y libera el lugar del trabajo"""
+        try:
+            if error is None:
+                trabajo.archivos = [os.path.basename(archivo) for archivo in archivos]
+                self._entregar(trabajo, archivos)
+        except Exception as e:
+            error = e
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+        if error is not None:
+            trabajo.error = str(error)
+            self.logger.error(f"❌ No se pudo generar el reporte de {trabajo.control_nombre}: {error}")
+        trabajo.estado = EstadoTrabajoReporte.ERROR if trabajo.error else EstadoTrabajoReporte.COMPLETADO
+        trabajo.fecha_fin = datetime.now()
+
+        with self._lock:
+            self._futuros.pop(trabajo.id, None)
+            self._pendientes -= 1
+            self._metricas['completados' if trabajo.estado == EstadoTrabajoReporte.COMPLETADO else 'errores'] += 1
+            # Historial acotado: se descartan los terminados más antiguos
+            terminados = [t.id for t in self._trabajos.values() if t.terminado]
+            for trabajo_id in terminados[:max(0, len(terminados) - self.max_historial)]:
+                del self._trabajos[trabajo_id]
+            self._lock.notify_all()
+        self._cupos.release()
+
+    def _entregar(self, trabajo: TrabajoReporte, archivos: List[str]) -> None:
+        """Entrega los archivos en la carpeta de cada referente y crea su notificación"""
+        carpetas = [referente.path_archivos for referente in trabajo.referentes]
+        for archivo in archivos:
+            for carpeta, entrega in self._distribucion_archivos.distribuir(archivo, carpetas).items():
+                # Por carpeta queda la primera entrega fallida o, si no hubo, la última
+                anterior = trabajo.entregas.get(carpeta)
+                if anterior is None or anterior.exitosa:
+                    trabajo.entregas[carpeta] = entrega
+        fallidas = []
+        for referente in trabajo.referentes:
+            entrega = trabajo.entregas[referente.path_archivos]
+            if not entrega.exitosa:
+                fallidas.append(referente.nombre)
+                self.logger.error(f"❌ No se pudo entregar el reporte a {referente.nombre}: {entrega.error}")
+                continue
+
+            # La notificación se crea con el archivo ya completo en la carpeta
+            archivo_notificacion = self._notification_file_service.crear_archivo_notificacion_control(
+                carpeta_destino=referente.path_archivos,
+                control_nombre=trabajo.control_nombre,
+                filas_procesadas=trabajo.filas_procesadas,
+                tiempo_ejecucion_ms=trabajo.tiempo_ejecucion_ms,
+                archivo_excel=trabajo.archivo if trabajo.formato == FormatoArchivo.XLSX else None,
+                archivos_datos=None if trabajo.formato == FormatoArchivo.XLSX else trabajo.archivos,
+                mensaje_adicional=f"Control ejecutado para referente: {referente.nombre}"
+            )
+            if not archivo_notificacion:
+                self.logger.warning(f"⚠️ No se pudo crear la notificación para {referente.nombre}")
+        if fallidas:
+            trabajo.error = f"No se pudo entregar a: {', '.join(fallidas)}"
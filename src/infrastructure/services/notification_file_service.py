@@ -7,7 +7,7 @@ import json
 import os
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
 
@@ -25,7 +25,8 @@ class NotificationFileService:
         filas_procesadas: int,
         tiempo_ejecucion_ms: float,
         archivo_excel: str = None,
-        mensaje_adicional: str = None
+        mensaje_adicional: str = None,
+        archivos_datos: List[str] = None
     ) -> str:
         """
         Crea un archivo de notificación cuando un control se dispara
@@ -37,6 +38,7 @@ class NotificationFileService:
             tiempo_ejecucion_ms: Tiempo de ejecución en milisegundos
             archivo_excel: Nombre del archivo Excel generado (opcional)
             mensaje_adicional: Mensaje adicional (opcional)
+            archivos_datos: Nombres de los archivos CSV / JSON Lines generados (opcional)
             
         Returns:
             str: Ruta del archivo de notificación creado
@@ -68,6 +70,8 @@ class NotificationFileService:
                     "usuario_origen": os.getenv('USERNAME', 'Unknown')
                 }
             }
+            if archivos_datos:
+                datos_notificacion["archivos"]["datos"] = list(archivos_datos)
             
             # Crear directorio si no existe
             os.makedirs(carpeta_destino, exist_ok=True)
@@ -277,16 +281,18 @@ class NotificationFileService:
             if not os.path.exists(carpeta_origen):
                 return []
             
+            # scandir trae el tipo (y en Windows la fecha) de cada entrada sin una llamada
+            # por archivo; solo se consulta la fecha de los archivos de notificación
             archivos = []
-            for archivo in os.listdir(carpeta_origen):
-                if archivo.startswith('notif_') and archivo.endswith('.json'):
-                    ruta_completa = os.path.join(carpeta_origen, archivo)
-                    archivos.append(ruta_completa)
+            with os.scandir(carpeta_origen) as entradas:
+                for entrada in entradas:
+                    if entrada.name.startswith('notif_') and entrada.name.endswith('.json') and entrada.is_file():
+                        archivos.append((entrada.stat().st_mtime, entrada.path))
             
             # Ordenar por fecha de modificación (más antiguos primero)
-            archivos.sort(key=lambda x: os.path.getmtime(x))
+            archivos.sort()
             
-            return archivos
+            return [ruta for _, ruta in archivos]
             
         except Exception as e:
             self.logger.error(f"Error al listar archivos de notificación: {e}")
@@ -0,0 +1,219 @@
+"""
+Servicio de retención del historial de ejecuciones
+
+Depura de forma no interactiva las ejecuciones más antiguas que la política
+de retención (por control, por estado o por defecto) y recupera el espacio
+libre del archivo. Borra por lotes, cada uno en su propia transacción corta,
+para que el motor y la GUI puedan escribir entre lote y lote. Las filas de
+datos de cada resultado (y el contenido que ya nadie referencia) se eliminan
+por triggers y el resumen diario (resumen_diario_ejecuciones) conserva las métricas de los
+días depurados.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from src.domain.entities.politica_retencion import PoliticaRetencion
+from src.infrastructure.database.conexion_sqlite import conectar
+
+# PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class ResultadoDepuracion:
+    """Resumen de una pasada de depuración del historial"""
+
+    ejecuciones_eliminadas: int = 0
+    lotes: int = 0
+    bytes_recuperados: int = 0
+    segundos: float = 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.ejecuciones_eliminadas} ejecuciones eliminadas en {self.lotes} lotes, "
+                f"{self.bytes_recuperados / (1024 * 1024):.1f} MB recuperados ({self.segundos:.1f}s)")
+
+
+class RetencionHistorialService:
+    """Aplica la política de retención sobre resultados_ejecucion"""
+
+    def __init__(
+        self,
+        db_path: str,
+        politica: Optional[PoliticaRetencion] = None,
+        tamano_lote: int = 500,
+        pausa_entre_lotes: float = 0.05,
+        paginas_por_paso: int = 1000,
+        vacuum_completo_si_necesario: bool = False
+    ):
+        """
+        Args:
+            db_path: Base de datos del sistema
+            politica: Días de retención (por defecto, 90 días para todo)
+            tamano_lote: Ejecuciones eliminadas por transacción
+            pausa_entre_lotes: Segundos de espera entre lotes para ceder la base a otros escritores
+            paginas_por_paso: Páginas liberadas por cada PRAGMA incremental_vacuum
+            vacuum_completo_si_necesario: Si la base no tiene auto_vacuum incremental,
+                ejecutar un VACUUM (una única vez) para activarlo. Bloquea la base
+                mientras reescribe el archivo: solo para uso sin el motor en marcha
+        """
+        self.db_path = db_path
+        self.politica = politica or PoliticaRetencion()
+        self.tamano_lote = max(1, tamano_lote)
+        self.pausa_entre_lotes = pausa_entre_lotes
+        self.paginas_por_paso = max(1, paginas_por_paso)
+        self.vacuum_completo_si_necesario = vacuum_completo_si_necesario
+        self.logger = logging.getLogger(__name__)
+
+    def depurar(
+        self,
+        ahora: Optional[datetime] = None,
+        detener: Optional[threading.Event] = None
+    ) -> ResultadoDepuracion:
+        """
+        Elimina las ejecuciones vencidas y recupera el espacio liberado
+
+        Args:
+            ahora: Fecha de referencia para calcular los vencimientos
+            detener: Evento que interrumpe la depuración entre lotes
+        """
+        inicio = time.monotonic()
+        resultado = ResultadoDepuracion()
+        if not self._existe_historial():
+            return resultado
+
+        ahora = ahora or datetime.now()
+        for condicion, valores, dias in self._grupos():
+            limite = PoliticaRetencion.limite(dias, ahora).isoformat()
+            while not (detener and detener.is_set()):
+                eliminadas = self._eliminar_lote(condicion, valores, limite)
+                if eliminadas:
+                    resultado.lotes += 1
+                    resultado.ejecuciones_eliminadas += eliminadas
+                if eliminadas < self.tamano_lote:
+                    break
+                if self.pausa_entre_lotes:
+                    time.sleep(self.pausa_entre_lotes)
+
+        if resultado.ejecuciones_eliminadas:
+            resultado.bytes_recuperados = self.recuperar_espacio(detener)
+        resultado.segundos = time.monotonic() - inicio
+        return resultado
+
+    def recuperar_espacio(self, detener: Optional[threading.Event] = None) -> int:
+        """
+        Devuelve al sistema las páginas libres del archivo; retorna los bytes recuperados
+
+        Con auto_vacuum incremental libera las páginas de a pasos cortos. Si la
+        base se creó sin él, las páginas quedan libres para reutilizar salvo que
+        se haya pedido la conversión (vacuum_completo_si_necesario).
+        """
+        tamano_pagina, paginas_antes, libres, modo = self._estado_paginas()
+        if not libres:
+            return 0
+
+        if modo != AUTO_VACUUM_INCREMENTAL:
+            if not self.vacuum_completo_si_necesario:
+                self.logger.info("ℹ️ La base no tiene auto_vacuum incremental: para activarlo ejecute, "
+                                 "con el motor detenido, 'python limpiar_historial.py --activar-auto-vacuum'")
+                return 0
+            return self.activar_auto_vacuum()
+
+        while libres and not (detener and detener.is_set()):
+            with conectar(self.db_path) as conn:
+                # Cada fila del resultado libera una página: hay que recorrerlo completo
+                conn.execute(f"PRAGMA incremental_vacuum({self.paginas_por_paso})").fetchall()
+            anteriores = libres
+            libres = self._estado_paginas()[2]
+            if libres >= anteriores:
+                break
+
+        with conectar(self.db_path) as conn:
+            # Pasivo: no espera a los lectores, el archivo se achica en el próximo checkpoint
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+        paginas_despues = self._estado_paginas()[1]
+        return max(0, paginas_antes - paginas_despues) * tamano_pagina
+
+    def activar_auto_vacuum(self) -> int:
+        """
+        Convierte la base a auto_vacuum incremental; retorna los bytes recuperados
+
+        Ejecuta un VACUUM completo, que reescribe el archivo y bloquea la base
+        mientras dura: es un paso de mantenimiento, a correr una única vez con
+        el motor y la GUI cerrados.
+        """
+        tamano_pagina, paginas_antes, _, modo = self._estado_paginas()
+        if modo == AUTO_VACUUM_INCREMENTAL:
+            return 0
+
+        self.logger.info("🔧 Activando auto_vacuum incremental (VACUUM completo, única vez)")
+        with conectar(self.db_path) as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        paginas_despues = self._estado_paginas()[1]
+        return max(0, paginas_antes - paginas_despues) * tamano_pagina
+
+    def _grupos(self) -> List[Tuple[str, list, int]]:
+        """Condiciones de depuración (condición SQL, valores, días) según la política"""
+        politica = self.politica
+        grupos = []
+
+        for control_id, dias in politica.dias_por_control.items():
+            if dias is not None:
+                grupos.append(("control_id = ?", [control_id], dias))
+
+        excluir = []
+        valores_excluir = []
+        if politica.dias_por_control:
+            excluir.append(f"control_id NOT IN ({','.join('?' * len(politica.dias_por_control))})")
+            valores_excluir.extend(politica.dias_por_control)
+
+        for estado, dias in politica.dias_por_estado.items():
+            if dias is not None:
+                grupos.append((" AND ".join(["estado = ?", *excluir]), [estado, *valores_excluir], dias))
+
+        if politica.dias_por_defecto is not None:
+            condiciones = ["1 = 1", *excluir]
+            valores = list(valores_excluir)
+            if politica.dias_por_estado:
+                condiciones.append(f"estado NOT IN ({','.join('?' * len(politica.dias_por_estado))})")
+                valores.extend(politica.dias_por_estado)
+            grupos.append((" AND ".join(condiciones), valores, politica.dias_por_defecto))
+
+        return grupos
+
+    def _eliminar_lote(self, condicion: str, valores: list, limite: str) -> int:
+        """Elimina un lote de ejecuciones vencidas (las más antiguas primero)"""
+        with conectar(self.db_path) as conn:
+            cursor = conn.execute(f"""
+                DELETE FROM resultados_ejecucion WHERE id IN (
+                    SELECT id FROM resultados_ejecucion
+                    WHERE {condicion} AND fecha_ejecucion < ?
+                    ORDER BY fecha_ejecucion
+                    LIMIT ?
+                )
+            """, [*valores, limite, self.tamano_lote])
+            return cursor.rowcount
+
+    def _estado_paginas(self) -> Tuple[int, int, int, int]:
+        """Tamaño de página, páginas totales, páginas libres y modo de auto_vacuum"""
+        with conectar(self.db_path) as conn:
+            return (
+                conn.execute("PRAGMA page_size").fetchone()[0],
+                conn.execute("PRAGMA page_count").fetchone()[0],
+                conn.execute("PRAGMA freelist_count").fetchone()[0],
+                conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            )
+
+    def _existe_historial(self) -> bool:
+        """Indica si la base tiene la tabla de resultados"""
+        with conectar(self.db_path) as conn:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resultados_ejecucion'"
+            ).fetchone() is not None
@@ -0,0 +1,335 @@
+"""
+Servicio de vigilancia de carpetas de notificación
+
+Avisa cuándo aparecen archivos de notificación en un conjunto de carpetas.
+En Linux usa inotify (vía libc, sin dependencias): el archivo se informa
+apenas se termina de escribir (IN_CLOSE_WRITE) o se renombra dentro de la
+carpeta (IN_MOVED_TO), sin recorrer la carpeta.
+
+Las carpetas que no entregan eventos (otros sistemas operativos, límite de
+watches, carpetas que todavía no existen) se revisan por sondeo con
+os.scandir. El intervalo de sondeo se duplica mientras la carpeta no cambia,
+hasta un máximo, y vuelve al mínimo cuando aparece un archivo nuevo.
+
+Las unidades de red montadas (CIFS/NFS) aceptan el watch pero no informan
+los archivos que escriben otros equipos. Por eso las carpetas con eventos
+también se revisan cada intervalo máximo; si esa revisión encuentra un
+archivo que no llegó por eventos (después de leer los eventos pendientes),
+la carpeta pasa a sondeo. Más adelante se vuelve a probar el watch, con una
+espera que se duplica cada vez que la carpeta vuelve a fallar.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class _Inotify:
+    """Acceso mínimo a inotify a través de libc (solo Linux)"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _EVENTO = struct.Struct('iIII')  # wd, mask, cookie, len (seguido del nombre)
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    @classmethod
+    def disponible(cls) -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6'), 'inotify_init1')
+        except OSError:
+            return False
+
+    def agregar(self, carpeta: str) -> int:
+        """Vigila la creación de archivos en la carpeta; retorna el descriptor del watch"""
+        mascara = (self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_DELETE_SELF |
+                   self.IN_MOVE_SELF | self.IN_ONLYDIR)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(carpeta), mascara)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), carpeta)
+        return wd
+
+    def quitar(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def leer(self) -> List[Tuple[int, int, str]]:
+        """Eventos pendientes como (wd, máscara, nombre)"""
+        try:
+            datos = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        eventos = []
+        posicion = 0
+        while posicion + self._EVENTO.size <= len(datos):
+            wd, mascara, _, largo = self._EVENTO.unpack_from(datos, posicion)
+            posicion += self._EVENTO.size
+            nombre = os.fsdecode(datos[posicion:posicion + largo].rstrip(b'\0'))
+            posicion += largo
+            eventos.append((wd, mascara, nombre))
+        return eventos
+
+    def cerrar(self) -> None:
+        os.close(self.fd)
+
+
+class VigilanciaCarpetasService:
+    """Espera archivos de notificación nuevos en varias carpetas (eventos o sondeo adaptativo)"""
+
+    # Antigüedad a partir de la cual un archivo sin evento indica que la carpeta no los entrega
+    ANTIGUEDAD_SIN_EVENTO = 2.0
+
+    # Segundos de sondeo antes de volver a probar eventos en una carpeta que no los entregó
+    # (se duplica en cada nuevo fallo, hasta el máximo)
+    ESPERA_REINTENTO_EVENTOS = 600.0
+    ESPERA_REINTENTO_EVENTOS_MAXIMA = 24 * 3600.0
+
+    def __init__(
+        self,
+        carpetas: List[str],
+        intervalo_minimo: float = 1.0,
+        intervalo_maximo: float = 60.0,
+        usar_eventos: bool = True,
+        prefijo: str = 'notif_',
+        sufijo: str = '.json'
+    ):
+        """
+        Args:
+            carpetas: Carpetas a vigilar
+            intervalo_minimo: Segundos entre revisiones por sondeo tras un cambio
+            intervalo_maximo: Tope del intervalo de sondeo (y de la revisión de las carpetas con eventos)
+            usar_eventos: Usar inotify donde esté disponible
+            prefijo: Prefijo de los archivos vigilados
+            sufijo: Sufijo de los archivos vigilados
+        """
+        self.carpetas = list(dict.fromkeys(carpetas))
+        self.intervalo_minimo = max(0.01, intervalo_minimo)
+        self.intervalo_maximo = max(self.intervalo_minimo, intervalo_maximo)
+        self.prefijo = prefijo
+        self.sufijo = sufijo
+        self.logger = logging.getLogger(__name__)
+
+        self._intervalos: Dict[str, float] = {c: self.intervalo_minimo for c in self.carpetas}
+        self._proxima_revision: Dict[str, float] = {c: 0.0 for c in self.carpetas}  # 0: listado inicial
+        self._vistos: Dict[str, Set[str]] = {c: set() for c in self.carpetas}
+        self._notificados: Set[str] = set()  # Archivos informados por eventos y aún presentes
+        self._carpeta_por_wd: Dict[int, str] = {}
+        self._wd_por_carpeta: Dict[str, int] = {}
+        # Carpetas que aceptan el watch pero no informan: cuándo volver a probarlo y la última espera
+        self._sin_eventos: Dict[str, Tuple[float, float]] = {}
+
+        self._inotify: Optional[_Inotify] = None
+        if usar_eventos and _Inotify.disponible():
+            try:
+                self._inotify = _Inotify()
+            except OSError as e:
+                self.logger.warning(f"⚠️ inotify no disponible, se usa sondeo: {e}")
+        for carpeta in self.carpetas:
+            self._vigilar(carpeta)
+
+    @property
+    def modo(self) -> str:
+        """'inotify' si alguna carpeta recibe eventos, 'sondeo' si no"""
+        return "inotify" if self._wd_por_carpeta else "sondeo"
+
+    def carpetas_con_eventos(self) -> List[str]:
+        return [carpeta for carpeta in self.carpetas if carpeta in self._wd_por_carpeta]
+
+    def esperar_archivos(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Espera hasta que haya archivos vigilados y los retorna (más antiguos primero)
+
+        Las revisiones por sondeo retornan todos los archivos presentes en la
+        carpeta; los eventos, solo los nuevos. Retorna una lista vacía si se
+        agotó timeout.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            archivos = self._revisar_vencidas()
+            if archivos:
+                return archivos
+
+            ahora = time.monotonic()
+            espera = min(self._proxima_revision.values(), default=ahora + self.intervalo_maximo) - ahora
+            if limite is not None:
+                if ahora >= limite:
+                    return []
+                espera = min(espera, limite - ahora)
+
+            archivos = self._esperar_eventos(max(0.0, espera))
+            if archivos:
+                return archivos
+
+    def cerrar(self) -> None:
+        if self._inotify is not None:
+            self._inotify.cerrar()
+            self._inotify = None
+        self._carpeta_por_wd.clear()
+        self._wd_por_carpeta.clear()
+
+    def _es_vigilado(self, nombre: str) -> bool:
+        return nombre.startswith(self.prefijo) and nombre.endswith(self.sufijo)
+
+    def _vigilar(self, carpeta: str) -> None:
+        """Agrega el watch de la carpeta si hay inotify y la carpeta lo admite"""
+        if self._inotify is None or carpeta in self._wd_por_carpeta:
+            return
+        if carpeta in self._sin_eventos and self._sin_eventos[carpeta][0] > time.monotonic():
+            return
+        try:
+            wd = self._inotify.agregar(carpeta)
+        except OSError:
+            # No existe todavía, no es una carpeta o se agotaron los watches: sondeo
+            return
+        self._carpeta_por_wd[wd] = carpeta
+        self._wd_por_carpeta[carpeta] = wd
+        if carpeta in self._sin_eventos:
+            self.logger.info(f"🔄 Se vuelven a probar los eventos de {carpeta}")
+
+    def _dejar_de_vigilar(self, carpeta: str) -> None:
+        wd = self._wd_por_carpeta.pop(carpeta, None)
+        if wd is None:
+            return
+        self._carpeta_por_wd.pop(wd, None)
+        if self._inotify is not None:
+            self._inotify.quitar(wd)
+
+    def _listar(self, carpeta: str) -> List[Tuple[float, str]]:
+        """Archivos vigilados de la carpeta como (fecha de modificación, ruta)"""
+        archivos = []
+        try:
+            with os.scandir(carpeta) as entradas:
+                for entrada in entradas:
+                    if not self._es_vigilado(entrada.name):
+                        continue
+                    try:
+                        if entrada.is_file():
+                            archivos.append((entrada.stat().st_mtime, entrada.path))
+                    except OSError:
+                        continue  # Se borró mientras se listaba
+        except OSError:
+            return []
+        archivos.sort()
+        return archivos
+
+    def _revisar_vencidas(self) -> List[str]:
+        """Lista las carpetas cuya revisión venció y reprograma la siguiente"""
+        ahora = time.monotonic()
+        vencidas = [carpeta for carpeta in self.carpetas if self._proxima_revision[carpeta] <= ahora]
+        if not vencidas:
+            return []
+
+        # Los eventos pendientes se leen antes de juzgar si una carpeta los entrega
+        notificados = self._leer_eventos()
+        archivos = []
+        for carpeta in vencidas:
+            # Solo se juzga la entrega de eventos de un watch que ya existía en la revisión anterior
+            juzgar_eventos = carpeta in self._wd_por_carpeta and self._proxima_revision[carpeta] > 0
+            self._vigilar(carpeta)
+            listado = self._listar(carpeta)
+            nombres = {os.path.basename(ruta) for _, ruta in listado}
+            nuevos = nombres - self._vistos[carpeta]
+            self._vistos[carpeta] = nombres
+
+            if carpeta in self._wd_por_carpeta:
+                rutas = {ruta for _, ruta in listado}
+                sin_evento = [
+                    ruta for mtime, ruta in listado
+                    if os.path.basename(ruta) in nuevos and ruta not in self._notificados
+                    and time.time() - mtime >= self.ANTIGUEDAD_SIN_EVENTO
+                ]
+                self._notificados &= rutas
+                if sin_evento and juzgar_eventos:
+                    # Unidad de red u otro sistema que acepta el watch pero no informa
+                    espera = self.ESPERA_REINTENTO_EVENTOS
+                    if carpeta in self._sin_eventos:
+                        espera = min(self._sin_eventos[carpeta][1] * 2, self.ESPERA_REINTENTO_EVENTOS_MAXIMA)
+                    self.logger.warning(f"🔄 {carpeta} no informa eventos, se revisa por sondeo "
+                                        f"(se vuelven a probar en {espera:.0f}s)")
+                    self._dejar_de_vigilar(carpeta)
+                    self._sin_eventos[carpeta] = (ahora + espera, espera)
+                    self._intervalos[carpeta] = self.intervalo_minimo
+                else:
+                    self._intervalos[carpeta] = self.intervalo_maximo
+            elif nuevos:
+                self._intervalos[carpeta] = self.intervalo_minimo
+            else:
+                self._intervalos[carpeta] = min(self._intervalos[carpeta] * 2, self.intervalo_maximo)
+
+            self._proxima_revision[carpeta] = ahora + self._intervalos[carpeta]
+            archivos.extend(listado)
+
+        archivos.sort()
+        rutas = [ruta for _, ruta in archivos]
+        listadas = set(rutas)
+        return rutas + [ruta for ruta in notificados if ruta not in listadas]
+
+    def _esperar_eventos(self, espera: float) -> List[str]:
+        """Espera eventos de inotify (o duerme si no hay carpetas con eventos)"""
+        if self._inotify is None or not self._wd_por_carpeta:
+            time.sleep(espera)
+            return []
+        listos, _, _ = select.select([self._inotify.fd], [], [], espera)
+        if not listos:
+            return []
+        return self._leer_eventos()
+
+    def _leer_eventos(self) -> List[str]:
+        """Procesa todos los eventos pendientes sin bloquear; retorna los archivos nuevos"""
+        if self._inotify is None:
+            return []
+        archivos = []
+        while True:
+            eventos = self._inotify.leer()
+            if not eventos:
+                return archivos
+            archivos.extend(self._procesar_eventos(eventos))
+
+    def _procesar_eventos(self, eventos: List[Tuple[int, int, str]]) -> List[str]:
+        archivos = []
+        for wd, mascara, nombre in eventos:
+            if mascara & _Inotify.IN_Q_OVERFLOW:
+                # Se perdieron eventos: revisar todas las carpetas ya, sin juzgar
+                # por esa revisión si entregan eventos (0: como el listado inicial)
+                self.logger.warning("⚠️ Desborde de eventos de inotify, se revisan las carpetas")
+                for carpeta in self.carpetas:
+                    self._proxima_revision[carpeta] = 0.0
+                continue
+            carpeta = self._carpeta_por_wd.get(wd)
+            if carpeta is None:
+                continue
+            if mascara & (_Inotify.IN_IGNORED | _Inotify.IN_DELETE_SELF | _Inotify.IN_MOVE_SELF):
+                # La carpeta se borró o se movió: sondeo hasta que vuelva a existir
+                self._carpeta_por_wd.pop(wd, None)
+                self._wd_por_carpeta.pop(carpeta, None)
+                self._intervalos[carpeta] = self.intervalo_minimo
+                self._proxima_revision[carpeta] = time.monotonic() + self.intervalo_minimo
+                continue
+            if mascara & (_Inotify.IN_CLOSE_WRITE | _Inotify.IN_MOVED_TO) and self._es_vigilado(nombre):
+                if nombre in self._vistos[carpeta]:
+                    continue  # Ya lo retornó una revisión
+                self._vistos[carpeta].add(nombre)
+                ruta = os.path.join(carpeta, nombre)
+                self._notificados.add(ruta)
+                archivos.append(ruta)
+        return archivos
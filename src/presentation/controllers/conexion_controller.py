@@ -51,7 +51,8 @@ class ConexionController:
                     'base_datos': conexion.base_datos,
                     'usuario': conexion.usuario,
                     'activa': conexion.activa,
-                    'driver_type': getattr(conexion, 'driver_type', 'default')
+                    'driver_type': getattr(conexion, 'driver_type', 'default'),
+                    'propiedades_jdbc': conexion.propiedades_jdbc
                 }
                 conexiones_data.append(conexion_data)
             
@@ -97,7 +98,8 @@ class ConexionController:
                 'usuario': conexion.usuario,
                 'contraseña': conexion.contraseña,  # Incluir contraseña para ejecución
                 'activa': conexion.activa,
-                'driver_type': getattr(conexion, 'driver_type', 'default')
+                'driver_type': getattr(conexion, 'driver_type', 'default'),
+                'propiedades_jdbc': conexion.propiedades_jdbc
             }
             
             return {
@@ -123,7 +125,8 @@ class ConexionController:
         base_datos: str,
         usuario: str,
         password: str,
-        driver_type: str = 'default'
+        driver_type: str = 'default',
+        propiedades_jdbc: str = ''
     ) -> Dict[str, Any]:
         """
         Crea una nueva conexión
@@ -137,6 +140,7 @@ class ConexionController:
             usuario: Usuario para la conexión
             password: Contraseña para la conexión
             driver_type: Tipo de driver (para IBM i Series: 'odbc', 'jdbc', 'auto')
+            propiedades_jdbc: Propiedades JDBC adicionales ("clave=valor;clave=valor")
             
         Returns:
             dict: Respuesta con los datos de la conexión creada
@@ -150,7 +154,8 @@ class ConexionController:
                 base_datos=base_datos,
                 usuario=usuario,
                 password=password,
-                driver_type=driver_type
+                driver_type=driver_type,
+                propiedades_jdbc=propiedades_jdbc
             )
             
             resultado = self._crear_conexion_use_case.ejecutar(dto)
@@ -187,7 +192,8 @@ class ConexionController:
         usuario: str,
         password: str,
         activa: bool = True,
-        driver_type: str = 'default'
+        driver_type: str = 'default',
+        propiedades_jdbc: str = ''
     ) -> Dict[str, Any]:
         """
         Actualiza una conexión existente
@@ -203,6 +209,7 @@ class ConexionController:
             password: Contraseña para la conexión
             activa: Si la conexión está activa
             driver_type: Tipo de driver (para IBM i Series)
+            propiedades_jdbc: Propiedades JDBC adicionales ("clave=valor;clave=valor")
             
         Returns:
             dict: Respuesta con los datos de la conexión actualizada
@@ -223,7 +230,8 @@ class ConexionController:
                 usuario=usuario,
                 password=password,
                 activa=activa,
-                driver_type=driver_type
+                driver_type=driver_type,
+                propiedades_jdbc=propiedades_jdbc
             )
             
             resultado = self._actualizar_conexion_use_case.ejecutar(conexion_id, dto)
@@ -239,7 +247,8 @@ class ConexionController:
                     "base_datos": resultado.base_datos,
                     "usuario": resultado.usuario,
                     "activa": resultado.activa,
-                    "driver_type": getattr(resultado, 'driver_type', 'default')
+                    "driver_type": getattr(resultado, 'driver_type', 'default'),
+                    "propiedades_jdbc": resultado.propiedades_jdbc
                 }
             }
             
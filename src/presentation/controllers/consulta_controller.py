@@ -31,7 +31,8 @@ class ConsultaController:
         descripcion: str = "",
         control_id: Optional[int] = None,
         conexion_id: Optional[int] = None,
-        activa: bool = True
+        activa: bool = True,
+        max_filas: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Crea una nueva consulta
@@ -43,6 +44,7 @@ class ConsultaController:
             control_id: ID del control al que pertenece (opcional)
             conexion_id: ID de la conexión específica (opcional)
             activa: Si la consulta está activa
+            max_filas: Máximo de filas a leer al ejecutarla (opcional)
             
         Returns:
             dict: Respuesta con los datos de la consulta creada
@@ -54,7 +56,8 @@ class ConsultaController:
                 descripcion=descripcion,
                 control_id=control_id,
                 conexion_id=conexion_id,
-                activa=activa
+                activa=activa,
+                max_filas=max_filas
             )
             
             resultado = self._crear_consulta_use_case.ejecutar(dto)
@@ -68,7 +71,8 @@ class ConsultaController:
                     "descripcion": resultado.descripcion,
                     "control_id": resultado.control_id,
                     "conexion_id": resultado.conexion_id,
-                    "activa": resultado.activa
+                    "activa": resultado.activa,
+                    "max_filas": resultado.max_filas
                 }
             }
             
@@ -108,7 +112,8 @@ class ConsultaController:
                     'descripcion': consulta.descripcion,
                     'control_id': consulta.control_id,
                     'conexion_id': consulta.conexion_id,
-                    'activa': consulta.activa
+                    'activa': consulta.activa,
+                    'max_filas': consulta.max_filas
                 }
                 consultas_data.append(consulta_data)
             
@@ -155,7 +160,8 @@ class ConsultaController:
                     "descripcion": consulta.descripcion,
                     "control_id": consulta.control_id,
                     "conexion_id": consulta.conexion_id,
-                    "activa": consulta.activa
+                    "activa": consulta.activa,
+                    "max_filas": consulta.max_filas
                 }
             }
             
@@ -172,7 +178,8 @@ class ConsultaController:
         sql: Optional[str] = None,
         descripcion: Optional[str] = None,
         conexion_id: Optional[int] = None,
-        activa: Optional[bool] = None
+        activa: Optional[bool] = None,
+        max_filas: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Actualiza una consulta existente
@@ -184,6 +191,7 @@ class ConsultaController:
             descripcion: Nueva descripción (opcional)
             conexion_id: Nueva conexión ID (opcional)
             activa: Nuevo estado activo (opcional)
+            max_filas: Nuevo máximo de filas (opcional, 0 = sin límite)
             
         Returns:
             dict: Respuesta con los datos de la consulta actualizada
@@ -200,7 +208,8 @@ class ConsultaController:
                 sql=sql,
                 descripcion=descripcion,
                 conexion_id=conexion_id,
-                activa=activa
+                activa=activa,
+                max_filas=max_filas
             )
             
             resultado = self._actualizar_consulta_use_case.ejecutar(consulta_id, dto)
@@ -214,7 +223,8 @@ class ConsultaController:
                     "descripcion": resultado.descripcion,
                     "control_id": resultado.control_id,
                     "conexion_id": resultado.conexion_id,
-                    "activa": resultado.activa
+                    "activa": resultado.activa,
+                    "max_filas": resultado.max_filas
                 }
             }
             
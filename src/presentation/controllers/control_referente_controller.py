@@ -9,7 +9,7 @@ from datetime import datetime
 from src.domain.repositories.control_referente_repository import ControlReferenteRepository
 from src.domain.repositories.control_repository import ControlRepository
 from src.domain.repositories.referente_repository import ReferenteRepository
-from src.domain.entities.control_referente import ControlReferente
+from src.domain.entities.control_referente import ControlReferente, FormatoArchivo
 
 
 class ControlReferenteController:
@@ -31,7 +31,8 @@ class ControlReferenteController:
         referente_id: int,
         notificar_por_email: bool = True,
         notificar_por_archivo: bool = False,
-        observaciones: str = ""
+        observaciones: str = "",
+        formato_archivo: str = FormatoArchivo.XLSX.value
     ) -> Dict[str, Any]:
         """
         Asocia un control con un referente
@@ -42,6 +43,7 @@ class ControlReferenteController:
             notificar_por_email: Si debe notificar por email
             notificar_por_archivo: Si debe notificar por archivo
             observaciones: Observaciones de la asociación
+            formato_archivo: Formato del archivo de resultados (xlsx, csv, csv.gz, jsonl)
             
         Returns:
             Dict con respuesta de la operación
@@ -81,7 +83,8 @@ class ControlReferenteController:
                 fecha_asociacion=datetime.now(),
                 notificar_por_email=notificar_por_email,
                 notificar_por_archivo=notificar_por_archivo,
-                observaciones=observaciones
+                observaciones=observaciones,
+                formato_archivo=FormatoArchivo(formato_archivo)
             )
             
             id_asociacion = self._control_referente_repository.guardar(asociacion)
@@ -99,7 +102,8 @@ class ControlReferenteController:
                     "fecha_asociacion": asociacion.fecha_asociacion.isoformat(),
                     "notificar_por_email": notificar_por_email,
                     "notificar_por_archivo": notificar_por_archivo,
-                    "observaciones": observaciones
+                    "observaciones": observaciones,
+                    "formato_archivo": asociacion.formato_archivo.value
                 },
                 "status": 201,
                 "message": f"Asociación creada entre control '{control.nombre}' y referente '{referente.nombre}'"
@@ -157,7 +161,8 @@ class ControlReferenteController:
                         "fecha_asociacion": asociacion.fecha_asociacion.isoformat() if asociacion.fecha_asociacion else None,
                         "notificar_por_email": asociacion.notificar_por_email,
                         "notificar_por_archivo": asociacion.notificar_por_archivo,
-                        "observaciones": asociacion.observaciones
+                        "observaciones": asociacion.observaciones,
+                        "formato_archivo": asociacion.formato_archivo.value
                     })
             
             return {
@@ -212,7 +217,8 @@ class ControlReferenteController:
                         "fecha_asociacion": asociacion.fecha_asociacion.isoformat() if asociacion.fecha_asociacion else None,
                         "notificar_por_email": asociacion.notificar_por_email,
                         "notificar_por_archivo": asociacion.notificar_por_archivo,
-                        "observaciones": asociacion.observaciones
+                        "observaciones": asociacion.observaciones,
+                        "formato_archivo": asociacion.formato_archivo.value
                     })
             
             return {
@@ -264,7 +270,8 @@ class ControlReferenteController:
                     "fecha_asociacion": asociacion.fecha_asociacion.isoformat() if asociacion.fecha_asociacion else None,
                     "notificar_por_email": asociacion.notificar_por_email,
                     "notificar_por_archivo": asociacion.notificar_por_archivo,
-                    "observaciones": asociacion.observaciones or ""
+                    "observaciones": asociacion.observaciones or "",
+                    "formato_archivo": asociacion.formato_archivo.value
                 },
                 "status": 200,
                 "message": "Asociación encontrada exitosamente"
@@ -283,7 +290,8 @@ class ControlReferenteController:
         activa: Optional[bool] = None,
         notificar_por_email: Optional[bool] = None,
         notificar_por_archivo: Optional[bool] = None,
-        observaciones: Optional[str] = None
+        observaciones: Optional[str] = None,
+        formato_archivo: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Actualiza una asociación existente
@@ -294,6 +302,7 @@ class ControlReferenteController:
             notificar_por_email: Nueva configuración de notificación por email (opcional)
             notificar_por_archivo: Nueva configuración de notificación por archivo (opcional)
             observaciones: Nuevas observaciones (opcional)
+            formato_archivo: Nuevo formato del archivo de resultados (opcional)
             
         Returns:
             Dict con respuesta de la operación
@@ -317,6 +326,8 @@ class ControlReferenteController:
                 asociacion.notificar_por_archivo = notificar_por_archivo
             if observaciones is not None:
                 asociacion.observaciones = observaciones
+            if formato_archivo is not None:
+                asociacion.formato_archivo = FormatoArchivo(formato_archivo)
             
             # Validar la asociación actualizada
             if not asociacion.es_valida():
@@ -345,7 +356,8 @@ class ControlReferenteController:
                     "fecha_asociacion": asociacion.fecha_asociacion.isoformat() if asociacion.fecha_asociacion else None,
                     "notificar_por_email": asociacion.notificar_por_email,
                     "notificar_por_archivo": asociacion.notificar_por_archivo,
-                    "observaciones": asociacion.observaciones
+                    "observaciones": asociacion.observaciones,
+                    "formato_archivo": asociacion.formato_archivo.value
                 },
                 "status": 200,
                 "message": "Asociación actualizada exitosamente"
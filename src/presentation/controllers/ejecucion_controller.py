@@ -82,7 +82,9 @@ class EjecucionController:
         fecha_hasta: str = None,
         estado: str = None,
         limite: int = 50,
-        incluir_detalles: bool = False
+        incluir_detalles: bool = False,
+        despues_de: tuple = None,
+        antes_de: tuple = None
     ) -> dict:
         """
         Obtiene el historial de ejecuciones
@@ -94,9 +96,12 @@ class EjecucionController:
             estado: Estado de ejecución (opcional)
             limite: Número máximo de resultados
             incluir_detalles: Si incluir detalles de consultas
+            despues_de: Cursor (fecha ISO, id) de la página siguiente (opcional)
+            antes_de: Cursor (fecha ISO, id) de la página anterior (opcional)
             
         Returns:
-            dict: Historial de ejecuciones en formato JSON
+            dict: Historial de ejecuciones en formato JSON, con los cursores
+            "cursor_anterior" y "cursor_siguiente" de la página devuelta
         """
         try:
             # Convertir fechas string a datetime
@@ -114,7 +119,9 @@ class EjecucionController:
                 fecha_hasta=fecha_hasta_dt,
                 estado=estado,
                 limite=limite,
-                incluir_detalles=incluir_detalles
+                incluir_detalles=incluir_detalles,
+                despues_de=self._cursor_desde_json(despues_de),
+                antes_de=self._cursor_desde_json(antes_de)
             )
             
             resultados = self.historial_use_case.obtener_historial(dto)
@@ -141,7 +148,9 @@ class EjecucionController:
             return {
                 "success": True,
                 "data": data,
-                "total": len(data)
+                "total": len(data),
+                "cursor_anterior": (data[0]["fecha_ejecucion"], data[0]["id"]) if data else None,
+                "cursor_siguiente": (data[-1]["fecha_ejecucion"], data[-1]["id"]) if data else None
             }
         
         except Exception as e:
@@ -188,6 +197,7 @@ class EjecucionController:
                     "controles_disparados": estadisticas.controles_disparados,
                     "sin_datos": estadisticas.sin_datos,
                     "tiempo_promedio_ejecucion_ms": estadisticas.tiempo_promedio_ejecucion_ms,
+                    "tiempo_p95_ejecucion_ms": estadisticas.tiempo_p95_ejecucion_ms,
                     "tasa_exito": estadisticas.tasa_exito,
                     "ultima_ejecucion": estadisticas.ultima_ejecucion.isoformat() if estadisticas.ultima_ejecucion else None
                 }
@@ -237,7 +247,65 @@ class EjecucionController:
                     "ultima_ejecucion": resumen.ultima_ejecucion.isoformat() if resumen.ultima_ejecucion else None,
                     "ultimo_estado": resumen.ultimo_estado,
                     "tasa_exito": resumen.tasa_exito,
-                    "tiempo_promedio_ms": resumen.tiempo_promedio_ms
+                    "tiempo_promedio_ms": resumen.tiempo_promedio_ms,
+                    "tiempo_p95_ms": resumen.tiempo_p95_ms
+                })
+            
+            return {
+                "success": True,
+                "data": data,
+                "total": len(data)
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def obtener_tendencia_diaria(
+        self,
+        fecha_desde: str = None,
+        fecha_hasta: str = None,
+        control_id: int = None
+    ) -> dict:
+        """
+        Obtiene las métricas diarias de ejecución (desde el resumen diario)
+        
+        Args:
+            fecha_desde: Fecha de inicio en formato ISO (opcional)
+            fecha_hasta: Fecha de fin en formato ISO (opcional)
+            control_id: ID del control (opcional)
+            
+        Returns:
+            dict: Métricas por día en formato JSON
+        """
+        try:
+            # Convertir fechas
+            fecha_desde_dt = None
+            fecha_hasta_dt = None
+            
+            if fecha_desde:
+                fecha_desde_dt = datetime.fromisoformat(fecha_desde.replace('Z', '+00:00'))
+            if fecha_hasta:
+                fecha_hasta_dt = datetime.fromisoformat(fecha_hasta.replace('Z', '+00:00'))
+            
+            tendencia = self.historial_use_case.obtener_tendencia_diaria(
+                fecha_desde_dt, fecha_hasta_dt, control_id
+            )
+            
+            data = []
+            for dia in tendencia:
+                data.append({
+                    "dia": dia.dia.isoformat(),
+                    "total_ejecuciones": dia.total_ejecuciones,
+                    "ejecuciones_exitosas": dia.ejecuciones_exitosas,
+                    "ejecuciones_con_error": dia.ejecuciones_con_error,
+                    "controles_disparados": dia.controles_disparados,
+                    "sin_datos": dia.sin_datos,
+                    "tiempo_promedio_ms": dia.tiempo_promedio_ms,
+                    "tiempo_maximo_ms": dia.tiempo_maximo_ms,
+                    "total_filas_disparadas": dia.total_filas_disparadas
                 })
             
             return {
@@ -300,4 +368,13 @@ class EjecucionController:
             return {
                 "success": False,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    def _cursor_desde_json(self, cursor: tuple):
+        """Convierte un cursor (fecha ISO, id) recibido de la vista al formato del caso de uso"""
+        if not cursor:
+            return None
+        fecha, id_resultado = cursor
+        if isinstance(fecha, str):
+            fecha = datetime.fromisoformat(fecha)
+        return (fecha, int(id_resultado))
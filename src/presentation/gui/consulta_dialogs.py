@@ -6,6 +6,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 
+def _leer_max_filas(texto: str):
+    """Interpreta el campo de máximo de filas: 0 si está vacío, None si es inválido"""
+    texto = texto.strip()
+    if not texto:
+        return 0
+    if not texto.isdigit():
+        messagebox.showerror("Error", "El máximo de filas debe ser un número entero positivo")
+        return None
+    return int(texto)
+
+
 class EditConsultaDialog:
     """Diálogo para editar consulta existente"""
     
@@ -67,6 +78,11 @@ class EditConsultaDialog:
         self.activa_var = tk.BooleanVar()
         ttk.Checkbutton(main_frame, text="Consulta activa", variable=self.activa_var).grid(row=6, column=1, sticky="w", pady=5, padx=(10, 0))
         
+        # Máximo de filas a leer (vacío = sin límite)
+        ttk.Label(main_frame, text="Máximo de filas:").grid(row=7, column=0, sticky="w", pady=5)
+        self.max_filas_var = tk.StringVar()
+        ttk.Entry(main_frame, textvariable=self.max_filas_var, width=12).grid(row=7, column=1, sticky="w", pady=5, padx=(10, 0))
+        
         # Información adicional
         info_frame = ttk.Frame(main_frame)
         info_frame.grid(row=8, column=0, columnspan=2, pady=(20, 0), sticky="ew")
@@ -130,6 +146,10 @@ class EditConsultaDialog:
             # Estado activo
             self.activa_var.set(self.consulta_data.get('activa', True))
             
+            # Máximo de filas
+            max_filas = self.consulta_data.get('max_filas')
+            self.max_filas_var.set(str(max_filas) if max_filas else '')
+            
             # Conexión
             conexion_id_actual = self.consulta_data.get('conexion_id')
             for i, conn in enumerate(self.conexiones_disponibles):
@@ -167,6 +187,10 @@ class EditConsultaDialog:
             descripcion = self.descripcion_text.get('1.0', tk.END).strip()
             activa = self.activa_var.get()
             
+            max_filas = _leer_max_filas(self.max_filas_var.get())
+            if max_filas is None:
+                return
+            
             # Obtener conexión seleccionada
             conexion_seleccionada_idx = self.conexion_combo.current()
             conexion_id = None
@@ -185,7 +209,8 @@ class EditConsultaDialog:
                 sql=sql,
                 descripcion=descripcion,
                 conexion_id=conexion_id,
-                activa=activa
+                activa=activa,
+                max_filas=max_filas
             )
             
             if response.get('success', False):
@@ -266,6 +291,11 @@ class CreateConsultaDialog:
         self.sql_text.pack(side="left", fill="both", expand=True)
         sql_scrollbar.pack(side="right", fill="y")
         
+        # Campo Máximo de filas (opcional)
+        ttk.Label(main_frame, text="Máximo de filas (vacío = sin límite):").pack(anchor="w", pady=(0, 5))
+        self.max_filas_entry = ttk.Entry(main_frame, width=12)
+        self.max_filas_entry.pack(anchor="w", pady=(0, 10))
+        
         # Checkbox Activa
         self.activa_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(main_frame, text="Consulta activa", variable=self.activa_var).pack(anchor="w", pady=(0, 10))
@@ -302,6 +332,9 @@ class CreateConsultaDialog:
             descripcion = self.descripcion_entry.get().strip()
             sql = self.sql_text.get("1.0", tk.END).strip()
             activa = self.activa_var.get()
+            max_filas = _leer_max_filas(self.max_filas_entry.get())
+            if max_filas is None:
+                return
             
             # Validaciones
             if not nombre:
@@ -330,7 +363,8 @@ class CreateConsultaDialog:
                 sql=sql,
                 descripcion=descripcion,
                 conexion_id=conexion_id,
-                activa=activa
+                activa=activa,
+                max_filas=max_filas or None
             )
             
             if response.get('success', False):
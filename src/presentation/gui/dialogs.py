@@ -68,9 +68,18 @@ class CreateConnectionDialog:
         self.password_var = tk.StringVar()
         ttk.Entry(frame, textvariable=self.password_var, width=30, show="*").grid(row=7, column=1, pady=5)
         
+        # Propiedades JDBC adicionales (solo IBM i Series), ej: "block size=512;prefetch=true"
+        self.propiedades_label = ttk.Label(frame, text="Propiedades JDBC:")
+        self.propiedades_label.grid(row=8, column=0, sticky="w", pady=5)
+        self.propiedades_var = tk.StringVar()
+        self.propiedades_entry = ttk.Entry(frame, textvariable=self.propiedades_var, width=30)
+        self.propiedades_entry.grid(row=8, column=1, pady=5)
+        self.propiedades_label.grid_remove()
+        self.propiedades_entry.grid_remove()
+        
         # Botones
         buttons_frame = ttk.Frame(frame)
-        buttons_frame.grid(row=8, column=0, columnspan=2, pady=20)
+        buttons_frame.grid(row=9, column=0, columnspan=2, pady=20)
         
         ttk.Button(buttons_frame, text="Crear", command=self.create_connection).pack(side="left", padx=5)
         ttk.Button(buttons_frame, text="Cancelar", command=self.cancel).pack(side="left", padx=5)
@@ -80,14 +89,19 @@ class CreateConnectionDialog:
         motor = self.motor_var.get()
         if motor == 'iseries':
             self.driver_combo.grid()
+            self.propiedades_label.grid()
+            self.propiedades_entry.grid()
         else:
             self.driver_combo.grid_remove()
             self.driver_type_var.set('default')
+            self.propiedades_label.grid_remove()
+            self.propiedades_entry.grid_remove()
         
     def create_connection(self):
         """Crea la conexión"""
         try:
             driver_type = self.driver_type_var.get() if self.motor_var.get() == 'iseries' else 'default'
+            propiedades_jdbc = self.propiedades_var.get().strip() if self.motor_var.get() == 'iseries' else ''
             
             response = self.conexion_ctrl.crear_conexion(
                 nombre=self.nombre_var.get(),
@@ -97,7 +111,8 @@ class CreateConnectionDialog:
                 base_datos=self.bd_var.get(),
                 usuario=self.usuario_var.get(),
                 password=self.password_var.get(),
-                driver_type=driver_type
+                driver_type=driver_type,
+                propiedades_jdbc=propiedades_jdbc
             )
             
             if response.get('success', False):
@@ -180,17 +195,24 @@ class EditConnectionDialog:
         self.password_var = tk.StringVar()
         ttk.Entry(frame, textvariable=self.password_var, width=30, show="*").grid(row=7, column=1, pady=5, padx=(10, 0))
         
+        # Propiedades JDBC adicionales (solo IBM i Series), ej: "block size=512;prefetch=true"
+        self.propiedades_label = ttk.Label(frame, text="Propiedades JDBC:")
+        self.propiedades_label.grid(row=8, column=0, sticky="w", pady=5)
+        self.propiedades_var = tk.StringVar()
+        self.propiedades_entry = ttk.Entry(frame, textvariable=self.propiedades_var, width=30)
+        self.propiedades_entry.grid(row=8, column=1, pady=5, padx=(10, 0))
+        
         # Checkbox activa
         self.activa_var = tk.BooleanVar()
-        ttk.Checkbutton(frame, text="Conexión activa", variable=self.activa_var).grid(row=8, column=0, columnspan=2, pady=10)
+        ttk.Checkbutton(frame, text="Conexión activa", variable=self.activa_var).grid(row=9, column=0, columnspan=2, pady=10)
         
         # Botón probar conexión
         test_frame = ttk.Frame(frame)
-        test_frame.grid(row=9, column=0, columnspan=2, pady=10)
+        test_frame.grid(row=10, column=0, columnspan=2, pady=10)
         ttk.Button(test_frame, text="Probar Conexión", command=self.test_connection).pack()
         
         buttons_frame = ttk.Frame(frame)
-        buttons_frame.grid(row=10, column=0, columnspan=2, pady=20)
+        buttons_frame.grid(row=11, column=0, columnspan=2, pady=20)
         
         ttk.Button(buttons_frame, text="Actualizar", command=self.update_connection).pack(side="left", padx=5)
         ttk.Button(buttons_frame, text="Cancelar", command=self.cancel).pack(side="left", padx=5)
@@ -212,6 +234,7 @@ class EditConnectionDialog:
         # Cargar driver_type si existe
         driver_type = self.conexion_data.get('driver_type', 'auto')
         self.driver_type_var.set(driver_type)
+        self.propiedades_var.set(self.conexion_data.get('propiedades_jdbc', ''))
         
         # Mostrar/ocultar campo driver_type según el motor
         self.on_motor_change()
@@ -222,12 +245,16 @@ class EditConnectionDialog:
         """Maneja el cambio de motor para mostrar/ocultar el campo driver_type"""
         motor = self.motor_var.get()
         if motor == 'iseries':
-            # Mostrar campo driver_type para IBM i Series
+            # Mostrar campos driver_type y propiedades JDBC para IBM i Series
             self.driver_combo.grid()
+            self.propiedades_label.grid()
+            self.propiedades_entry.grid()
         else:
-            # Ocultar campo driver_type para otros motores
+            # Ocultar campos driver_type y propiedades JDBC para otros motores
             self.driver_combo.grid_remove()
             self.driver_type_var.set('default')
+            self.propiedades_label.grid_remove()
+            self.propiedades_entry.grid_remove()
         
     def update_connection(self):
         """Actualiza la conexión con validaciones"""
@@ -255,6 +282,7 @@ class EditConnectionDialog:
         try:
             # Determinar driver_type
             driver_type = self.driver_type_var.get() if self.motor_var.get() == 'iseries' else 'default'
+            propiedades_jdbc = self.propiedades_var.get().strip() if self.motor_var.get() == 'iseries' else ''
             
             response = self.conexion_ctrl.actualizar_conexion(
                 conexion_id=self.conexion_data['id'],
@@ -266,7 +294,8 @@ class EditConnectionDialog:
                 usuario=self.usuario_var.get().strip(),
                 password=self.password_var.get() if self.password_var.get().strip() else None,
                 activa=self.activa_var.get(),
-                driver_type=driver_type
+                driver_type=driver_type,
+                propiedades_jdbc=propiedades_jdbc
             )
             
             if response.get('success', False):
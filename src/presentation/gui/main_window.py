@@ -17,8 +17,13 @@ from src.infrastructure.repositories.sqlite_consulta_control_repository import S
 from src.infrastructure.repositories.sqlite_conexion_repository import SQLiteConexionRepository
 from src.infrastructure.repositories.sqlite_referente_repository import SQLiteReferenteRepository
 from src.infrastructure.repositories.sqlite_control_referente_repository import SQLiteControlReferenteRepository
+from src.infrastructure.repositories.sqlite_plan_ejecucion_repository import SQLitePlanEjecucionRepository
 from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
 from src.infrastructure.repositories.sqlite_programacion_repository import SQLiteProgramacionRepository
+from src.infrastructure.repositories.sqlite_configuracion_jdbc_repository import SQLiteConfiguracionJDBCRepository
+from src.infrastructure.database.conector_ibmi_jdbc import ConectorIBMiJDBC
+from src.infrastructure.database.pool_conexiones import GestorPoolsConexiones
+from src.infrastructure.services.generacion_reportes_service import GeneracionReportesService
 
 from src.domain.services.usuario_service import UsuarioService
 from src.domain.services.control_service import ControlService
@@ -96,6 +101,8 @@ class MainWindow:
         # Crear interfaz
         self.create_widgets()
         
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
+        
     def setup_controllers(self):
         """Configura todos los controladores siguiendo Clean Architecture"""
         # Inicializar servicios de prueba de conexión
@@ -115,11 +122,17 @@ class MainWindow:
         
         # Servicios
         usuario_service = UsuarioService(usuario_repo)
+        # Los Excel se generan en procesos aparte: la ventana no espera a openpyxl
+        self.generador_reportes = GeneracionReportesService()
         self.control_service = ControlService(
             control_repo, consulta_repo, conexion_repo, parametro_repo, referente_repo
         )
         ejecucion_service = EjecucionControlService(
-            control_repo, parametro_repo, consulta_repo, referente_repo, conexion_repo, consulta_control_repo, control_referente_repo
+            control_repo, parametro_repo, consulta_repo, referente_repo, conexion_repo, consulta_control_repo, control_referente_repo,
+            gestor_pools=GestorPoolsConexiones(),
+            conector_ibmi=ConectorIBMiJDBC(SQLiteConfiguracionJDBCRepository(self.db_path)),
+            plan_ejecucion_repository=SQLitePlanEjecucionRepository(self.db_path),
+            generador_reportes=self.generador_reportes
         )
         
         # Casos de uso
@@ -238,7 +251,7 @@ class MainWindow:
         file_menu.add_command(label="Gestionar Referentes", command=self.manage_referentes)
         file_menu.add_command(label="Gestionar Programaciones", command=self.manage_programaciones)
         file_menu.add_separator()
-        file_menu.add_command(label="Salir", command=self.root.quit)
+        file_menu.add_command(label="Salir", command=self.close_window)
         
         # Menú Herramientas
         tools_menu = tk.Menu(menubar, tearoff=0)
@@ -417,6 +430,19 @@ class MainWindow:
         ttk.Button(filters_frame, text="Filtrar", command=lambda: self.filter_history()).grid(row=0, column=4, padx=5, pady=5)
         ttk.Button(filters_frame, text="Limpiar", command=self.clear_filters).grid(row=0, column=5, padx=5, pady=5)
         
+        # Navegación entre páginas del historial
+        nav_frame = ttk.Frame(history_frame)
+        nav_frame.pack(side="bottom", fill="x", padx=5, pady=5)
+        self.history_prev_button = ttk.Button(nav_frame, text="◀ Anterior", command=self.history_previous_page)
+        self.history_prev_button.pack(side="left")
+        self.history_page_label = ttk.Label(nav_frame, text="Página 1")
+        self.history_page_label.pack(side="left", padx=10)
+        self.history_next_button = ttk.Button(nav_frame, text="Siguiente ▶", command=self.history_next_page)
+        self.history_next_button.pack(side="left")
+        self.history_page_size = 100
+        self.history_page = 1
+        self.history_cursors = (None, None)
+        
         # Lista de historial
         columns = ("ID", "Control", "Fecha", "Estado", "Tiempo (ms)", "Filas Disparo", "Mensaje")
         self.history_tree = ttk.Treeview(history_frame, columns=columns, show="headings", height=20)
@@ -567,112 +593,124 @@ class MainWindow:
             messagebox.showerror("Error", f"Error al cargar controles para ejecución: {str(e)}")
     
     def refresh_history(self):
-        """Actualiza el historial de ejecuciones"""
-        # Limpiar lista actual
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-        
+        """Actualiza el historial de ejecuciones (primera página con los filtros actuales)"""
+        self.history_page = 1
+        self._load_history_page()
+    
+    def filter_history(self, event=None):
+        """Filtra el historial según los criterios seleccionados"""
+        print(f"DEBUG - Filtrando historial: Control={self.filter_control.get()}, Estado={self.filter_estado.get()}")
+        self.refresh_history()
+    
+    def history_next_page(self):
+        """Muestra la página siguiente (ejecuciones más antiguas)"""
+        if self._load_history_page(despues_de=self.history_cursors[1]):
+            self.history_page += 1
+            self._update_history_navigation()
+    
+    def history_previous_page(self):
+        """Muestra la página anterior (ejecuciones más recientes)"""
+        if self.history_page <= 1:
+            return
+        if self._load_history_page(antes_de=self.history_cursors[0]):
+            self.history_page -= 1
+            self._update_history_navigation()
+    
+    def _history_filters(self) -> dict:
+        """Filtros seleccionados en la pestaña de historial"""
+        control_id = None
+        selected_control = self.filter_control.get()
+        if hasattr(self, 'control_filter_mapping') and selected_control in self.control_filter_mapping:
+            control_id = self.control_filter_mapping[selected_control]
+        
+        estado = None
+        selected_estado = self.filter_estado.get()
+        if selected_estado and selected_estado != "Todos":
+            estado = selected_estado
+        
+        return {'control_id': control_id, 'estado': estado}
+    
+    def _load_history_page(self, despues_de=None, antes_de=None) -> bool:
+        """
+        Carga una página del historial con los filtros actuales
+        
+        Returns:
+            bool: True si se mostró la página (al paginar, False si no había más resultados)
+        """
+        paginando = despues_de is not None or antes_de is not None
         try:
             # Obtener historial real desde el controlador
             response = self.ejecucion_ctrl.obtener_historial(
-                limite=100,  # Últimas 100 ejecuciones
-                incluir_detalles=False
+                limite=self.history_page_size,
+                incluir_detalles=False,
+                despues_de=despues_de,
+                antes_de=antes_de,
+                **self._history_filters()
             )
             
-            if response.get('success', False):
-                historial_data = response.get('data', [])
-                
-                for ejecucion in historial_data:
-                    # Formatear fecha para mostrar
-                    fecha_str = ""
-                    try:
-                        from datetime import datetime
-                        fecha = datetime.fromisoformat(ejecucion['fecha_ejecucion'].replace('Z', '+00:00'))
-                        fecha_str = fecha.strftime("%Y-%m-%d %H:%M:%S")
-                    except:
-                        fecha_str = ejecucion.get('fecha_ejecucion', '')[:19]
-                    
-                    # Formatear estado para mostrar
-                    estado = ejecucion.get('estado', '').upper()
-                    
-                    valores = (
-                        ejecucion.get('id', ''),
-                        ejecucion.get('control_nombre', 'N/A'),
-                        fecha_str,
-                        estado,
-                        f"{ejecucion.get('tiempo_total_ejecucion_ms', 0):.1f}",
-                        ejecucion.get('total_filas_disparadas', 0),
-                        ejecucion.get('mensaje', '')[:50] + "..." if len(ejecucion.get('mensaje', '')) > 50 else ejecucion.get('mensaje', '')
-                    )
-                    
-                    self.history_tree.insert("", "end", values=valores)
-                    
-                print(f"DEBUG - Historial cargado: {len(historial_data)} ejecuciones")
-            else:
+            if not response.get('success', False):
                 error_msg = response.get('error', 'Error al obtener historial')
                 print(f"DEBUG - Error obteniendo historial: {error_msg}")
                 # Si hay error, mostrar mensaje en el historial
+                self._clear_history_tree()
                 self.history_tree.insert("", "end", values=("", "Error", "", "ERROR", "", "", error_msg))
-                
-        except Exception as e:
-            print(f"DEBUG - Excepción en refresh_history: {e}")
-            import traceback
-            traceback.print_exc()
-            # Si hay excepción, mostrar mensaje en el historial
-            self.history_tree.insert("", "end", values=("", "Error", "", "ERROR", "", "", f"Error: {str(e)}"))
-    
-    def filter_history(self, event=None):
-        """Filtra el historial según los criterios seleccionados"""
-        try:
-            # Obtener valores de los filtros
-            selected_control = self.filter_control.get()
-            selected_estado = self.filter_estado.get()
-            
-            print(f"DEBUG - Filtrando historial: Control={selected_control}, Estado={selected_estado}")
+                return False
             
-            # Obtener el ID del control seleccionado
-            control_id = None
-            if hasattr(self, 'control_filter_mapping') and selected_control in self.control_filter_mapping:
-                control_id = self.control_filter_mapping[selected_control]
+            historial_data = response.get('data', [])
+            if paginando and not historial_data:
+                return False
             
-            # Preparar estado para el filtro
-            estado = None
-            if selected_estado and selected_estado != "Todos":
-                estado = selected_estado
-            
-            # Limpiar la vista
-            for item in self.history_tree.get_children():
-                self.history_tree.delete(item)
-            
-            # Obtener historial con filtros
-            response = self.ejecucion_ctrl.obtener_historial(
-                control_id=control_id,
-                estado=estado,
-                limite=100  # Aumentar límite para ver más resultados
-            )
-            
-            if response.get('success', False):
-                historial_data = response.get('data', [])
+            self._clear_history_tree()
+            for ejecucion in historial_data:
+                # Formatear fecha para mostrar
+                fecha_str = ""
+                try:
+                    from datetime import datetime
+                    fecha = datetime.fromisoformat(ejecucion['fecha_ejecucion'].replace('Z', '+00:00'))
+                    fecha_str = fecha.strftime("%Y-%m-%d %H:%M:%S")
+                except:
+                    fecha_str = ejecucion.get('fecha_ejecucion', '')[:19]
                 
-                for ejecucion in historial_data:
-                    self.history_tree.insert("", "end", values=(
-                        ejecucion.get('id', ''),
-                        ejecucion.get('control_nombre', ''),
-                        ejecucion.get('fecha_ejecucion', ''),
-                        ejecucion.get('estado', ''),
-                        ejecucion.get('tiempo_ejecucion_ms', ''),
-                        ejecucion.get('filas_disparo', ''),
-                        ejecucion.get('mensaje', '')
-                    ))
+                # Formatear estado para mostrar
+                estado = ejecucion.get('estado', '').upper()
                 
-                print(f"DEBUG - Historial filtrado: {len(historial_data)} ejecuciones")
-            else:
-                print(f"DEBUG - Error filtrando historial: {response.get('error', '')}")
+                valores = (
+                    ejecucion.get('id', ''),
+                    ejecucion.get('control_nombre', 'N/A'),
+                    fecha_str,
+                    estado,
+                    f"{ejecucion.get('tiempo_total_ejecucion_ms', 0):.1f}",
+                    ejecucion.get('total_filas_disparadas', 0),
+                    ejecucion.get('mensaje', '')[:50] + "..." if len(ejecucion.get('mensaje', '')) > 50 else ejecucion.get('mensaje', '')
+                )
+                
+                self.history_tree.insert("", "end", values=valores)
+            
+            self.history_cursors = (response.get('cursor_anterior'), response.get('cursor_siguiente'))
+            self.history_has_next = len(historial_data) >= self.history_page_size
+            self._update_history_navigation()
+            print(f"DEBUG - Historial cargado: {len(historial_data)} ejecuciones")
+            return True
                 
         except Exception as e:
-            print(f"DEBUG - Error en filter_history: {e}")
+            print(f"DEBUG - Excepción cargando historial: {e}")
             import traceback
             traceback.print_exc()
+            # Si hay excepción, mostrar mensaje en el historial
+            self._clear_history_tree()
+            self.history_tree.insert("", "end", values=("", "Error", "", "ERROR", "", "", f"Error: {str(e)}"))
+            return False
+    
+    def _clear_history_tree(self):
+        """Limpia la lista del historial"""
+        for item in self.history_tree.get_children():
+            self.history_tree.delete(item)
+    
+    def _update_history_navigation(self):
+        """Actualiza la página mostrada y habilita los botones de navegación"""
+        self.history_page_label.config(text=f"Página {self.history_page}")
+        self.history_prev_button.state(["!disabled"] if self.history_page > 1 else ["disabled"])
+        self.history_next_button.state(["!disabled"] if self.history_has_next else ["disabled"])
     
     def clear_filters(self):
         """Limpia todos los filtros y recarga el historial completo"""
@@ -1265,7 +1303,8 @@ Mensaje: {mensaje}"""
                 sql=sql_sentence,
                 descripcion=consulta_info.get('descripcion', ''),
                 conexion_id=conexion_id,
-                activa=True
+                activa=True,
+                max_filas=consulta_info.get('max_filas')
             )
             
             # Debug: mostrar datos de conexión
@@ -1351,7 +1390,7 @@ Mensaje: {mensaje}"""
             tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
             
             # Crear Treeview para mostrar datos
-            columns = list(resultado.datos[0].keys()) if resultado.datos else []
+            columns = resultado.columnas
             tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
             
             # Configurar columnas con mejor ancho
@@ -1391,6 +1430,8 @@ Mensaje: {mensaje}"""
             
             # Información adicional
             info_text = f"Mostrando {min(len(resultado.datos), 100)} filas de {len(resultado.datos)} totales"
+            if getattr(resultado, 'truncado', False):
+                info_text += " (resultado limitado por el máximo de filas de la consulta)"
             if len(columns) > 10:
                 info_text += f" - {len(columns)} columnas (use scroll horizontal para ver todas)"
             
@@ -1601,6 +1642,11 @@ Mensaje: {mensaje}"""
         programaciones_window = ProgramacionesWindow(self.root, self.programacion_ctrl, self.control_ctrl)
         programaciones_window.show()
     
+    def close_window(self):
+        """Cierra la ventana tras entregar los reportes pendientes y liberar el pool de procesos"""
+        self.generador_reportes.cerrar()
+        self.root.destroy()
+    
     def run(self):
         """Inicia la aplicación"""
         self.root.mainloop()
@@ -9,6 +9,8 @@ from tkinter import ttk, messagebox, filedialog
 from typing import Optional, List, Dict, Any
 import os
 
+from src.domain.entities.control_referente import FormatoArchivo
+
 
 class CreateReferenteDialog:
     """Diálogo para crear nuevo referente"""
@@ -639,7 +641,8 @@ class ControlReferentesDialog:
                         "Sí" if asoc.get('activa', False) else "No",
                         fecha_str,
                         "Sí" if asoc.get('notificar_por_email', False) else "No",
-                        "Sí" if asoc.get('notificar_por_archivo', False) else "No",
+                        f"Sí ({asoc.get('formato_archivo', FormatoArchivo.XLSX.value)})"
+                        if asoc.get('notificar_por_archivo', False) else "No",
                         asoc.get('observaciones', '')
                     )
                     
@@ -796,6 +799,15 @@ class EditAsociacionDialog:
         self.archivo_notif_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(notif_frame, text="Por Archivo", variable=self.archivo_notif_var).pack(anchor="w")
         
+        formato_frame = ttk.Frame(notif_frame)
+        formato_frame.pack(anchor="w", pady=(5, 0))
+        ttk.Label(formato_frame, text="Formato:").pack(side="left")
+        self.formato_var = tk.StringVar(value=FormatoArchivo.XLSX.value)
+        ttk.Combobox(
+            formato_frame, textvariable=self.formato_var, width=8, state="readonly",
+            values=[formato.value for formato in FormatoArchivo]
+        ).pack(side="left", padx=5)
+        
         ttk.Label(frame, text="Observaciones:").grid(row=2, column=0, sticky="nw", pady=5)
         self.observaciones_text = tk.Text(frame, height=6, width=35, wrap="word")
         self.observaciones_text.grid(row=2, column=1, pady=5, sticky="ew")
@@ -828,6 +840,7 @@ class EditAsociacionDialog:
                 self.activa_var.set(data.get('activa', True))
                 self.email_notif_var.set(data.get('notificar_por_email', True))
                 self.archivo_notif_var.set(data.get('notificar_por_archivo', False))
+                self.formato_var.set(data.get('formato_archivo', FormatoArchivo.XLSX.value))
                 
                 # Cargar observaciones
                 observaciones = data.get('observaciones', '')
@@ -838,6 +851,7 @@ class EditAsociacionDialog:
                 print(f"  Activa: {data.get('activa')}")
                 print(f"  Email: {data.get('notificar_por_email')}")
                 print(f"  Archivo: {data.get('notificar_por_archivo')}")
+                print(f"  Formato: {data.get('formato_archivo')}")
                 print(f"  Observaciones: '{observaciones}'")
             else:
                 error_msg = response.get('error', 'Error al cargar datos de la asociación')
@@ -867,7 +881,8 @@ class EditAsociacionDialog:
                 activa=self.activa_var.get(),
                 notificar_por_email=self.email_notif_var.get(),
                 notificar_por_archivo=self.archivo_notif_var.get(),
-                observaciones=observaciones
+                observaciones=observaciones,
+                formato_archivo=self.formato_var.get()
             )
             
             print(f"DEBUG EditAsociacionDialog - Respuesta del controlador: {response}")
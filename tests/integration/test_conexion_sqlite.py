@@ -0,0 +1,117 @@
+"""
+Test de integración para el gestor de conexiones SQLite
+
+Verifica la reutilización de la conexión por hilo, la configuración WAL,
+el manejo de transacciones, que las lecturas no esperen a una escritura y
+que un hilo pueda cerrar sus conexiones al terminar.
+"""
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.infrastructure.database.conexion_sqlite import GestorConexionesSQLite
+
+
+class TestGestorConexionesSQLite(unittest.TestCase):
+    """Tests para GestorConexionesSQLite"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.gestor = GestorConexionesSQLite(timeout_ms=2000)
+        with self.gestor.conectar(self.db_path) as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, valor TEXT)")
+
+    def tearDown(self):
+        self.gestor.cerrar()
+        self.directorio.cleanup()
+
+    def test_reutiliza_conexion_del_hilo(self):
+        with self.gestor.conectar(self.db_path) as c1:
+            pass
+        with self.gestor.conectar(os.path.join(self.directorio.name, ".", "test.db")) as c2:
+            pass
+        self.assertIs(c1, c2)
+
+        otras = []
+        hilo = threading.Thread(target=lambda: otras.append(self.gestor._obtener(self.db_path)))
+        hilo.start()
+        hilo.join()
+        self.assertIsNot(otras[0], c1)
+
+    def test_pragmas(self):
+        with self.gestor.conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 2000)
+
+    def test_confirma_y_revierte(self):
+        with self.gestor.conectar(self.db_path) as conn:
+            conn.execute("INSERT INTO t (valor) VALUES ('a')")
+        with self.assertRaises(ValueError):
+            with self.gestor.conectar(self.db_path) as conn:
+                conn.execute("INSERT INTO t (valor) VALUES ('b')")
+                raise ValueError()
+        with self.gestor.conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT valor FROM t").fetchall(), [('a',)])
+
+    def test_bloque_anidado_conserva_row_factory(self):
+        with self.gestor.conectar(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            with self.gestor.conectar(self.db_path) as interna:
+                self.assertIsNone(interna.row_factory)
+            self.assertIs(conn.row_factory, sqlite3.Row)
+
+    def test_lectura_durante_escritura(self):
+        """Con WAL un lector de otro hilo no espera a una transacción de escritura abierta"""
+        leidas = []
+
+        def leer():
+            with self.gestor.conectar(self.db_path) as conn:
+                leidas.append(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+
+        with self.gestor.conectar(self.db_path) as conn:
+            conn.execute("INSERT INTO t (valor) VALUES ('x')")
+            hilo = threading.Thread(target=leer)
+            hilo.start()
+            hilo.join(timeout=1)
+            self.assertFalse(hilo.is_alive())
+        self.assertEqual(leidas, [0])
+
+    def test_cerrar(self):
+        with self.gestor.conectar(self.db_path) as c1:
+            pass
+        self.gestor.cerrar(self.db_path)
+        with self.gestor.conectar(self.db_path) as c2:
+            pass
+        self.assertIsNot(c1, c2)
+
+    def test_cerrar_hilo_actual(self):
+        with self.gestor.conectar(self.db_path) as principal:
+            pass
+
+        def trabajar():
+            with self.gestor.conectar(self.db_path) as conn:
+                conn.execute("INSERT INTO t (valor) VALUES ('hilo')")
+            self.gestor.cerrar_hilo_actual()
+
+        for _ in range(3):
+            hilo = threading.Thread(target=trabajar)
+            hilo.start()
+            hilo.join()
+
+        # Solo queda la conexión del hilo principal
+        self.assertEqual([conn for _, conn in self.gestor._abiertas.values()], [principal])
+        with self.gestor.conectar(self.db_path) as conn:
+            self.assertIs(conn, principal)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Test de integración para EscritorDiferidoSQLite
+
+Verifica que los resultados y programaciones encolados se escriban por
+lotes desde el hilo escritor, que la cola acotada aplique presión hacia
+atrás y que al cerrar se escriba todo lo pendiente.
+"""
+import unittest
+import sys
+import os
+import queue
+import tempfile
+import threading
+from datetime import datetime, time
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.programacion import Programacion, TipoProgramacion
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.database.escritor_diferido import EscritorDiferidoSQLite
+from src.infrastructure.repositories.sqlite_programacion_repository import SQLiteProgramacionRepository
+
+
+def crear_resultado(control_id: int = 1) -> ResultadoEjecucion:
+    return ResultadoEjecucion(
+        control_id=control_id,
+        control_nombre=f"Control {control_id}",
+        fecha_ejecucion=datetime(2024, 1, 1, 10, 0),
+        estado=EstadoEjecucion.CONTROL_DISPARADO,
+        resultado_consulta_disparo=ResultadoConsulta(
+            consulta_id=1, consulta_nombre="Disparo", sql_ejecutado="SELECT 1",
+            filas_afectadas=1, datos=[{'id': 1}]
+        )
+    )
+
+
+class TestEscritorDiferidoSQLite(unittest.TestCase):
+    """Tests para EscritorDiferidoSQLite"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.programaciones = SQLiteProgramacionRepository(self.db_path)
+        self.escritor = EscritorDiferidoSQLite(self.db_path, programacion_repository=self.programaciones,
+                                               espera_lote=0.05)
+
+    def tearDown(self):
+        self.escritor.cerrar()
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def contar(self, tabla: str) -> int:
+        with conectar(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+    def test_escribe_resultados_y_programaciones(self):
+        programacion = self.programaciones.crear(Programacion(
+            id=None, control_id=1, nombre="Diaria", descripcion="",
+            tipo_programacion=TipoProgramacion.DIARIA, activo=True, hora_ejecucion=time(10, 0),
+            fecha_inicio=None, fecha_fin=None, dias_semana=None, dias_mes=None,
+            intervalo_minutos=None, ultima_ejecucion=None, proxima_ejecucion=None
+        ))
+        resultados = [crear_resultado(i) for i in range(1, 6)]
+        for resultado in resultados:
+            self.escritor.encolar_resultado(resultado)
+        programacion.total_ejecuciones = 1
+        self.escritor.encolar_programacion(programacion)
+        programacion.total_ejecuciones = 2
+        self.escritor.encolar_programacion(programacion)
+
+        self.assertTrue(self.escritor.vaciar(timeout=5))
+
+        self.assertEqual(self.contar("resultados_ejecucion"), 5)
+        self.assertEqual(self.contar("resultados_ejecucion_datos"), 5)
+        self.assertEqual(self.contar("resumen_diario_ejecuciones"), 5)
+        self.assertTrue(all(r.id is not None for r in resultados))
+        self.assertEqual(self.programaciones.obtener_por_id(programacion.id).total_ejecuciones, 2)
+        metricas = self.escritor.obtener_metricas()
+        self.assertEqual(metricas['resultados'], 5)
+        self.assertEqual(metricas['pendientes'], 0)
+
+    def crear_programacion(self) -> Programacion:
+        return self.programaciones.crear(Programacion(
+            id=None, control_id=1, nombre="Diaria", descripcion="",
+            tipo_programacion=TipoProgramacion.DIARIA, activo=True, hora_ejecucion=time(10, 0),
+            fecha_inicio=None, fecha_fin=None, dias_semana=None, dias_mes=None,
+            intervalo_minutos=None, ultima_ejecucion=None, proxima_ejecucion=None
+        ))
+
+    def test_no_revierte_cambios_de_la_gui(self):
+        desactivada = self.crear_programacion()
+        reprogramada = self.crear_programacion()
+        # Copias del motor, cargadas antes de los cambios
+        copias = [self.programaciones.obtener_por_id(p.id) for p in (desactivada, reprogramada)]
+
+        desactivada.nombre = "Renombrada"
+        desactivada.activo = False
+        self.programaciones.actualizar(desactivada)
+        reprogramada.hora_ejecucion = time(18, 0)
+        reprogramada.proxima_ejecucion = datetime(2024, 1, 1, 18, 0)
+        self.programaciones.actualizar(reprogramada)
+
+        for copia in copias:
+            copia.marcar_ejecutado(datetime(2024, 1, 1, 10, 0, 5))
+            self.escritor.encolar_programacion(copia)
+        self.assertTrue(self.escritor.vaciar(timeout=5))
+
+        leida = self.programaciones.obtener_por_id(desactivada.id)
+        self.assertEqual((leida.nombre, leida.activo, leida.proxima_ejecucion), ("Renombrada", False, None))
+        self.assertEqual((leida.total_ejecuciones, leida.ultima_ejecucion), (1, datetime(2024, 1, 1, 10, 0, 5)))
+        leida = self.programaciones.obtener_por_id(reprogramada.id)
+        self.assertEqual((leida.hora_ejecucion, leida.proxima_ejecucion), (time(18, 0), datetime(2024, 1, 1, 18, 0)))
+        self.assertEqual(leida.total_ejecuciones, 1)
+
+        # Sin cambios en la GUI la próxima ejecución calculada por el motor sí se guarda
+        copia = self.programaciones.obtener_por_id(reprogramada.id)
+        copia.marcar_ejecutado(datetime(2024, 1, 1, 18, 0, 5))
+        self.escritor.encolar_programacion(copia)
+        self.assertTrue(self.escritor.vaciar(timeout=5))
+        self.assertEqual(self.programaciones.obtener_por_id(reprogramada.id).proxima_ejecucion,
+                         datetime(2024, 1, 2, 18, 0))
+
+    def test_lote_fallido_se_retiene_y_reintenta(self):
+        self.escritor.cerrar()
+        escritor = EscritorDiferidoSQLite(self.db_path, espera_lote=0.01, reintentos=1, pausa_retenidos=0.05)
+        original = escritor.resultado_repository._insertar
+        fallos = iter([True, True])
+        def insertar(conn, resultados):
+            if next(fallos, False):
+                raise RuntimeError("database is locked")
+            return original(conn, resultados)
+        try:
+            with mock.patch.object(escritor.resultado_repository, '_insertar', side_effect=insertar):
+                escritor.encolar_resultado(crear_resultado())
+                self.assertTrue(escritor.vaciar(timeout=5))
+                for _ in range(100):
+                    if escritor.obtener_metricas()['resultados'] == 1:
+                        break
+                    threading.Event().wait(0.02)
+        finally:
+            escritor.cerrar()
+
+        self.assertEqual(self.contar("resultados_ejecucion"), 1)
+        metricas = escritor.obtener_metricas()
+        self.assertEqual((metricas['descartados'], metricas['retenidos']), (0, 0))
+
+    def test_cerrar_escribe_pendientes(self):
+        for _ in range(50):
+            self.escritor.encolar_resultado(crear_resultado())
+        self.escritor.cerrar()
+
+        self.assertEqual(self.contar("resultados_ejecucion"), 50)
+        with self.assertRaises(RuntimeError):
+            self.escritor.encolar_resultado(crear_resultado())
+
+    def test_cola_llena(self):
+        self.escritor.cerrar()
+        escritor = EscritorDiferidoSQLite(self.db_path, capacidad=1, tamano_lote=1)
+        bloqueo = threading.Event()
+        original = escritor._confirmar_lote
+        escritor._confirmar_lote = lambda lote: (bloqueo.wait(5), original(lote))
+        try:
+            escritor.encolar_resultado(crear_resultado())  # Lo toma el escritor
+            escritor.encolar_resultado(crear_resultado())  # Ocupa la cola
+            with self.assertRaises(queue.Full):
+                escritor.encolar_resultado(crear_resultado(), timeout=0.05)
+        finally:
+            bloqueo.set()
+            escritor.cerrar()
+        self.assertEqual(self.contar("resultados_ejecucion"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Test de integración para las migraciones versionadas del esquema
+
+Verifica que una base nueva quede en la última versión, que una base
+anterior a las migraciones se complete sin perder datos (incluida la
+próxima ejecución de programaciones antiguas) y que construir repositorios
+sobre una base al día no ejecute sentencias.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, time as dt_time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.database.migraciones import (
+    MIGRACIONES, Migracion, aplicar_migraciones, asegurar_esquema, version_actual
+)
+from src.infrastructure.repositories.sqlite_conexion_repository import SQLiteConexionRepository
+from src.domain.entities.control_referente import ControlReferente, FormatoArchivo
+from src.infrastructure.repositories.sqlite_control_referente_repository import SQLiteControlReferenteRepository
+from src.infrastructure.repositories.sqlite_control_repository import SQLiteControlRepository
+from src.infrastructure.repositories.sqlite_programacion_repository import SQLiteProgramacionRepository
+from src.infrastructure.repositories.sqlite_referente_repository import SQLiteReferenteRepository
+
+ULTIMA_VERSION = max(m.version for m in MIGRACIONES)
+
+
+class TestMigraciones(unittest.TestCase):
+    """Tests para aplicar_migraciones y asegurar_esquema"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def test_base_nueva(self):
+        self.assertEqual(aplicar_migraciones(self.db_path), ULTIMA_VERSION)
+        self.assertEqual(version_actual(self.db_path), ULTIMA_VERSION)
+        with conectar(self.db_path) as conn:
+            tablas = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({'controles', 'programaciones', 'resultados_ejecucion',
+                         'resumen_diario_ejecuciones'} <= tablas)
+
+    def test_base_anterior_a_las_migraciones(self):
+        with conectar(self.db_path) as conn:
+            conn.execute("""CREATE TABLE conexiones (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            nombre TEXT UNIQUE NOT NULL, base_datos TEXT NOT NULL, servidor TEXT NOT NULL,
+                            puerto INTEGER, usuario TEXT NOT NULL, contraseña TEXT NOT NULL,
+                            tipo_motor TEXT DEFAULT 'postgresql', activa BOOLEAN DEFAULT 1)""")
+            conn.execute("""INSERT INTO conexiones (nombre, base_datos, servidor, usuario, contraseña)
+                            VALUES ('Vieja', 'db', 'srv', 'u', 'p')""")
+            conn.execute("""CREATE TABLE referentes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL,
+                            email TEXT UNIQUE NOT NULL, carpeta_red TEXT, activo BOOLEAN DEFAULT 1)""")
+            conn.execute("INSERT INTO referentes (nombre, email, carpeta_red) VALUES ('R', 'r@x', '/red')")
+
+        self.assertEqual(aplicar_migraciones(self.db_path), ULTIMA_VERSION)
+
+        conexion = SQLiteConexionRepository(self.db_path).obtener_todos()[0]
+        self.assertEqual(conexion.nombre, "Vieja")
+        self.assertEqual(conexion.driver_type, "default")
+        self.assertEqual(SQLiteReferenteRepository(self.db_path).obtener_todos()[0].path_archivos, "/red")
+
+    def test_migracion_se_aplica_una_vez(self):
+        aplicadas = []
+        migraciones = MIGRACIONES + [
+            Migracion(ULTIMA_VERSION + 1, "Prueba", lambda conn, db_path: aplicadas.append(db_path))
+        ]
+
+        aplicar_migraciones(self.db_path, migraciones)
+        aplicar_migraciones(self.db_path, migraciones)
+
+        self.assertEqual(len(aplicadas), 1)
+        self.assertEqual(version_actual(self.db_path), ULTIMA_VERSION + 1)
+
+    def test_migracion_fallida_no_avanza_version(self):
+        def fallar(conn, db_path):
+            conn.execute("CREATE TABLE temporal (x)")
+            raise RuntimeError("falla")
+
+        aplicar_migraciones(self.db_path)
+        with self.assertRaises(RuntimeError):
+            aplicar_migraciones(self.db_path, MIGRACIONES + [Migracion(ULTIMA_VERSION + 1, "Falla", fallar)])
+
+        self.assertEqual(version_actual(self.db_path), ULTIMA_VERSION)
+        with conectar(self.db_path) as conn:
+            self.assertIsNone(conn.execute("SELECT name FROM sqlite_master WHERE name = 'temporal'").fetchone())
+
+    def test_construir_repositorios_no_ejecuta_sentencias(self):
+        asegurar_esquema(self.db_path)
+        sentencias = []
+        with conectar(self.db_path) as conn:
+            conn.set_trace_callback(sentencias.append)
+        try:
+            SQLiteControlRepository(self.db_path)
+            SQLiteProgramacionRepository(self.db_path)
+            SQLiteConexionRepository(self.db_path)
+        finally:
+            with conectar(self.db_path) as conn:
+                conn.set_trace_callback(None)
+
+        self.assertEqual(sentencias, [])
+
+    def test_formato_archivo_de_asociaciones(self):
+        aplicar_migraciones(self.db_path, [m for m in MIGRACIONES if m.version < 6])
+        with conectar(self.db_path) as conn:
+            conn.execute("INSERT INTO control_referente (control_id, referente_id) VALUES (1, 1)")
+
+        aplicar_migraciones(self.db_path)
+
+        repo = SQLiteControlReferenteRepository(self.db_path)
+        anterior = repo.obtener_por_control(1)[0]
+        self.assertEqual(anterior.formato_archivo, FormatoArchivo.XLSX)
+        anterior.formato_archivo = FormatoArchivo.JSONL
+        repo.guardar(anterior)
+        repo.guardar(ControlReferente(control_id=1, referente_id=2, formato_archivo=FormatoArchivo.CSV_GZ))
+        self.assertEqual([a.formato_archivo for a in sorted(repo.obtener_por_control(1), key=lambda a: a.id)],
+                         [FormatoArchivo.JSONL, FormatoArchivo.CSV_GZ])
+
+    def test_completa_proxima_ejecucion_de_programaciones_antiguas(self):
+        aplicar_migraciones(self.db_path, [m for m in MIGRACIONES if m.version < 3])
+        with conectar(self.db_path) as conn:
+            conn.executemany(
+                """INSERT INTO programaciones (control_id, nombre, tipo_programacion, activo, hora_ejecucion,
+                                               dias_semana, intervalo_minutos, fecha_creacion)
+                   VALUES (1, ?, ?, ?, '08:30:00', ?, ?, '2024-01-01T00:00:00')""",
+                [("Diaria", "diaria", 1, None, None), ("Semanal", "semanal", 1, "[1, 5]", None),
+                 ("Inactiva", "intervalo", 0, None, 15)]
+            )
+
+        aplicar_migraciones(self.db_path)
+
+        with conectar(self.db_path) as conn:
+            proximas = dict(conn.execute("SELECT nombre, proxima_ejecucion FROM programaciones").fetchall())
+        self.assertIsNone(proximas["Inactiva"])
+        for nombre in ("Diaria", "Semanal"):
+            proxima = datetime.fromisoformat(proximas[nombre])
+            self.assertEqual(proxima.time(), dt_time(8, 30))
+            self.assertGreater(proxima, datetime.now())
+        self.assertIn(datetime.fromisoformat(proximas["Semanal"]).isoweekday(), (1, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
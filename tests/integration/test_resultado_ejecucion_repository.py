@@ -0,0 +1,381 @@
+"""
+Test de integración para SQLiteResultadoEjecucionRepository
+
+Verifica que las filas de las consultas se guarden aparte, que los
+listados del historial no las carguen y que se lean a pedido, y la
+búsqueda paginada por cursor con filtros combinados, las estadísticas
+agregadas en la base y el resumen diario mantenido al guardar.
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.database.migraciones import MIGRACIONES, aplicar_migraciones
+from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
+from src.application.use_cases.obtener_historial_ejecucion_use_case import ObtenerHistorialEjecucionUseCase
+
+
+def crear_resultado() -> ResultadoEjecucion:
+    return ResultadoEjecucion(
+        control_id=1,
+        control_nombre="Control",
+        fecha_ejecucion=datetime(2024, 1, 1, 10, 0),
+        estado=EstadoEjecucion.CONTROL_DISPARADO,
+        resultado_consulta_disparo=ResultadoConsulta(
+            consulta_id=1, consulta_nombre="Disparo", sql_ejecutado="SELECT 1",
+            filas_afectadas=2, datos=[{'id': 1}, {'id': 2}]
+        ),
+        resultados_consultas_disparadas=[
+            ResultadoConsulta(consulta_id=2, consulta_nombre="Vacía", sql_ejecutado="SELECT 2", filas_afectadas=0),
+            ResultadoConsulta(consulta_id=3, consulta_nombre="Detalle", sql_ejecutado="SELECT 3",
+                              filas_afectadas=1, datos=[{'a': 'x', 'b': 2}], truncado=True)
+        ]
+    )
+
+
+class TestSQLiteResultadoEjecucionRepository(unittest.TestCase):
+    """Tests para la carga a pedido de las filas de los resultados"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteResultadoEjecucionRepository(self.db_path)
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def test_listado_sin_filas(self):
+        self.repo.guardar(crear_resultado())
+        resultado = self.repo.obtener_todos()[0]
+
+        self.assertFalse(resultado.datos_cargados)
+        self.assertEqual(resultado.resultado_consulta_disparo.filas_afectadas, 2)
+        self.assertEqual(len(resultado.resultado_consulta_disparo.datos), 0)
+        self.assertEqual(resultado.resultados_consultas_disparadas[1].consulta_nombre, "Detalle")
+
+        with conectar(self.db_path) as conn:
+            resumen = conn.execute("SELECT resultados_consultas_disparadas FROM resultados_ejecucion").fetchone()[0]
+        self.assertNotIn('"filas"', resumen)
+
+    def test_carga_a_pedido(self):
+        self.repo.guardar(crear_resultado())
+        resultado = self.repo.cargar_datos(self.repo.obtener_todos()[0])
+
+        self.assertTrue(resultado.datos_cargados)
+        self.assertEqual(list(resultado.resultado_consulta_disparo.datos), [{'id': 1}, {'id': 2}])
+        self.assertEqual(len(resultado.resultados_consultas_disparadas[0].datos), 0)
+        detalle = resultado.resultados_consultas_disparadas[1]
+        self.assertEqual(detalle.datos[0], {'a': 'x', 'b': 2})
+        self.assertTrue(detalle.datos.truncado)
+
+    def test_obtener_por_id_incluye_filas(self):
+        guardado = self.repo.guardar(crear_resultado())
+        resultado = self.repo.obtener_por_id(guardado.id)
+        self.assertTrue(resultado.datos_cargados)
+        self.assertEqual(len(resultado.resultado_consulta_disparo.datos), 2)
+
+    def test_eliminar_borra_filas(self):
+        guardado = self.repo.guardar(crear_resultado())
+        self.repo.eliminar(guardado.id)
+        with conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM resultados_ejecucion_datos").fetchone()[0], 0)
+
+    def test_migra_filas_en_linea(self):
+        """Los resultados guardados con las filas dentro del JSON se separan al migrar"""
+        disparo = {'consulta_id': 1, 'consulta_nombre': 'Disparo', 'sql_ejecutado': 'SELECT 1',
+                   'filas_afectadas': 1, 'columnas': ['id'], 'filas': [[7]]}
+        disparadas = [{'consulta_id': 2, 'consulta_nombre': 'Vieja', 'sql_ejecutado': 'SELECT 2',
+                       'filas_afectadas': 1, 'datos': [{'n': 5}]}]
+        gestor_conexiones.cerrar(self.db_path)
+        os.remove(self.db_path)
+        # Base anterior a la migración que separa las filas
+        aplicar_migraciones(self.db_path, [m for m in MIGRACIONES if m.version == 1])
+        with conectar(self.db_path) as conn:
+            conn.execute(
+                """INSERT INTO resultados_ejecucion (control_id, control_nombre, fecha_ejecucion, estado,
+                   resultado_consulta_disparo, resultados_consultas_disparadas)
+                   VALUES (1, 'Control', '2024-01-01T00:00:00', 'exitoso', ?, ?)""",
+                (json.dumps(disparo), json.dumps(disparadas))
+            )
+
+        aplicar_migraciones(self.db_path)
+        repo = SQLiteResultadoEjecucionRepository(self.db_path)
+        with conectar(self.db_path) as conn:
+            resumen = conn.execute("SELECT resultado_consulta_disparo FROM resultados_ejecucion").fetchone()[0]
+        self.assertNotIn('"filas"', resumen)
+
+        resultado = repo.cargar_datos(repo.obtener_todos()[0])
+        self.assertEqual(list(resultado.resultado_consulta_disparo.datos), [{'id': 7}])
+        self.assertEqual(list(resultado.resultados_consultas_disparadas[0].datos), [{'n': 5}])
+
+    def contenidos(self):
+        with conectar(self.db_path) as conn:
+            return conn.execute(
+                "SELECT referencias, tamano, length(contenido) FROM contenidos_datos ORDER BY referencias"
+            ).fetchall()
+
+    def test_contenido_repetido_se_guarda_una_vez(self):
+        primero = self.repo.guardar(crear_resultado())
+        segundo = self.repo.guardar(crear_resultado())
+        # Dos contenidos distintos (disparo y detalle), cada uno referenciado por ambas ejecuciones
+        self.assertEqual([r for r, _, _ in self.contenidos()], [2, 2])
+
+        self.repo.eliminar(primero.id)
+        self.assertEqual([r for r, _, _ in self.contenidos()], [1, 1])
+        self.assertEqual(len(self.repo.obtener_por_id(segundo.id).resultado_consulta_disparo.datos), 2)
+
+        self.repo.eliminar(segundo.id)
+        self.assertEqual(self.contenidos(), [])
+
+    def test_contenido_comprimido(self):
+        resultado = crear_resultado()
+        resultado.resultado_consulta_disparo.datos = [{'id': i, 'texto': 'abc' * 20} for i in range(500)]
+        guardado = self.repo.guardar(resultado)
+
+        _, tamano, comprimido = max(self.contenidos(), key=lambda c: c[1])
+        self.assertLess(comprimido * 10, tamano)
+        self.assertEqual(self.repo.obtener_por_id(guardado.id).resultado_consulta_disparo.datos[499],
+                         {'id': 499, 'texto': 'abc' * 20})
+
+    def test_migra_datos_a_contenido_comprimido(self):
+        gestor_conexiones.cerrar(self.db_path)
+        os.remove(self.db_path)
+        # Base anterior, con el JSON de las filas en texto en la tabla de datos
+        aplicar_migraciones(self.db_path, [m for m in MIGRACIONES if m.version < 5])
+        with conectar(self.db_path) as conn:
+            for id_ in (1, 2):
+                conn.execute(
+                    """INSERT INTO resultados_ejecucion (id, control_id, control_nombre, fecha_ejecucion, estado,
+                       resultado_consulta_disparo, resultados_consultas_disparadas)
+                       VALUES (?, 1, 'Control', '2024-01-01T00:00:00', 'exitoso', ?, '[]')""",
+                    (id_, json.dumps({'consulta_id': 1, 'filas_afectadas': 1}))
+                )
+                conn.execute(
+                    "INSERT INTO resultados_ejecucion_datos (resultado_id, posicion, datos) VALUES (?, 0, ?)",
+                    (id_, '{"columnas": ["id"], "filas": [[7]]}')
+                )
+
+        aplicar_migraciones(self.db_path)
+
+        self.assertEqual([r for r, _, _ in self.contenidos()], [2])
+        self.assertEqual(list(self.repo.obtener_por_id(2).resultado_consulta_disparo.datos), [{'id': 7}])
+
+
+
+class TestBusquedaPaginada(unittest.TestCase):
+    """Tests para buscar() con filtros combinados y cursores"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteResultadoEjecucionRepository(self.db_path)
+        inicio = datetime(2024, 1, 1)
+        estados = [EstadoEjecucion.EXITOSO, EstadoEjecucion.CONTROL_DISPARADO]
+        # 20 ejecuciones: controles 1 y 2 alternados; dos ejecuciones por minuto (misma fecha)
+        for i in range(20):
+            self.repo.guardar(ResultadoEjecucion(
+                control_id=1 + i % 2,
+                control_nombre=f"Control {1 + i % 2}",
+                fecha_ejecucion=inicio + timedelta(minutes=i // 2),
+                estado=estados[(i // 2) % 2]
+            ))
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def _claves(self, resultados):
+        return [(r.fecha_ejecucion, r.id) for r in resultados]
+
+    def test_paginas_hacia_adelante_y_atras(self):
+        todos = self._claves(self.repo.buscar(limite=None))
+        self.assertEqual(todos, sorted(todos, reverse=True))
+
+        pagina1 = self.repo.buscar(limite=7)
+        pagina2 = self.repo.buscar(limite=7, despues_de=self._claves(pagina1)[-1])
+        pagina3 = self.repo.buscar(limite=7, despues_de=self._claves(pagina2)[-1])
+        self.assertEqual(self._claves(pagina1 + pagina2 + pagina3), todos)
+
+        anterior = self.repo.buscar(limite=7, antes_de=self._claves(pagina3)[0])
+        self.assertEqual(self._claves(anterior), self._claves(pagina2))
+
+    def test_filtros_combinados(self):
+        resultados = self.repo.buscar(
+            control_id=2, estado=EstadoEjecucion.CONTROL_DISPARADO.value,
+            fecha_desde=datetime(2024, 1, 1, 0, 2), limite=None
+        )
+        self.assertEqual(len(resultados), 4)
+        for r in resultados:
+            self.assertEqual(r.control_id, 2)
+            self.assertEqual(r.estado, EstadoEjecucion.CONTROL_DISPARADO)
+            self.assertGreaterEqual(r.fecha_ejecucion, datetime(2024, 1, 1, 0, 2))
+
+    def test_usa_indice(self):
+        with conectar(self.db_path) as conn:
+            plan = conn.execute(
+                """EXPLAIN QUERY PLAN SELECT * FROM resultados_ejecucion
+                   WHERE control_id = ? AND estado = ? ORDER BY fecha_ejecucion DESC, id DESC LIMIT 10""",
+                (1, 'exitoso')
+            ).fetchall()
+        detalle = " ".join(str(fila[-1]) for fila in plan)
+        self.assertIn("idx_resultados_control_estado_fecha", detalle)
+        self.assertNotIn("TEMP B-TREE", detalle)
+
+
+
+class TestEstadisticas(unittest.TestCase):
+    """Tests para las estadísticas calculadas con SQL"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteResultadoEjecucionRepository(self.db_path)
+        inicio = datetime(2024, 1, 1)
+        # Control 1: 20 ejecuciones de 1..20 ms; la última con error
+        for i in range(20):
+            self.repo.guardar(ResultadoEjecucion(
+                control_id=1, control_nombre="Uno", fecha_ejecucion=inicio + timedelta(minutes=i),
+                estado=EstadoEjecucion.ERROR if i == 19 else EstadoEjecucion.EXITOSO,
+                tiempo_total_ejecucion_ms=float(i + 1)
+            ))
+        # Control 2: dos ejecuciones, una fuera del rango consultado
+        self.repo.guardar(ResultadoEjecucion(
+            control_id=2, control_nombre="Dos", fecha_ejecucion=inicio + timedelta(hours=2),
+            estado=EstadoEjecucion.CONTROL_DISPARADO, tiempo_total_ejecucion_ms=50.0
+        ))
+        self.repo.guardar(ResultadoEjecucion(
+            control_id=2, control_nombre="Dos", fecha_ejecucion=inicio + timedelta(days=5),
+            estado=EstadoEjecucion.SIN_DATOS, tiempo_total_ejecucion_ms=0.0
+        ))
+        self.desde = inicio
+        self.hasta = inicio + timedelta(days=1)
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def test_estadisticas_globales(self):
+        estadisticas = self.repo.obtener_estadisticas(self.desde, self.hasta)
+        self.assertEqual(estadisticas['total_ejecuciones'], 21)
+        self.assertEqual(estadisticas['por_estado'], {'exitoso': 19, 'error': 1, 'control_disparado': 1})
+        self.assertAlmostEqual(estadisticas['tiempo_promedio_ms'], (210 + 50) / 21)
+        self.assertEqual(estadisticas['tiempo_p95_ms'], 20.0)
+        self.assertEqual(estadisticas['ultima_ejecucion'], self.desde + timedelta(hours=2))
+
+    def test_rango_vacio(self):
+        estadisticas = self.repo.obtener_estadisticas(datetime(2000, 1, 1), datetime(2000, 1, 2))
+        self.assertEqual(estadisticas['total_ejecuciones'], 0)
+        self.assertIsNone(estadisticas['ultima_ejecucion'])
+
+    def test_resumen_por_control(self):
+        resumenes = self.repo.obtener_resumen_por_control(self.desde, self.hasta)
+        self.assertEqual([r['control_id'] for r in resumenes], [2, 1])
+
+        uno = resumenes[1]
+        self.assertEqual(uno['total_ejecuciones'], 20)
+        self.assertEqual(uno['ultimo_estado'], 'error')
+        self.assertEqual(uno['tiempo_p95_ms'], 19.0)
+        self.assertAlmostEqual(uno['tiempo_promedio_ms'], 10.5)
+
+    def test_caso_de_uso_cuenta_estados(self):
+        """Los estados se comparan con los valores guardados (en minúsculas)"""
+        caso_uso = ObtenerHistorialEjecucionUseCase(self.repo, None)
+        estadisticas = caso_uso.obtener_estadisticas(self.desde, self.hasta)
+        self.assertEqual(estadisticas.ejecuciones_exitosas, 19)
+        self.assertEqual(estadisticas.ejecuciones_con_error, 1)
+        self.assertEqual(estadisticas.controles_disparados, 1)
+
+        resumen = caso_uso.obtener_resumen_por_control(self.desde, self.hasta)[1]
+        self.assertAlmostEqual(resumen.tasa_exito, 95.0)
+
+
+
+class TestResumenDiario(unittest.TestCase):
+    """Tests para el resumen diario por control"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteResultadoEjecucionRepository(self.db_path)
+        inicio = datetime(2024, 3, 1, 8, 0)
+        # Tres días, 4 ejecuciones por día del control 1 y una del control 2
+        for dia in range(3):
+            for i in range(4):
+                self.repo.guardar(ResultadoEjecucion(
+                    control_id=1, control_nombre="Uno",
+                    fecha_ejecucion=inicio + timedelta(days=dia, hours=i),
+                    estado=EstadoEjecucion.CONTROL_DISPARADO if i == 3 else EstadoEjecucion.EXITOSO,
+                    tiempo_total_ejecucion_ms=float(10 * (i + 1)),
+                    total_filas_disparadas=i
+                ))
+            self.repo.guardar(ResultadoEjecucion(
+                control_id=2, control_nombre="Dos", fecha_ejecucion=inicio + timedelta(days=dia),
+                estado=EstadoEjecucion.ERROR
+            ))
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def _resumen(self):
+        return self.repo.obtener_resumen_diario(date(2024, 3, 1), date(2024, 3, 31))
+
+    def test_se_actualiza_al_guardar(self):
+        dias = self._resumen()
+        self.assertEqual(len(dias), 6)
+
+        dia = next(d for d in dias if d['control_id'] == 1 and d['dia'] == date(2024, 3, 2))
+        self.assertEqual(dia['total_ejecuciones'], 4)
+        self.assertEqual(dia['por_estado']['exitoso'], 3)
+        self.assertEqual(dia['por_estado']['control_disparado'], 1)
+        self.assertEqual(dia['tiempo_suma_ms'], 100.0)
+        self.assertEqual((dia['tiempo_min_ms'], dia['tiempo_max_ms']), (10.0, 40.0))
+        self.assertEqual(dia['total_filas_disparadas'], 6)
+        self.assertEqual(dia['ultimo_estado'], 'control_disparado')
+
+        sin_tiempo = next(d for d in dias if d['control_id'] == 2)
+        self.assertEqual(sin_tiempo['ejecuciones_con_tiempo'], 0)
+        self.assertIsNone(sin_tiempo['tiempo_min_ms'])
+
+    def test_reconstruir_igual_al_incremental(self):
+        incremental = self._resumen()
+        with conectar(self.db_path) as conn:
+            conn.execute("DELETE FROM resumen_diario_ejecuciones")
+
+        self.assertEqual(self.repo.reconstruir_resumen_diario(), 6)
+        self.assertEqual(self._resumen(), incremental)
+
+    def test_rango_largo_lee_solo_el_resumen(self):
+        caso_uso = ObtenerHistorialEjecucionUseCase(self.repo, None, dias_detalle=1)
+        # Sin detalle: las estadísticas siguen disponibles desde el resumen
+        with conectar(self.db_path) as conn:
+            conn.execute("DELETE FROM resultados_ejecucion")
+
+        estadisticas = caso_uso.obtener_estadisticas(datetime(2024, 2, 1), datetime(2024, 4, 1))
+        self.assertEqual(estadisticas.total_ejecuciones, 15)
+        self.assertEqual(estadisticas.ejecuciones_exitosas, 9)
+        self.assertEqual(estadisticas.ejecuciones_con_error, 3)
+        self.assertAlmostEqual(estadisticas.tiempo_promedio_ejecucion_ms, 25.0)
+        # El resumen diario no permite calcular el p95: se informa como no disponible
+        self.assertIsNone(estadisticas.tiempo_p95_ejecucion_ms)
+
+        resumenes = caso_uso.obtener_resumen_por_control(datetime(2024, 2, 1), datetime(2024, 4, 1))
+        self.assertEqual([r.control_id for r in resumenes], [1, 2])
+        self.assertEqual(resumenes[0].ultimo_estado, 'control_disparado')
+        self.assertTrue(all(r.tiempo_p95_ms is None for r in resumenes))
+
+        tendencia = caso_uso.obtener_tendencia_diaria(datetime(2024, 2, 1), datetime(2024, 4, 1))
+        self.assertEqual([d.total_ejecuciones for d in tendencia], [5, 5, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
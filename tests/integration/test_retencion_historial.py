@@ -0,0 +1,145 @@
+"""
+Test de integración para la retención del historial de ejecuciones
+
+Verifica la prioridad de la política (control, estado, defecto), el borrado
+por lotes, que se conserve el resumen diario y que se recupere el espacio
+liberado con auto_vacuum incremental.
+"""
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.politica_retencion import PoliticaRetencion
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.database.migraciones import aplicar_migraciones
+from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
+from src.infrastructure.services.retencion_historial_service import RetencionHistorialService
+
+AHORA = datetime(2024, 6, 1, 12, 0)
+
+
+class TestPoliticaRetencion(unittest.TestCase):
+    """Tests para PoliticaRetencion"""
+
+    def test_prioridad(self):
+        politica = PoliticaRetencion.desde_dict({
+            'dias_por_defecto': 90,
+            'dias_por_estado': {'ERROR': 180},
+            'dias_por_control': {'7': None}
+        })
+
+        self.assertEqual(politica.dias_para(1, 'exitoso'), 90)
+        self.assertEqual(politica.dias_para(1, 'error'), 180)
+        self.assertIsNone(politica.dias_para(7, 'error'))
+
+    def test_dias_negativos(self):
+        with self.assertRaises(ValueError):
+            PoliticaRetencion(dias_por_defecto=-1)
+
+
+class TestRetencionHistorialService(unittest.TestCase):
+    """Tests para RetencionHistorialService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteResultadoEjecucionRepository(self.db_path)
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def guardar(self, control_id: int, dias: int, estado=EstadoEjecucion.EXITOSO, filas: int = 0,
+                texto: str = 'x'):
+        self.repo.guardar(ResultadoEjecucion(
+            control_id=control_id,
+            control_nombre=f"Control {control_id}",
+            fecha_ejecucion=AHORA - timedelta(days=dias),
+            estado=estado,
+            resultado_consulta_disparo=ResultadoConsulta(
+                consulta_id=1, consulta_nombre="Disparo", sql_ejecutado="SELECT 1",
+                filas_afectadas=filas, datos=[{'texto': texto * 200, 'n': i} for i in range(filas)]
+            )
+        ))
+
+    def contar(self, tabla: str) -> int:
+        with conectar(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+    def test_aplica_politica_por_lotes(self):
+        for _ in range(5):
+            self.guardar(1, 100)
+        self.guardar(1, 10)
+        self.guardar(1, 100, EstadoEjecucion.ERROR)
+        self.guardar(2, 400)
+
+        politica = PoliticaRetencion(dias_por_defecto=30, dias_por_estado={'error': 180},
+                                     dias_por_control={2: None})
+        servicio = RetencionHistorialService(self.db_path, politica, tamano_lote=2, pausa_entre_lotes=0)
+        resultado = servicio.depurar(ahora=AHORA)
+
+        self.assertEqual(resultado.ejecuciones_eliminadas, 5)
+        self.assertEqual(resultado.lotes, 3)
+        with conectar(self.db_path) as conn:
+            restantes = conn.execute(
+                "SELECT control_id, estado FROM resultados_ejecucion ORDER BY control_id, estado"
+            ).fetchall()
+        self.assertEqual(restantes, [(1, 'error'), (1, 'exitoso'), (2, 'exitoso')])
+        # Las métricas de los días depurados siguen en el resumen diario
+        self.assertEqual(self.contar("resumen_diario_ejecuciones"), 3)
+
+    def test_recupera_espacio(self):
+        for _ in range(20):
+            self.guardar(1, 100, filas=200)
+
+        resultado = RetencionHistorialService(self.db_path, pausa_entre_lotes=0).depurar(ahora=AHORA)
+
+        self.assertEqual(resultado.ejecuciones_eliminadas, 20)
+        self.assertEqual(self.contar("resultados_ejecucion_datos"), 0)
+        self.assertGreater(resultado.bytes_recuperados, 0)
+        with conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_activa_auto_vacuum_en_base_existente(self):
+        gestor_conexiones.cerrar(self.db_path)
+        os.remove(self.db_path)
+        # Base creada sin auto_vacuum, como las anteriores a la política
+        sqlite3.connect(self.db_path).close()
+        with conectar(self.db_path) as conn:
+            conn.execute("PRAGMA auto_vacuum = NONE")
+            conn.execute("VACUUM")
+        aplicar_migraciones(self.db_path)
+        # Datos distintos: el contenido deduplicado no liberaría páginas al depurar
+        for i in range(10):
+            self.guardar(1, 100, filas=2000, texto=str(i))
+
+        servicio = RetencionHistorialService(self.db_path, pausa_entre_lotes=0)
+        resultado = servicio.depurar(ahora=AHORA)
+
+        # La depuración del motor no reescribe el archivo: la conversión es un paso aparte
+        self.assertEqual(resultado.bytes_recuperados, 0)
+        with conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+
+        self.assertGreater(servicio.activar_auto_vacuum(), 0)
+        with conectar(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(servicio.activar_auto_vacuum(), 0)
+
+    def test_sin_historial(self):
+        servicio = RetencionHistorialService(os.path.join(self.directorio.name, "vacia.db"))
+        try:
+            self.assertEqual(servicio.depurar().ejecuciones_eliminadas, 0)
+        finally:
+            gestor_conexiones.cerrar(servicio.db_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test de integración para SQLiteControlRepository
+
+Verifica que las listas de IDs de un control se guarden en las tablas de
+relación conservando el orden, que se migren desde las columnas JSON de
+bases anteriores y que los triggers borren las relaciones huérfanas.
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.control import Control
+from src.domain.entities.parametro import Parametro
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.database.migraciones import MIGRACIONES, aplicar_migraciones
+from src.infrastructure.repositories.sqlite_control_repository import SQLiteControlRepository
+from src.infrastructure.repositories.sqlite_parametro_repository import SQLiteParametroRepository
+
+
+class TestSQLiteControlRepository(unittest.TestCase):
+    """Tests para SQLiteControlRepository"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteControlRepository(self.db_path)
+        self.parametros = SQLiteParametroRepository(self.db_path)
+        self.p1 = self.parametros.guardar(Parametro(nombre="desde"))
+        self.p2 = self.parametros.guardar(Parametro(nombre="hasta"))
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def contar(self, tabla: str) -> int:
+        with conectar(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+    def test_guarda_listas_en_orden(self):
+        control = self.repo.guardar(Control(
+            nombre="Control", parametros_ids=[self.p2.id, self.p1.id],
+            consultas_a_disparar_ids=[3, 1, 2], referentes_ids=[5]
+        ))
+
+        leido = self.repo.obtener_por_id(control.id)
+        self.assertEqual(leido.parametros_ids, [self.p2.id, self.p1.id])
+        self.assertEqual(leido.consultas_a_disparar_ids, [3, 1, 2])
+        self.assertEqual(leido.referentes_ids, [5])
+        self.assertEqual([p.nombre for p in self.parametros.obtener_por_control(control.id)], ["hasta", "desde"])
+
+        leido.consultas_a_disparar_ids = [2]
+        self.repo.guardar(leido)
+        self.assertEqual(self.repo.obtener_por_id(control.id).consultas_a_disparar_ids, [2])
+        self.assertEqual(self.contar("controles_consultas_disparar"), 1)
+
+    def test_obtener_todos_y_busqueda_inversa(self):
+        a = self.repo.guardar(Control(nombre="A", parametros_ids=[self.p1.id]))
+        self.repo.guardar(Control(nombre="B", parametros_ids=[self.p2.id]))
+        c = self.repo.guardar(Control(nombre="C", parametros_ids=[self.p1.id, self.p2.id]))
+
+        todos = self.repo.obtener_todos()
+        self.assertEqual([len(control.parametros_ids) for control in todos], [1, 1, 2])
+        self.assertEqual([control.id for control in self.repo.obtener_por_parametro(self.p1.id)], [a.id, c.id])
+
+    def test_triggers_borran_relaciones(self):
+        a = self.repo.guardar(Control(nombre="A", parametros_ids=[self.p1.id, self.p2.id], referentes_ids=[1]))
+        b = self.repo.guardar(Control(nombre="B", parametros_ids=[self.p1.id]))
+
+        self.parametros.eliminar(self.p1.id)
+        self.assertEqual(self.repo.obtener_por_id(a.id).parametros_ids, [self.p2.id])
+        self.assertEqual(self.repo.obtener_por_id(b.id).parametros_ids, [])
+
+        self.repo.eliminar(a.id)
+        self.assertEqual(self.contar("controles_parametros"), 0)
+        self.assertEqual(self.contar("controles_referentes"), 0)
+
+    def test_migra_columnas_json(self):
+        gestor_conexiones.cerrar(self.db_path)
+        os.remove(self.db_path)
+        # Base en la versión anterior, con las listas como arrays JSON
+        aplicar_migraciones(self.db_path, [m for m in MIGRACIONES if m.version < 4])
+        with conectar(self.db_path) as conn:
+            conn.execute(
+                """INSERT INTO controles (nombre, parametros_ids, consultas_a_disparar_ids, referentes_ids)
+                   VALUES ('Viejo', '[7, 3]', '[]', 'no es json')"""
+            )
+
+        aplicar_migraciones(self.db_path)
+
+        control = self.repo.obtener_por_nombre("Viejo")
+        self.assertEqual(control.parametros_ids, [7, 3])
+        self.assertEqual(control.consultas_a_disparar_ids, [])
+        self.assertEqual(control.referentes_ids, [])
+        with conectar(self.db_path) as conn:
+            self.assertIsNone(conn.execute("SELECT parametros_ids FROM controles").fetchone()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
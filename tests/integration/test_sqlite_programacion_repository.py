@@ -0,0 +1,132 @@
+"""
+Test de integración para SQLiteProgramacionRepository
+
+Verifica la consulta de programaciones pendientes, que proxima_ejecucion
+se mantenga al día al crear, actualizar y activar o desactivar, y que la
+firma de cambios ignore el registro de ejecuciones del motor.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.programacion import Programacion, TipoProgramacion
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+from src.infrastructure.repositories.sqlite_programacion_repository import SQLiteProgramacionRepository
+
+
+class TestSQLiteProgramacionRepository(unittest.TestCase):
+    """Tests para SQLiteProgramacionRepository"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLiteProgramacionRepository(self.db_path)
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.db_path)
+        self.directorio.cleanup()
+
+    def crear(self, nombre: str = "Diaria", activo: bool = True,
+              proxima_ejecucion: datetime = None) -> Programacion:
+        return self.repo.crear(Programacion(
+            id=None, control_id=1, nombre=nombre, descripcion="",
+            tipo_programacion=TipoProgramacion.DIARIA, activo=activo, hora_ejecucion=time(10, 0),
+            fecha_inicio=None, fecha_fin=None, dias_semana=None, dias_mes=None,
+            intervalo_minutos=None, ultima_ejecucion=None, proxima_ejecucion=proxima_ejecucion
+        ))
+
+    def test_pendientes_solo_activas_y_vencidas(self):
+        corte = datetime(2024, 1, 1, 12, 0)
+        self.crear("Posterior", proxima_ejecucion=datetime(2024, 1, 1, 12, 0, 1))
+        self.crear("Vencida", proxima_ejecucion=datetime(2024, 1, 1, 11, 0))
+        self.crear("Justa", proxima_ejecucion=corte)
+        self.crear("Inactiva", activo=False, proxima_ejecucion=datetime(2024, 1, 1, 9, 0))
+
+        pendientes = self.repo.obtener_pendientes_ejecucion(corte)
+
+        self.assertEqual([p.nombre for p in pendientes], ["Vencida", "Justa"])
+
+    def test_proxima_ejecucion_al_crear(self):
+        activa = self.crear()
+        inactiva = self.crear("Inactiva", activo=False, proxima_ejecucion=datetime(2024, 1, 1, 10, 0))
+
+        proxima = self.repo.obtener_por_id(activa.id).proxima_ejecucion
+        self.assertIsNotNone(proxima)
+        self.assertEqual(proxima.time(), time(10, 0))
+        self.assertGreater(proxima, datetime.now())
+        self.assertIsNone(self.repo.obtener_por_id(inactiva.id).proxima_ejecucion)
+
+    def test_proxima_ejecucion_al_actualizar(self):
+        programacion = self.crear()
+
+        programacion.activo = False
+        self.repo.actualizar(programacion)
+        self.assertIsNone(self.repo.obtener_por_id(programacion.id).proxima_ejecucion)
+
+        programacion.activo = True
+        programacion.hora_ejecucion = time(18, 30)
+        self.repo.actualizar(programacion)
+        proxima = self.repo.obtener_por_id(programacion.id).proxima_ejecucion
+        self.assertEqual(proxima.time(), time(18, 30))
+        self.assertGreater(proxima, datetime.now())
+
+    def test_proxima_ejecucion_al_activar_y_desactivar(self):
+        programacion = self.crear(proxima_ejecucion=datetime(2024, 1, 1, 10, 0))
+
+        self.assertTrue(self.repo.activar_desactivar(programacion.id, False))
+        leida = self.repo.obtener_por_id(programacion.id)
+        self.assertFalse(leida.activo)
+        self.assertIsNone(leida.proxima_ejecucion)
+        self.assertEqual(self.repo.obtener_pendientes_ejecucion(datetime.now() + timedelta(days=2)), [])
+
+        self.assertTrue(self.repo.activar_desactivar(programacion.id, True))
+        leida = self.repo.obtener_por_id(programacion.id)
+        self.assertTrue(leida.activo)
+        self.assertGreater(leida.proxima_ejecucion, datetime.now())
+        self.assertEqual([p.id for p in self.repo.obtener_pendientes_ejecucion(leida.proxima_ejecucion)],
+                         [programacion.id])
+
+        self.assertFalse(self.repo.activar_desactivar(9999, True))
+
+    def test_firma_cambia_con_cambios_de_configuracion(self):
+        firma = self.repo.obtener_firma_cambios()
+        programacion = self.crear()
+        self.assertNotEqual(self.repo.obtener_firma_cambios(), firma)
+
+        firma = self.repo.obtener_firma_cambios()
+        programacion.nombre = "Renombrada"
+        self.repo.actualizar(programacion)
+        self.assertNotEqual(self.repo.obtener_firma_cambios(), firma)
+
+        firma = self.repo.obtener_firma_cambios()
+        self.repo.actualizar(programacion)
+        self.assertEqual(self.repo.obtener_firma_cambios(), firma)
+
+        self.repo.activar_desactivar(programacion.id, False)
+        self.assertNotEqual(self.repo.obtener_firma_cambios(), firma)
+
+        firma = self.repo.obtener_firma_cambios()
+        self.repo.eliminar(programacion.id)
+        self.assertNotEqual(self.repo.obtener_firma_cambios(), firma)
+
+    def test_firma_no_cambia_al_registrar_ejecuciones(self):
+        programacion = self.crear()
+        firma = self.repo.obtener_firma_cambios()
+
+        programacion.marcar_ejecutado(datetime.now())
+        with conectar(self.db_path) as conn:
+            self.repo._registrar_ejecuciones(conn, [programacion])
+
+        leida = self.repo.obtener_por_id(programacion.id)
+        self.assertEqual(leida.total_ejecuciones, 1)
+        self.assertEqual(leida.proxima_ejecucion, programacion.proxima_ejecucion)
+        self.assertEqual(self.repo.obtener_firma_cambios(), firma)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Test unitario para BufferFilas
+
+Verifica la ventana en memoria, el volcado a disco, el recorrido de las
+filas como vistas tipo diccionario y la serialización compacta en el historial.
+"""
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.buffer_filas import BufferFilas, FilaResultado
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta
+from src.infrastructure.repositories.sqlite_resultado_ejecucion_repository import SQLiteResultadoEjecucionRepository
+
+
+class TestBufferFilas(unittest.TestCase):
+    """Tests para BufferFilas"""
+
+    def crear_buffer(self, filas: int, filas_en_memoria: int) -> BufferFilas:
+        buffer = BufferFilas(["id", "nombre"], filas_en_memoria=filas_en_memoria)
+        lote = []
+        for i in range(filas):
+            lote.append((i, f"fila {i}"))
+            if len(lote) == 4:
+                buffer.agregar(lote)
+                lote = []
+        buffer.agregar(lote)
+        return buffer
+
+    def test_sin_volcado(self):
+        """Si las filas entran en la ventana no se usa el disco"""
+        buffer = self.crear_buffer(5, filas_en_memoria=10)
+
+        self.assertFalse(buffer.en_disco)
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer[0], {"id": 0, "nombre": "fila 0"})
+        self.assertEqual([fila["id"] for fila in buffer], list(range(5)))
+
+    def test_volcado_a_disco(self):
+        """Las filas que exceden la ventana se vuelcan y se recorren en orden"""
+        buffer = self.crear_buffer(25, filas_en_memoria=6)
+
+        self.assertTrue(buffer.en_disco)
+        self.assertEqual(len(buffer), 25)
+        self.assertEqual(buffer.filas_en_disco, 19)
+        self.assertEqual([fila["id"] for fila in buffer], list(range(25)))
+        self.assertEqual(buffer[20], {"id": 20, "nombre": "fila 20"})
+        self.assertEqual(buffer[-1]["id"], 24)
+        self.assertEqual([fila["id"] for fila in buffer[4:9]], [4, 5, 6, 7, 8])
+        with self.assertRaises(IndexError):
+            buffer[25]
+
+        # Se puede recorrer más de una vez y seguir agregando
+        buffer.agregar([(25, "fila 25")])
+        self.assertEqual(sum(1 for _ in buffer), 26)
+
+    def test_cerrar_elimina_archivo(self):
+        """Cerrar el buffer borra el archivo temporal"""
+        buffer = self.crear_buffer(10, filas_en_memoria=2)
+        ruta = buffer._ruta
+        self.assertTrue(os.path.exists(ruta))
+
+        buffer.cerrar()
+        self.assertFalse(os.path.exists(ruta))
+        self.assertEqual(len(buffer), 2)
+
+    def test_archivo_se_elimina_al_liberar_el_buffer(self):
+        buffer = self.crear_buffer(10, filas_en_memoria=2)
+        ruta = buffer._ruta
+        del buffer
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_serializar_comparte_archivo(self):
+        """La copia serializada lee las filas volcadas del archivo del original"""
+        buffer = self.crear_buffer(10, filas_en_memoria=2)
+        buffer.truncado = True
+        copia = pickle.loads(pickle.dumps(buffer))
+
+        self.assertEqual(list(copia.filas()), list(buffer.filas()))
+        self.assertTrue(copia.truncado)
+        with self.assertRaises(RuntimeError):
+            copia.agregar([(99, "nueva")])
+
+        # El archivo pertenece al original: liberar la copia no lo borra
+        ruta = buffer._ruta
+        del copia
+        self.assertTrue(os.path.exists(ruta))
+
+
+class TestFilaResultado(unittest.TestCase):
+    """Tests para la vista tipo diccionario de una fila"""
+
+    def test_se_comporta_como_diccionario(self):
+        buffer = BufferFilas(["id", "nombre", "importe"])
+        buffer.agregar([(1, "a", None)])
+        fila = buffer[0]
+
+        self.assertIsInstance(fila, FilaResultado)
+        self.assertEqual(fila, {"id": 1, "nombre": "a", "importe": None})
+        self.assertEqual(list(fila.keys()), ["id", "nombre", "importe"])
+        self.assertEqual(fila.get("nombre"), "a")
+        self.assertEqual(fila.get("otra", ""), "")
+        self.assertIn("importe", fila)
+        self.assertEqual(dict(fila), {"id": 1, "nombre": "a", "importe": None})
+        self.assertEqual(fila.valores(), (1, "a", None))
+
+    def test_desde_diccionarios(self):
+        buffer = BufferFilas.desde_diccionarios([{"a": i, "b": str(i)} for i in range(5)])
+        self.assertEqual(buffer.columnas, ["a", "b"])
+        self.assertEqual(list(buffer.columna("a")), [0, 1, 2, 3, 4])
+        self.assertEqual(len(BufferFilas.desde_diccionarios([])), 0)
+
+
+class TestHistorialCompacto(unittest.TestCase):
+    """El historial guarda las filas con las columnas una sola vez"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repo = SQLiteResultadoEjecucionRepository(os.path.join(self.temp_dir.name, "test.db"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def guardar_y_leer(self, datos) -> ResultadoConsulta:
+        consulta = ResultadoConsulta(1, "c", "SELECT 1", len(datos), datos=datos,
+                                     truncado=getattr(datos, "truncado", False))
+        resultado = self.repo.guardar(ResultadoEjecucion(
+            control_id=1, control_nombre="x", fecha_ejecucion=datetime.now(),
+            resultado_consulta_disparo=consulta
+        ))
+        return self.repo.obtener_por_id(resultado.id).resultado_consulta_disparo
+
+    def test_guarda_buffer_con_filas_en_disco(self):
+        buffer = BufferFilas(["id", "fecha"], filas_en_memoria=2)
+        buffer.agregar([(i, datetime(2024, 1, i + 1)) for i in range(5)])
+        buffer.truncado = True
+
+        leida = self.guardar_y_leer(buffer)
+        self.assertEqual(leida.columnas, ["id", "fecha"])
+        self.assertEqual(len(leida.datos), 5)
+        self.assertEqual(leida.datos[4], {"id": 4, "fecha": "2024-01-05 00:00:00"})
+        self.assertTrue(leida.truncado)
+
+    def test_guarda_lista_de_diccionarios(self):
+        leida = self.guardar_y_leer([{"total": 3}])
+        self.assertEqual(list(leida.datos), [{"total": 3}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Test unitario para el compilador de sentencias SQL
+
+Verifica la conversión de parámetros :nombre a los estilos de los drivers
+y el tipado de los valores según TipoParametro.
+"""
+import unittest
+import sys
+import os
+from datetime import date, datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.parametro import TipoParametro
+from src.domain.services.compilador_sql import (
+    compilar_sentencia, renderizar_sql, convertir_valor, es_lectura_simple
+)
+
+
+class TestCompiladorSQL(unittest.TestCase):
+    """Tests para compilar_sentencia y renderizar_sql"""
+
+    SQL = "SELECT * FROM t WHERE f >= :fecha AND f < :fecha_fin AND n = :fecha"
+
+    def test_qmark_respeta_nombres_completos(self):
+        """:fecha no reemplaza el prefijo de :fecha_fin y cada aparición es un ?"""
+        sentencia = compilar_sentencia(self.SQL, 'qmark', ['fecha', 'fecha_fin'])
+        self.assertEqual(sentencia.sql, "SELECT * FROM t WHERE f >= ? AND f < ? AND n = ?")
+        self.assertEqual(sentencia.parametros, ('fecha', 'fecha_fin', 'fecha'))
+        self.assertTrue(sentencia.es_lectura)
+        self.assertFalse(sentencia.es_procedimiento)
+
+    def test_pyformat_y_numeric(self):
+        """pyformat usa nombres y escapa %; numeric numera cada nombre una vez"""
+        sql = self.SQL + " AND d LIKE 'A%'"
+        pyformat = compilar_sentencia(sql, 'pyformat', ['fecha', 'fecha_fin'])
+        self.assertIn("f >= %(fecha)s AND f < %(fecha_fin)s", pyformat.sql)
+        self.assertIn("LIKE 'A%%'", pyformat.sql)
+
+        numeric = compilar_sentencia(sql, 'numeric', ['fecha', 'fecha_fin'])
+        self.assertIn("f >= $1 AND f < $2 AND n = $1", numeric.sql)
+        self.assertEqual(numeric.parametros, ('fecha', 'fecha_fin'))
+
+    def test_ignora_literales_comentarios_y_casts(self):
+        """No se enlazan :nombre dentro de literales, comentarios ni casts ::tipo"""
+        sql = "SELECT x::int, '10:30', ':fecha' FROM t -- :fecha\nWHERE a = :otro"
+        sentencia = compilar_sentencia(sql, 'qmark', ['fecha', 'int'])
+        self.assertEqual(sentencia.sql, "SELECT x::int, '10:30', ? FROM t -- :fecha\nWHERE a = :otro")
+        self.assertEqual(sentencia.parametros, ('fecha',))
+
+    def test_lectura_simple(self):
+        """Solo SELECT, VALUES y WITH sin sentencias que modifiquen datos admiten un cursor del servidor"""
+        for sql in ("SELECT * FROM t", "  values (1), (2)", "WITH a AS (SELECT 1) SELECT * FROM a",
+                    "-- INSERT\nSELECT 'DELETE' AS \"update\" FROM t", "/* x */ select 1"):
+            with self.subTest(sql=sql):
+                self.assertTrue(es_lectura_simple(sql))
+        for sql in ("EXPLAIN SELECT 1", "SHOW search_path", "SELECT * INTO copia FROM t",
+                    "WITH n AS (INSERT INTO t VALUES (1) RETURNING id) SELECT * FROM n",
+                    "WITH b AS (DELETE FROM t RETURNING *) SELECT count(*) FROM b", "UPDATE t SET a = 1", ""):
+            with self.subTest(sql=sql):
+                self.assertFalse(es_lectura_simple(sql))
+
+    def test_compilacion_cacheada(self):
+        """La misma consulta con los mismos parámetros se compila una sola vez"""
+        primera = compilar_sentencia(self.SQL, 'qmark', {'fecha': 1, 'fecha_fin': 2})
+        segunda = compilar_sentencia(self.SQL, 'qmark', ['fecha_fin', 'fecha'])
+        self.assertIs(primera, segunda)
+
+    def test_argumentos_tipados(self):
+        """Los valores se convierten según el tipo del parámetro"""
+        sentencia = compilar_sentencia("SELECT :n, :d, :b, :s", 'qmark', ['n', 'd', 'b', 's'])
+        tipos = {
+            'n': TipoParametro.INTEGER,
+            'd': TipoParametro.DATE,
+            'b': TipoParametro.BOOLEAN,
+            's': TipoParametro.STRING
+        }
+        valores = {'n': '42', 'd': '2024-01-31', 'b': 'true', 's': "'abc'"}
+
+        self.assertEqual(
+            sentencia.argumentos(valores, tipos),
+            (42, date(2024, 1, 31), True, 'abc')
+        )
+        self.assertEqual(
+            sentencia.argumentos(valores, tipos, fechas_como_texto=True)[1],
+            '2024-01-31'
+        )
+        with self.assertRaises(ValueError):
+            sentencia.argumentos({'n': 'x'}, tipos)
+
+    def test_convertir_datetime(self):
+        """DATETIME acepta texto ISO"""
+        self.assertEqual(
+            convertir_valor('f', '2024-01-31 10:00:00', TipoParametro.DATETIME),
+            datetime(2024, 1, 31, 10, 0)
+        )
+
+    def test_renderizar_sql(self):
+        """El SQL para mostrar reemplaza por nombre completo"""
+        self.assertEqual(
+            renderizar_sql(self.SQL, {'fecha': '2024-01-01', 'fecha_fin': '2024-02-01'}),
+            "SELECT * FROM t WHERE f >= 2024-01-01 AND f < 2024-02-01 AND n = 2024-01-01"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+"""
+Test unitario para el conector JDBC de IBM i
+
+Verifica que la configuración exitosa se recuerde entre instancias
+(persistida en SQLite), que se omita la verificación de puerto cuando la
+conexión estuvo sana, que se apliquen las propiedades de block fetch y que
+el cursor reutilice los PreparedStatement del cache leyendo el ResultSet
+solo con la API JDBC pública.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.conexion import Conexion
+from src.infrastructure.database import conector_ibmi_jdbc
+from src.infrastructure.database.conector_ibmi_jdbc import ConectorIBMiJDBC, CursorSentenciasPreparadas
+from src.infrastructure.database.pool_conexiones import CacheSentenciasPreparadas
+from src.infrastructure.repositories.sqlite_configuracion_jdbc_repository import SQLiteConfiguracionJDBCRepository
+
+
+class TestConectorIBMiJDBC(unittest.TestCase):
+    """Tests para ConectorIBMiJDBC"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "test.db")
+        self.driver_path = os.path.join(self.temp_dir.name, "jt400.jar")
+        open(self.driver_path, "w").close()
+
+        self.conexion = Conexion(
+            id=7, nombre="IBM i", tipo_motor="iseries", servidor="as400",
+            puerto=446, base_datos="*LIBL", usuario="user", contraseña="pwd",
+            propiedades_jdbc="block size=256; Prefetch=false"
+        )
+
+        # La configuración "basica" falla; las demás conectan
+        self.intentos = []
+
+        def conectar(driver, url, props, jar):
+            self.intentos.append(url)
+            if props.get('errors') == 'full':
+                raise Exception("timeout")
+            return mock.Mock(props=props)
+
+        self.jaydebeapi = mock.Mock(connect=mock.Mock(side_effect=conectar))
+        patches = [
+            mock.patch.object(conector_ibmi_jdbc, 'jaydebeapi', self.jaydebeapi),
+            mock.patch.object(conector_ibmi_jdbc, 'iniciar_jvm', return_value=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def crear_conector(self) -> ConectorIBMiJDBC:
+        return ConectorIBMiJDBC(
+            SQLiteConfiguracionJDBCRepository(self.db_path),
+            driver_path=self.driver_path
+        )
+
+    def test_recuerda_configuracion_entre_reinicios(self):
+        """Tras un reinicio se prueba primero la configuración que funcionó"""
+        conector = self.crear_conector()
+        with mock.patch.object(conector, '_verificar_conectividad') as verificar:
+            conector.conectar(self.conexion)
+            self.assertEqual(verificar.call_count, 1)
+        self.assertEqual(len(self.intentos), 2)
+
+        self.intentos.clear()
+        nuevo = self.crear_conector()
+        with mock.patch.object(nuevo, '_verificar_conectividad') as verificar:
+            nuevo.conectar(self.conexion)
+            # Conectó hace instantes: no se verifica el puerto
+            verificar.assert_not_called()
+        self.assertEqual(self.intentos, ["jdbc:as400://as400"])
+
+    def test_cambio_de_conexion_invalida_configuracion(self):
+        """Si cambian las credenciales no se usa la configuración recordada"""
+        conector = self.crear_conector()
+        with mock.patch.object(conector, '_verificar_conectividad'):
+            conector.conectar(self.conexion)
+            self.conexion.contraseña = "otra"
+            self.assertFalse(conector.esta_sana(self.conexion))
+
+            self.intentos.clear()
+            conector.conectar(self.conexion)
+        self.assertEqual(len(self.intentos), 2)
+
+    def test_propiedades_de_rendimiento(self):
+        """Se aplican las propiedades de block fetch y las de la conexión tienen prioridad"""
+        conector = self.crear_conector()
+        with mock.patch.object(conector, '_verificar_conectividad'):
+            conn = conector.conectar(self.conexion)
+
+        self.assertEqual(conn.props['block size'], '256')
+        self.assertEqual(conn.props['prefetch'], 'false')
+        self.assertEqual(conn.props['block criteria'], '2')
+        self.assertEqual(conn.props['user'], 'user')
+
+
+class TimestampFalso:
+    """java.sql.Timestamp simulado"""
+
+    def __init__(self, texto, nanos):
+        self.texto, self.nanos = texto, nanos
+
+    def __str__(self):
+        return self.texto
+
+    def getNanos(self):
+        return self.nanos
+
+
+class ResultSetFalso:
+    """ResultSet JDBC simulado: los getters primitivos devuelven 0 para NULL"""
+
+    def __init__(self, columnas, filas):
+        self.columnas = columnas  # [(nombre, tipo java.sql.Types)]
+        self.filas = filas
+        self.actual = -1
+        self.nulo = False
+        self.cerrado = False
+
+    def next(self):
+        self.actual += 1
+        return self.actual < len(self.filas)
+
+    def _valor(self, columna):
+        valor = self.filas[self.actual][columna - 1]
+        self.nulo = valor is None
+        return valor
+
+    def getInt(self, columna):
+        return self._valor(columna) or 0
+
+    def getDouble(self, columna):
+        return self._valor(columna) or 0.0
+
+    def getObject(self, columna):
+        return self._valor(columna)
+
+    getTimestamp = getObject
+
+    def wasNull(self):
+        return self.nulo
+
+    def getMetaData(self):
+        return mock.Mock(
+            getColumnCount=lambda: len(self.columnas),
+            getColumnLabel=lambda i: self.columnas[i - 1][0],
+            getColumnType=lambda i: self.columnas[i - 1][1]
+        )
+
+    def close(self):
+        self.cerrado = True
+
+
+class TestCursorSentenciasPreparadas(unittest.TestCase):
+    """Tests para el cursor que reutiliza PreparedStatement"""
+
+    def setUp(self):
+        self.resultados = []
+
+        def preparar(sql):
+            prep = mock.Mock()
+            prep.execute.side_effect = lambda: sql.startswith("SELECT")
+            prep.getResultSet.side_effect = lambda: self.resultados.pop(0)
+            prep.getUpdateCount.return_value = 3
+            return prep
+
+        self.conn = mock.Mock()
+        self.conn.jconn.prepareStatement.side_effect = preparar
+        self.cache = CacheSentenciasPreparadas()
+
+    def test_reutiliza_la_sentencia_y_convierte_valores(self):
+        columnas = [("ID", 4), ("MONTO", 3), ("NOMBRE", 12), ("ALTA", 93)]
+        primero = ResultSetFalso(columnas, [(1, 2.5, "a", TimestampFalso("2024-01-02 03:04:05.123456789", 123456789))])
+        segundo = ResultSetFalso(columnas, [(None, None, None, None)])
+        self.resultados = [primero, segundo]
+        sql = "SELECT ID, MONTO, NOMBRE, ALTA FROM T WHERE ID = ?"
+
+        cursor = CursorSentenciasPreparadas(self.conn, self.cache)
+        cursor.execute(sql, [1])
+        self.assertEqual([d[0] for d in cursor.description], ["ID", "MONTO", "NOMBRE", "ALTA"])
+        self.assertEqual(cursor.fetchmany(10), [(1, 2.5, "a", "2024-01-02 03:04:05.123456")])
+        cursor.execute(sql, [2])
+        self.assertEqual(cursor.fetchall(), [(None, None, None, None)])
+        cursor.close()
+
+        self.conn.jconn.prepareStatement.assert_called_once_with(sql)
+        prep = self.cache.obtener(sql, lambda: None)
+        self.assertEqual(prep.setObject.call_args_list, [mock.call(1, 1), mock.call(1, 2)])
+        prep.close.assert_not_called()
+        self.assertTrue(primero.cerrado and segundo.cerrado)
+
+    def test_sentencia_sin_resultado(self):
+        cursor = CursorSentenciasPreparadas(self.conn, self.cache)
+        cursor.execute("UPDATE T SET A = ?", ["x"])
+
+        self.assertEqual(cursor.rowcount, 3)
+        self.assertIsNone(cursor.description)
+        self.assertIsNone(cursor.fetchone())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Test unitario para la distribución de archivos generados
+
+Verifica que un archivo se entregue en varias carpetas sin dejar archivos
+temporales, que una carpeta que falla no afecte a las demás y que el
+Excel de un control se genere una sola vez para todos los referentes.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.control import Control
+from src.domain.entities.control_referente import ControlReferente, FormatoArchivo
+from src.domain.entities.referente import Referente
+from src.domain.entities.resultado_ejecucion import ResultadoEjecucion, ResultadoConsulta, EstadoEjecucion
+from src.domain.services.ejecucion_control_service import EjecucionControlService
+from src.infrastructure.services.distribucion_archivos_service import DistribucionArchivosService
+from src.infrastructure.services.generacion_reportes_service import GeneracionReportesService
+
+
+class TestDistribucionArchivosService(unittest.TestCase):
+    """Tests para DistribucionArchivosService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.archivo = os.path.join(self.directorio.name, "reporte.xlsx")
+        with open(self.archivo, "wb") as f:
+            f.write(b"contenido")
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def carpeta(self, nombre: str) -> str:
+        return os.path.join(self.directorio.name, nombre)
+
+    def test_entrega_en_todas_las_carpetas(self):
+        for usar_enlaces in (True, False):
+            carpetas = [self.carpeta(f"{usar_enlaces}_{i}") for i in range(3)]
+            servicio = DistribucionArchivosService(usar_enlaces=usar_enlaces)
+
+            entregas = servicio.distribuir(self.archivo, carpetas + carpetas[:1])
+
+            self.assertEqual(set(entregas), set(carpetas))
+            for carpeta in carpetas:
+                self.assertTrue(entregas[carpeta].exitosa)
+                self.assertEqual(os.listdir(carpeta), ["reporte.xlsx"])
+                with open(entregas[carpeta].ruta, "rb") as f:
+                    self.assertEqual(f.read(), b"contenido")
+
+    def test_carpeta_con_error_no_afecta_al_resto(self):
+        # Una carpeta que en realidad es un archivo: makedirs falla siempre
+        invalida = self.carpeta("ocupada")
+        with open(invalida, "w") as f:
+            f.write("x")
+        servicio = DistribucionArchivosService(reintentos=2, pausa_reintento=0)
+
+        entregas = servicio.distribuir(self.archivo, [invalida, self.carpeta("ok")])
+
+        self.assertFalse(entregas[invalida].exitosa)
+        self.assertEqual(entregas[invalida].intentos, 2)
+        self.assertTrue(entregas[self.carpeta("ok")].exitosa)
+
+    def test_reintenta_y_limpia_temporal(self):
+        servicio = DistribucionArchivosService(reintentos=3, pausa_reintento=0, usar_enlaces=False)
+        reemplazar = os.replace
+        fallas = [OSError("ocupado")]
+
+        def replace(origen, destino):
+            if fallas:
+                raise fallas.pop()
+            reemplazar(origen, destino)
+
+        with mock.patch("os.replace", side_effect=replace):
+            entrega = servicio.distribuir(self.archivo, [self.carpeta("destino")])[self.carpeta("destino")]
+
+        self.assertTrue(entrega.exitosa)
+        self.assertEqual(entrega.intentos, 2)
+        self.assertEqual(os.listdir(self.carpeta("destino")), ["reporte.xlsx"])
+
+
+class TestGenerarArchivosExcel(unittest.TestCase):
+    """El Excel de una ejecución se genera una vez y se entrega a cada referente"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_genera_una_vez_para_todos_los_referentes(self):
+        referentes = [
+            Referente(id=i, nombre=f"R{i}", path_archivos=os.path.join(self.directorio.name, f"r{i}"))
+            for i in range(1, 4)
+        ]
+        control_referente_repo = mock.Mock()
+        control_referente_repo.obtener_por_control.return_value = [
+            ControlReferente(control_id=1, referente_id=r.id, notificar_por_archivo=True) for r in referentes
+        ]
+        referente_repo = mock.Mock()
+        referente_repo.obtener_por_id.side_effect = {r.id: r for r in referentes}.get
+        service = EjecucionControlService(
+            mock.Mock(), mock.Mock(), mock.Mock(), referente_repo,
+            mock.Mock(), mock.Mock(), control_referente_repo,
+            generador_reportes=GeneracionReportesService(en_segundo_plano=False)
+        )
+        reportes = service._generador_reportes
+        reportes._notification_file_service = mock.Mock()
+        excel = reportes._reporte_generator._excel_generator
+        generar = mock.Mock(wraps=excel.generar_excel_control)
+        excel.generar_excel_control = generar
+
+        resultado = ResultadoEjecucion(
+            control_id=1, control_nombre="Control", fecha_ejecucion=datetime(2024, 1, 1, 10, 0),
+            estado=EstadoEjecucion.CONTROL_DISPARADO,
+            resultado_consulta_disparo=ResultadoConsulta(
+                consulta_id=1, consulta_nombre="Disparo", sql_ejecutado="SELECT 1",
+                filas_afectadas=1, datos=[{'id': 1}]
+            )
+        )
+        service._generar_archivos_excel(Control(id=1, nombre="Control"), resultado)
+
+        self.assertEqual(generar.call_count, 1)
+        for referente in referentes:
+            self.assertEqual(os.listdir(referente.path_archivos), ["Control_20240101_100000.xlsx"])
+        self.assertEqual(reportes._notification_file_service.crear_archivo_notificacion_control.call_count, 3)
+
+    def test_un_reporte_por_formato(self):
+        referentes = [
+            Referente(id=i, nombre=f"R{i}", path_archivos=os.path.join(self.directorio.name, f"r{i}"))
+            for i in range(1, 4)
+        ]
+        formatos = [FormatoArchivo.XLSX, FormatoArchivo.CSV_GZ, FormatoArchivo.CSV_GZ]
+        control_referente_repo = mock.Mock()
+        control_referente_repo.obtener_por_control.return_value = [
+            ControlReferente(control_id=1, referente_id=r.id, notificar_por_archivo=True, formato_archivo=f)
+            for r, f in zip(referentes, formatos)
+        ]
+        referente_repo = mock.Mock()
+        referente_repo.obtener_por_id.side_effect = {r.id: r for r in referentes}.get
+        service = EjecucionControlService(
+            mock.Mock(), mock.Mock(), mock.Mock(), referente_repo,
+            mock.Mock(), mock.Mock(), control_referente_repo,
+            generador_reportes=GeneracionReportesService(en_segundo_plano=False)
+        )
+        reportes = service._generador_reportes
+        reportes._notification_file_service = mock.Mock()
+
+        resultado = ResultadoEjecucion(
+            control_id=1, control_nombre="Control", fecha_ejecucion=datetime(2024, 1, 1, 10, 0),
+            estado=EstadoEjecucion.CONTROL_DISPARADO,
+            resultado_consulta_disparo=ResultadoConsulta(
+                consulta_id=1, consulta_nombre="Disparo", sql_ejecutado="SELECT 1",
+                filas_afectadas=1, datos=[{'id': 1}]
+            )
+        )
+        service._generar_archivos_excel(Control(id=1, nombre="Control"), resultado)
+
+        self.assertEqual([t.formato for t in reportes.obtener_trabajos()], [FormatoArchivo.XLSX, FormatoArchivo.CSV_GZ])
+        self.assertEqual(os.listdir(referentes[0].path_archivos), ["Control_20240101_100000.xlsx"])
+        for referente in referentes[1:]:
+            self.assertEqual(os.listdir(referente.path_archivos), ["Control_20240101_100000.csv.gz"])
+        llamadas = reportes._notification_file_service.crear_archivo_notificacion_control.call_args_list
+        self.assertEqual([c.kwargs['archivos_datos'] for c in llamadas],
+                         [None, ["Control_20240101_100000.csv.gz"], ["Control_20240101_100000.csv.gz"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+"""
+Test unitario para EjecucionControlService
+
+Verifica que un control sin consulta de disparo ejecute cada consulta
+una sola vez, que los resultados se lean en lotes con máximo de filas y
+que en PostgreSQL solo las lecturas simples usen un cursor del servidor y
+las lecturas con parámetros reutilicen su sentencia preparada.
+"""
+import unittest
+import sys
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.control import Control
+from src.domain.entities.conexion import Conexion
+from src.domain.entities.consulta import Consulta
+from src.domain.entities.consulta_control import ConsultaControl
+from src.domain.entities.resultado_ejecucion import ResultadoConsulta, EstadoEjecucion
+from src.domain.services.compilador_sql import compilar_sentencia
+from src.domain.services.ejecucion_control_service import EjecucionControlService
+from src.infrastructure.database.pool_conexiones import CacheSentenciasPreparadas
+
+
+class TestControlSinDisparo(unittest.TestCase):
+    """Tests para controles sin consulta de disparo"""
+
+    def setUp(self):
+        self.filas_por_consulta = {1: 0, 2: 3, 3: 5}
+        consultas = {
+            id_: Consulta(id=id_, nombre=f"Consulta {id_}", sql="SELECT 1")
+            for id_ in self.filas_por_consulta
+        }
+
+        consulta_repo = mock.Mock()
+        consulta_repo.obtener_por_id.side_effect = consultas.get
+        parametro_repo = mock.Mock()
+        parametro_repo.obtener_por_control.return_value = []
+        consulta_control_repo = mock.Mock()
+        consulta_control_repo.obtener_por_control.return_value = [
+            ConsultaControl(id=id_, control_id=1, consulta_id=id_, orden=id_)
+            for id_ in self.filas_por_consulta
+        ]
+
+        self.service = EjecucionControlService(
+            mock.Mock(), parametro_repo, consulta_repo, mock.Mock(),
+            mock.Mock(), consulta_control_repo, mock.Mock()
+        )
+        self.ejecutadas = []
+        self.service._ejecutar_consulta = self._ejecutar_consulta
+        self.service._generar_archivos_excel = mock.Mock()
+        self.conexion = Conexion(id=1, nombre="Test", tipo_motor="sqlite")
+
+    def _ejecutar_consulta(self, consulta, parametros, conexion, mock_execution=False, es_disparo=False,
+                           tipos_parametros=None, plan=None):
+        self.ejecutadas.append(consulta.id)
+        filas = self.filas_por_consulta[consulta.id]
+        return ResultadoConsulta(
+            consulta_id=consulta.id,
+            consulta_nombre=consulta.nombre,
+            sql_ejecutado=consulta.sql,
+            filas_afectadas=filas,
+            datos=[{'n': i} for i in range(filas)]
+        )
+
+    def test_dispara_con_una_sola_pasada(self):
+        """Si se dispara, los resultados de la evaluación son los resultados finales"""
+        control = Control(id=1, nombre="Control", disparar_si_hay_datos=True)
+        resultado = self.service.ejecutar_control(control, self.conexion)
+
+        self.assertEqual(resultado.estado, EstadoEjecucion.CONTROL_DISPARADO)
+        self.assertEqual(self.ejecutadas, [1, 2, 3])
+        self.assertEqual(len(resultado.resultados_consultas_disparadas), 3)
+        self.assertEqual(resultado.total_filas_disparadas, 8)
+
+    def test_corta_en_la_primera_consulta_con_datos(self):
+        """Si se dispara cuando NO hay datos, basta una consulta con datos para descartarlo"""
+        control = Control(id=1, nombre="Control", disparar_si_hay_datos=False)
+        resultado = self.service.ejecutar_control(control, self.conexion)
+
+        self.assertNotEqual(resultado.estado, EstadoEjecucion.CONTROL_DISPARADO)
+        self.assertEqual(self.ejecutadas, [1, 2])
+        self.assertEqual(resultado.resultados_consultas_disparadas, [])
+
+
+class TestLecturaEnLotes(unittest.TestCase):
+    """Tests para la lectura de resultados con fetchmany"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE t (id INTEGER, valor TEXT)")
+        self.conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"v{i}") for i in range(50)])
+        self.service = EjecucionControlService(
+            *[mock.Mock()] * 7, tamano_lote_fetch=7, filas_en_memoria=10
+        )
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_lee_todo_con_volcado(self):
+        cursor = self.conn.execute("SELECT id, valor, id FROM t ORDER BY id")
+        datos = self.service._leer_filas(cursor, Consulta(nombre="c"))
+
+        self.assertEqual(len(datos), 50)
+        self.assertFalse(datos.truncado)
+        self.assertEqual(datos.filas_en_disco, 40)
+        self.assertEqual(datos.columnas, ["id", "valor", "id_1"])
+        self.assertEqual(datos[49], {"id": 49, "valor": "v49", "id_1": 49})
+
+    def test_maximo_de_filas(self):
+        """La consulta se corta en su máximo de filas y queda marcada como truncada"""
+        cursor = self.conn.execute("SELECT * FROM t")
+        datos = self.service._leer_filas(cursor, Consulta(nombre="c", max_filas=20))
+        self.assertEqual(len(datos), 20)
+        self.assertTrue(datos.truncado)
+
+        # Exactamente el máximo no es truncar
+        cursor = self.conn.execute("SELECT * FROM t")
+        datos = self.service._leer_filas(cursor, Consulta(nombre="c", max_filas=50))
+        self.assertEqual(len(datos), 50)
+        self.assertFalse(datos.truncado)
+
+    def test_maximo_por_defecto_del_servicio(self):
+        self.service.max_filas_por_consulta = 5
+        cursor = self.conn.execute("SELECT * FROM t")
+        datos = self.service._leer_filas(cursor, Consulta(nombre="c"))
+        self.assertEqual(len(datos), 5)
+        self.assertTrue(datos.truncado)
+
+
+class CursorPostgreSQLFalso:
+    """Cursor de psycopg2 simulado: registra lo ejecutado y devuelve una fila por lectura"""
+
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.description = None
+        self.rowcount = -1
+        self._filas = []
+        conn.cursores.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, argumentos=None):
+        self.conn.ejecutadas.append((self.name, sql, argumentos))
+        if sql.startswith(("PREPARE", "DEALLOCATE")):
+            return
+        self.description = [('n',)]
+        self.rowcount = 1
+        self._filas = [(1,)]
+
+    def fetchmany(self, cantidad):
+        lote, self._filas = self._filas[:cantidad], self._filas[cantidad:]
+        return lote
+
+
+class TestPostgreSQL(unittest.TestCase):
+    """Tests para la ejecución en PostgreSQL (con un driver simulado)"""
+
+    def setUp(self):
+        self.service = EjecucionControlService(*[mock.Mock()] * 7, gestor_pools=mock.Mock(timeout_obtener_segundos=30))
+        self.conn = mock.Mock(cursores=[], ejecutadas=[])
+        self.conn.cursor.side_effect = lambda name=None: CursorPostgreSQLFalso(self.conn, name)
+        self.cache = CacheSentenciasPreparadas()
+
+        @contextmanager
+        def conexion(timeout=None):
+            yield self.conn
+
+        pool = mock.Mock(conexion=conexion, cache_sentencias=lambda conn, al_descartar=None: self.cache)
+        self.service._obtener_pool = lambda conexion: pool
+        self.conexion = Conexion(id=1, nombre="PG", tipo_motor="postgresql")
+
+    def ejecutar(self, sql, valores=None):
+        sentencia = compilar_sentencia(sql, 'pyformat', list(valores or ()))
+        return self.service._ejecutar_postgresql(
+            sql, sentencia, sentencia.argumentos(valores or {}), self.conexion, Consulta(nombre="c", sql=sql),
+            time.time()
+        )
+
+    def test_cursor_del_servidor_solo_para_lecturas_simples(self):
+        casos = {
+            "SELECT n FROM t": "ctrl_lectura",
+            "WITH a AS (SELECT 1 AS n) SELECT n FROM a": "ctrl_lectura",
+            "EXPLAIN SELECT n FROM t": None,
+            "SHOW search_path": None,
+            "WITH n AS (INSERT INTO t VALUES (1) RETURNING n) SELECT n FROM n": None,
+        }
+        for sql, cursor in casos.items():
+            with self.subTest(sql=sql):
+                self.conn.cursores.clear()
+                resultado = self.ejecutar(sql)
+
+                self.assertEqual(resultado.error, "")
+                self.assertEqual(resultado.filas_afectadas, 1)
+                self.assertEqual(resultado.datos[0], {'n': 1})
+                self.assertEqual([c.name for c in self.conn.cursores], [cursor])
+
+    def test_lectura_con_parametros_preparada(self):
+        sql = "SELECT n FROM t WHERE f >= :desde AND g = :desde"
+        for _ in range(2):
+            resultado = self.ejecutar(sql, {'desde': 5})
+            self.assertEqual(resultado.datos[0], {'n': 1})
+
+        nombre = self.cache.obtener("SELECT n FROM t WHERE f >= $1 AND g = $1", lambda: None)
+        self.assertTrue(nombre.startswith("ctrl_"))
+        self.assertEqual(self.conn.ejecutadas, [
+            (None, f"PREPARE {nombre} AS SELECT n FROM t WHERE f >= $1 AND g = $1", None),
+            (None, f"EXECUTE {nombre} (%s)", (5,)),
+            (None, f"EXECUTE {nombre} (%s)", (5,)),
+        ])
+        self.assertNotIn("ctrl_lectura", [c.name for c in self.conn.cursores])
+
+    def test_lectura_sin_preparar_usa_cursor_del_servidor(self):
+        """Si el servidor no puede prepararla, la lectura se hace igual con el cursor del servidor"""
+        self.service._preparar_postgresql = lambda conn, sql: None
+        resultado = self.ejecutar("SELECT n FROM t WHERE f >= :desde", {'desde': 5})
+
+        self.assertEqual(resultado.filas_afectadas, 1)
+        self.assertEqual(self.conn.ejecutadas, [("ctrl_lectura", "SELECT n FROM t WHERE f >= %(desde)s", {'desde': 5})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Test unitario para ExcelGeneratorService
+
+Verifica que las hojas se escriban en modo write-only con los estilos con
+nombre compartidos, la tabla con autofiltro y que una consulta que supera
+el máximo de filas por hoja continúe en hojas adicionales.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from openpyxl import load_workbook
+
+from src.domain.entities.buffer_filas import BufferFilas
+from src.domain.services.excel_generator_service import ExcelGeneratorService
+
+FECHA = datetime(2024, 1, 2, 3, 4, 5)
+
+
+class TestExcelGeneratorService(unittest.TestCase):
+    """Tests para ExcelGeneratorService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.servicio = ExcelGeneratorService()
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def generar(self, consultas):
+        ruta = self.servicio.generar_excel_control("Control: diario", consultas, self.directorio.name, FECHA)
+        return ruta, load_workbook(ruta)
+
+    def test_genera_resumen_y_hojas(self):
+        ruta, libro = self.generar([
+            {'nombre': 'Ventas del día', 'datos': [{'id': 1, 'monto': 10.5}, {'id': 2, 'monto': None}]},
+            {'nombre': 'Vacía', 'datos': []}
+        ])
+
+        self.assertEqual(os.path.basename(ruta), "Control__diario_20240102_030405.xlsx")
+        self.assertEqual(libro.sheetnames, ["Resumen", "Ventas_del_día"])
+        resumen = libro["Resumen"]
+        self.assertEqual(resumen["A1"].value, "Reporte de Control: Control: diario")
+        self.assertEqual(resumen["B4"].value, 2)
+        self.assertEqual([c.value for c in resumen[9]], ["Ventas del día", 2, "Con datos"])
+
+        hoja = libro["Ventas_del_día"]
+        self.assertEqual([[c.value for c in fila] for fila in hoja.iter_rows()],
+                         [["id", "monto"], [1, 10.5], [2, None]])
+        self.assertEqual(hoja["A1"].style, ExcelGeneratorService.ESTILO_ENCABEZADO)
+        self.assertEqual(hoja["B3"].style, ExcelGeneratorService.ESTILO_CELDA)
+        self.assertEqual(hoja.freeze_panes, "A2")
+        self.assertEqual(list(hoja.tables.values())[0].ref, "A1:B3")
+
+    def test_tipos_mezclados_en_una_columna(self):
+        _, libro = self.generar([{'nombre': 'Mixta', 'datos': [
+            {'valor': datetime(2024, 1, 1)}, {'valor': 5}, {'valor': None}, {'valor': 'texto'},
+            {'valor': datetime(2024, 2, 1)}, {'valor': 7.5}
+        ]}])
+
+        celdas = [fila[0] for fila in libro["Mixta"].iter_rows(min_row=2)]
+        self.assertEqual([c.value for c in celdas],
+                         [datetime(2024, 1, 1), 5, None, 'texto', datetime(2024, 2, 1), 7.5])
+        self.assertEqual([c.is_date for c in celdas], [True, False, False, False, True, False])
+        self.assertEqual({c.style for c in celdas}, {ExcelGeneratorService.ESTILO_CELDA})
+
+    def test_continua_en_hojas_adicionales(self):
+        self.servicio.MAX_FILAS_HOJA = 4  # 3 filas de datos por hoja
+        datos = BufferFilas(['n'], filas_en_memoria=2, directorio_temporal=self.directorio.name)
+        datos.agregar([(i,) for i in range(7)])
+
+        _, libro = self.generar([{'nombre': 'Detalle', 'datos': datos}])
+
+        self.assertEqual(libro.sheetnames, ["Resumen", "Detalle", "Detalle_2", "Detalle_3"])
+        valores = [[c.value for c in fila][0] for nombre in libro.sheetnames[1:] for fila in libro[nombre].iter_rows()]
+        self.assertEqual(valores, ['n', 0, 1, 2, 'n', 3, 4, 5, 'n', 6])
+        self.assertEqual(list(libro["Detalle_3"].tables.values())[0].ref, "A1:A2")
+
+    def test_filas_justas_no_crean_hoja_vacia(self):
+        self.servicio.MAX_FILAS_HOJA = 4
+        _, libro = self.generar([{'nombre': 'Detalle', 'datos': [{'n': i} for i in range(3)]}])
+        self.assertEqual(libro.sheetnames, ["Resumen", "Detalle"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Test unitario para GeneracionReportesService
+
+Verifica que un reporte encolado se genere en el pool de procesos (con
+filas volcadas a disco), se entregue a cada referente con su notificación
+y que el estado y las métricas de los trabajos reflejen errores y cupos,
+también cuando el servicio se cierra sin esperar.
+"""
+import unittest
+import sys
+import os
+import queue
+import tempfile
+from concurrent.futures import Future
+from datetime import datetime
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from openpyxl import load_workbook
+
+from src.domain.entities.buffer_filas import BufferFilas
+from src.domain.entities.referente import Referente
+from src.infrastructure.services.generacion_reportes_service import (
+    EstadoTrabajoReporte, GeneracionReportesService
+)
+
+FECHA = datetime(2024, 1, 1, 10, 0)
+
+
+class TestGeneracionReportesService(unittest.TestCase):
+    """Tests para GeneracionReportesService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.notificaciones = mock.Mock()
+        self.referentes = [
+            Referente(id=i, nombre=f"R{i}", path_archivos=os.path.join(self.directorio.name, f"r{i}"))
+            for i in (1, 2)
+        ]
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def crear_servicio(self, **kwargs) -> GeneracionReportesService:
+        servicio = GeneracionReportesService(notification_file_service=self.notificaciones, **kwargs)
+        self.addCleanup(servicio.cerrar)
+        return servicio
+
+    def test_genera_en_pool_de_procesos(self):
+        servicio = self.crear_servicio(max_procesos=1)
+        datos = BufferFilas(['n'], filas_en_memoria=2, directorio_temporal=self.directorio.name)
+        datos.agregar([(i,) for i in range(10)])
+
+        trabajo = servicio.encolar("Control", [{'nombre': 'Detalle', 'datos': datos}], self.referentes, FECHA, 12.5)
+
+        self.assertTrue(servicio.esperar(timeout=120))
+        trabajo = servicio.obtener_trabajo(trabajo.id)
+        self.assertEqual(trabajo.estado, EstadoTrabajoReporte.COMPLETADO)
+        self.assertEqual(trabajo.archivo, "Control_20240101_100000.xlsx")
+        for referente in self.referentes:
+            libro = load_workbook(os.path.join(referente.path_archivos, trabajo.archivo))
+            self.assertEqual([fila[0].value for fila in libro["Detalle"].iter_rows(min_row=2)], list(range(10)))
+        self.assertEqual(self.notificaciones.crear_archivo_notificacion_control.call_count, 2)
+        self.assertEqual(servicio.obtener_metricas(),
+                         {'encolados': 1, 'completados': 1, 'errores': 0, 'pendientes': 0})
+
+    def test_cerrar_sin_esperar_termina_los_trabajos(self):
+        servicio = self.crear_servicio(max_procesos=1)
+        futuro = Future()
+        with mock.patch.object(servicio, '_pool_procesos', return_value=mock.Mock(submit=lambda *a: futuro)):
+            trabajo = servicio.encolar("Control", [{'nombre': 'Q', 'datos': [{'a': 1}]}], self.referentes, FECHA)
+        servicio.cerrar(esperar=False)
+
+        # El pool termina el reporte después del cierre: ya no hay hilo de entregas
+        futuro.set_result([])
+
+        self.assertTrue(servicio.esperar(timeout=5))
+        self.assertEqual(trabajo.estado, EstadoTrabajoReporte.ERROR)
+        self.assertIn("cerrado", trabajo.error)
+        self.assertIsNone(servicio._entregas)
+        self.assertEqual(servicio.obtener_metricas()['pendientes'], 0)
+        self.notificaciones.crear_archivo_notificacion_control.assert_not_called()
+
+    def test_error_de_entrega(self):
+        servicio = self.crear_servicio(en_segundo_plano=False)
+        ocupada = os.path.join(self.directorio.name, "ocupada")
+        with open(ocupada, "w") as f:
+            f.write("x")
+        servicio._distribucion_archivos.pausa_reintento = 0
+        referentes = self.referentes + [Referente(id=3, nombre="R3", path_archivos=ocupada)]
+
+        trabajo = servicio.encolar("Control", [{'nombre': 'Q', 'datos': [{'a': 1}]}], referentes, FECHA)
+
+        self.assertEqual(trabajo.estado, EstadoTrabajoReporte.ERROR)
+        self.assertIn("R3", trabajo.error)
+        self.assertEqual(self.notificaciones.crear_archivo_notificacion_control.call_count, 2)
+        self.assertEqual(servicio.obtener_metricas()['errores'], 1)
+
+    def test_cupos_agotados(self):
+        servicio = self.crear_servicio(en_segundo_plano=False, capacidad=1)
+        servicio._cupos.acquire()  # Un trabajo sin terminar ocupa el único cupo
+        try:
+            with self.assertRaises(queue.Full):
+                servicio.encolar("Control", [], self.referentes, FECHA, timeout=0.01)
+        finally:
+            servicio._cupos.release()
+
+    def test_historial_acotado(self):
+        servicio = self.crear_servicio(en_segundo_plano=False, max_historial=2)
+        for _ in range(4):
+            servicio.encolar("Control", [{'nombre': 'Q', 'datos': [{'a': 1}]}], self.referentes[:1], FECHA)
+        self.assertEqual(len(servicio.obtener_trabajos()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
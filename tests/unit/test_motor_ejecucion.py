@@ -0,0 +1,198 @@
+"""
+Test unitario para MotorEjecucionService
+
+Verifica que una programación cuya ejecución falla se reprograme con una
+espera y no se vuelva a disparar enseguida, que el hilo de depuración del
+historial cierre sus conexiones al terminar, y que el ciclo ejecute en
+paralelo respetando el límite global y el límite por conexión (contando las
+conexiones específicas de las consultas) sin ocupar workers en espera.
+"""
+import unittest
+import sys
+import os
+import logging
+import tempfile
+import threading
+import time as reloj
+from collections import Counter, deque
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from motor_ejecucion import MotorEjecucionService
+from src.domain.entities.plan_ejecucion import PlanEjecucion
+from src.domain.entities.programacion import Programacion, TipoProgramacion
+from src.domain.entities.resultado_ejecucion import EstadoEjecucion
+from src.domain.services.planificador_programaciones import PlanificadorProgramaciones
+from src.infrastructure.database.conexion_sqlite import conectar, gestor_conexiones
+
+
+class TestMotorEjecucion(unittest.TestCase):
+    """Tests para la reprogramación del motor"""
+
+    def setUp(self):
+        # Sin setup_dependencies: solo lo que usa _ejecutar_y_reprogramar
+        self.motor = MotorEjecucionService.__new__(MotorEjecucionService)
+        self.motor.logger = logging.getLogger(__name__)
+        self.motor.planificador = PlanificadorProgramaciones(espera_reintento_segundos=60)
+        self.motor._despertar = threading.Event()
+        self.programacion = Programacion(
+            id=1, control_id=99, nombre="Cada minuto", descripcion="",
+            tipo_programacion=TipoProgramacion.INTERVALO, activo=True, hora_ejecucion=time(0, 0),
+            fecha_inicio=None, fecha_fin=None, dias_semana=None, dias_mes=None, intervalo_minutos=1,
+            ultima_ejecucion=None, proxima_ejecucion=None
+        )
+        self.motor.planificador.cargar([self.programacion])
+
+    def test_fallo_reprograma_con_espera(self):
+        for error in (RuntimeError("Control 99 no encontrado"), None):
+            with self.subTest(error=error):
+                efecto = {'side_effect': error} if error else {'return_value': False}
+                with mock.patch.object(self.motor, 'ejecutar_programacion', **efecto):
+                    [programacion] = self.motor.planificador.extraer_vencidas(
+                        self.motor.planificador.proxima_ejecucion())
+                    antes = datetime.now()
+                    self.motor._ejecutar_y_reprogramar(programacion)
+
+                self.assertEqual(self.motor.planificador.extraer_vencidas(datetime.now()), [])
+                self.assertGreaterEqual((self.motor.planificador.proxima_ejecucion() - antes).total_seconds(), 59)
+                self.assertTrue(self.motor._despertar.is_set())
+
+    def test_ejecutar_programacion_sin_control_retorna_false(self):
+        self.motor.control_repo = mock.Mock()
+        self.motor.control_repo.obtener_por_id.return_value = None
+        self.motor.notification_service = mock.Mock()
+
+        self.assertFalse(self.motor.ejecutar_programacion(self.programacion))
+        self.motor.notification_service.mostrar_control_error.assert_called_once()
+
+
+    def test_hilo_de_retencion_cierra_sus_conexiones(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        db_path = os.path.join(directorio.name, "test.db")
+        self.addCleanup(gestor_conexiones.cerrar, db_path)
+
+        def depurar(detener=None):
+            with conectar(db_path) as conn:
+                conn.execute("SELECT 1")
+            return mock.Mock(ejecuciones_eliminadas=0)
+
+        self.motor.retencion_service = mock.Mock(depurar=depurar)
+        self.motor.intervalo_retencion = timedelta(hours=6)
+        self.motor._detener_retencion = threading.Event()
+        self.motor._hilo_retencion = None
+        self.motor._proxima_retencion = None
+        abiertas = len(gestor_conexiones._abiertas)
+
+        self.motor._programar_depuracion_historial()
+        self.motor._hilo_retencion.join(timeout=5)
+
+        self.assertEqual(len(gestor_conexiones._abiertas), abiertas)
+
+
+class EjecucionServiceFalso:
+    """Registra la concurrencia máxima por conexión y total"""
+
+    def __init__(self, conexiones_consultas, demora=0.2):
+        self.conexiones_consultas = conexiones_consultas
+        self.demora = demora
+        self.lock = threading.Lock()
+        self.en_curso = Counter()
+        self.total = 0
+        self.pico_conexion = Counter()
+        self.pico_total = 0
+        self.ejecutados = Counter()
+
+    def cargar_plan(self, control):
+        conexiones = {id_: mock.Mock(id=id_) for id_ in self.conexiones_consultas.get(control.id, ())}
+        return PlanEjecucion(control=control, conexiones=conexiones)
+
+    def ejecutar_control(self, control, conexion, plan=None, **kwargs):
+        conexiones = {conexion.id, *plan.conexiones}
+        with self.lock:
+            self.total += 1
+            self.pico_total = max(self.pico_total, self.total)
+            for conexion_id in conexiones:
+                self.en_curso[conexion_id] += 1
+                self.pico_conexion[conexion_id] = max(self.pico_conexion[conexion_id], self.en_curso[conexion_id])
+        reloj.sleep(self.demora)
+        with self.lock:
+            self.total -= 1
+            for conexion_id in conexiones:
+                self.en_curso[conexion_id] -= 1
+            self.ejecutados[control.id] += 1
+        return mock.Mock(estado=EstadoEjecucion.EXITOSO, mensaje=None)
+
+
+class TestConcurrenciaMotor(unittest.TestCase):
+    """Tests para los límites de concurrencia del ciclo"""
+
+    def setUp(self):
+        self.motor = MotorEjecucionService.__new__(MotorEjecucionService)
+        self.motor.logger = logging.getLogger(__name__)
+        self.motor.planificador = PlanificadorProgramaciones()
+        self.motor._despertar = threading.Event()
+        self.motor.max_workers = 4
+        self.motor.max_por_conexion = 2
+        self.motor._executor = None
+        self.motor._en_curso_conexion = {}
+        self.motor._en_espera_conexion = deque()
+        self.motor._futuros = set()
+        self.motor._conexiones_lock = threading.Lock()
+        self.motor.escritor = mock.Mock()
+        self.motor.notification_service = mock.Mock()
+        self.addCleanup(lambda: self.motor._executor and self.motor._executor.shutdown(wait=True))
+
+        # Controles 1-5 sobre la conexión 1; 6-8 sobre la 2 con consultas en la 3;
+        # el 9 sobre la 4 con una consulta en la 1
+        conexion_control = {id_: 1 for id_ in range(1, 6)}
+        conexion_control.update({6: 2, 7: 2, 8: 2, 9: 4})
+        self.motor.control_repo = mock.Mock()
+        self.motor.control_repo.obtener_por_id.side_effect = lambda id_: mock.Mock(
+            id=id_, conexion_id=conexion_control[id_], nombre=f"Control {id_}")
+        self.motor.conexion_repo = mock.Mock()
+        self.motor.conexion_repo.obtener_por_id.side_effect = lambda id_: mock.Mock(id=id_)
+        self.servicio = EjecucionServiceFalso({6: [3], 7: [3], 8: [3], 9: [1]})
+        self.motor.ejecucion_service = self.servicio
+
+        self.programaciones = [
+            Programacion(
+                id=id_, control_id=id_, nombre=f"Programación {id_}", descripcion="",
+                tipo_programacion=TipoProgramacion.INTERVALO, activo=True, hora_ejecucion=time(0, 0),
+                fecha_inicio=None, fecha_fin=None, dias_semana=None, dias_mes=None, intervalo_minutos=1,
+                ultima_ejecucion=None, proxima_ejecucion=datetime.now()
+            )
+            for id_ in range(1, 10)
+        ]
+        self.motor.planificador.cargar(self.programaciones)
+
+    def test_ciclo_respeta_limites_y_ejecuta_en_paralelo(self):
+        pendientes = self.motor.planificador.extraer_vencidas(datetime.now())
+        self.assertEqual(len(pendientes), 9)
+
+        inicio = reloj.monotonic()
+        with mock.patch.object(self.motor, 'obtener_programaciones_pendientes', return_value=pendientes):
+            self.motor.ejecutar_ciclo()
+        duracion = reloj.monotonic() - inicio
+
+        # Todas se ejecutaron una vez y volvieron al planificador
+        self.assertEqual(self.servicio.ejecutados, Counter(range(1, 10)))
+        self.assertEqual(self.motor.planificador.total_planificadas(), 9)
+        self.assertEqual(self.motor._en_curso_conexion, {})
+        self.assertEqual(len(self.motor._en_espera_conexion), 0)
+
+        # Límite global y por conexión (la 1 y la 3 también por consultas)
+        self.assertEqual(self.servicio.pico_total, 4)
+        for conexion_id in (1, 2, 3, 4):
+            self.assertLessEqual(self.servicio.pico_conexion[conexion_id], 2)
+        self.assertEqual(self.servicio.pico_conexion[1], 2)
+
+        # En paralelo: bastante menos que ejecutar las 9 en secuencia
+        self.assertLess(duracion, 9 * self.servicio.demora * 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Test unitario para la carga del plan de ejecución
+
+Verifica que el repositorio SQLite cargue el grafo completo de un control
+y que el servicio de ejecución no consulte los repositorios por consulta.
+"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.control import Control
+from src.domain.entities.conexion import Conexion
+from src.domain.entities.consulta import Consulta
+from src.domain.entities.consulta_control import ConsultaControl
+from src.domain.entities.control_referente import ControlReferente
+from src.domain.entities.parametro import Parametro
+from src.domain.entities.plan_ejecucion import PlanEjecucion
+from src.domain.entities.referente import Referente
+from src.domain.services.ejecucion_control_service import EjecucionControlService
+from src.infrastructure.database.conexion_sqlite import gestor_conexiones
+from src.infrastructure.repositories.sqlite_conexion_repository import SQLiteConexionRepository
+from src.infrastructure.repositories.sqlite_consulta_control_repository import SQLiteConsultaControlRepository
+from src.infrastructure.repositories.sqlite_consulta_repository import SQLiteConsultaRepository
+from src.infrastructure.repositories.sqlite_control_referente_repository import SQLiteControlReferenteRepository
+from src.infrastructure.repositories.sqlite_control_repository import SQLiteControlRepository
+from src.infrastructure.repositories.sqlite_parametro_repository import SQLiteParametroRepository
+from src.infrastructure.repositories.sqlite_plan_ejecucion_repository import SQLitePlanEjecucionRepository
+from src.infrastructure.repositories.sqlite_referente_repository import SQLiteReferenteRepository
+
+
+class TestSQLitePlanEjecucionRepository(unittest.TestCase):
+    """Tests para SQLitePlanEjecucionRepository"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.directorio.name, "test.db")
+        self.repo = SQLitePlanEjecucionRepository(db_path)
+
+        conexiones = SQLiteConexionRepository(db_path)
+        self.conexion_control = conexiones.guardar(Conexion(nombre="Principal", tipo_motor="sqlite"))
+        self.conexion_consulta = conexiones.guardar(Conexion(nombre="Otra", tipo_motor="sqlite"))
+
+        parametro = SQLiteParametroRepository(db_path).guardar(Parametro(nombre="fecha", valor_por_defecto="2024-01-01"))
+        self.control = SQLiteControlRepository(db_path).guardar(Control(
+            nombre="Control", conexion_id=self.conexion_control.id, parametros_ids=[parametro.id]
+        ))
+
+        consultas = SQLiteConsultaRepository(db_path)
+        self.c1 = consultas.guardar(Consulta(nombre="C1", sql="SELECT 1"))
+        self.c2 = consultas.guardar(Consulta(nombre="C2", sql="SELECT 2", conexion_id=self.conexion_consulta.id))
+        self.c3 = consultas.guardar(Consulta(nombre="C3", sql="SELECT 3"))
+        asociaciones = SQLiteConsultaControlRepository(db_path)
+        asociaciones.guardar(ConsultaControl(control_id=self.control.id, consulta_id=self.c2.id, orden=2))
+        asociaciones.guardar(ConsultaControl(control_id=self.control.id, consulta_id=self.c1.id, orden=1,
+                                             es_disparo=True))
+        asociaciones.guardar(ConsultaControl(control_id=self.control.id, consulta_id=self.c3.id, orden=3,
+                                             activa=False))
+
+        self.referente = SQLiteReferenteRepository(db_path).guardar(Referente(nombre="Ref", path_archivos="/tmp"))
+        SQLiteControlReferenteRepository(db_path).guardar(ControlReferente(
+            control_id=self.control.id, referente_id=self.referente.id, notificar_por_archivo=True
+        ))
+
+    def tearDown(self):
+        gestor_conexiones.cerrar(self.repo.db_path)
+        self.directorio.cleanup()
+
+    def test_carga_grafo_completo(self):
+        plan = self.repo.obtener_por_control(self.control.id)
+
+        self.assertEqual(plan.control.nombre, "Control")
+        self.assertEqual(plan.conexion.nombre, "Principal")
+        self.assertEqual([p.nombre for p in plan.parametros], ["fecha"])
+        # Solo asociaciones activas, en orden de ejecución
+        self.assertEqual([a.consulta_id for a in plan.asociaciones], [self.c1.id, self.c2.id])
+        self.assertEqual(set(plan.consultas), {self.c1.id, self.c2.id})
+        self.assertIsNone(plan.conexion_de(plan.consulta(self.c1.id)))
+        self.assertEqual(plan.conexion_de(plan.consulta(self.c2.id)).nombre, "Otra")
+        self.assertEqual(len(plan.asociaciones_referentes), 1)
+        self.assertEqual(plan.referentes[self.referente.id].path_archivos, "/tmp")
+
+    def test_control_inexistente(self):
+        self.assertIsNone(self.repo.obtener_por_control(9999))
+
+
+class TestServicioConPlan(unittest.TestCase):
+    """El servicio usa el plan y no consulta los repositorios por cada consulta"""
+
+    def test_no_consulta_repositorios(self):
+        control = Control(id=1, nombre="Control", disparar_si_hay_datos=True)
+        plan = PlanEjecucion(
+            control=control,
+            asociaciones=[ConsultaControl(id=1, control_id=1, consulta_id=1, orden=1)],
+            consultas={1: Consulta(id=1, nombre="C1", sql="SELECT 1")},
+            asociaciones_referentes=[]
+        )
+        plan_repo = mock.Mock()
+        plan_repo.obtener_por_control.return_value = plan
+        repos = [mock.Mock() for _ in range(7)]
+
+        service = EjecucionControlService(*repos, plan_ejecucion_repository=plan_repo)
+        resultado = service.ejecutar_control(
+            control, Conexion(id=1, nombre="Test", tipo_motor="sqlite"), mock_execution=True
+        )
+
+        self.assertEqual(len(resultado.resultados_consultas_disparadas), 1)
+        plan_repo.obtener_por_control.assert_called_once_with(1)
+        for repo in repos:
+            self.assertEqual(repo.method_calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
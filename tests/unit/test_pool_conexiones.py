@@ -0,0 +1,136 @@
+"""
+Test unitario para el pool de conexiones
+
+Verifica la reutilización de conexiones, el límite máximo, la validación
+y la invalidación del pool cuando cambian los datos de la conexión.
+"""
+import unittest
+import sys
+import os
+import sqlite3
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.conexion import Conexion
+from src.infrastructure.database.pool_conexiones import (
+    PoolConexiones, GestorPoolsConexiones, PoolConexionesAgotadoError, CacheSentenciasPreparadas
+)
+
+
+def crear_fabrica(creadas: list):
+    """Fábrica de conexiones SQLite en memoria que registra las creadas"""
+    def fabrica():
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        creadas.append(conn)
+        return conn
+    return fabrica
+
+
+class TestPoolConexiones(unittest.TestCase):
+    """Tests para PoolConexiones"""
+
+    def test_reutiliza_conexiones(self):
+        """Una conexión devuelta se entrega de nuevo sin crear otra"""
+        creadas = []
+        pool = PoolConexiones(crear_fabrica(creadas))
+
+        with pool.conexion() as conn1:
+            conn1.execute("SELECT 1")
+        with pool.conexion() as conn2:
+            conn2.execute("SELECT 1")
+
+        self.assertIs(conn1, conn2)
+        self.assertEqual(len(creadas), 1)
+        metricas = pool.obtener_metricas()
+        self.assertEqual(metricas['aciertos'], 1)
+        self.assertEqual(metricas['fallos'], 1)
+        pool.cerrar()
+
+    def test_respeta_maximo(self):
+        """Con el pool lleno se espera y, vencido el timeout, se lanza error"""
+        pool = PoolConexiones(crear_fabrica([]), max_conexiones=1)
+        conn = pool.obtener()
+
+        with self.assertRaises(PoolConexionesAgotadoError):
+            pool.obtener(timeout=0.05)
+
+        pool.devolver(conn)
+        self.assertIs(pool.obtener(timeout=0.05), conn)
+
+    def test_descarta_en_error_y_validacion_fallida(self):
+        """Las conexiones con error o que no pasan la validación no se reutilizan"""
+        creadas = []
+        pool = PoolConexiones(
+            crear_fabrica(creadas),
+            validador=lambda conn: False,
+            intervalo_validacion_segundos=0
+        )
+
+        with self.assertRaises(sqlite3.OperationalError):
+            with pool.conexion() as conn:
+                conn.execute("SELECT * FROM tabla_inexistente")
+        self.assertEqual(pool.obtener_metricas()['descartadas'], 1)
+
+        pool.devolver(pool.obtener())
+        pool.obtener()
+        self.assertEqual(len(creadas), 3)
+        self.assertEqual(pool.obtener_metricas()['validaciones_fallidas'], 1)
+
+
+class TestGestorPoolsConexiones(unittest.TestCase):
+    """Tests para GestorPoolsConexiones"""
+
+    def test_invalida_pool_si_cambia_la_conexion(self):
+        """Editar los datos de la conexión crea un pool nuevo"""
+        gestor = GestorPoolsConexiones()
+        conexion = Conexion(
+            id=1, nombre="Test", tipo_motor="sqlite", servidor="localhost",
+            puerto=0, base_datos="test.db", usuario="", contraseña=""
+        )
+        fabrica = crear_fabrica([])
+
+        pool = gestor.obtener_pool(conexion, fabrica)
+        self.assertIs(gestor.obtener_pool(conexion, fabrica), pool)
+
+        conexion.servidor = "otro-servidor"
+        self.assertIsNot(gestor.obtener_pool(conexion, fabrica), pool)
+        self.assertEqual(gestor.obtener_metricas()['invalidaciones'], 1)
+
+        self.assertTrue(gestor.invalidar(1))
+        self.assertFalse(gestor.invalidar(1))
+
+
+class TestCacheSentenciasPreparadas(unittest.TestCase):
+    """Tests para el cache de sentencias preparadas por conexión"""
+
+    def test_reutiliza_y_desaloja_la_menos_usada(self):
+        descartadas = []
+        cache = CacheSentenciasPreparadas(max_sentencias=2, al_descartar=descartadas.append)
+
+        cache.obtener("SELECT 1", lambda: "s1")
+        cache.obtener("SELECT 2", lambda: "s2")
+        self.assertEqual(cache.obtener("SELECT 1", lambda: "otra"), "s1")
+        cache.obtener("SELECT 3", lambda: "s3")
+
+        self.assertEqual(descartadas, ["s2"])
+        self.assertEqual((cache.aciertos, cache.fallos), (1, 3))
+
+        cache.limpiar()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(descartadas, ["s2", "s1", "s3"])
+
+    def test_cache_por_conexion_del_pool(self):
+        """Cada conexión prestada conserva su cache entre préstamos"""
+        creadas = []
+        pool = PoolConexiones(crear_fabrica(creadas), max_conexiones=1)
+        with pool.conexion() as conn:
+            cache = pool.cache_sentencias(conn)
+            cache.obtener("SELECT 1", lambda: "s1")
+        with pool.conexion() as conn:
+            self.assertIs(pool.cache_sentencias(conn), cache)
+        pool.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+Test unitario para la entidad Programacion
+
+Verifica el cálculo de la próxima ejecución para cada tipo de programación
+y el planificador basado en cola de prioridad.
+"""
+import unittest
+import sys
+import os
+from datetime import datetime, time, timedelta
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.programacion import Programacion, TipoProgramacion, DiaSemana
+from src.domain.services.planificador_programaciones import PlanificadorProgramaciones
+
+
+def crear_programacion(tipo: TipoProgramacion, **kwargs) -> Programacion:
+    """Crea una programación de prueba con valores por defecto"""
+    valores = dict(
+        id=1,
+        control_id=1,
+        nombre="Programación Test",
+        descripcion="",
+        tipo_programacion=tipo,
+        activo=True,
+        hora_ejecucion=time(10, 0),
+        fecha_inicio=None,
+        fecha_fin=None,
+        dias_semana=None,
+        dias_mes=None,
+        intervalo_minutos=None,
+        ultima_ejecucion=None,
+        proxima_ejecucion=None
+    )
+    valores.update(kwargs)
+    return Programacion(**valores)
+
+
+class TestProximaEjecucion(unittest.TestCase):
+    """Tests para el cálculo de la próxima ejecución"""
+
+    def test_diaria_hoy_y_manana(self):
+        """La diaria se ejecuta hoy si la hora no pasó, si no mañana"""
+        prog = crear_programacion(TipoProgramacion.DIARIA)
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 3, 31, 9, 0)),
+            datetime(2024, 3, 31, 10, 0)
+        )
+        # Fin de mes: no debe desbordar el día
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 3, 31, 10, 0)),
+            datetime(2024, 4, 1, 10, 0)
+        )
+
+    def test_semanal(self):
+        """La semanal busca el próximo día configurado"""
+        prog = crear_programacion(
+            TipoProgramacion.SEMANAL,
+            dias_semana=[DiaSemana.LUNES, DiaSemana.VIERNES]
+        )
+        # 2024-01-03 es miércoles
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 1, 3, 12, 0)),
+            datetime(2024, 1, 5, 10, 0)
+        )
+        # Viernes después de la hora -> lunes siguiente
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 1, 5, 11, 0)),
+            datetime(2024, 1, 8, 10, 0)
+        )
+
+    def test_mensual_fin_de_mes(self):
+        """El día -1 representa el último día de cada mes"""
+        prog = crear_programacion(TipoProgramacion.MENSUAL, dias_mes=[-1])
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 2, 10, 0, 0)),
+            datetime(2024, 2, 29, 10, 0)
+        )
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 2, 29, 10, 0)),
+            datetime(2024, 3, 31, 10, 0)
+        )
+
+    def test_mensual_omite_dias_inexistentes(self):
+        """El día 31 no se ejecuta en meses de 30 días"""
+        prog = crear_programacion(TipoProgramacion.MENSUAL, dias_mes=[31])
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 4, 1, 0, 0)),
+            datetime(2024, 5, 31, 10, 0)
+        )
+
+    def test_intervalo_sin_desbordar_minutos(self):
+        """El intervalo se suma como duración, no sobre el campo minuto"""
+        prog = crear_programacion(
+            TipoProgramacion.INTERVALO,
+            intervalo_minutos=90,
+            ultima_ejecucion=datetime(2024, 1, 1, 23, 50)
+        )
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 1, 1, 23, 55)),
+            datetime(2024, 1, 2, 1, 20)
+        )
+
+    def test_unica_vez(self):
+        """La única vez no vuelve a programarse tras ejecutarse"""
+        prog = crear_programacion(
+            TipoProgramacion.UNICA_VEZ,
+            fecha_inicio=datetime(2024, 6, 1)
+        )
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 5, 1)),
+            datetime(2024, 6, 1, 10, 0)
+        )
+        prog.marcar_ejecutado(datetime(2024, 6, 1, 10, 0))
+        self.assertIsNone(prog.proxima_ejecucion)
+
+    def test_respeta_fecha_fin_e_inactiva(self):
+        """Sin próxima ejecución fuera de vigencia o si está inactiva"""
+        prog = crear_programacion(TipoProgramacion.DIARIA, fecha_fin=datetime(2024, 1, 1, 12, 0))
+        self.assertIsNone(prog.calcular_proxima_ejecucion(datetime(2024, 1, 1, 11, 0)))
+
+        prog = crear_programacion(TipoProgramacion.DIARIA, activo=False)
+        self.assertIsNone(prog.calcular_proxima_ejecucion(datetime(2024, 1, 1, 9, 0)))
+
+    def test_no_repite_ocurrencia_ejecutada(self):
+        """Tras marcar ejecutado no se vuelve a devolver la misma ocurrencia"""
+        prog = crear_programacion(TipoProgramacion.DIARIA)
+        prog.marcar_ejecutado(datetime(2024, 1, 1, 10, 0, 5))
+        self.assertEqual(prog.proxima_ejecucion, datetime(2024, 1, 2, 10, 0))
+        self.assertEqual(
+            prog.calcular_proxima_ejecucion(datetime(2024, 1, 1, 9, 59)),
+            datetime(2024, 1, 2, 10, 0)
+        )
+
+
+class TestPlanificadorProgramaciones(unittest.TestCase):
+    """Tests para el planificador de programaciones"""
+
+    def test_extrae_en_orden_y_no_duplica(self):
+        """Entrega solo las vencidas y no las repite mientras se ejecutan"""
+        ahora = datetime(2024, 1, 1, 9, 0)
+        temprana = crear_programacion(TipoProgramacion.DIARIA, id=1, hora_ejecucion=time(9, 30))
+        tardia = crear_programacion(TipoProgramacion.DIARIA, id=2, hora_ejecucion=time(11, 0))
+
+        planificador = PlanificadorProgramaciones()
+        planificador.cargar([tardia, temprana], ahora)
+
+        self.assertEqual(planificador.proxima_ejecucion(), datetime(2024, 1, 1, 9, 30))
+        self.assertEqual(planificador.segundos_hasta_proxima(ahora), 1800)
+
+        vencidas = planificador.extraer_vencidas(datetime(2024, 1, 1, 9, 30))
+        self.assertEqual([p.id for p in vencidas], [1])
+
+        # Mientras se ejecuta, una recarga no la vuelve a encolar
+        planificador.cargar([tardia, temprana], datetime(2024, 1, 1, 9, 30))
+        self.assertEqual(planificador.extraer_vencidas(datetime(2024, 1, 1, 9, 31)), [])
+
+        temprana.marcar_ejecutado(datetime(2024, 1, 1, 9, 30, 2))
+        planificador.reprogramar(temprana, datetime(2024, 1, 1, 9, 30, 2))
+        self.assertEqual(planificador.proxima_ejecucion(), datetime(2024, 1, 1, 11, 0))
+        self.assertEqual(planificador.total_planificadas(), 2)
+
+    def test_reintento_tras_fallo_con_espera_creciente(self):
+        """Una ejecución fallida no se vuelve a disparar enseguida, ni al recargar"""
+        ahora = datetime(2024, 1, 1, 9, 0)
+        prog = crear_programacion(TipoProgramacion.INTERVALO, intervalo_minutos=5)
+        planificador = PlanificadorProgramaciones(espera_reintento_segundos=60, espera_reintento_maxima_segundos=150)
+        planificador.cargar([prog], ahora)
+
+        esperas = []
+        for _ in range(4):
+            vencidas = planificador.extraer_vencidas(ahora)
+            self.assertEqual([p.id for p in vencidas], [1])
+            proxima = planificador.reprogramar(prog, ahora, fallo=True)
+            esperas.append((proxima - ahora).total_seconds())
+            self.assertEqual(planificador.extraer_vencidas(ahora), [])
+            ahora = proxima
+        self.assertEqual(esperas, [60, 120, 150, 150])
+
+        # Recargar la copia persistida (vencida) respeta la espera del reintento
+        copia = crear_programacion(TipoProgramacion.INTERVALO, intervalo_minutos=5)
+        planificador.extraer_vencidas(ahora)
+        planificador.reprogramar(prog, ahora, fallo=True)
+        planificador.cargar([copia], ahora)
+        self.assertEqual(planificador.proxima_ejecucion(), ahora + timedelta(seconds=150))
+
+        # Tras una ejecución exitosa vuelve al ritmo normal
+        planificador.extraer_vencidas(ahora + timedelta(seconds=150))
+        copia.marcar_ejecutado(ahora + timedelta(seconds=150))
+        self.assertEqual(planificador.reprogramar(copia, ahora + timedelta(seconds=150)),
+                         ahora + timedelta(seconds=150, minutes=5))
+        self.assertEqual(planificador._reintentos, {})
+
+    def test_reintento_no_posterga_la_proxima_ocurrencia(self):
+        """Si la próxima ocurrencia normal llega antes que el reintento, se respeta"""
+        ahora = datetime(2024, 1, 1, 9, 59, 30)
+        prog = crear_programacion(TipoProgramacion.DIARIA, proxima_ejecucion=datetime(2024, 1, 1, 10, 0))
+        planificador = PlanificadorProgramaciones(espera_reintento_segundos=600)
+        self.assertEqual(planificador.reprogramar(prog, ahora, fallo=True), datetime(2024, 1, 1, 10, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Test unitario para ReporteGeneratorService
+
+Verifica que cada formato genere sus archivos con el esquema de nombres
+del Excel: un CSV (o CSV comprimido) por consulta con datos y un único
+JSON Lines con la consulta de cada fila, leyendo las filas volcadas a
+disco de un BufferFilas.
+"""
+import unittest
+import sys
+import os
+import csv
+import gzip
+import json
+import tempfile
+from datetime import datetime
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.domain.entities.buffer_filas import BufferFilas
+from src.domain.entities.control_referente import FormatoArchivo
+from src.domain.services.reporte_generator_service import ReporteGeneratorService
+
+FECHA = datetime(2024, 1, 2, 3, 4, 5)
+
+
+class TestReporteGeneratorService(unittest.TestCase):
+    """Tests para ReporteGeneratorService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.carpeta = os.path.join(self.directorio.name, "salida")
+        self.servicio = ReporteGeneratorService()
+        self.buffer = BufferFilas(['id', 'nombre', 'fecha'], filas_en_memoria=2,
+                                  directorio_temporal=self.directorio.name)
+        self.buffer.agregar([(i, f"ñandú, {i}", datetime(2024, 1, i)) for i in range(1, 6)])
+
+    def tearDown(self):
+        self.buffer.cerrar()
+        self.directorio.cleanup()
+
+    def generar(self, consultas, formato):
+        archivos = self.servicio.generar_archivos_control("Control: diario", consultas, self.carpeta, FECHA, formato)
+        return [os.path.basename(archivo) for archivo in archivos]
+
+    def test_csv_una_consulta(self):
+        archivos = self.generar([{'nombre': 'Detalle', 'datos': self.buffer}, {'nombre': 'Vacía', 'datos': []}],
+                                FormatoArchivo.CSV)
+
+        self.assertEqual(archivos, ["Control__diario_20240102_030405.csv"])
+        with open(os.path.join(self.carpeta, archivos[0]), encoding='utf-8', newline='') as f:
+            filas = list(csv.reader(f))
+        self.assertEqual(filas[0], ['id', 'nombre', 'fecha'])
+        self.assertEqual(filas[1], ['1', 'ñandú, 1', '2024-01-01 00:00:00'])
+        self.assertEqual(len(filas), 6)
+
+    def test_csv_comprimido_por_consulta(self):
+        archivos = self.generar([
+            {'nombre': 'Disparo (Disparo)', 'datos': [{'total': 5}]},
+            {'nombre': 'Detalle', 'datos': self.buffer}
+        ], FormatoArchivo.CSV_GZ)
+
+        self.assertEqual(archivos, ["Control__diario_20240102_030405_Disparo_(Disparo).csv.gz",
+                                    "Control__diario_20240102_030405_Detalle.csv.gz"])
+        with gzip.open(os.path.join(self.carpeta, archivos[1]), 'rt', encoding='utf-8', newline='') as f:
+            filas = list(csv.reader(f))
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(filas[5][0], '5')
+
+    def test_jsonl(self):
+        archivos = self.generar([
+            {'nombre': 'Disparo', 'datos': [{'total': 5}]},
+            {'nombre': 'Detalle', 'datos': self.buffer}
+        ], FormatoArchivo.JSONL)
+
+        self.assertEqual(archivos, ["Control__diario_20240102_030405.jsonl"])
+        with open(os.path.join(self.carpeta, archivos[0]), encoding='utf-8') as f:
+            registros = [json.loads(linea) for linea in f]
+        self.assertEqual(len(registros), 6)
+        self.assertEqual(registros[0], {'_consulta': 'Disparo', 'total': 5})
+        self.assertEqual(registros[1], {'_consulta': 'Detalle', 'id': 1, 'nombre': 'ñandú, 1',
+                                        'fecha': '2024-01-01 00:00:00'})
+
+    def test_xlsx_usa_el_generador_excel(self):
+        archivos = self.generar([{'nombre': 'Detalle', 'datos': self.buffer}], FormatoArchivo.XLSX)
+
+        self.assertEqual(archivos, ["Control__diario_20240102_030405.xlsx"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Test unitario para VigilanciaCarpetasService
+
+Verifica que con inotify un archivo de notificación se informe apenas se
+escribe, que el sondeo liste los archivos presentes y espacie las
+revisiones mientras la carpeta no cambia, y que una carpeta que no informa
+eventos pase a sondeo (sin confundir eventos aún no leídos con eventos
+perdidos) y más adelante vuelva a probarlos.
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.infrastructure.services.vigilancia_carpetas_service import VigilanciaCarpetasService, _Inotify
+
+
+class TestVigilanciaCarpetas(unittest.TestCase):
+    """Tests para VigilanciaCarpetasService"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.carpeta = os.path.join(self.directorio.name, "notificaciones")
+        os.makedirs(self.carpeta)
+        self.servicios = []
+
+    def tearDown(self):
+        for servicio in self.servicios:
+            servicio.cerrar()
+        self.directorio.cleanup()
+
+    def vigilancia(self, carpetas=None, **kwargs) -> VigilanciaCarpetasService:
+        servicio = VigilanciaCarpetasService(carpetas or [self.carpeta], **kwargs)
+        self.servicios.append(servicio)
+        return servicio
+
+    def escribir(self, nombre: str, carpeta: str = None, antiguedad: float = 0) -> str:
+        ruta = os.path.join(carpeta or self.carpeta, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'tipo': 'control_disparado'}, f)
+        if antiguedad:
+            fecha = time.time() - antiguedad
+            os.utime(ruta, (fecha, fecha))
+        return ruta
+
+    def test_sondeo_lista_existentes_en_orden(self):
+        nuevo = self.escribir("notif_b.json")
+        viejo = self.escribir("notif_a.json", antiguedad=60)
+        self.escribir("otro.json")
+
+        servicio = self.vigilancia(usar_eventos=False)
+
+        self.assertEqual(servicio.modo, "sondeo")
+        self.assertEqual(servicio.esperar_archivos(timeout=0), [viejo, nuevo])
+
+    def test_sondeo_adaptativo(self):
+        servicio = self.vigilancia(usar_eventos=False, intervalo_minimo=0.01, intervalo_maximo=0.04)
+        servicio.esperar_archivos(timeout=0)
+
+        # Sin cambios el intervalo se duplica hasta el máximo
+        self.assertEqual(servicio.esperar_archivos(timeout=0.1), [])
+        self.assertEqual(servicio._intervalos[self.carpeta], 0.04)
+
+        ruta = self.escribir("notif_1.json")
+        self.assertEqual(servicio.esperar_archivos(timeout=1), [ruta])
+        self.assertEqual(servicio._intervalos[self.carpeta], 0.01)
+
+    def test_carpeta_creada_despues(self):
+        pendiente = os.path.join(self.directorio.name, "todavia_no")
+        servicio = self.vigilancia([pendiente], intervalo_minimo=0.01, intervalo_maximo=0.02)
+        self.assertEqual(servicio.esperar_archivos(timeout=0), [])
+
+        os.makedirs(pendiente)
+        ruta = self.escribir("notif_1.json", carpeta=pendiente)
+        self.assertEqual(servicio.esperar_archivos(timeout=1), [ruta])
+
+    @unittest.skipUnless(_Inotify.disponible(), "inotify solo está disponible en Linux")
+    def test_eventos_informan_al_terminar_de_escribir(self):
+        servicio = self.vigilancia(intervalo_minimo=30, intervalo_maximo=60)
+        self.assertEqual(servicio.modo, "inotify")
+        self.assertEqual(servicio.esperar_archivos(timeout=0), [])
+
+        escritor = threading.Timer(0.05, self.escribir, args=("notif_1.json",))
+        inicio = time.monotonic()
+        escritor.start()
+        archivos = servicio.esperar_archivos(timeout=5)
+        escritor.join()
+
+        self.assertEqual(archivos, [os.path.join(self.carpeta, "notif_1.json")])
+        self.assertLess(time.monotonic() - inicio, 2)
+
+        # Un renombre dentro de la carpeta también se informa; el temporal no
+        temporal = self.escribir(".notif_2.json.tmp")
+        os.replace(temporal, os.path.join(self.carpeta, "notif_2.json"))
+        self.assertEqual(servicio.esperar_archivos(timeout=5), [os.path.join(self.carpeta, "notif_2.json")])
+
+    @unittest.skipUnless(_Inotify.disponible(), "inotify solo está disponible en Linux")
+    def test_carpeta_sin_eventos_pasa_a_sondeo(self):
+        servicio = self.vigilancia(intervalo_minimo=0.01, intervalo_maximo=0.01)
+        servicio.esperar_archivos(timeout=0)
+
+        # Un archivo que no llegó por eventos, como los que escribe otro equipo en una unidad de red
+        ruta = self.escribir("notif_remoto.json", antiguedad=60)
+        servicio._inotify.leer()
+
+        self.assertEqual(servicio.esperar_archivos(timeout=1), [ruta])
+        self.assertEqual(servicio.carpetas_con_eventos(), [])
+        self.assertEqual(servicio.modo, "sondeo")
+
+    @unittest.skipUnless(_Inotify.disponible(), "inotify solo está disponible en Linux")
+    def test_eventos_pendientes_no_pasan_la_carpeta_a_sondeo(self):
+        servicio = self.vigilancia(intervalo_minimo=30, intervalo_maximo=60)
+        servicio.esperar_archivos(timeout=0)
+
+        # El evento queda sin leer y la revisión periódica vence antes de la espera de eventos
+        ruta = self.escribir("notif_1.json", antiguedad=60)
+        servicio._proxima_revision[self.carpeta] = 1.0
+
+        self.assertEqual(servicio.esperar_archivos(timeout=0), [ruta])
+        self.assertEqual(servicio.carpetas_con_eventos(), [self.carpeta])
+
+    @unittest.skipUnless(_Inotify.disponible(), "inotify solo está disponible en Linux")
+    def test_carpeta_sin_eventos_vuelve_a_probarlos(self):
+        servicio = self.vigilancia(intervalo_minimo=0.01, intervalo_maximo=0.01)
+        servicio.ESPERA_REINTENTO_EVENTOS = 0.05
+        servicio.esperar_archivos(timeout=0)
+
+        for intento, espera in enumerate([0.05, 0.1], 1):
+            ruta = self.escribir(f"notif_remoto_{intento}.json", antiguedad=60)
+            servicio._inotify.leer()
+            self.assertEqual(servicio.esperar_archivos(timeout=1), [ruta])
+            self.assertEqual(servicio.modo, "sondeo")
+            self.assertEqual(servicio._sin_eventos[self.carpeta][1], espera)
+            os.remove(ruta)  # Procesado por el monitor
+
+            # Pasada la espera se vuelve a vigilar con eventos
+            time.sleep(espera)
+            self.assertEqual(servicio.esperar_archivos(timeout=0.05), [])
+            self.assertEqual(servicio.carpetas_con_eventos(), [self.carpeta])
+
+
+if __name__ == '__main__':
+    unittest.main()